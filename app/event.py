@@ -4,6 +4,7 @@ from services.tts.google_tts import router as tts_router
 from services.correction.gemini import router as corr_router
 from services.youtube.router import router as youtube_router
 from services.insight.insight_router import router as insight_router
+from services.elasticsearch.router import router as admin_router
 
 router = APIRouter()
 
@@ -11,4 +12,5 @@ router.include_router(stt_router)
 router.include_router(tts_router)
 router.include_router(corr_router)
 router.include_router(youtube_router)
-router.include_router(insight_router)
\ No newline at end of file
+router.include_router(insight_router)
+router.include_router(admin_router)
\ No newline at end of file
@@ -1,17 +1,28 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from event import router  # APIRouter를 불러옴
+from services.stt.stt_service import close_http_client
+from services.stt.preprocess import shutdown_executor
 from dotenv import load_dotenv
 import os
 
 # 환경 변수 로드
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # STT 서버 공유 연결과 음성 전처리 프로세스 정리
+    await close_http_client()
+    shutdown_executor()
+
 app = FastAPI(
     title="Vocalytics API Server",
     description="음성 인식, 텍스트 음성 변환, 문법 교정, YouTube 검색 서비스를 제공하는 API 서버",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -3,6 +3,7 @@ from collections import Counter
 import os
 import traceback
 from dotenv import load_dotenv
+from .index_template import ensure_index
 
 # 환경변수 로드 (다른 모듈에서 import할 때를 대비)
 # 현재 디렉토리와 상위 디렉토리에서 .env 파일 찾기
@@ -46,8 +47,32 @@ except Exception as e:
 INDEX_NAME = os.getenv("ELASTICSEARCH_INDEX_NAME")
 if not INDEX_NAME:
     raise ValueError("ELASTICSEARCH_INDEX_NAME 환경변수가 설정되지 않았습니다.")
-if not es.indices.exists(index=INDEX_NAME):
-    es.indices.create(index=INDEX_NAME)
+# INDEX_NAME은 버전 관리 인덱스를 가리키는 별칭 (템플릿 등록 및 최초 생성)
+try:
+    ensure_index(es, INDEX_NAME)
+except Exception as e:
+    print(f"인덱스 템플릿 준비 실패: {e}")
+    if not es.indices.exists(index=INDEX_NAME):
+        raise
+
+# 인덱스 쓰기 후 호출될 콜백 목록 (인사이트 캐시/스냅샷 갱신용)
+_write_listeners = []
+
+def add_write_listener(callback):
+    """문서 저장 후 호출될 콜백 등록
+
+    콜백은 저장된 문서 목록({"_id", "_source", "result", "_seq_no"})을 인자로 받는다.
+    """
+    _write_listeners.append(callback)
+
+def _notify_write(documents):
+    if not documents:
+        return
+    for callback in _write_listeners:
+        try:
+            callback(documents)
+        except Exception as e:
+            print(f"[쓰기 알림 실패]: {e}")
 
 def store_error_pattern(stt_text: str, enhanced_text: str):
     errors = []
@@ -59,6 +84,7 @@ def store_error_pattern(stt_text: str, enhanced_text: str):
             errors.append((stt_word, "발음 오류"))
 
     error_term_counter = Counter([term for term, _ in errors])
+    written = []
 
     for term, count in error_term_counter.items():
         doc_id = f"{term}_pronunciation_error"
@@ -73,11 +99,15 @@ def store_error_pattern(stt_text: str, enhanced_text: str):
         }
 
         try:
-            es.update(index=INDEX_NAME, id=doc_id, body={
+            response = es.update(index=INDEX_NAME, id=doc_id, body={
                 "doc_as_upsert": True,
                 "doc": doc
             })
+            written.append({"_id": doc_id, "_source": doc, "result": response.get("result"),
+                            "_seq_no": response.get("_seq_no")})
             print(f"[Elasticsearch 저장 성공 - 단어: {term}]")
         except Exception as e:
             print(f"[Elasticsearch 저장 실패 - 단어: {term}]: {e}")
             traceback.print_exc()
+
+    _notify_write(written)
@@ -0,0 +1,219 @@
+"""발음 평가 인덱스의 명시적 매핑과 버전 관리 인덱스 템플릿
+
+ELASTICSEARCH_INDEX_NAME은 별칭(alias)으로 사용하고, 실제 인덱스는 "{별칭}-v{버전}"으로 만든다.
+매핑을 바꿀 때는 TEMPLATE_VERSION을 올린 뒤 app 디렉토리에서 마이그레이션을 실행한다:
+    python -m services.elasticsearch.index_template --migrate
+"""
+from typing import Dict, Any, Optional
+import argparse
+import time
+
+TEMPLATE_VERSION = 1
+
+# 필터/집계 차원 (term 필터와 terms 집계의 hot path)
+_DIMENSION = {"type": "keyword", "eager_global_ordinals": True}
+# 검색하지 않고 _source로만 읽는 긴 음소 문자열
+_STORED_ONLY = {"type": "keyword", "index": False, "doc_values": False}
+
+INDEX_SETTINGS = {
+    "number_of_shards": 1,
+    "refresh_interval": "1s"
+}
+
+INDEX_MAPPINGS = {
+    "properties": {
+        # 학습자/문항 메타데이터
+        "file": {"type": "keyword"},
+        "speaker": {"type": "keyword"},
+        "code": {"type": "keyword"},
+        "age": {"type": "short"},
+        "sex": _DIMENSION,
+        "nationality": _DIMENSION,
+        "level": _DIMENSION,
+        "type": _DIMENSION,
+        "ref": {**_DIMENSION, "fields": {"text": {"type": "text"}}},
+
+        # 발음 평가 결과
+        "ans": _STORED_ONLY,
+        "rec": _STORED_ONLY,
+        "error": {"type": "keyword", "index": False, "ignore_above": 8191},  # doc_values로 집계만 수행
+        "count": {"type": "object", "enabled": False},
+        "C": {"type": "short"},
+        "S": {"type": "short"},
+        "I": {"type": "short"},
+        "D": {"type": "short"},
+        "per": {"type": "float"},
+        "error_events": {
+            "properties": {
+                "op": {"type": "keyword"},
+                "from": {"type": "keyword"},
+                "to": {"type": "keyword"}
+            }
+        },
+        "alignment_ops": _STORED_ONLY,
+        "alignment_insertions": {"type": "short", "index": False, "doc_values": False},
+        "alignment_distance": {"type": "short"},
+
+        # STT 교정 결과에서 저장하는 단어별 오류 문서 (store_error_pattern)
+        "term": {"type": "keyword"},
+        "term_text": {"type": "text"},
+        "error_count": {"type": "integer"},
+        "category_distribution": {
+            "properties": {
+                "category": {"type": "keyword"},
+                "count": {"type": "integer"}
+            }
+        },
+        "sample_sentences": {"type": "text", "index": False}
+    }
+}
+
+
+def template_name(alias: str) -> str:
+    return f"{alias}-template"
+
+
+def versioned_index(alias: str, version: Optional[int] = None) -> str:
+    return f"{alias}-v{version or TEMPLATE_VERSION}"
+
+
+def put_template(es, alias: str) -> bool:
+    """인덱스 템플릿 등록 (같은 버전이 이미 있으면 건너뜀), 등록 여부 반환"""
+    name = template_name(alias)
+    if es.indices.exists_index_template(name=name):
+        templates = es.indices.get_index_template(name=name)["index_templates"]
+        if templates and templates[0]["index_template"].get("version") == TEMPLATE_VERSION:
+            return False
+
+    es.indices.put_index_template(
+        name=name,
+        index_patterns=[f"{alias}-v*"],
+        priority=100,
+        version=TEMPLATE_VERSION,
+        template={"settings": INDEX_SETTINGS, "mappings": INDEX_MAPPINGS},
+        meta={"description": "vocalytics pronunciation records"}
+    )
+    print(f"[index] 인덱스 템플릿 등록 - {name} (버전 {TEMPLATE_VERSION})")
+    return True
+
+
+def _alias_targets(es, alias: str) -> list:
+    if not es.indices.exists_alias(name=alias):
+        return []
+    return sorted(es.indices.get_alias(name=alias).keys())
+
+
+def ensure_index(es, alias: str) -> None:
+    """템플릿을 등록하고 별칭이 가리키는 인덱스를 준비
+
+    별칭도 인덱스도 없으면 현재 버전 인덱스를 만들고 별칭을 연결한다.
+    동적 매핑으로 만든 기존 인덱스나 이전 버전 인덱스는 그대로 두고 마이그레이션을 안내한다.
+    """
+    put_template(es, alias)
+
+    targets = _alias_targets(es, alias)
+    if targets:
+        if versioned_index(alias) not in targets:
+            print(f"[index] '{alias}'가 이전 버전 인덱스({', '.join(targets)})를 가리킵니다. "
+                  f"마이그레이션: python -m services.elasticsearch.index_template --migrate")
+        return
+
+    if es.indices.exists(index=alias):
+        print(f"[index] '{alias}'는 동적 매핑 인덱스입니다. "
+              f"마이그레이션: python -m services.elasticsearch.index_template --migrate")
+        return
+
+    index = versioned_index(alias)
+    if not es.indices.exists(index=index):
+        es.indices.create(index=index)
+    es.indices.put_alias(index=index, name=alias)
+    print(f"[index] 인덱스 생성 - {index} (별칭: {alias})")
+
+
+def _wait_for_task(es, task_id: str, poll_seconds: float = 2.0) -> Dict[str, Any]:
+    """재색인 작업이 끝날 때까지 진행 상황을 출력하며 대기"""
+    while True:
+        task = es.tasks.get(task_id=task_id)
+        if task.get("completed"):
+            if task.get("error"):
+                raise RuntimeError(f"재색인 작업 실패: {task['error']}")
+            return task.get("response", {})
+        status = task.get("task", {}).get("status", {})
+        print(f"[index] 재색인 진행 - {status.get('created', 0) + status.get('updated', 0)}/{status.get('total', 0)}건")
+        time.sleep(poll_seconds)
+
+
+def migrate(es, alias: str, delete_old: bool = False, requests_per_second: Optional[float] = None) -> Dict[str, Any]:
+    """현재 버전 인덱스로 재색인한 뒤 별칭을 원자적으로 교체
+
+    기존 대상이 동적 매핑 인덱스(별칭과 같은 이름)이면 교체와 동시에 삭제한다.
+    """
+    put_template(es, alias)
+    target = versioned_index(alias)
+    sources = _alias_targets(es, alias)
+    legacy = not sources and es.indices.exists(index=alias)
+    if legacy:
+        sources = [alias]
+    sources = [index for index in sources if index != target]
+    if not sources:
+        ensure_index(es, alias)
+        return {"target": target, "sources": [], "reindexed": 0}
+
+    if not es.indices.exists(index=target):
+        es.indices.create(index=target)
+
+    started = time.time()
+    # 재색인 동안에는 refresh를 끄고 끝난 뒤 복원
+    es.indices.put_settings(index=target, settings={"refresh_interval": "-1"})
+    try:
+        task = es.reindex(
+            source={"index": sources},
+            dest={"index": target, "op_type": "index"},
+            slices="auto",
+            wait_for_completion=False,
+            requests_per_second=requests_per_second if requests_per_second else -1,
+            refresh=False
+        )["task"]
+        response = _wait_for_task(es, task)
+    finally:
+        es.indices.put_settings(index=target, settings={"refresh_interval": INDEX_SETTINGS["refresh_interval"]})
+        es.indices.refresh(index=target)
+
+    failures = response.get("failures") or []
+    if failures:
+        print(f"[index] 재색인 실패 {len(failures)}건 - 별칭을 교체하지 않습니다: {failures[:3]}")
+        return {"target": target, "sources": sources, "reindexed": response.get("total", 0), "failures": len(failures)}
+
+    if legacy:
+        actions = [{"remove_index": {"index": alias}}, {"add": {"index": target, "alias": alias}}]
+    else:
+        actions = [{"remove": {"index": index, "alias": alias}} for index in sources]
+        actions.append({"add": {"index": target, "alias": alias}})
+    es.indices.update_aliases(actions=actions)
+
+    if delete_old and not legacy:
+        for index in sources:
+            es.indices.delete(index=index)
+
+    elapsed = time.time() - started
+    total = response.get("total", 0)
+    print(f"[index] 마이그레이션 완료 - {', '.join(sources)} → {target}, {total}건, {elapsed:.1f}초")
+    return {"target": target, "sources": sources, "reindexed": total, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인덱스 템플릿 등록 및 매핑 마이그레이션")
+    parser.add_argument("--migrate", action="store_true", help="현재 버전 인덱스로 재색인 후 별칭 교체")
+    parser.add_argument("--delete-old", action="store_true", help="마이그레이션 후 이전 버전 인덱스 삭제")
+    parser.add_argument("--requests-per-second", type=float, default=None, help="재색인 속도 제한")
+    args = parser.parse_args()
+
+    from .es_client import es, INDEX_NAME
+    if args.migrate:
+        migrate(es, INDEX_NAME, delete_old=args.delete_old, requests_per_second=args.requests_per_second)
+    else:
+        ensure_index(es, INDEX_NAME)
+
+
+if __name__ == "__main__":
+    main()
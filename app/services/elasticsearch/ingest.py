@@ -0,0 +1,126 @@
+"""app/data의 발음 평가 CSV를 인덱스에 대량 색인
+
+app 디렉토리에서 실행:
+    python -m services.elasticsearch.ingest --chunk-size 2000 --threads 4
+    python -m services.elasticsearch.ingest data/chinese.csv --restart
+"""
+from collections import deque
+from typing import Dict, List, Any, Optional, Callable
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from elasticsearch import helpers
+
+from services.insight.corpus import DATA_DIR, document_from_row, iter_rows, default_paths
+from .es_client import es, INDEX_NAME, _notify_write
+
+# 파일별 색인 완료 행 수 (중단 후 이어서 색인)
+PROGRESS_PATH = os.getenv("INGEST_PROGRESS_PATH", os.path.join(DATA_DIR, ".ingest_progress.json"))
+DEFAULT_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "2000"))
+DEFAULT_THREADS = int(os.getenv("INGEST_THREADS", "4"))
+
+
+def document_id(source: Dict[str, Any]) -> str:
+    """file 값으로 만든 고정 문서 ID (재색인 시 같은 문서를 덮어씀)"""
+    file_id = source.get("file")
+    if file_id:
+        return str(file_id)
+    digest = hashlib.sha1(json.dumps(source, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_progress(path: str = PROGRESS_PATH) -> Dict[str, int]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_progress(progress: Dict[str, int], path: str = PROGRESS_PATH) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def ingest(paths: Optional[List[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+           thread_count: int = DEFAULT_THREADS, resume: bool = True,
+           progress_path: str = PROGRESS_PATH,
+           on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """CSV 파일들을 parallel_bulk로 색인
+
+    parallel_bulk 결과는 요청 순서대로 돌아오므로, 결과를 받은 행까지를 파일별 진행 상황으로 저장한다.
+    중단 후 resume=True로 다시 실행하면 저장된 행 다음부터 색인한다.
+    """
+    paths = [os.path.abspath(p) for p in (paths or default_paths())]
+    progress = load_progress(progress_path) if resume else {}
+    pending: deque = deque()
+
+    def actions():
+        for path in paths:
+            for row_number, row in iter_rows(path, skip=progress.get(path, 0)):
+                source = document_from_row(row)
+                doc_id = document_id(source)
+                pending.append((path, row_number, doc_id, source))
+                yield {"_op_type": "index", "_index": INDEX_NAME, "_id": doc_id, "_source": source}
+
+    stats = {"files": paths, "indexed": 0, "failed": 0, "docs_per_second": 0.0, "seconds": 0.0, "done": False}
+    written = []
+    started = time.time()
+
+    def checkpoint():
+        elapsed = time.time() - started
+        stats["seconds"] = elapsed
+        stats["docs_per_second"] = (stats["indexed"] + stats["failed"]) / elapsed if elapsed else 0.0
+        save_progress(progress, progress_path)
+        _notify_write(written[:])
+        written.clear()
+        print(f"[ingest] 색인 {stats['indexed']}건, 실패 {stats['failed']}건 ({stats['docs_per_second']:.0f}건/초)")
+        if on_progress:
+            on_progress(dict(stats))
+
+    # 문서 단위 오류는 실패로 집계하고, 연결 오류 등 요청 실패는 진행 상황을 저장한 뒤 중단
+    results = helpers.parallel_bulk(
+        es, actions(), thread_count=thread_count, chunk_size=chunk_size,
+        queue_size=thread_count, raise_on_error=False
+    )
+    try:
+        for ok, info in results:
+            path, row_number, doc_id, source = pending.popleft()
+            progress[path] = row_number
+            result = info.get("index", {})
+            if ok:
+                stats["indexed"] += 1
+                written.append({"_id": doc_id, "_source": source, "result": result.get("result"),
+                                "_seq_no": result.get("_seq_no")})
+            else:
+                stats["failed"] += 1
+                if stats["failed"] <= 5:
+                    print(f"[ingest] 색인 실패 - {os.path.basename(path)}:{row_number}: {result.get('error')}")
+            if (stats["indexed"] + stats["failed"]) % chunk_size == 0:
+                checkpoint()
+        stats["done"] = True
+    finally:
+        checkpoint()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="발음 평가 CSV 대량 색인")
+    parser.add_argument("paths", nargs="*", help="색인할 CSV 파일 (기본값: app/data/*.csv)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="bulk 요청당 문서 수")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="동시 bulk 요청 수")
+    parser.add_argument("--restart", action="store_true", help="저장된 진행 상황을 무시하고 처음부터 색인")
+    args = parser.parse_args()
+
+    stats = ingest(args.paths or None, chunk_size=args.chunk_size, thread_count=args.threads, resume=not args.restart)
+    print(f"[ingest] 완료 - 색인 {stats['indexed']}건, 실패 {stats['failed']}건, "
+          f"{stats['seconds']:.1f}초 ({stats['docs_per_second']:.0f}건/초)")
+
+
+if __name__ == "__main__":
+    main()
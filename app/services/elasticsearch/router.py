@@ -0,0 +1,100 @@
+from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+from pydantic import BaseModel
+import os
+import threading
+import time
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+# ingest는 import 시 Elasticsearch에 연결하므로 실패해도 서버는 기동되도록 처리
+try:
+    from . import ingest
+except Exception as e:
+    print(f"CSV 색인 모듈 초기화 실패: {e}")
+    ingest = None
+
+class IngestRequest(BaseModel):
+    files: Optional[List[str]] = None  # app/data 안의 CSV 파일명 (없으면 전체)
+    chunk_size: Optional[int] = None
+    thread_count: Optional[int] = None
+    restart: Optional[bool] = False
+
+# 실행 중인 색인 작업 상태 (프로세스당 하나)
+_job = {"running": False, "started_at": None, "finished_at": None, "stats": None, "error": None}
+_job_lock = threading.Lock()
+
+def _run_ingest(paths, chunk_size, thread_count, resume):
+    def on_progress(stats):
+        _job["stats"] = stats
+
+    try:
+        _job["stats"] = ingest.ingest(
+            paths, chunk_size=chunk_size, thread_count=thread_count,
+            resume=resume, on_progress=on_progress
+        )
+    except Exception as e:
+        print(f"[ingest] 색인 작업 오류: {e}")
+        _job["error"] = str(e)
+    finally:
+        _job["finished_at"] = time.time()
+        _job["running"] = False
+
+@router.post("/ingest")
+async def start_ingest(request: IngestRequest):
+    """
+    CSV 코퍼스 대량 색인 시작 API
+
+    - app/data의 CSV를 parallel_bulk로 색인 (백그라운드 실행)
+    - 파일별 진행 상황을 저장해 중단 후 이어서 색인 (restart=true면 처음부터)
+    - 진행 상황과 처리량은 GET /api/admin/ingest/status로 확인
+    """
+    if ingest is None:
+        raise HTTPException(status_code=500, detail="CSV 색인 모듈이 초기화되지 않았습니다.")
+
+    paths = None
+    if request.files:
+        paths = []
+        for name in request.files:
+            path = os.path.join(ingest.DATA_DIR, os.path.basename(name))
+            if not name.endswith(".csv") or not os.path.isfile(path):
+                raise HTTPException(status_code=400, detail=f"색인할 CSV 파일을 찾을 수 없습니다: {name}")
+            paths.append(path)
+
+    chunk_size = request.chunk_size or ingest.DEFAULT_CHUNK_SIZE
+    thread_count = request.thread_count or ingest.DEFAULT_THREADS
+    if chunk_size <= 0 or chunk_size > 20000:
+        raise HTTPException(status_code=400, detail="chunk_size는 1-20000 사이의 값이어야 합니다.")
+    if thread_count <= 0 or thread_count > 32:
+        raise HTTPException(status_code=400, detail="thread_count는 1-32 사이의 값이어야 합니다.")
+
+    with _job_lock:
+        if _job["running"]:
+            raise HTTPException(status_code=409, detail="이미 색인 작업이 실행 중입니다.")
+        _job.update(running=True, started_at=time.time(), finished_at=None, stats=None, error=None)
+
+    threading.Thread(
+        target=_run_ingest,
+        args=(paths, chunk_size, thread_count, not request.restart),
+        name="csv-ingest",
+        daemon=True
+    ).start()
+
+    return {
+        "success": True,
+        "data": dict(_job),
+        "message": "CSV 색인 작업을 시작했습니다."
+    }
+
+@router.get("/ingest/status")
+async def get_ingest_status():
+    """
+    CSV 코퍼스 색인 상태 API
+
+    - 실행 여부, 색인/실패 문서 수, 초당 처리 문서 수
+    """
+    return {
+        "success": True,
+        "data": dict(_job),
+        "message": "색인 작업이 실행 중입니다." if _job["running"] else "실행 중인 색인 작업이 없습니다."
+    }
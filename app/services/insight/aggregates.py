@@ -0,0 +1,393 @@
+from collections import Counter
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+from .snapshot import InsightSnapshot, CSID_FIELDS
+from .cube import Cube, cell_summary
+from .sketch import TDigest, DEFAULT_COMPRESSION
+from .difficulty import DifficultyRanking, text_entry
+
+# 집계 셀을 나누는 코호트 차원
+COHORT_DIMENSIONS = ("sex", "nationality", "level", "type")
+
+
+def is_learner_document(doc: Dict) -> bool:
+    """학습자 발화 문서 여부 (같은 인덱스의 발음 오류 단어 문서처럼 ref가 없는 문서는 집계 대상이 아님)"""
+    return doc.get("ref") is not None
+
+
+class RunningStats:
+    """Welford 방식으로 누적하는 per 통계, per 분위수 스케치와 C/S/I/D 합계"""
+
+    __slots__ = ("count", "n", "mean", "m2", "C", "S", "I", "D", "digest")
+
+    def __init__(self, count: int = 0, n: int = 0, mean: float = 0.0, m2: float = 0.0,
+                 C: int = 0, S: int = 0, I: int = 0, D: int = 0,
+                 digest: Optional[TDigest] = None):
+        self.count = count
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.C = C
+        self.S = S
+        self.I = I
+        self.D = D
+        self.digest = digest if digest is not None else TDigest()
+
+    @classmethod
+    def from_cube_stats(cls, stats: Dict[str, float], digest: Optional[TDigest] = None) -> "RunningStats":
+        n = int(stats["n"])
+        mean = stats["sum"] / n if n else 0.0
+        return cls(
+            count=int(stats["count"]),
+            n=n,
+            mean=float(mean),
+            m2=float(max(stats["sumsq"] - stats["sum"] * mean, 0.0)),
+            digest=digest,
+            **{key: int(round(stats[key])) for key in CSID_FIELDS}
+        )
+
+    def add(self, doc: Dict) -> None:
+        self.count += 1
+        value = doc.get("per")
+        if value is not None:
+            x = float(value)
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+            self.digest.add(x)
+        self.C += int(doc.get("C") or 0)
+        self.S += int(doc.get("S") or 0)
+        self.I += int(doc.get("I") or 0)
+        self.D += int(doc.get("D") or 0)
+
+    def cube_stats(self) -> Dict[str, float]:
+        """Cube 셀 통계 형식 (count, n, sum, sumsq, C/S/I/D)"""
+        total = self.mean * self.n
+        return {
+            "count": self.count,
+            "n": self.n,
+            "sum": total,
+            "sumsq": self.m2 + total * self.mean,
+            "C": self.C,
+            "S": self.S,
+            "I": self.I,
+            "D": self.D
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return cell_summary(self.cube_stats())
+
+    def to_list(self) -> List:
+        return [self.count, self.n, self.mean, self.m2, self.C, self.S, self.I, self.D, self.digest.to_list()]
+
+    @classmethod
+    def from_list(cls, values: List) -> "RunningStats":
+        return cls(*values[:8], digest=TDigest.from_list(values[8]))
+
+    def differs_from(self, other: "RunningStats", rel_tol: float = 1e-9) -> bool:
+        if (self.count, self.n, self.C, self.S, self.I, self.D) != (other.count, other.n, other.C, other.S, other.I, other.D):
+            return True
+        return not (math.isclose(self.mean, other.mean, rel_tol=rel_tol, abs_tol=1e-12)
+                    and math.isclose(self.m2, other.m2, rel_tol=rel_tol, abs_tol=1e-9))
+
+
+class CohortAggregates:
+    """sex × nationality × level × type 셀별, ref 텍스트별 누적 통계와 오류 패턴 빈도
+
+    문서가 추가될 때 셀 단위로 갱신되므로 코호트 분석을 O(셀 수)로 계산할 수 있다.
+    분위수는 조건에 맞는 셀의 스케치를 병합해 구한다.
+    version은 집계에 반영된 인덱스 워터마크(샤드별 쓰기 위치)로, 전체 재계산 시 정해지고 로컬 쓰기를 증분 반영하면 전진한다.
+    """
+
+    def __init__(self, cells: Optional[Dict[Tuple, RunningStats]] = None,
+                 texts: Optional[Dict[str, RunningStats]] = None,
+                 errors: Optional[Counter] = None,
+                 errors_by_nationality: Optional[Dict[str, Counter]] = None,
+                 version: Any = None, compression: int = DEFAULT_COMPRESSION):
+        self.cells = cells or {}
+        self.texts = texts or {}
+        self.errors = errors or Counter()
+        self.errors_by_nationality = errors_by_nationality or {}
+        self.version = version
+        self.compression = compression
+        self.dirty = False
+        self._cube: Optional[Cube] = None
+        # 텍스트 난이도 순위 (최초 요청 시 생성, 이후 문서 추가 시 바뀐 텍스트만 갱신)
+        self._ranking: Optional[DifficultyRanking] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: InsightSnapshot, version: Any = None,
+                      compression: int = DEFAULT_COMPRESSION) -> "CohortAggregates":
+        """스냅샷 전체 재계산 (벡터 연산, 학습자 문서만)"""
+        learner = snapshot.codes["ref"] >= 0
+        cells = {
+            key: RunningStats.from_cube_stats(stats, digest)
+            for (key, stats), digest in zip(
+                Cube.build(snapshot, COHORT_DIMENSIONS, learner).cells(),
+                _grouped_digests(snapshot, COHORT_DIMENSIONS, compression, learner)
+            )
+        }
+        texts = {
+            key[0]: RunningStats.from_cube_stats(stats, digest)
+            for (key, stats), digest in zip(
+                Cube.build(snapshot, ("ref",), learner).cells(),
+                _grouped_digests(snapshot, ("ref",), compression, learner)
+            )
+        }
+
+        # 오류 패턴 빈도 (먼저 등장한 패턴 순)
+        error_codes = snapshot.codes["error"]
+        nationality_codes = snapshot.codes["nationality"]
+        has_error = (error_codes >= 0) & learner
+        pairs = np.stack([nationality_codes[has_error], error_codes[has_error]], axis=1)
+        errors = Counter()
+        errors_by_nationality = {}
+        if len(pairs):
+            unique_pairs, first_index, counts = np.unique(pairs, axis=0, return_index=True, return_counts=True)
+            for (nat_code, error_code), count in zip(unique_pairs[np.argsort(first_index)], counts[np.argsort(first_index)]):
+                error = snapshot.categories["error"][error_code]
+                errors[error] += int(count)
+                if nat_code >= 0:
+                    nationality = snapshot.categories["nationality"][nat_code]
+                    errors_by_nationality.setdefault(nationality, Counter())[error] += int(count)
+
+        return cls(cells, texts, errors, errors_by_nationality, version=version, compression=compression)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Dict], version: Any = None,
+                       compression: int = DEFAULT_COMPRESSION) -> "CohortAggregates":
+        """문서를 하나씩 누적해 생성 (일관성 검사용 전체 재계산)"""
+        aggregates = cls(version=version, compression=compression)
+        aggregates.add_documents(documents)
+        aggregates.dirty = False
+        return aggregates
+
+    def add_documents(self, documents: Iterable[Dict]) -> None:
+        """새로 추가된 학습자 문서를 셀/텍스트/오류 빈도에 반영"""
+        with self._lock:
+            touched = set()
+            for doc in documents:
+                if not is_learner_document(doc):
+                    continue
+                key = tuple(doc.get(d) for d in COHORT_DIMENSIONS)
+                cell = self.cells.get(key)
+                if cell is None:
+                    cell = self.cells[key] = RunningStats(digest=TDigest(self.compression))
+                cell.add(doc)
+
+                ref = doc["ref"]
+                text = self.texts.get(ref)
+                if text is None:
+                    text = self.texts[ref] = RunningStats(digest=TDigest(self.compression))
+                text.add(doc)
+                touched.add(ref)
+
+                error = doc.get("error")
+                if error is not None:
+                    self.errors[error] += 1
+                    nationality = doc.get("nationality")
+                    if nationality is not None:
+                        self.errors_by_nationality.setdefault(nationality, Counter())[error] += 1
+            if self._ranking is not None:
+                for ref in touched:
+                    self._ranking.update(text_entry(ref, self.texts[ref].summary()))
+            self._cube = None
+            self.dirty = True
+
+    def cube(self) -> Cube:
+        """코호트 셀을 Cube로 변환 (변경 전까지 재사용)"""
+        with self._lock:
+            if self._cube is None:
+                self._cube = self._build_cube()
+            return self._cube
+
+    def _build_cube(self) -> Cube:
+        categories = {d: [] for d in COHORT_DIMENSIONS}
+        lookups = {d: {} for d in COHORT_DIMENSIONS}
+        cell_codes = np.empty((len(self.cells), len(COHORT_DIMENSIONS)), dtype=np.int64)
+        stats = {key: np.empty(len(self.cells)) for key in ("count", "n", "sum", "sumsq") + CSID_FIELDS}
+
+        for row, (key, cell) in enumerate(self.cells.items()):
+            for position, (d, value) in enumerate(zip(COHORT_DIMENSIONS, key)):
+                if value is None:
+                    cell_codes[row, position] = -1
+                    continue
+                code = lookups[d].get(value)
+                if code is None:
+                    code = lookups[d][value] = len(categories[d])
+                    categories[d].append(value)
+                cell_codes[row, position] = code
+            for name, value in cell.cube_stats().items():
+                stats[name][row] = value
+
+        return Cube(COHORT_DIMENSIONS, categories, cell_codes, stats)
+
+    def text_groups(self) -> Dict[str, Dict[str, Any]]:
+        """ref 텍스트별 요약 (빈 텍스트 제외)"""
+        with self._lock:
+            return {text: stats.summary() for text, stats in self.texts.items() if text}
+
+    def difficulty_ranking(self) -> DifficultyRanking:
+        """ref 텍스트 난이도 순위 (생성 후에는 add_documents가 바뀐 텍스트만 갱신)"""
+        with self._lock:
+            if self._ranking is None:
+                self._ranking = DifficultyRanking(
+                    text_entry(text, stats.summary()) for text, stats in self.texts.items()
+                )
+            return self._ranking
+
+    def _merged_digest(self, cells: Iterable[RunningStats]) -> TDigest:
+        return TDigest.merge_all((cell.digest for cell in cells), self.compression)
+
+    def _matching_cells(self, filters: Dict[str, Optional[str]]) -> Iterable[Tuple[Tuple, RunningStats]]:
+        positions = [(COHORT_DIMENSIONS.index(d), value) for d, value in filters.items() if value is not None]
+        for key, cell in self.cells.items():
+            if all(key[position] == value for position, value in positions):
+                yield key, cell
+
+    def cohort_digest(self, **filters) -> TDigest:
+        """차원=값 조건에 맞는 셀 스케치를 병합 (None 값은 무시)"""
+        with self._lock:
+            return self._merged_digest(cell for _, cell in self._matching_cells(filters))
+
+    def group_digests(self, dimension: str, **filters) -> Dict[str, TDigest]:
+        """조건에 맞는 셀을 단일 차원 값별로 병합한 스케치 (값이 없거나 빈 문자열인 그룹 제외)"""
+        position = COHORT_DIMENSIONS.index(dimension)
+        with self._lock:
+            grouped: Dict[str, List[RunningStats]] = {}
+            for key, cell in self._matching_cells(filters):
+                if key[position]:
+                    grouped.setdefault(key[position], []).append(cell)
+            return {value: self._merged_digest(cells) for value, cells in grouped.items()}
+
+    def median(self, **filters) -> float:
+        """조건에 맞는 per 중간값 (스케치 기반, 값이 없으면 0)"""
+        return self.cohort_digest(**filters).quantile(0.5)
+
+    def group_medians(self, dimension: str, **filters) -> Dict[str, float]:
+        """단일 차원 값별 per 중간값 (스케치 기반)"""
+        return {value: digest.quantile(0.5) for value, digest in self.group_digests(dimension, **filters).items()}
+
+    def text_digest(self, text: str) -> Optional[TDigest]:
+        """ref 텍스트의 per 스케치 (없으면 None)"""
+        with self._lock:
+            stats = self.texts.get(text)
+            return TDigest.merge_all([stats.digest], self.compression) if stats else None
+
+    def text_medians(self) -> Dict[str, float]:
+        """ref 텍스트별 per 중간값 (빈 텍스트 제외)"""
+        with self._lock:
+            return {text: stats.digest.quantile(0.5) for text, stats in self.texts.items() if text}
+
+    def text_median(self, text: str) -> float:
+        """ref 텍스트의 per 중간값 (스케치 기반, 없으면 0)"""
+        with self._lock:
+            stats = self.texts.get(text)
+            return stats.digest.quantile(0.5) if stats else 0
+
+    def top_errors(self, n: int, nationality: Optional[str] = None) -> Dict[str, int]:
+        """가장 빈번한 오류 패턴 상위 n개 (빈 값 제외)"""
+        with self._lock:
+            counter = self.errors if nationality is None else self.errors_by_nationality.get(nationality, Counter())
+            result = {}
+            for error, count in counter.most_common():
+                if len(result) >= n:
+                    break
+                if error:
+                    result[error] = count
+            return result
+
+    def diff(self, other: "CohortAggregates", limit: int = 20) -> Dict[str, Any]:
+        """다른 집계(전체 재계산 결과)와 셀 단위 비교"""
+        mismatches = []
+
+        def compare(kind, mine, theirs):
+            for key in set(mine) | set(theirs):
+                a = mine.get(key)
+                b = theirs.get(key)
+                if a is None or b is None or a.differs_from(b):
+                    mismatches.append({
+                        "kind": kind,
+                        "key": list(key) if isinstance(key, tuple) else key,
+                        "maintained": a.to_list() if a else None,
+                        "recomputed": b.to_list() if b else None
+                    })
+
+        with self._lock:
+            compare("cohort", self.cells, other.cells)
+            compare("text", self.texts, other.texts)
+            error_mismatches = sum(1 for key in set(self.errors) | set(other.errors) if self.errors[key] != other.errors[key])
+
+        return {
+            "consistent": not mismatches and not error_mismatches,
+            "cells_checked": len(set(self.cells) | set(other.cells)),
+            "texts_checked": len(set(self.texts) | set(other.texts)),
+            "cell_mismatches": len(mismatches),
+            "error_pattern_mismatches": error_mismatches,
+            "samples": mismatches[:limit]
+        }
+
+    def save(self, path: str) -> None:
+        """JSON 파일로 저장 (임시 파일 후 교체)"""
+        with self._lock:
+            payload = {
+                "version": self.version,
+                "cells": [[list(key), stats.to_list()] for key, stats in self.cells.items()],
+                "texts": [[text, stats.to_list()] for text, stats in self.texts.items()],
+                "errors": list(self.errors.items()),
+                "errors_by_nationality": {nat: list(counter.items()) for nat, counter in self.errors_by_nationality.items()}
+            }
+            self.dirty = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, compression: int = DEFAULT_COMPRESSION) -> Optional["CohortAggregates"]:
+        """저장된 집계 로드 (파일이 없으면 None)"""
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+
+        return cls(
+            cells={tuple(key): RunningStats.from_list(values) for key, values in payload["cells"]},
+            texts={text: RunningStats.from_list(values) for text, values in payload["texts"]},
+            errors=Counter(dict(payload["errors"])),
+            errors_by_nationality={
+                nat: Counter(dict(items)) for nat, items in payload["errors_by_nationality"].items()
+            },
+            version=_as_tuple(payload["version"]),
+            compression=compression
+        )
+
+
+def _grouped_digests(snapshot: InsightSnapshot, dimensions: Tuple[str, ...], compression: int,
+                     mask: np.ndarray) -> List[TDigest]:
+    """Cube.build(mask)와 같은 셀 순서로 셀별 per 스케치 생성 (한 번의 정렬)"""
+    codes = np.stack([snapshot.codes[d][mask] for d in dimensions])
+    cell_codes, inverse = Cube._group(codes, [len(snapshot.categories[d]) + 1 for d in dimensions])
+    valid_per = snapshot.valid_per[mask]
+    cells = inverse[valid_per]
+    values = snapshot.numeric["per"][mask][valid_per]
+    values = values[np.lexsort((values, cells))]
+    counts = np.bincount(cells, minlength=len(cell_codes))
+    return [TDigest.from_values(chunk, compression) for chunk in np.split(values, np.cumsum(counts)[:-1])]
+
+
+def _as_tuple(value: Any) -> Any:
+    """JSON으로 저장된 중첩 리스트 버전을 튜플로 복원"""
+    if isinstance(value, list):
+        return tuple(_as_tuple(item) for item in value)
+    return value
@@ -0,0 +1,179 @@
+from typing import Dict, List, Any, Optional
+
+from .snapshot import CSID_FIELDS, CATEGORICAL_FIELDS
+
+# terms 집계 버킷 최대 개수
+TERMS_SIZE = 1000
+# terms 집계에서 값이 없는 문서를 모으기 위한 키
+MISSING_KEY = "__missing__"
+
+
+def resolve_keyword_fields(mapping: Dict) -> Dict[str, str]:
+    """인덱스 매핑에서 범주형 필드의 집계용 keyword 필드명을 찾는다
+
+    동적 매핑으로 생성된 text 필드는 `.keyword` 하위 필드를 사용한다.
+    """
+    properties = {}
+    for index_mapping in mapping.values():
+        properties.update(index_mapping.get("mappings", {}).get("properties", {}))
+
+    fields = {}
+    for field in CATEGORICAL_FIELDS:
+        prop = properties.get(field, {})
+        if prop.get("type") == "keyword":
+            fields[field] = field
+        else:
+            fields[field] = f"{field}.keyword"
+    return fields
+
+
+def filter_query(fields: Dict[str, str], filters: Dict[str, Optional[str]]) -> Dict:
+    """None이 아닌 필터를 term 조건으로 묶은 쿼리"""
+    clauses = [
+        {"term": {fields[field]: value}}
+        for field, value in filters.items()
+        if value
+    ]
+    if not clauses:
+        return {"match_all": {}}
+    return {"bool": {"filter": clauses}}
+
+
+def per_stats_aggs(with_distribution: bool = False) -> Dict:
+    """per 통계 집계 (평균, 필요 시 중간값/표준편차 포함)"""
+    if not with_distribution:
+        return {"per_stats": {"stats": {"field": "per"}}}
+    return {
+        "per_stats": {"extended_stats": {"field": "per"}},
+        "per_median": {"percentiles": {"field": "per", "percents": [50]}}
+    }
+
+
+def csid_sum_aggs() -> Dict:
+    """C/S/I/D 합계 집계"""
+    return {f"{key}_sum": {"sum": {"field": key}} for key in CSID_FIELDS}
+
+
+def gender_performance_query(fields: Dict[str, str], level: Optional[str], nationality: Optional[str]) -> Dict:
+    """성별별 성과 분석 집계 쿼리"""
+    return {
+        "size": 0,
+        "query": filter_query(fields, {"level": level, "nationality": nationality}),
+        "aggs": {
+            "by_sex": {
+                "terms": {"field": fields["sex"], "include": ["M", "F"], "size": 2},
+                "aggs": {
+                    **per_stats_aggs(with_distribution=True),
+                    **csid_sum_aggs(),
+                    "levels": {"terms": {"field": fields["level"], "size": TERMS_SIZE, "missing": MISSING_KEY}}
+                }
+            }
+        }
+    }
+
+
+def csid_patterns_query(fields: Dict[str, str], filters: Dict[str, Optional[str]]) -> Dict:
+    """CSID 패턴 분석 집계 쿼리"""
+    return {
+        "size": 0,
+        "track_total_hits": True,
+        "query": filter_query(fields, filters),
+        "aggs": csid_sum_aggs()
+    }
+
+
+def overview_query(fields: Dict[str, str]) -> Dict:
+    """전체 지표 개요 집계 쿼리"""
+    return {
+        "size": 0,
+        "track_total_hits": True,
+        "query": {"match_all": {}},
+        "aggs": {
+            **per_stats_aggs(),
+            **csid_sum_aggs(),
+            "top_errors": {"terms": {"field": fields["error"], "size": 3, "exclude": [""]}},
+            "by_sex": {
+                "terms": {"field": fields["sex"], "include": ["M", "F"], "size": 2},
+                "aggs": per_stats_aggs()
+            },
+            "by_nationality": {
+                "terms": {"field": fields["nationality"], "size": TERMS_SIZE, "exclude": [""]},
+                "aggs": per_stats_aggs()
+            },
+            "by_level": {
+                "terms": {"field": fields["level"], "size": TERMS_SIZE, "exclude": [""]},
+                "aggs": per_stats_aggs()
+            },
+            "by_type": {
+                "terms": {"field": fields["type"], "include": ["S", "W"], "size": 2},
+                "aggs": per_stats_aggs()
+            },
+            # "왜" 텍스트 및 오류율 없는 문서 제외
+            "texts": {
+                "filter": {
+                    "bool": {
+                        "filter": [{"exists": {"field": "per"}}],
+                        "must_not": [{"terms": {fields["ref"]: ["왜", ""]}}]
+                    }
+                },
+                "aggs": {
+                    "unique_texts": {"cardinality": {"field": fields["ref"]}},
+                    "hardest": {
+                        "terms": {
+                            "field": fields["ref"],
+                            "size": 3,
+                            "min_doc_count": 2,
+                            "order": {"per_stats.avg": "desc"}
+                        },
+                        "aggs": per_stats_aggs()
+                    }
+                }
+            }
+        }
+    }
+
+
+def parse_buckets(aggregation: Dict) -> Dict[str, Dict]:
+    """terms 집계 결과를 키별 버킷 딕셔너리로 변환"""
+    return {bucket["key"]: bucket for bucket in aggregation.get("buckets", [])}
+
+
+def parse_csid(aggregations: Dict) -> Dict[str, int]:
+    """C/S/I/D 합계 집계 결과"""
+    return {key: int(aggregations[f"{key}_sum"]["value"] or 0) for key in CSID_FIELDS}
+
+
+def parse_per_stats(aggregations: Dict) -> Dict[str, Any]:
+    """per 통계 집계 결과 (값이 없으면 0)"""
+    stats = aggregations["per_stats"]
+    count = stats.get("count", 0)
+    result = {
+        "n": count,
+        "avg": (stats.get("avg") or 0) if count else 0
+    }
+    if "per_median" in aggregations:
+        result["median"] = (aggregations["per_median"]["values"].get("50.0") or 0) if count else 0
+        result["std"] = (stats.get("std_deviation_sampling") or 0) if count > 1 else 0
+    return result
+
+
+def parse_level_distribution(aggregation: Dict) -> Dict[Optional[str], int]:
+    """레벨 분포 집계 결과 (값이 없는 문서는 None 키)"""
+    return {
+        (None if key == MISSING_KEY else key): bucket["doc_count"]
+        for key, bucket in parse_buckets(aggregation).items()
+    }
+
+
+def parse_summary_buckets(aggregation: Dict) -> List[Dict[str, Any]]:
+    """그룹별 개수/평균 오류율 요약 (오류율 없는 그룹 제외)"""
+    summaries = []
+    for key, bucket in parse_buckets(aggregation).items():
+        per_stats = parse_per_stats(bucket)
+        if per_stats["n"]:
+            summaries.append({
+                "key": key,
+                "count": bucket["doc_count"],
+                "avg_error_rate": per_stats["avg"]
+            })
+    return summaries
@@ -0,0 +1,228 @@
+from collections import Counter
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import re
+
+import numpy as np
+
+# 위치별 정렬 결과 코드 (ans 음소 기준)
+CORRECT, SUBSTITUTION, DELETION = 0, 1, 2
+_OP_LETTERS = np.array(["C", "S", "D"])
+# 한 배치의 DP 셀 수 상한 (int16 기준 약 40MB)
+DEFAULT_CELL_BUDGET = 20_000_000
+
+# 모음 음소 (음절의 중심)
+VOWELS = frozenset([
+    "A", "E", "EO", "EU", "I", "O", "OE", "U", "UI",
+    "euI", "iA", "iE", "iEO", "iO", "iU", "oA", "uEO"
+])
+_HANGUL_SYLLABLE = re.compile(r"[가-힣]")
+
+
+class PhonemeEncoder:
+    """음소 문자열을 정수 코드로 변환 (처음 등장한 순서대로 코드 부여)"""
+
+    def __init__(self):
+        self.lookup: Dict[str, int] = {}
+        self.phonemes: List[str] = []
+
+    def encode(self, sequence: str) -> np.ndarray:
+        codes = []
+        for phoneme in sequence.split():
+            code = self.lookup.get(phoneme)
+            if code is None:
+                code = self.lookup[phoneme] = len(self.phonemes)
+                self.phonemes.append(phoneme)
+            codes.append(code)
+        return np.asarray(codes, dtype=np.int32)
+
+
+def align(ans_sequences: Sequence[np.ndarray], rec_sequences: Sequence[np.ndarray],
+          cell_budget: int = DEFAULT_CELL_BUDGET) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """정수 코드 음소열 쌍들의 Levenshtein 정렬을 배치로 계산
+
+    레코드마다 (ops, insertions)를 반환한다.
+    ops[i]는 ans의 i번째 음소 결과(CORRECT/SUBSTITUTION/DELETION),
+    insertions[i]는 ans의 i번째 음소 앞(마지막 칸은 끝)에 삽입된 음소 수이다.
+    길이가 비슷한 레코드끼리 묶어 패딩을 줄인다.
+    """
+    n = np.fromiter((len(a) for a in ans_sequences), dtype=np.int64, count=len(ans_sequences))
+    m = np.fromiter((len(r) for r in rec_sequences), dtype=np.int64, count=len(rec_sequences))
+    results: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(n)
+
+    order = np.lexsort((m, n))
+    start = 0
+    while start < len(order):
+        end = start + 1
+        max_m = m[order[start]]
+        while end < len(order):
+            candidate_m = max(max_m, m[order[end]])
+            if (end - start + 1) * (n[order[end]] + 1) * (n[order[end]] + candidate_m + 1) > cell_budget:
+                break
+            max_m = candidate_m
+            end += 1
+
+        batch = order[start:end]
+        ops, insertions = _align_padded(
+            _pad([ans_sequences[b] for b in batch], -1),
+            n[batch],
+            _pad([rec_sequences[b] for b in batch], -2),
+            m[batch]
+        )
+        for row, b in enumerate(batch):
+            results[b] = (ops[row, :n[b]], insertions[row, :n[b] + 1])
+        start = end
+
+    return results
+
+
+def _pad(sequences: List[np.ndarray], fill: int) -> np.ndarray:
+    width = max((len(s) for s in sequences), default=0)
+    padded = np.full((len(sequences), width), fill, dtype=np.int32)
+    for row, sequence in enumerate(sequences):
+        padded[row, :len(sequence)] = sequence
+    return padded
+
+
+def _align_padded(A: np.ndarray, n: np.ndarray, R: np.ndarray, m: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """패딩된 배치의 편집 거리 DP(반대각선 wavefront)와 역추적
+
+    W[d, i, b]는 레코드 b의 D[i, d - i]이다. 같은 반대각선의 셀은 서로 독립이므로
+    d마다 배치 전체를 슬라이스 연산 몇 번으로 계산한다.
+    """
+    B, N = A.shape
+    M = R.shape[1]
+    dtype = np.int16 if N + M < np.iinfo(np.int16).max else np.int32
+    # 반대각선 d의 i번째 칸이 비교할 rec 음소 R[d - i - 1]을 슬라이스로 꺼내기 위한 배열
+    skewed = np.full((2 * N + M, B), -3, dtype=np.int32)
+    skewed[N:N + M] = R.T
+    At = A.T
+    W = np.empty((N + M + 1, N + 1, B), dtype=dtype)
+    W[0, 0] = 0
+
+    for d in range(1, N + M + 1):
+        current, previous = W[d], W[d - 1]
+        if d <= M:
+            current[0] = d
+        if d <= N:
+            current[d] = d
+        lo, hi = max(1, d - M), min(d - 1, N)
+        if lo > hi:
+            continue
+        cells = current[lo:hi + 1]
+        np.minimum(previous[lo - 1:hi], previous[lo:hi + 1], out=cells)  # 삭제/삽입
+        cells += 1
+        substitution = W[d - 2, lo - 1:hi] + (At[lo - 1:hi] != skewed[N + d - hi - 1:N + d - lo][::-1])
+        np.minimum(cells, substitution, out=cells)  # 대체/일치
+
+    # 역추적 (대각선 → 삭제 → 삽입 순으로 우선)
+    ops = np.full((B, N), -1, dtype=np.int8)
+    insertions = np.zeros((B, N + 1), dtype=np.int32)
+    i = n.copy()
+    j = m.copy()
+    active = np.flatnonzero((i > 0) | (j > 0))
+    while len(active):
+        ib, jb = i[active], j[active]
+        current = W[ib + jb, ib, active]
+        ip, jp = np.maximum(ib - 1, 0), np.maximum(jb - 1, 0)
+        mismatch = A[active, ip] != R[active, jp]
+
+        diagonal = (ib > 0) & (jb > 0) & (W[ip + jp, ip, active] + mismatch == current)
+        delete = ~diagonal & (ib > 0) & (W[ip + jb, ip, active] + 1 == current)
+        insert = ~diagonal & ~delete
+
+        rows = active[diagonal]
+        ops[rows, ip[diagonal]] = np.where(mismatch[diagonal], SUBSTITUTION, CORRECT)
+        rows = active[delete]
+        ops[rows, ip[delete]] = DELETION
+        rows = active[insert]
+        insertions[rows, ib[insert]] += 1
+
+        i[active] = ib - (diagonal | delete)
+        j[active] = jb - (diagonal | insert)
+        active = active[(i[active] > 0) | (j[active] > 0)]
+
+    return ops, insertions
+
+
+def ops_string(ops: np.ndarray) -> str:
+    """위치별 결과를 'CCSD...' 문자열로 변환"""
+    return "".join(_OP_LETTERS[ops])
+
+
+def syllable_index(phonemes: Sequence[str]) -> np.ndarray:
+    """발음 음소열의 각 음소가 속한 음절 번호
+
+    모음 앞의 자음은 다음 음절의 초성, 그 밖의 자음은 앞 음절의 받침으로 본다.
+    """
+    is_vowel = np.fromiter((p in VOWELS for p in phonemes), dtype=bool, count=len(phonemes))
+    next_is_vowel = np.r_[is_vowel[1:], False]
+    onset = ~is_vowel & next_is_vowel
+    return np.maximum(np.cumsum(is_vowel) - 1 + onset, 0)
+
+
+def position_heatmaps(refs: Sequence[str], ans: Sequence[str], rec: Sequence[str],
+                      cell_budget: int = DEFAULT_CELL_BUDGET) -> Dict[str, Dict[str, Any]]:
+    """ref 텍스트별 음소/음절 위치 오류 히트맵
+
+    같은 ref의 레코드 중 가장 흔한 ans를 기준으로 위치를 맞춘다.
+    """
+    encoder = PhonemeEncoder()
+    ans_codes = [encoder.encode(a or "") for a in ans]
+    rec_codes = [encoder.encode(r or "") for r in rec]
+    alignments = align(ans_codes, rec_codes, cell_budget)
+
+    by_ref: Dict[str, List[int]] = {}
+    for index, ref in enumerate(refs):
+        if ref:
+            by_ref.setdefault(ref, []).append(index)
+
+    heatmaps = {}
+    for ref, indices in by_ref.items():
+        reference = Counter(ans[i] for i in indices).most_common(1)[0][0]
+        indices = [i for i in indices if ans[i] == reference]
+        phonemes = (reference or "").split()
+        if not phonemes:
+            continue
+
+        ops = np.stack([alignments[i][0] for i in indices])
+        inserted = np.stack([alignments[i][1] for i in indices]).sum(axis=0)
+        substituted = (ops == SUBSTITUTION).sum(axis=0)
+        deleted = (ops == DELETION).sum(axis=0)
+
+        # 음절별 오류 수 (삽입은 바로 앞 음소의 음절에 귀속)
+        syllables = syllable_index(phonemes)
+        syllable_count = int(syllables.max()) + 1
+        insert_owner = syllables[np.maximum(np.arange(len(phonemes) + 1) - 1, 0)]
+        syllable_errors = (
+            np.bincount(syllables, weights=substituted + deleted, minlength=syllable_count)
+            + np.bincount(insert_owner, weights=inserted, minlength=syllable_count)
+        )
+        labels = _HANGUL_SYLLABLE.findall(ref)
+        if len(labels) != syllable_count:
+            labels = [None] * syllable_count
+
+        records = len(indices)
+        syllable_stats = [
+            {
+                "index": s,
+                "syllable": labels[s],
+                "phonemes": " ".join(p for p, owner in zip(phonemes, syllables) if owner == s),
+                "errors": int(syllable_errors[s]),
+                "errors_per_record": float(syllable_errors[s] / records)
+            }
+            for s in range(syllable_count)
+        ]
+
+        heatmaps[ref] = {
+            "ref": ref,
+            "records": records,
+            "phonemes": phonemes,
+            "phoneme_errors": {
+                "substitution": substituted.tolist(),
+                "deletion": deleted.tolist(),
+                "insertion": inserted.tolist()
+            },
+            "syllables": syllable_stats,
+            "hardest_syllable": max(syllable_stats, key=lambda s: s["errors"])
+        }
+    return heatmaps
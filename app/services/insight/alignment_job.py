@@ -0,0 +1,119 @@
+"""ans/rec 음소 정렬 결과를 인덱스 문서에 저장하는 오프라인 작업
+
+app 디렉토리에서 실행:
+    python -m services.insight.alignment_job --chunk-size 20000
+"""
+from typing import Dict, List, Any, Iterator
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
+from elasticsearch import Elasticsearch, helpers
+
+from . import alignment
+
+load_dotenv()
+
+
+def _connect() -> Elasticsearch:
+    es_url = os.getenv("ELASTICSEARCH_URL")
+    es_username = os.getenv("ES_USERNAME")
+    es_password = os.getenv("ES_PASSWORD")
+    if not all([es_url, es_username, es_password, os.getenv("ELASTICSEARCH_INDEX_NAME")]):
+        raise ValueError("필수 환경변수가 설정되지 않았습니다.")
+    return Elasticsearch(es_url, basic_auth=(es_username, es_password))
+
+
+def _chunks(hits: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for hit in hits:
+        chunk.append(hit)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def alignment_fields(ops, insertions) -> Dict[str, Any]:
+    """정렬 결과를 문서에 추가할 필드로 변환"""
+    return {
+        "alignment_ops": alignment.ops_string(ops),
+        "alignment_insertions": insertions.tolist(),
+        "alignment_distance": int((ops != alignment.CORRECT).sum() + insertions.sum())
+    }
+
+
+def run(chunk_size: int = 20000, dry_run: bool = False) -> Dict[str, Any]:
+    """인덱스 전체를 순회하며 청크 단위로 정렬하고 결과를 부분 업데이트로 저장"""
+    es = _connect()
+    index_name = os.getenv("ELASTICSEARCH_INDEX_NAME")
+    hits = helpers.scan(
+        es, index=index_name,
+        query={"query": {"exists": {"field": "ans"}}, "_source": ["ans", "rec", "S", "I", "D"]}
+    )
+
+    encoder = alignment.PhonemeEncoder()
+    processed = updated = agreed = 0
+    align_seconds = 0.0
+    started = time.time()
+
+    for chunk in _chunks(hits, chunk_size):
+        sources = [hit["_source"] for hit in chunk]
+        ans = [encoder.encode(s.get("ans") or "") for s in sources]
+        rec = [encoder.encode(s.get("rec") or "") for s in sources]
+
+        align_started = time.time()
+        results = alignment.align(ans, rec)
+        align_seconds += time.time() - align_started
+
+        actions = []
+        for hit, source, (ops, insertions) in zip(chunk, sources, results):
+            fields = alignment_fields(ops, insertions)
+            # 저장된 S/I/D와 같은 최소 편집 거리인지 확인 (정렬 경로는 다를 수 있음)
+            stored = [source.get(key) for key in ("S", "I", "D")]
+            if None not in stored and sum(int(v) for v in stored) == fields["alignment_distance"]:
+                agreed += 1
+            actions.append({
+                "_op_type": "update",
+                "_index": hit["_index"],
+                "_id": hit["_id"],
+                "doc": fields
+            })
+
+        if not dry_run:
+            success, errors = helpers.bulk(es, actions, raise_on_error=False)
+            updated += success
+            for error in errors[:5]:
+                print(f"정렬 결과 저장 오류: {error}")
+
+        processed += len(chunk)
+        elapsed = time.time() - started
+        print(f"[alignment] {processed}건 처리 ({processed / elapsed:.0f}건/초, 정렬 {align_seconds:.2f}초)")
+
+    elapsed = time.time() - started
+    return {
+        "processed": processed,
+        "updated": updated,
+        "distance_agreement": agreed / processed if processed else 0,
+        "seconds": elapsed,
+        "align_seconds": align_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ans/rec 음소 정렬 결과 색인")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="한 번에 정렬할 문서 수")
+    parser.add_argument("--dry-run", action="store_true", help="정렬만 수행하고 저장하지 않음")
+    args = parser.parse_args()
+
+    result = run(chunk_size=args.chunk_size, dry_run=args.dry_run)
+    print(
+        f"[alignment] 완료 - 문서 {result['processed']}건, 저장 {result['updated']}건, "
+        f"편집 거리 일치율 {result['distance_agreement']:.2%}, {result['seconds']:.1f}초"
+    )
+
+
+if __name__ == "__main__":
+    main()
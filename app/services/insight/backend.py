@@ -0,0 +1,379 @@
+from elasticsearch import Elasticsearch, AsyncElasticsearch
+from typing import Dict, List, Any, Optional, Callable, Iterator, AsyncIterator, Tuple, Set
+import os
+from dotenv import load_dotenv
+
+from .snapshot import InsightSnapshot
+from . import aggregations
+
+# 환경변수 로드
+load_dotenv()
+
+# 분석 데이터 백엔드 (elasticsearch, embedded, auto: ES 연결 실패 시 embedded)
+BACKEND = os.getenv("INSIGHT_BACKEND", "elasticsearch")
+# 전체 인덱스 순회 시 페이지 크기와 point-in-time 유지 시간
+PAGE_SIZE = int(os.getenv("INSIGHT_PAGE_SIZE", "2000"))
+PIT_KEEP_ALIVE = os.getenv("INSIGHT_PIT_KEEP_ALIVE", "1m")
+
+# 발음 오류 조회 요청 (참조 텍스트, 후보 ref [(ref, 자모 편집 거리)], 최대 문서 수)
+RefSearch = Tuple[str, List[Tuple[str, int]], int]
+
+
+class InsightBackend:
+    """InsightService가 원본 데이터를 읽는 백엔드 인터페이스
+
+    분석 계산은 모두 서비스의 스냅샷/코호트 집계에서 수행하고, 백엔드는 다음만 제공한다.
+    - 문서 순회와 스냅샷 생성, 변경 감지용 버전
+    - 발음 오류 조회용 후보 ref 문서 검색 (가까운 후보 순)
+    - 스냅샷 준비 전 응답용 집계 (지원하지 않으면 None)
+    """
+
+    name = ""
+    index_name = ""
+
+    def ping(self) -> bool:
+        raise NotImplementedError
+
+    async def ping_async(self) -> bool:
+        return self.ping()
+
+    def version(self) -> tuple:
+        """데이터 변경 여부 판단용 버전"""
+        raise NotImplementedError
+
+    def watermark(self, version: tuple) -> tuple:
+        """증분 반영 기준 버전 - 쓰기 위치만 남긴 버전 (기본은 version 그대로)"""
+        return version
+
+    def includes(self, watermark: Any, seq_no: Optional[int]) -> bool:
+        """쓰기 위치(_seq_no)가 워터마크에 이미 포함되는지 (알 수 없으면 False)"""
+        return False
+
+    def advance_watermark(self, watermark: Any, seq_nos: Set[int]) -> Any:
+        """워터마크 바로 다음부터 연속된 로컬 쓰기 위치만큼 전진한 워터마크 (전진할 수 없으면 그대로)"""
+        return watermark
+
+    def iter_documents(self, filters: Optional[Dict] = None, source: Optional[List[str]] = None) -> Iterator[Dict]:
+        """필터(필드=값, 빈 값은 무시)에 맞는 문서의 _source 순회 (source로 필드 지정 가능)"""
+        raise NotImplementedError
+
+    def snapshot(self, source: List[str], version: Any = None) -> InsightSnapshot:
+        """전체 문서 스냅샷 (워터마크는 스캔 전에 읽은 값 - 동시 쓰기가 없는 백엔드 기준)"""
+        watermark = self.watermark(self.version())
+        snapshot = InsightSnapshot.from_documents(self.iter_documents(source=source), version=version)
+        snapshot.watermark = watermark
+        return snapshot
+
+    def aggregate(self, build_query: Callable[[Dict[str, str]], Dict]) -> Optional[Dict]:
+        """ES 집계 쿼리 실행 결과 {"total", "aggregations"} (지원하지 않거나 실패 시 None)"""
+        return None
+
+    def search_refs(self, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                    source: Optional[List[str]] = None) -> List[Dict]:
+        """후보 ref 문서 검색 (앞선 후보일수록 먼저, 후보가 없으면 단어 검색, source로 필드 지정 가능)"""
+        raise NotImplementedError
+
+    async def search_refs_async(self, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                                source: Optional[List[str]] = None) -> List[Dict]:
+        return self.search_refs(ref_text, matches, limit, source)
+
+    async def iter_refs_async(self, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                              source: Optional[List[str]] = None, page_size: int = PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """search_refs와 같은 순서의 검색 결과를 페이지 단위로 순회"""
+        hits = await self.search_refs_async(ref_text, matches, limit, source)
+        for start in range(0, len(hits), page_size):
+            yield hits[start:start + page_size]
+
+    def search_refs_many(self, searches: List[RefSearch]) -> List[List[Dict]]:
+        return [self.search_refs(*search) for search in searches]
+
+    def add_write_listener(self, listener: Callable[[List[Dict]], None]) -> None:
+        """원본 데이터 쓰기 알림 등록 (쓰기가 없는 백엔드는 무시)"""
+
+
+class ElasticsearchBackend(InsightBackend):
+    """Elasticsearch 인덱스 백엔드"""
+
+    name = "elasticsearch"
+
+    def __init__(self):
+        es_url = os.getenv("ELASTICSEARCH_URL")
+        es_username = os.getenv("ES_USERNAME")
+        es_password = os.getenv("ES_PASSWORD")
+        self.index_name = os.getenv("ELASTICSEARCH_INDEX_NAME")
+
+        if not all([es_url, es_username, es_password, self.index_name]):
+            raise ValueError("필수 환경변수가 설정되지 않았습니다.")
+
+        self.es = Elasticsearch(es_url, basic_auth=(es_username, es_password))
+
+        if not self.es.ping():
+            raise ConnectionError("Elasticsearch 연결에 실패했습니다.")
+
+        # async 라우트용 클라이언트
+        self.async_es = AsyncElasticsearch(es_url, basic_auth=(es_username, es_password))
+
+        # 집계 쿼리용 keyword 필드명 (최초 집계 시 매핑에서 확인)
+        self._keyword_fields: Optional[Dict[str, str]] = None
+
+    def ping(self) -> bool:
+        try:
+            return self.es.ping()
+        except Exception:
+            return False
+
+    async def ping_async(self) -> bool:
+        """Elasticsearch 연결 확인 (AsyncElasticsearch)"""
+        try:
+            return await self.async_es.ping()
+        except Exception:
+            return False
+
+    def keyword_fields(self) -> Dict[str, str]:
+        """범주형 필드의 keyword 필드명 (최초 호출 시 매핑에서 확인)"""
+        if self._keyword_fields is None:
+            mapping = self.es.indices.get_mapping(index=self.index_name)
+            self._keyword_fields = aggregations.resolve_keyword_fields(mapping)
+        return self._keyword_fields
+
+    def version(self) -> tuple:
+        """인덱스 변경 여부 판단용 버전
+
+        primary 샤드별 max_seq_no(쓰기 발생)와 문서/삭제 수(refresh 후 반영)로 구성한다.
+        """
+        stats = self.es.indices.stats(index=self.index_name, metric="docs", level="shards")
+        version = []
+        for index_name, index_stats in sorted(stats["indices"].items()):
+            for shard_id, copies in sorted(index_stats["shards"].items()):
+                for copy in copies:
+                    if copy["routing"]["primary"]:
+                        version.append((
+                            index_name,
+                            shard_id,
+                            copy["seq_no"]["max_seq_no"],
+                            copy["docs"]["count"],
+                            copy["docs"]["deleted"]
+                        ))
+        return tuple(version)
+
+    def watermark(self, version: tuple) -> tuple:
+        """primary 샤드별 max_seq_no (refresh 시점에 따라 바뀌는 문서/삭제 수는 제외)"""
+        return tuple(entry[:3] for entry in version)
+
+    @staticmethod
+    def _position(watermark: Any) -> Optional[int]:
+        """단일 샤드 인덱스의 max_seq_no (쓰기 응답에는 샤드 번호가 없어 여러 샤드면 None)"""
+        if isinstance(watermark, tuple) and len(watermark) == 1:
+            return watermark[0][2]
+        return None
+
+    def includes(self, watermark: Any, seq_no: Optional[int]) -> bool:
+        position = self._position(watermark)
+        return position is not None and seq_no is not None and seq_no <= position
+
+    def advance_watermark(self, watermark: Any, seq_nos: Set[int]) -> Any:
+        """쓰기 응답의 _seq_no로 워터마크 전진 (샤드별 seq_no는 쓰기마다 1씩 증가)
+
+        사이에 빠진 위치가 있으면(다른 워커나 외부 쓰기) 그 앞에서 멈추고, 스냅샷 갱신 시 재계산으로 맞춘다.
+        """
+        position = self._position(watermark)
+        if position is None:
+            return watermark
+        while position + 1 in seq_nos:
+            position += 1
+        return ((watermark[0][0], watermark[0][1], position),)
+
+    def aggregate(self, build_query: Callable[[Dict[str, str]], Dict]) -> Optional[Dict]:
+        """Elasticsearch 집계 실행 (실패 시 None)"""
+        try:
+            response = self.es.search(index=self.index_name, body=build_query(self.keyword_fields()))
+            return {
+                "total": response['hits']['total']['value'],
+                "aggregations": response.get('aggregations', {})
+            }
+        except Exception as e:
+            print(f"집계 실행 오류: {e}")
+            return None
+
+    def iter_documents(self, filters: Optional[Dict] = None, source: Optional[List[str]] = None,
+                       page_size: int = PAGE_SIZE) -> Iterator[Dict]:
+        """point-in-time + search_after로 인덱스 전체를 페이지 단위로 순회 (필터, _source 필드 지정 가능)"""
+        query = aggregations.filter_query(self.keyword_fields(), filters) if filters else {"match_all": {}}
+        pit_id = self.es.open_point_in_time(index=self.index_name, keep_alive=PIT_KEEP_ALIVE)["id"]
+        return self._iter_pit(pit_id, query, source, page_size)
+
+    def snapshot(self, source: List[str], version: Any = None) -> InsightSnapshot:
+        """refresh 후 연 point-in-time으로 스냅샷 생성 (스캔한 데이터의 워터마크 기록)
+
+        스캔 직전의 쓰기 위치를 읽고 refresh한 뒤 point-in-time을 열어, 그 위치까지의 쓰기(다른 워커의
+        refresh 전 쓰기 포함)가 모두 스캔에 보이게 한다. point-in-time을 여는 사이 쓰기 위치가 바뀌었으면
+        스캔에 포함된 쓰기를 알 수 없으므로 워터마크를 None으로 두어 다음 갱신에서 다시 계산하게 한다.
+        """
+        before = self.watermark(self.version())
+        self.es.indices.refresh(index=self.index_name)
+        pit_id = self.es.open_point_in_time(index=self.index_name, keep_alive=PIT_KEEP_ALIVE)["id"]
+        try:
+            after = self.watermark(self.version())
+        except Exception:
+            self._close_pit(pit_id)
+            raise
+        documents = self._iter_pit(pit_id, {"match_all": {}}, source, PAGE_SIZE)
+        snapshot = InsightSnapshot.from_documents(documents, version=version)
+        snapshot.watermark = before if before == after else None
+        return snapshot
+
+    def _iter_pit(self, pit_id: str, query: Dict, source: Optional[List[str]], page_size: int) -> Iterator[Dict]:
+        """열린 point-in-time을 페이지 단위로 순회하고 끝나면 닫음"""
+        try:
+            search_after = None
+            while True:
+                body = {
+                    "query": query,
+                    "size": page_size,
+                    "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+                    "sort": [{"_shard_doc": "asc"}],
+                    "_source": source if source is not None else True,
+                    "track_total_hits": False
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
+
+                response = self.es.search(body=body)
+                pit_id = response.get('pit_id', pit_id)
+                hits = response['hits']['hits']
+
+                for hit in hits:
+                    yield hit['_source']
+
+                if len(hits) < page_size:
+                    break
+                search_after = hits[-1]['sort']
+        finally:
+            self._close_pit(pit_id)
+
+    def _close_pit(self, pit_id: str) -> None:
+        try:
+            self.es.close_point_in_time(id=pit_id)
+        except Exception as e:
+            print(f"point-in-time 종료 오류: {e}")
+
+    @staticmethod
+    def ref_query(ref_field: str, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                  source: Optional[List[str]] = None) -> Dict:
+        """후보 ref 문서 검색 쿼리 (같은 거리 단계의 후보만 받으며 앞선 후보일수록 높은 점수, 후보가 없으면 단어 매치)"""
+        if not matches:
+            # 명시적 매핑에서는 ref가 keyword이고 단어 검색은 ref.text 하위 필드로 수행
+            query = {"query": {"multi_match": {"query": ref_text, "fields": ["ref", "ref.text"]}}, "size": limit}
+        else:
+            query = {
+                "query": {
+                    "bool": {
+                        "should": [
+                            {"constant_score": {"filter": {"term": {ref_field: ref}}, "boost": len(matches) - rank}}
+                            for rank, (ref, _) in enumerate(matches)
+                        ],
+                        "minimum_should_match": 1
+                    }
+                },
+                "size": limit
+            }
+        if source is not None:
+            query["_source"] = source
+        return query
+
+    def search_refs(self, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                    source: Optional[List[str]] = None) -> List[Dict]:
+        """Elasticsearch 검색 실행"""
+        try:
+            query = self.ref_query(self.keyword_fields()["ref"], ref_text, matches, limit, source)
+            response = self.es.search(index=self.index_name, body=query)
+            return response['hits']['hits']
+        except Exception as e:
+            print(f"검색 실행 오류: {e}")
+            return []
+
+    async def search_refs_async(self, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                                source: Optional[List[str]] = None) -> List[Dict]:
+        """Elasticsearch 검색 실행 (AsyncElasticsearch)"""
+        try:
+            query = self.ref_query(self.keyword_fields()["ref"], ref_text, matches, limit, source)
+            response = await self.async_es.search(index=self.index_name, body=query)
+            return response['hits']['hits']
+        except Exception as e:
+            print(f"검색 실행 오류: {e}")
+            return []
+
+    async def iter_refs_async(self, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                              source: Optional[List[str]] = None, page_size: int = PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """point-in-time + search_after로 후보 ref 검색 결과를 페이지 단위로 순회 (점수 내림차순, 같은 점수는 문서 순서)"""
+        query = self.ref_query(self.keyword_fields()["ref"], ref_text, matches, limit, source)
+        pit_id = (await self.async_es.open_point_in_time(index=self.index_name, keep_alive=PIT_KEEP_ALIVE))["id"]
+
+        try:
+            search_after = None
+            remaining = limit
+            while remaining > 0:
+                body = {
+                    **query,
+                    "size": min(page_size, remaining),
+                    "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+                    "sort": [{"_score": "desc"}, {"_shard_doc": "asc"}],
+                    "track_total_hits": False
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
+
+                response = await self.async_es.search(body=body)
+                pit_id = response.get('pit_id', pit_id)
+                hits = response['hits']['hits']
+                if hits:
+                    yield hits
+
+                remaining -= len(hits)
+                if len(hits) < body["size"]:
+                    break
+                search_after = hits[-1]['sort']
+        finally:
+            try:
+                await self.async_es.close_point_in_time(id=pit_id)
+            except Exception as e:
+                print(f"point-in-time 종료 오류: {e}")
+
+    def search_refs_many(self, searches: List[RefSearch]) -> List[List[Dict]]:
+        """여러 후보 ref 검색을 msearch 한 번으로 실행"""
+        body = []
+        for ref_text, matches, limit in searches:
+            body.extend([{}, self.ref_query(self.keyword_fields()["ref"], ref_text, matches, limit)])
+        responses = self.es.msearch(index=self.index_name, searches=body)["responses"]
+
+        results = []
+        for response in responses:
+            if "error" in response:
+                print(f"검색 실행 오류: {response['error']}")
+            results.append(response.get("hits", {}).get("hits", []))
+        return results
+
+    def add_write_listener(self, listener: Callable[[List[Dict]], None]) -> None:
+        """es_client 쓰기 알림 등록 (store_error_pattern, CSV 색인)"""
+        try:
+            from services.elasticsearch.es_client import add_write_listener
+            add_write_listener(listener)
+        except Exception as e:
+            print(f"인덱스 쓰기 알림 등록 실패: {e}")
+
+
+def create_backend(kind: str = BACKEND) -> InsightBackend:
+    """설정된 백엔드 생성 (auto면 Elasticsearch 연결 실패 시 내장 백엔드로 대체)"""
+    if kind == "embedded":
+        from .embedded import EmbeddedBackend
+        return EmbeddedBackend()
+    if kind == "auto":
+        try:
+            return ElasticsearchBackend()
+        except Exception as e:
+            print(f"Elasticsearch 백엔드 초기화 실패, 내장 백엔드 사용: {e}")
+            from .embedded import EmbeddedBackend
+            return EmbeddedBackend()
+    if kind != "elasticsearch":
+        raise ValueError(f"지원하지 않는 INSIGHT_BACKEND입니다: {kind}")
+    return ElasticsearchBackend()
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Hashable, Awaitable, Tuple
+import asyncio
+import functools
+import inspect
+import threading
+
+
+class VersionedResultCache:
+    """데이터셋 버전이 태그된 LRU 결과 캐시
+
+    - 같은 버전의 항목이 있으면 그대로 반환
+    - 버전이 바뀐 항목은 백그라운드에서 재계산하는 동안 기존 결과를 반환
+    - 항목이 없으면 즉시 계산
+    - allow_stale=False면 버전이 다른 항목은 쓰지 않고 즉시 계산 (다른 버전 항목은 덮어쓰지 않음)
+    """
+
+    def __init__(self, maxsize: int = 256, refresh_workers: int = 2):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="insight-cache")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Hashable, version: Any, allow_stale: bool = True) -> Tuple[bool, Any, bool]:
+        """(항목 존재 여부, 값, 백그라운드 재계산 필요 여부)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None, False
+            self._entries.move_to_end(key)
+            if entry[0] == version:
+                self.hits += 1
+                return True, entry[1], False
+            if not allow_stale:
+                self.misses += 1
+                return False, None, False
+            self.stale_hits += 1
+            if key in self._refreshing:
+                return True, entry[1], False
+            self._refreshing.add(key)
+            return True, entry[1], True
+
+    def get_or_compute(self, key: Hashable, version: Any, compute: Callable[[], Any], allow_stale: bool = True) -> Any:
+        found, value, refresh = self._lookup(key, version, allow_stale)
+        if refresh:
+            self._executor.submit(self._recompute, key, version, compute)
+        if found:
+            return value
+
+        value = compute()
+        self._store(key, version, value, replace=allow_stale)
+        return value
+
+    async def get_or_compute_async(self, key: Hashable, version: Any, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_compute의 코루틴 버전 (재계산은 이벤트 루프 태스크로 실행)"""
+        found, value, refresh = self._lookup(key, version)
+        if refresh:
+            asyncio.ensure_future(self._recompute_async(key, version, compute))
+        if found:
+            return value
+
+        value = await compute()
+        self._store(key, version, value)
+        return value
+
+    def _recompute(self, key: Hashable, version: Any, compute: Callable[[], Any]) -> None:
+        try:
+            self._store(key, version, compute())
+        except Exception as e:
+            print(f"캐시 재계산 오류 ({key[0] if isinstance(key, tuple) else key}): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _recompute_async(self, key: Hashable, version: Any, compute: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            self._store(key, version, await compute())
+        except Exception as e:
+            print(f"캐시 재계산 오류 ({key[0] if isinstance(key, tuple) else key}): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key: Hashable, version: Any, value: Any, replace: bool = True) -> None:
+        with self._lock:
+            if not replace and key in self._entries:
+                return
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses
+            }
+
+
+def cached_analysis(method: Callable) -> Callable:
+    """InsightService 분석 메서드 결과를 메서드+인자 키로 캐시
+
+    인스턴스에 `_cache`(VersionedResultCache), `_dataset_version()`, `_allow_stale_results()`가 있어야 한다.
+    """
+    key_of = _key_builder(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._cache.get_or_compute(
+            key_of(self, args, kwargs),
+            self._dataset_version(),
+            lambda: method(self, *args, **kwargs),
+            allow_stale=self._allow_stale_results()
+        )
+
+    return wrapper
+
+
+def cached_async_analysis(method: Callable) -> Callable:
+    """cached_analysis의 코루틴 메서드 버전"""
+    key_of = _key_builder(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._cache.get_or_compute_async(
+            key_of(self, args, kwargs),
+            self._dataset_version(),
+            lambda: method(self, *args, **kwargs)
+        )
+
+    return wrapper
+
+
+def _key_builder(method: Callable) -> Callable:
+    """메서드 이름과 (인자명, 값) 쌍으로 캐시 키를 만드는 함수"""
+    signature = inspect.signature(method)
+
+    def key_of(instance, args, kwargs) -> Tuple:
+        bound = signature.bind(instance, *args, **kwargs)
+        bound.apply_defaults()
+        return (method.__name__,) + tuple(
+            (name, value) for name, value in bound.arguments.items() if name != "self"
+        )
+
+    return key_of
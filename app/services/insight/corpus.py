@@ -0,0 +1,63 @@
+"""app/data의 발음 평가 CSV 코퍼스 읽기 (Elasticsearch 색인과 내장 백엔드가 함께 사용)"""
+from typing import Dict, List, Any, Optional, Iterator, Callable, Tuple
+import csv
+import glob
+import os
+import re
+
+from .phoneme import error_event_fields
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+INTEGER_FIELDS = ("age", "C", "S", "I", "D")
+FLOAT_FIELDS = ("per",)
+# 빈 값이면 문서에서 제외하는 문자열 필드
+OPTIONAL_FIELDS = ("error",)
+# "Counter({'C': 15, 'I': 1})"
+_COUNT_PATTERN = re.compile(r"'([A-Z]+)'\s*:\s*(\d+)")
+
+
+def parse_count(value: Optional[str]) -> Dict[str, int]:
+    """Counter 문자열을 eval 없이 dict로 변환"""
+    if not value:
+        return {}
+    return {key: int(count) for key, count in _COUNT_PATTERN.findall(value)}
+
+
+def _number(value: Optional[str], cast: Callable) -> Any:
+    if value is None or value.strip() == "":
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        return cast(float(value))
+
+
+def document_from_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """CSV 한 행을 색인할 문서로 변환 (숫자형 변환, count 파싱, 오류 이벤트 추가)"""
+    source = {key: value for key, value in row.items() if key}  # pandas 인덱스 열(이름 없음) 제외
+    for field in INTEGER_FIELDS:
+        if field in source:
+            source[field] = _number(source[field], int)
+    for field in FLOAT_FIELDS:
+        if field in source:
+            source[field] = _number(source[field], float)
+    for field in OPTIONAL_FIELDS:
+        if not source.get(field):
+            source.pop(field, None)
+    if "count" in source:
+        source["count"] = parse_count(source["count"])
+    source.update(error_event_fields(source.get("error")))
+    return source
+
+
+def iter_rows(path: str, skip: int = 0) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """CSV를 한 행씩 읽어 (행 번호, 행) 반환 (BOM 처리, 앞의 skip행 건너뜀)"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row_number, row in enumerate(csv.DictReader(f), start=1):
+            if row_number > skip:
+                yield row_number, row
+
+
+def default_paths() -> List[str]:
+    return sorted(glob.glob(os.path.join(DATA_DIR, "*.csv")))
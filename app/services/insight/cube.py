@@ -0,0 +1,129 @@
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from .snapshot import InsightSnapshot, CSID_FIELDS
+
+
+def cell_summary(stats: Dict[str, float]) -> Dict[str, Any]:
+    """누적 통계로부터 개수/평균/표준편차/CSID 합계 계산"""
+    n = int(stats["n"])
+    mean = stats["sum"] / n if n else 0.0
+    variance = (stats["sumsq"] - stats["sum"] * mean) / (n - 1) if n > 1 else 0.0
+    return {
+        "count": int(stats["count"]),
+        "n": n,
+        "avg": float(mean),
+        "std": float(np.sqrt(max(variance, 0.0))),
+        "csid": {key: int(round(stats[key])) for key in CSID_FIELDS}
+    }
+
+
+class Cube:
+    """차원 조합별 셀 통계 (count, n, per 합계/제곱합, C/S/I/D 합계)
+
+    n은 per 값이 있는 행 수이다.
+    cell_codes는 셀마다 각 차원의 범주 코드(-1: 값 없음)를 담은 (셀 수 × 차원 수) 배열이다.
+    """
+
+    def __init__(self, dimensions: Tuple[str, ...], categories: Dict[str, List[str]],
+                 cell_codes: np.ndarray, stats: Dict[str, np.ndarray]):
+        self.dimensions = tuple(dimensions)
+        self.categories = categories
+        self.cell_codes = cell_codes
+        self.stats = stats
+
+    @classmethod
+    def build(cls, snapshot: InsightSnapshot, dimensions: Iterable[str],
+              mask: Optional[np.ndarray] = None) -> "Cube":
+        """스냅샷을 한 번 훑어 주어진 차원 조합의 셀 통계를 누적"""
+        dimensions = tuple(dimensions)
+        if mask is None:
+            mask = snapshot.mask()
+
+        codes = np.stack([snapshot.codes[d][mask] for d in dimensions]) if dimensions else np.empty((0, int(mask.sum())), dtype=np.int32)
+        per = snapshot.numeric["per"][mask]
+        valid = ~np.isnan(per)
+        values = np.where(valid, per, 0.0)
+
+        weights = {
+            "count": None,
+            "n": valid.astype(np.float64),
+            "sum": values,
+            "sumsq": values * values
+        }
+        for key in CSID_FIELDS:
+            weights[key] = snapshot.numeric[key][mask]
+
+        categories = {d: snapshot.categories[d] for d in dimensions}
+        cell_codes, inverse = cls._group(codes, [len(categories[d]) + 1 for d in dimensions])
+        stats = {
+            key: np.bincount(inverse, weights=weight, minlength=len(cell_codes)).astype(np.float64)
+            for key, weight in weights.items()
+        }
+        return cls(dimensions, categories, cell_codes, stats)
+
+    @staticmethod
+    def _group(codes: np.ndarray, radices: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """차원별 코드 행렬을 셀 단위로 묶어 (셀 코드, 행→셀 인덱스) 반환"""
+        if not radices:
+            return np.empty((1, 0), dtype=np.int64), np.zeros(codes.shape[1], dtype=np.int64)
+        keys = np.ravel_multi_index(codes.astype(np.int64) + 1, radices)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        cell_codes = np.stack(np.unravel_index(unique_keys, radices), axis=1) - 1
+        return cell_codes, inverse.ravel()
+
+    def rollup(self, dimensions: Iterable[str]) -> "Cube":
+        """일부 차원으로 셀을 다시 묶은 큐브 (원본 행을 다시 훑지 않음)"""
+        dimensions = tuple(dimensions)
+        positions = [self.dimensions.index(d) for d in dimensions]
+        codes = self.cell_codes[:, positions].T
+        cell_codes, inverse = self._group(codes, [len(self.categories[d]) + 1 for d in dimensions])
+        stats = {
+            key: np.bincount(inverse, weights=values, minlength=len(cell_codes))
+            for key, values in self.stats.items()
+        }
+        return Cube(dimensions, {d: self.categories[d] for d in dimensions}, cell_codes, stats)
+
+    def slice(self, **filters) -> "Cube":
+        """차원=값 조건을 만족하는 셀만 남긴 큐브 (None 값은 무시)"""
+        keep = np.ones(len(self.cell_codes), dtype=bool)
+        for dimension, value in filters.items():
+            if value is None:
+                continue
+            categories = self.categories[dimension]
+            code = categories.index(value) if value in categories else -2
+            keep &= self.cell_codes[:, self.dimensions.index(dimension)] == code
+        return Cube(
+            self.dimensions,
+            self.categories,
+            self.cell_codes[keep],
+            {key: values[keep] for key, values in self.stats.items()}
+        )
+
+    def cells(self) -> Iterator[Tuple[Tuple[Optional[str], ...], Dict[str, float]]]:
+        """(차원 값 튜플, 누적 통계) 순회 (값이 없는 차원은 None)"""
+        for row, codes in enumerate(self.cell_codes):
+            key = tuple(
+                self.categories[d][code] if code >= 0 else None
+                for d, code in zip(self.dimensions, codes)
+            )
+            yield key, {name: values[row] for name, values in self.stats.items()}
+
+    def total(self) -> Dict[str, Any]:
+        """전체 셀 합계 요약"""
+        return cell_summary({key: values.sum() for key, values in self.stats.items()})
+
+    def groups(self, dimension: str) -> Dict[str, Dict[str, Any]]:
+        """단일 차원 값별 요약 (값이 없거나 빈 문자열인 그룹 제외)"""
+        cube = self if self.dimensions == (dimension,) else self.rollup((dimension,))
+        return {
+            key[0]: cell_summary(stats)
+            for key, stats in cube.cells()
+            if key[0]
+        }
+
+    def value_counts(self, dimension: str) -> Dict[Optional[str], int]:
+        """단일 차원 값별 행 수 (값이 없는 행은 None 키)"""
+        cube = self if self.dimensions == (dimension,) else self.rollup((dimension,))
+        return {key[0]: int(stats["count"]) for key, stats in cube.cells() if stats["count"]}
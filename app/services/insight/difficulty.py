@@ -0,0 +1,218 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import base64
+import binascii
+import json
+import threading
+
+import numpy as np
+
+from .cube import Cube
+from .snapshot import CSID_FIELDS
+
+# 난이도 순위에서 제외하는 텍스트와 최소 샘플 수
+EXCLUDED_TEXTS = frozenset(["왜"])
+MIN_SAMPLES = 2
+# difficulty_distribution 구간 (평균 오류율이 하한 초과, 마지막 구간은 나머지 전부)
+DISTRIBUTION_BOUNDS = (("very_hard", 0.3), ("hard", 0.2), ("medium", 0.1), ("easy", None))
+
+# 순위 키: 평균 오류율 내림차순, 같으면 텍스트 오름차순
+RankKey = Tuple[float, str]
+
+
+def is_ranked(text: Optional[str], count: int) -> bool:
+    """난이도 순위에 포함할 텍스트인지 (빈 텍스트, 제외 텍스트, 샘플 부족 제외)"""
+    return bool(text) and text not in EXCLUDED_TEXTS and count >= MIN_SAMPLES
+
+
+def text_entry(text: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """cell_summary 결과를 난이도 항목으로 변환 (중간값은 응답 시 채움)"""
+    return {
+        "text": text,
+        "sample_count": summary["count"],
+        "avg_error_rate": summary["avg"],
+        "std_error_rate": summary["std"],
+        "text_length": len(text),
+        "csid_distribution": summary["csid"]
+    }
+
+
+def with_median(entry: Dict[str, Any], median: float) -> Dict[str, Any]:
+    """중간값을 포함한 응답 항목 (기존 응답과 같은 필드 순서)"""
+    return {
+        "text": entry["text"],
+        "sample_count": entry["sample_count"],
+        "avg_error_rate": entry["avg_error_rate"],
+        "median_error_rate": median,
+        "std_error_rate": entry["std_error_rate"],
+        "text_length": entry["text_length"],
+        "csid_distribution": entry["csid_distribution"]
+    }
+
+
+def encode_cursor(entry: Dict[str, Any]) -> str:
+    """마지막 항목의 순위 키를 불투명한 커서 문자열로 변환"""
+    raw = json.dumps([entry["avg_error_rate"], entry["text"]], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> RankKey:
+    """커서 문자열을 (평균 오류율, 텍스트)로 복원 (형식이 잘못되면 ValueError)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        avg, text = json.loads(raw.decode("utf-8"))
+        return float(avg), str(text)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"잘못된 cursor입니다: {cursor}") from e
+
+
+def _key(avg: float, text: str) -> RankKey:
+    return (-avg, text)
+
+
+class DifficultyRanking:
+    """전체 텍스트 난이도 순위 (정렬 상태를 유지)
+
+    텍스트 통계가 바뀌면 해당 텍스트만 빼고 이진 탐색 위치에 다시 넣으므로 전체 재정렬이 없다.
+    커서 이후 페이지는 이진 탐색 + 슬라이스로 구한다.
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self._entries: Dict[str, Dict[str, Any]] = {
+            entry["text"]: entry for entry in entries if is_ranked(entry["text"], entry["sample_count"])
+        }
+        self._keys: List[RankKey] = sorted(_key(e["avg_error_rate"], e["text"]) for e in self._entries.values())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, entry: Dict[str, Any]) -> None:
+        """텍스트 항목 추가/갱신 (순위 조건을 만족하지 않으면 제거)"""
+        text = entry["text"]
+        with self._lock:
+            previous = self._entries.pop(text, None)
+            if previous is not None:
+                position = bisect_left(self._keys, _key(previous["avg_error_rate"], text))
+                del self._keys[position]
+            if is_ranked(text, entry["sample_count"]):
+                key = _key(entry["avg_error_rate"], text)
+                self._keys.insert(bisect_left(self._keys, key), key)
+                self._entries[text] = entry
+
+    def page(self, after: Optional[RankKey] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """after(평균 오류율, 텍스트) 다음부터 limit개 (after가 없으면 처음부터)"""
+        with self._lock:
+            start = bisect_right(self._keys, _key(*after)) if after is not None else 0
+            return [self._entries[text] for _, text in self._keys[start:start + limit]]
+
+    def tail(self, limit: int) -> List[Dict[str, Any]]:
+        """순위 마지막 limit개 (가장 쉬운 텍스트, 순위 순서 유지)"""
+        with self._lock:
+            return [self._entries[text] for _, text in self._keys[-limit:]] if limit > 0 else []
+
+    def distribution(self) -> Dict[str, int]:
+        """난이도 구간별 텍스트 수 (구간 경계마다 이진 탐색)"""
+        with self._lock:
+            result = {}
+            previous = 0
+            for name, bound in DISTRIBUTION_BOUNDS:
+                position = bisect_left(self._keys, (-bound,)) if bound is not None else len(self._keys)
+                result[name] = position - previous
+                previous = position
+            return result
+
+
+class DifficultyTable:
+    """필터 조건(국적, 레벨)별 텍스트 통계 배열
+
+    조건 조합마다 정렬 상태를 유지하지 않고, 페이지 요청마다 커서 이후 후보에서
+    상위 limit개만 부분 선택(argpartition)한 뒤 그 안에서만 정렬한다.
+    """
+
+    def __init__(self, texts: List[str], count: np.ndarray, avg: np.ndarray, std: np.ndarray,
+                 csid: Dict[str, np.ndarray]):
+        self.texts = np.array(texts, dtype=str) if texts else np.empty(0, dtype=str)
+        self.count = count
+        self.avg = avg
+        self.std = std
+        self.csid = csid
+        # 동률 정렬용 텍스트 순위 (문자열 비교 순서)
+        self._text_rank = np.argsort(np.argsort(self.texts, kind="stable"), kind="stable")
+
+    @classmethod
+    def from_cube(cls, cube: Cube) -> "DifficultyTable":
+        """("ref",) 큐브로부터 순위 대상 텍스트의 통계 배열 생성"""
+        categories = cube.categories["ref"]
+        codes = cube.cell_codes[:, 0]
+        count = cube.stats["count"]
+        keep = [
+            row for row, code in enumerate(codes)
+            if code >= 0 and is_ranked(categories[code], int(count[row]))
+        ]
+        keep = np.asarray(keep, dtype=np.int64)
+
+        n = cube.stats["n"][keep]
+        total = cube.stats["sum"][keep]
+        avg = np.divide(total, n, out=np.zeros(len(keep)), where=n > 0)
+        variance = np.divide(cube.stats["sumsq"][keep] - total * avg, n - 1, out=np.zeros(len(keep)), where=n > 1)
+        return cls(
+            [categories[code] for code in codes[keep]],
+            count[keep].astype(np.int64),
+            avg,
+            np.sqrt(np.maximum(variance, 0.0)),
+            {key: np.rint(cube.stats[key][keep]).astype(np.int64) for key in CSID_FIELDS}
+        )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _entries(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        return [
+            {
+                "text": str(self.texts[row]),
+                "sample_count": int(self.count[row]),
+                "avg_error_rate": float(self.avg[row]),
+                "std_error_rate": float(self.std[row]),
+                "text_length": len(self.texts[row]),
+                "csid_distribution": {key: int(values[row]) for key, values in self.csid.items()}
+            }
+            for row in rows.tolist()
+        ]
+
+    def _ordered(self, rows: np.ndarray) -> np.ndarray:
+        return rows[np.lexsort((self._text_rank[rows], -self.avg[rows]))]
+
+    def page(self, after: Optional[RankKey] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """after(평균 오류율, 텍스트) 다음부터 limit개 (전체 정렬 없이 상위 limit개만 선택)"""
+        if after is None:
+            rows = np.arange(len(self.texts))
+        else:
+            avg, text = after
+            rows = np.flatnonzero((self.avg < avg) | ((self.avg == avg) & (self.texts > text)))
+        if len(rows) > limit:
+            # limit번째 평균 오류율 이상인 행만 남김 (경계 동률은 모두 포함한 뒤 정렬로 자름)
+            values = -self.avg[rows]
+            threshold = np.partition(values, limit - 1)[limit - 1]
+            rows = rows[values <= threshold]
+        return self._entries(self._ordered(rows)[:limit])
+
+    def tail(self, limit: int) -> List[Dict[str, Any]]:
+        """순위 마지막 limit개 (가장 쉬운 텍스트, 순위 순서 유지)"""
+        if limit <= 0:
+            return []
+        rows = np.arange(len(self.texts))
+        if len(rows) > limit:
+            threshold = np.partition(self.avg, limit - 1)[limit - 1]
+            rows = rows[self.avg <= threshold]
+        return self._entries(self._ordered(rows)[-limit:])
+
+    def distribution(self) -> Dict[str, int]:
+        """난이도 구간별 텍스트 수"""
+        result = {}
+        previous = 0
+        for name, bound in DISTRIBUTION_BOUNDS:
+            count = int((self.avg > bound).sum()) if bound is not None else len(self.avg)
+            result[name] = count - previous
+            previous = count
+        return result
@@ -0,0 +1,418 @@
+"""app/data 코퍼스를 메모리 매핑 컬럼 배열로 읽는 내장 분석 백엔드
+
+CSV(또는 같은 이름의 Parquet 변환본)를 처음 읽을 때 컬럼별 .npy 파일로 저장하고,
+이후에는 원본 파일이 바뀌지 않는 한 np.load(mmap_mode="r")로 바로 연다.
+Elasticsearch 없이 같은 분석 결과를 내므로 엣지 배포, CI, 결과 비교용 기준 구현으로 쓴다.
+
+app 디렉토리에서 실행:
+    python -m services.insight.embedded            # 컬럼 캐시 생성
+    python -m services.insight.embedded --parquet  # CSV를 Parquet으로 변환 (pyarrow 필요)
+"""
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from .backend import InsightBackend
+from .corpus import DATA_DIR, INTEGER_FIELDS, FLOAT_FIELDS, document_from_row, iter_rows
+from .phoneme import error_event_fields
+from .snapshot import InsightSnapshot, CSID_FIELDS, CATEGORICAL_FIELDS
+
+# 원본 파일 디렉토리와 컬럼 캐시 디렉토리
+EMBEDDED_DATA_DIR = os.getenv("INSIGHT_EMBEDDED_DATA_DIR", DATA_DIR)
+COLUMNAR_DIR = os.getenv("INSIGHT_EMBEDDED_CACHE_DIR", os.path.join(EMBEDDED_DATA_DIR, ".columnar"))
+# 캐시 형식이 바뀌면 증가 (이전 캐시는 다시 생성)
+FORMAT_VERSION = 1
+NUMERIC_FIELDS = INTEGER_FIELDS + FLOAT_FIELDS
+# 원본 문서에서 파생되는 필드 (캐시에 저장하지 않고 error에서 다시 계산)
+DERIVED_FIELDS = ("error_events",)
+MANIFEST = "manifest.json"
+
+# ref 단어 검색 (ES standard 분석기와 같은 단어 단위, BM25 기본값)
+_TOKEN_PATTERN = re.compile(r"\w+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _parquet():
+    """pyarrow.parquet 모듈 (설치되지 않았으면 None)"""
+    try:
+        import pyarrow.parquet as pq
+        return pq
+    except ImportError:
+        return None
+
+
+def source_paths(data_dir: str = EMBEDDED_DATA_DIR) -> List[str]:
+    """코퍼스 파일 목록 (같은 이름의 Parquet 변환본이 있고 pyarrow를 쓸 수 있으면 CSV 대신 사용)"""
+    paths = {os.path.splitext(p)[0]: p for p in glob.glob(os.path.join(data_dir, "*.csv"))}
+    if _parquet() is not None:
+        for path in glob.glob(os.path.join(data_dir, "*.parquet")):
+            paths[os.path.splitext(path)[0]] = path
+    return [paths[stem] for stem in sorted(paths)]
+
+
+def _signature(paths: List[str]) -> List[List[Any]]:
+    """원본 파일 변경 감지용 (파일명, 크기, 수정 시각)"""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def _iter_source_rows(path: str) -> Iterator[Dict[str, str]]:
+    """CSV 또는 Parquet 변환본의 원본 행 (모든 값은 CSV와 같은 문자열)"""
+    if path.endswith(".parquet"):
+        for batch in _parquet().ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    for _, row in iter_rows(path):
+        yield row
+
+
+class ColumnStore:
+    """코퍼스 문서의 컬럼 배열
+
+    수치 필드는 float64 배열(값 없음은 NaN), 그 밖의 필드는 사전 인코딩한 int32 코드(-1: 값 없음)와
+    UTF-8 값 버퍼/오프셋으로 저장한다. 사전 코드는 행 순서대로 처음 등장한 순서로 매긴다.
+    dict 값(count)은 JSON 문자열로 저장한다.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], numeric: Dict[str, np.ndarray], codes: Dict[str, np.ndarray],
+                 buffers: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        self.manifest = manifest
+        self.fields: List[str] = manifest["fields"]
+        self.size: int = manifest["rows"]
+        self.numeric = numeric
+        self.codes = codes
+        self._buffers = buffers
+        self._json_fields = set(manifest["json_fields"])
+        self._categories: Dict[str, List[str]] = {}
+        self._lookups: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, paths: List[str], directory: str = COLUMNAR_DIR) -> "ColumnStore":
+        """컬럼 캐시가 원본과 같으면 메모리 매핑으로 열고, 아니면 원본을 읽어 캐시 생성"""
+        signature = _signature(paths)
+        store = cls.open(directory)
+        if store is not None and store.manifest["sources"] == signature:
+            return store
+        return cls.build(paths, directory, signature)
+
+    @classmethod
+    def open(cls, directory: str = COLUMNAR_DIR) -> Optional["ColumnStore"]:
+        """저장된 컬럼 캐시를 메모리 매핑으로 열기 (없거나 형식이 다르면 None)"""
+        try:
+            with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format") != FORMAT_VERSION:
+            return None
+
+        def column(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        numeric = {field: column(field) for field in manifest["numeric_fields"]}
+        codes = {field: column(f"{field}.codes") for field in manifest["string_fields"]}
+        buffers = {
+            field: (column(f"{field}.values"), column(f"{field}.offsets"))
+            for field in manifest["string_fields"]
+        }
+        return cls(manifest, numeric, codes, buffers)
+
+    @classmethod
+    def build(cls, paths: List[str], directory: str = COLUMNAR_DIR,
+              signature: Optional[List[List[Any]]] = None) -> "ColumnStore":
+        """원본 파일을 한 번 읽어 컬럼 캐시를 만들고 메모리 매핑으로 열기"""
+        started = time.time()
+        fields: List[str] = []
+        numeric: Dict[str, List[float]] = {}
+        codes: Dict[str, List[int]] = {}
+        lookups: Dict[str, Dict[str, int]] = {}
+        json_fields = set()
+        rows = 0
+
+        for path in paths:
+            for row in _iter_source_rows(path):
+                document = document_from_row(row)
+                for field, value in document.items():
+                    if field in DERIVED_FIELDS or field in numeric or field in codes:
+                        continue
+                    fields.append(field)
+                    if field in NUMERIC_FIELDS:
+                        numeric[field] = [math.nan] * rows
+                    else:
+                        codes[field] = [-1] * rows
+                        lookups[field] = {}
+
+                for field, values in numeric.items():
+                    value = document.get(field)
+                    values.append(float(value) if value is not None else math.nan)
+                for field, values in codes.items():
+                    value = document.get(field)
+                    if value is None:
+                        values.append(-1)
+                        continue
+                    if isinstance(value, dict):
+                        value = json.dumps(value, ensure_ascii=False)
+                        json_fields.add(field)
+                    table = lookups[field]
+                    code = table.get(value)
+                    if code is None:
+                        code = table[value] = len(table)
+                    values.append(code)
+                rows += 1
+
+        # 다른 프로세스가 읽는 중일 수 있으므로 임시 디렉토리에 쓴 뒤 교체
+        tmp_directory = f"{directory}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        for field, values in numeric.items():
+            np.save(os.path.join(tmp_directory, f"{field}.npy"), np.asarray(values, dtype=np.float64))
+        for field, values in codes.items():
+            encoded = [value.encode("utf-8") for value in lookups[field]]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(value) for value in encoded])
+            np.save(os.path.join(tmp_directory, f"{field}.codes.npy"), np.asarray(values, dtype=np.int32))
+            np.save(os.path.join(tmp_directory, f"{field}.values.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+            np.save(os.path.join(tmp_directory, f"{field}.offsets.npy"), offsets)
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "sources": signature if signature is not None else _signature(paths),
+            "rows": rows,
+            "fields": fields,
+            "numeric_fields": list(numeric),
+            "string_fields": list(codes),
+            "json_fields": sorted(json_fields)
+        }
+        with open(os.path.join(tmp_directory, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+        print(f"[embedded] 컬럼 캐시 생성 - {rows}건, {len(fields)}개 필드, {time.time() - started:.1f}초")
+        return cls.open(directory)
+
+    def value(self, field: str, code: int) -> Any:
+        """사전 코드의 원래 값"""
+        values, offsets = self._buffers[field]
+        value = bytes(values[offsets[code]:offsets[code + 1]]).decode("utf-8")
+        return json.loads(value) if field in self._json_fields else value
+
+    def categories(self, field: str) -> List[str]:
+        """필드의 사전 값 목록 (코드 순서, 최초 호출 시 디코딩)"""
+        categories = self._categories.get(field)
+        if categories is None:
+            if field in self._buffers:
+                values, offsets = self._buffers[field]
+                buffer = bytes(values)
+                categories = [
+                    buffer[start:end].decode("utf-8")
+                    for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+                ]
+            else:
+                categories = []
+            with self._lock:
+                self._categories[field] = categories
+                self._lookups[field] = {value: code for code, value in enumerate(categories)}
+        return categories
+
+    def code_of(self, field: str, value: Any) -> Optional[int]:
+        if field not in self._lookups:
+            self.categories(field)
+        return self._lookups[field].get(value)
+
+    def field_codes(self, field: str) -> np.ndarray:
+        """필드 코드 배열 (없는 필드는 모두 -1)"""
+        codes = self.codes.get(field)
+        return codes if codes is not None else np.full(self.size, -1, dtype=np.int32)
+
+    def mask(self, filters: Optional[Dict] = None) -> np.ndarray:
+        """필드=값 조건을 모두 만족하는 행 (빈 값 조건은 무시)"""
+        result = np.ones(self.size, dtype=bool)
+        for field, value in (filters or {}).items():
+            if not value:
+                continue
+            code = self.code_of(field, value)
+            if code is None:
+                return np.zeros(self.size, dtype=bool)
+            result &= self.field_codes(field) == code
+        return result
+
+    def document(self, row: int, source: Optional[List[str]] = None) -> Dict[str, Any]:
+        """행을 색인 문서(_source)와 같은 형태로 복원 (source 지정 시 해당 필드만)"""
+        fields = self.fields + list(DERIVED_FIELDS) if source is None else source
+        document = {}
+        for field in fields:
+            if field in self.numeric:
+                value = self.numeric[field][row]
+                if math.isnan(value):
+                    document[field] = None
+                else:
+                    document[field] = int(value) if field in INTEGER_FIELDS else float(value)
+            elif field in self.codes:
+                code = int(self.codes[field][row])
+                if code >= 0:
+                    document[field] = self.value(field, code)
+            elif field in DERIVED_FIELDS:
+                code = int(self.codes["error"][row]) if "error" in self.codes else -1
+                document.update(error_event_fields(self.value("error", code) if code >= 0 else None))
+        return document
+
+
+class EmbeddedBackend(InsightBackend):
+    """로컬 코퍼스 파일 백엔드 (Elasticsearch 불필요)
+
+    원본 파일이 바뀌면 버전이 바뀌고, 다음 스냅샷 갱신 때 컬럼 캐시를 다시 만든다.
+    """
+
+    name = "embedded"
+
+    def __init__(self, data_dir: str = EMBEDDED_DATA_DIR, cache_dir: str = COLUMNAR_DIR):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.index_name = f"embedded:{os.path.basename(os.path.normpath(data_dir))}"
+        self._store: Optional[ColumnStore] = None
+        self._lock = threading.Lock()
+        if not source_paths(data_dir):
+            raise FileNotFoundError(f"내장 백엔드에서 읽을 코퍼스 파일이 없습니다: {data_dir}")
+
+    def ping(self) -> bool:
+        """데이터 파일 접근 가능 여부"""
+        return bool(source_paths(self.data_dir))
+
+    def version(self) -> tuple:
+        return ("embedded",) + tuple(tuple(item) for item in _signature(source_paths(self.data_dir)))
+
+    def store(self) -> ColumnStore:
+        """현재 원본 파일과 일치하는 컬럼 저장소 (바뀌었으면 다시 로드)"""
+        paths = source_paths(self.data_dir)
+        with self._lock:
+            store = self._store
+            if store is None or store.manifest["sources"] != _signature(paths):
+                store = self._store = ColumnStore.load(paths, self.cache_dir)
+            return store
+
+    def iter_documents(self, filters: Optional[Dict] = None, source: Optional[List[str]] = None) -> Iterator[Dict]:
+        store = self.store()
+        for row in np.flatnonzero(store.mask(filters)).tolist():
+            yield store.document(row, source)
+
+    def snapshot(self, source: List[str], version: Any = None) -> InsightSnapshot:
+        """컬럼 배열로 스냅샷을 직접 구성 (문서 복원 없이 사전 코드를 그대로 사용)"""
+        store = self.store()
+        nan = np.full(store.size, np.nan)
+        numeric = {"per": np.array(store.numeric.get("per", nan), dtype=np.float64)}
+        for key in CSID_FIELDS:
+            values = store.numeric.get(key, nan)
+            numeric[key] = np.nan_to_num(values, nan=0.0).astype(np.int64)
+        return InsightSnapshot(
+            numeric=numeric,
+            codes={field: np.asarray(store.field_codes(field), dtype=np.int32) for field in CATEGORICAL_FIELDS},
+            categories={field: list(store.categories(field)) for field in CATEGORICAL_FIELDS},
+            version=version,
+            watermark=("embedded",) + tuple(tuple(item) for item in store.manifest["sources"])
+        )
+
+    def search_refs(self, ref_text: str, matches: List[Tuple[str, int]], limit: int,
+                    source: Optional[List[str]] = None) -> List[Dict]:
+        """ES 검색과 같은 순서로 후보 ref 문서 반환
+
+        후보가 있으면 앞선 후보일수록 높은 점수(ES constant_score boost와 동일)를 주고,
+        없으면 ref 단어 BM25 점수를 쓴다. 같은 점수는 행 순서로 정렬한다.
+        """
+        store = self.store()
+        categories = store.categories("ref")
+        scores = np.zeros(len(categories))
+        if matches:
+            for rank, (ref, _) in enumerate(matches):
+                code = store.code_of("ref", ref)
+                if code is not None:
+                    scores[code] = len(matches) - rank
+        else:
+            scores = self._bm25_scores(store, ref_text)
+
+        ref_codes = store.field_codes("ref")
+        row_scores = np.where(ref_codes >= 0, scores[ref_codes] if len(scores) else 0.0, 0.0)
+        rows = np.flatnonzero(row_scores > 0)
+        rows = rows[np.lexsort((rows, -row_scores[rows]))][:limit]
+        return [
+            {"_id": str(row), "_score": float(row_scores[row]), "_source": store.document(row, source)}
+            for row in rows.tolist()
+        ]
+
+    @staticmethod
+    def _bm25_scores(store: ColumnStore, text: str) -> np.ndarray:
+        """ref 값별 단어 BM25 점수 (문서 빈도와 평균 길이는 행 단위)"""
+        categories = store.categories("ref")
+        terms = set(_TOKEN_PATTERN.findall(text.lower()))
+        scores = np.zeros(len(categories))
+        if not terms or not categories:
+            return scores
+
+        ref_codes = store.field_codes("ref")
+        rows_per_ref = np.bincount(ref_codes[ref_codes >= 0], minlength=len(categories))
+        tokens = [_TOKEN_PATTERN.findall(value.lower()) for value in categories]
+        lengths = np.array([len(t) for t in tokens], dtype=np.float64)
+        total_rows = rows_per_ref.sum()
+        if not total_rows:
+            return scores
+        average_length = (lengths * rows_per_ref).sum() / total_rows
+
+        for term in terms:
+            frequencies = np.array([t.count(term) for t in tokens], dtype=np.float64)
+            document_frequency = rows_per_ref[frequencies > 0].sum()
+            if not document_frequency:
+                continue
+            idf = math.log(1 + (total_rows - document_frequency + 0.5) / (document_frequency + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+            scores += idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+        return scores
+
+
+def convert_to_parquet(data_dir: str = EMBEDDED_DATA_DIR) -> List[str]:
+    """CSV를 같은 이름의 Parquet 파일로 변환 (값은 CSV 문자열 그대로, zstd 압축)"""
+    pq = _parquet()
+    if pq is None:
+        raise RuntimeError("Parquet 변환에는 pyarrow가 필요합니다: pip install pyarrow")
+    import pyarrow as pa
+
+    written = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        rows = [row for _, row in iter_rows(path)]
+        columns = list(rows[0]) if rows else []
+        table = pa.table({column: [row.get(column) for row in rows] for column in columns})
+        target = f"{os.path.splitext(path)[0]}.parquet"
+        pq.write_table(table, target, compression="zstd")
+        written.append(target)
+        print(f"[embedded] Parquet 변환 - {os.path.basename(path)} → {os.path.basename(target)} ({len(rows)}건)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="내장 분석 백엔드 컬럼 캐시 생성")
+    parser.add_argument("--parquet", action="store_true", help="CSV를 Parquet으로 변환한 뒤 캐시 생성")
+    args = parser.parse_args()
+
+    if args.parquet:
+        convert_to_parquet()
+    paths = source_paths()
+    started = time.time()
+    store = ColumnStore.build(paths)
+    print(f"[embedded] 완료 - {len(paths)}개 파일, {store.size}건, {time.time() - started:.1f}초 ({COLUMNAR_DIR})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from typing import Any, Iterable
+import json
+
+import numpy as np
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json으로 인코딩
+    orjson = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _default(value: Any) -> Any:
+    """numpy 스칼라/배열 변환 (표준 json 인코딩용)"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"JSON으로 변환할 수 없는 값입니다: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """응답 본문 JSON 인코딩 (orjson 우선, 없으면 Starlette JSONResponse와 같은 형식의 표준 json)"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def ndjson(items: Iterable[Any]) -> bytes:
+    """항목별 한 줄 JSON (NDJSON) 인코딩"""
+    return b"".join(dumps(item) + b"\n" for item in items)
+
+
+class InsightJSONResponse(JSONResponse):
+    """dumps로 인코딩하는 JSON 응답"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
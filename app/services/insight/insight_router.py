@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional, List, Dict, Any, AsyncIterator
+from pydantic import BaseModel
 from .insight_service import InsightService
+from . import encoding
 
-router = APIRouter(prefix="/api/insights", tags=["insights"])
+router = APIRouter(prefix="/api/insights", tags=["insights"], default_response_class=encoding.InsightJSONResponse)
 
 # InsightService 인스턴스 생성
 try:
@@ -11,6 +14,29 @@ except Exception as e:
     print(f"InsightService 초기화 실패: {e}")
     insight_service = None
 
+async def _respond(content: Dict[str, Any]) -> Response:
+    """응답 JSON 인코딩 (큰 응답도 이벤트 루프를 막지 않도록 분석 실행기에서 수행)"""
+    if insight_service:
+        body = await insight_service.run(encoding.dumps, content)
+    else:
+        body = encoding.dumps(content)
+    return Response(content=body, media_type="application/json")
+
+async def _ndjson_stream(summary: Dict[str, Any], pages: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """요약 줄을 먼저 보내고 샘플 페이지마다 샘플 줄을 보낸 뒤 완료 줄로 마무리"""
+    yield encoding.dumps({"type": "summary", "data": summary}) + b"\n"
+    
+    sent = 0
+    try:
+        async for samples in pages:
+            sent += len(samples)
+            yield await insight_service.run(encoding.ndjson, [{"type": "sample", "data": sample} for sample in samples])
+    except Exception as e:
+        # 응답 헤더를 이미 보냈으므로 오류도 한 줄로 전달
+        yield encoding.dumps({"type": "error", "message": f"샘플 조회 중 오류가 발생했습니다: {str(e)}"}) + b"\n"
+        return
+    yield encoding.dumps({"type": "end", "sample_count": sent}) + b"\n"
+
 @router.get("/gender-performance")
 async def get_gender_performance(
     level: Optional[str] = Query(None, description="레벨 필터 (예: A, B, C)"),
@@ -27,12 +53,12 @@ async def get_gender_performance(
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.analyze_gender_performance(level=level, nationality=nationality)
-        return {
+        result = await insight_service.run(insight_service.analyze_gender_performance, level=level, nationality=nationality)
+        return await _respond({
             "success": True,
             "data": result,
             "message": "성별별 발음 성과 분석이 완료되었습니다."
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
 
@@ -49,12 +75,12 @@ async def get_nationality_analysis():
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.analyze_nationality_performance()
-        return {
+        result = await insight_service.run(insight_service.analyze_nationality_performance)
+        return await _respond({
             "success": True,
             "data": result,
             "message": "국적별 발음 특성 분석이 완료되었습니다."
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
 
@@ -71,16 +97,16 @@ async def get_specific_nationality_analysis(nationality: str):
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.analyze_nationality_performance(nationality=nationality)
+        result = await insight_service.run(insight_service.analyze_nationality_performance, nationality=nationality)
         
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         
-        return {
+        return await _respond({
             "success": True,
             "data": result,
             "message": f"'{nationality}' 국적의 발음 특성 분석이 완료되었습니다."
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -99,12 +125,12 @@ async def get_level_performance():
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.analyze_level_performance()
-        return {
+        result = await insight_service.run(insight_service.analyze_level_performance)
+        return await _respond({
             "success": True,
             "data": result,
             "message": "레벨별 성과 분석이 완료되었습니다."
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
 
@@ -121,16 +147,16 @@ async def get_specific_level_performance(level: str):
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.analyze_level_performance(level=level)
+        result = await insight_service.run(insight_service.analyze_level_performance, level=level)
         
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         
-        return {
+        return await _respond({
             "success": True,
             "data": result,
             "message": f"레벨 '{level}'의 성과 분석이 완료되었습니다."
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -153,16 +179,16 @@ async def get_csid_patterns(
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.analyze_csid_patterns(sex=sex, nationality=nationality, level=level)
+        result = await insight_service.run(insight_service.analyze_csid_patterns, sex=sex, nationality=nationality, level=level)
         
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         
-        return {
+        return await _respond({
             "success": True,
             "data": result,
             "message": "CSID 오류 패턴 분석이 완료되었습니다."
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -181,18 +207,20 @@ async def get_type_performance():
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.analyze_type_performance()
-        return {
+        result = await insight_service.run(insight_service.analyze_type_performance)
+        return await _respond({
             "success": True,
             "data": result,
             "message": "타입별 성과 분석이 완료되었습니다."
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
 
 @router.get("/text-difficulty")
 async def get_text_difficulty(
-    limit: int = Query(20, description="반환할 텍스트 개수 (기본값: 20)")
+    limit: int = Query(20, description="반환할 텍스트 개수 (기본값: 20)"),
+    nationality: Optional[str] = Query(None, description="국적 필터 (예: Chinese)"),
+    level: Optional[str] = Query(None, description="레벨 필터 (예: A, B, C)")
 ):
     """
     참조 텍스트 난이도 분석 API
@@ -201,6 +229,7 @@ async def get_text_difficulty(
     - 가장 어려운/쉬운 한국어 표현 TOP N
     - 텍스트 길이와 난이도 상관관계
     - 난이도별 분포 분석
+    - 국적/레벨 필터 지정 시 해당 학습자 그룹 기준 순위
     """
     if not insight_service:
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
@@ -209,12 +238,53 @@ async def get_text_difficulty(
         raise HTTPException(status_code=400, detail="limit은 1-100 사이의 값이어야 합니다.")
     
     try:
-        result = insight_service.analyze_text_difficulty(limit=limit)
-        return {
+        result = await insight_service.run(
+            insight_service.analyze_text_difficulty, limit=limit, nationality=nationality, level=level
+        )
+        return await _respond({
             "success": True,
             "data": result,
             "message": "참조 텍스트 난이도 분석이 완료되었습니다."
-        }
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+@router.get("/text-difficulty/ranking")
+async def get_text_difficulty_ranking(
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (없으면 첫 페이지)"),
+    limit: int = Query(50, description="페이지당 텍스트 수 (기본값: 50)"),
+    nationality: Optional[str] = Query(None, description="국적 필터 (예: Chinese)"),
+    level: Optional[str] = Query(None, description="레벨 필터 (예: A, B, C)")
+):
+    """
+    텍스트 난이도 순위 페이지 API
+    
+    - 평균 오류율 내림차순(같으면 텍스트 순) 전체 순위를 커서로 페이지 단위 조회
+    - next_cursor가 null이면 마지막 페이지
+    - 국적/레벨 필터 지정 시 해당 학습자 그룹 기준 순위
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    if limit <= 0 or limit > 200:
+        raise HTTPException(status_code=400, detail="limit은 1-200 사이의 값이어야 합니다.")
+    
+    try:
+        result = await insight_service.run(
+            insight_service.get_text_difficulty_page,
+            cursor=cursor, limit=limit, nationality=nationality, level=level
+        )
+        
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+        
+        return await _respond({
+            "success": True,
+            "data": result,
+            "message": "텍스트 난이도 순위 조회가 완료되었습니다."
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
 
@@ -233,16 +303,16 @@ async def get_overview():
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
     
     try:
-        result = insight_service.get_overview()
+        result = await insight_service.run(insight_service.get_overview)
         
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         
-        return {
+        return await _respond({
             "success": True,
             "data": result,
             "message": "전체 지표 개요 분석이 완료되었습니다."
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -251,7 +321,8 @@ async def get_overview():
 @router.get("/pronunciation-errors")
 async def get_pronunciation_errors(
     ref_text: str = Query(..., description="분석할 참조 텍스트 (예: '시계', '안녕하세요')"),
-    limit: int = Query(50, description="반환할 최대 문서 수 (기본값: 50)")
+    limit: int = Query(50, description="반환할 최대 문서 수 (기본값: 50)"),
+    stream: bool = Query(False, description="NDJSON 스트리밍 응답 (요약 후 샘플을 한 줄씩 전송)")
 ):
     """
     발음 오류 분석 API
@@ -260,6 +331,7 @@ async def get_pronunciation_errors(
     - 정답 발음(ans), 인식된 발음(rec), 오류 설명(error) 제공
     - 성별/국적/레벨별 해당 텍스트 발음 성과 비교
     - 주요 오류 패턴 및 인사이트 제공
+    - stream=true면 요약 줄 다음에 샘플을 검색 페이지 단위로 한 줄씩 전송 (application/x-ndjson)
     """
     if not insight_service:
         raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
@@ -267,53 +339,407 @@ async def get_pronunciation_errors(
     if limit <= 0 or limit > 200:
         raise HTTPException(status_code=400, detail="limit은 1-200 사이의 값이어야 합니다.")
     
+    if stream:
+        try:
+            pages = insight_service.stream_pronunciation_errors(ref_text=ref_text, limit=limit)
+            summary = await pages.__anext__()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+        
+        if "error" in summary:
+            await pages.aclose()
+            raise HTTPException(status_code=400, detail=summary["error"])
+        
+        return StreamingResponse(_ndjson_stream(summary, pages), media_type=encoding.NDJSON_MEDIA_TYPE)
+    
     try:
-        result = insight_service.analyze_pronunciation_errors(ref_text=ref_text, limit=limit)
+        result = await insight_service.analyze_pronunciation_errors_async(ref_text=ref_text, limit=limit)
         
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         
         if result.get("found_documents", 0) == 0:
-            return {
+            return await _respond({
                 "success": True,
                 "data": result,
                 "message": f"'{ref_text}'와 관련된 발음 데이터를 찾을 수 없습니다."
-            }
+            })
         
-        return {
+        return await _respond({
             "success": True,
             "data": result,
             "message": f"'{ref_text}'에 대한 발음 오류 분석이 완료되었습니다."
-        }
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+@router.get("/learner-percentile")
+async def get_learner_percentile(
+    ref_text: str = Query(..., description="학습자가 발음한 참조 텍스트"),
+    per: float = Query(..., description="학습자의 오류율 (0 이상)"),
+    sex: Optional[str] = Query(None, description="성별 코호트 (M/F)"),
+    nationality: Optional[str] = Query(None, description="국적 코호트"),
+    level: Optional[str] = Query(None, description="레벨 코호트")
+):
+    """
+    학습자 백분위 조회 API
+    
+    - 같은 참조 텍스트를 발음한 코호트(성별/국적/레벨) 안에서 학습자 오류율의 백분위
+    - percentile은 학습자보다 오류율이 높은 학습자 비율 (높을수록 우수)
+    - 텍스트×코호트별 정렬 배열의 이진 탐색으로 응답 (STT 시도마다 호출 가능)
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    if not per >= 0:  # 음수와 NaN 거부
+        raise HTTPException(status_code=400, detail="per는 0 이상이어야 합니다.")
+    
+    try:
+        result = await insight_service.run(
+            insight_service.get_learner_percentile,
+            ref_text=ref_text, per=per, sex=sex, nationality=nationality, level=level
+        )
+        
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        return await _respond({
+            "success": True,
+            "data": result,
+            "message": "학습자 백분위 조회가 완료되었습니다."
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+@router.get("/error-rate-percentiles")
+async def get_error_rate_percentiles(
+    sex: Optional[str] = Query(None, description="성별 필터 (M/F)"),
+    nationality: Optional[str] = Query(None, description="국적 필터"),
+    level: Optional[str] = Query(None, description="레벨 필터"),
+    text_type: Optional[str] = Query(None, alias="type", description="타입 필터 (S/W)"),
+    group_by: Optional[str] = Query(None, description="그룹 기준 (sex/nationality/level/type)"),
+    ref_text: Optional[str] = Query(None, description="참조 텍스트 (지정 시 다른 필터는 무시)")
+):
+    """
+    오류율 분위수 분석 API
+    
+    - 조건에 맞는 학습자 그룹의 오류율 중간값, p90, p99
+    - group_by 지정 시 그룹별 분위수 함께 제공
+    - ref_text 지정 시 해당 텍스트의 분위수 제공
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    if group_by is not None and group_by not in ("sex", "nationality", "level", "type"):
+        raise HTTPException(status_code=400, detail="group_by는 sex, nationality, level, type 중 하나여야 합니다.")
+    
+    try:
+        result = await insight_service.run(
+            insight_service.analyze_error_rate_percentiles,
+            sex=sex, nationality=nationality, level=level, text_type=text_type,
+            group_by=group_by, ref_text=ref_text
+        )
+        
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        return await _respond({
+            "success": True,
+            "data": result,
+            "message": "오류율 분위수 분석이 완료되었습니다."
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+@router.get("/phoneme-confusion")
+async def get_phoneme_confusion(
+    nationality: Optional[str] = Query(None, description="국적 필터"),
+    level: Optional[str] = Query(None, description="레벨 필터"),
+    sex: Optional[str] = Query(None, description="성별 필터 (M/F)"),
+    text_type: Optional[str] = Query(None, alias="type", description="타입 필터 (S/W)"),
+    top: int = Query(20, description="그룹별 상위 오류 이벤트 수 (기본값: 20)")
+):
+    """
+    음소 혼동 분석 API
+    
+    - error 문자열을 (연산, 원래 음소, 바뀐 음소) 이벤트로 분해해 집계
+    - 국적×레벨 그룹별 대체(S) 행렬, 삽입(I)/삭제(D) 음소 빈도
+    - 그룹별 가장 빈번한 음소 오류 이벤트
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    if top <= 0 or top > 200:
+        raise HTTPException(status_code=400, detail="top은 1-200 사이의 값이어야 합니다.")
+    
+    try:
+        result = await insight_service.run(
+            insight_service.analyze_phoneme_confusion,
+            nationality=nationality, level=level, sex=sex, text_type=text_type, top=top
+        )
+        
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        return await _respond({
+            "success": True,
+            "data": result,
+            "message": "음소 혼동 분석이 완료되었습니다."
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+@router.get("/error-positions")
+async def get_error_positions(
+    ref_text: Optional[str] = Query(None, description="분석할 텍스트 (없으면 전체 텍스트 순위)"),
+    limit: int = Query(20, description="반환할 텍스트 수 (기본값: 20)")
+):
+    """
+    음절 위치별 오류 분석 API
+    
+    - 정답 발음(ans)과 인식 발음(rec)을 음소 단위로 정렬해 위치별 대체/삭제/삽입 횟수 계산
+    - 텍스트별 음절 히트맵과 가장 오류가 많은 음절
+    - ref_text가 없으면 가장 어려운 음절의 레코드당 오류 수가 많은 텍스트 순으로 반환
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    if limit <= 0 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit은 1-100 사이의 값이어야 합니다.")
+    
+    try:
+        result = await insight_service.run(insight_service.analyze_error_positions, ref_text=ref_text, limit=limit)
+    
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+    
+        return await _respond({
+            "success": True,
+            "data": result,
+            "message": "음절 위치별 오류 분석이 완료되었습니다."
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+# 배치 분석에서 사용할 수 있는 분석 (이름 → (서비스 메서드, {요청 파라미터: 메서드 인자}))
+BATCH_ANALYSES = {
+    "overview": ("get_overview", {}),
+    "gender-performance": ("analyze_gender_performance", {"level": "level", "nationality": "nationality"}),
+    "nationality-analysis": ("analyze_nationality_performance", {"nationality": "nationality"}),
+    "level-performance": ("analyze_level_performance", {"level": "level"}),
+    "csid-patterns": ("analyze_csid_patterns", {"sex": "sex", "nationality": "nationality", "level": "level"}),
+    "type-performance": ("analyze_type_performance", {}),
+    "text-difficulty": ("analyze_text_difficulty", {"limit": "limit", "nationality": "nationality", "level": "level"}),
+    "text-difficulty-ranking": ("get_text_difficulty_page", {
+        "cursor": "cursor", "limit": "limit", "nationality": "nationality", "level": "level"
+    }),
+    "pronunciation-errors": ("analyze_pronunciation_errors", {"ref_text": "ref_text", "limit": "limit"}),
+    "error-rate-percentiles": ("analyze_error_rate_percentiles", {
+        "sex": "sex", "nationality": "nationality", "level": "level", "type": "text_type",
+        "group_by": "group_by", "ref_text": "ref_text"
+    }),
+    "phoneme-confusion": ("analyze_phoneme_confusion", {
+        "nationality": "nationality", "level": "level", "sex": "sex", "type": "text_type", "top": "top"
+    }),
+    "error-positions": ("analyze_error_positions", {"ref_text": "ref_text", "limit": "limit"})
+}
+# 개별 API와 같은 정수 파라미터 범위
+BATCH_RANGES = {
+    ("text-difficulty", "limit"): (1, 100),
+    ("text-difficulty-ranking", "limit"): (1, 200),
+    ("pronunciation-errors", "limit"): (1, 200),
+    ("phoneme-confusion", "top"): (1, 200),
+    ("error-positions", "limit"): (1, 100)
+}
+BATCH_MAX_ANALYSES = 20
+
+class BatchAnalysis(BaseModel):
+    name: str
+    params: Optional[Dict[str, Any]] = None
+
+class BatchRequest(BaseModel):
+    analyses: List[BatchAnalysis]
+
+def _batch_call(position: int, analysis: BatchAnalysis):
+    """배치 항목을 (서비스 메서드명, 인자)로 변환 (잘못된 이름/파라미터는 400)"""
+    if analysis.name not in BATCH_ANALYSES:
+        raise HTTPException(status_code=400, detail=f"{position}번 항목: 지원하지 않는 분석입니다: {analysis.name}")
+    method_name, arguments = BATCH_ANALYSES[analysis.name]
+    
+    kwargs = {}
+    for param, value in (analysis.params or {}).items():
+        if param not in arguments:
+            raise HTTPException(status_code=400, detail=f"{position}번 항목: '{analysis.name}'에서 지원하지 않는 파라미터입니다: {param}")
+        value_range = BATCH_RANGES.get((analysis.name, param))
+        if value_range is not None:
+            if not isinstance(value, int) or isinstance(value, bool) or not value_range[0] <= value <= value_range[1]:
+                raise HTTPException(status_code=400, detail=f"{position}번 항목: {param}은 {value_range[0]}-{value_range[1]} 사이의 값이어야 합니다.")
+        elif value is not None and not isinstance(value, str):
+            raise HTTPException(status_code=400, detail=f"{position}번 항목: {param}은 문자열이어야 합니다.")
+        kwargs[arguments[param]] = value
+    
+    if analysis.name == "pronunciation-errors" and not kwargs.get("ref_text"):
+        raise HTTPException(status_code=400, detail=f"{position}번 항목: ref_text가 필요합니다.")
+    if analysis.name == "error-rate-percentiles" and kwargs.get("group_by") not in (None, "sex", "nationality", "level", "type"):
+        raise HTTPException(status_code=400, detail=f"{position}번 항목: group_by는 sex, nationality, level, type 중 하나여야 합니다.")
+    return method_name, kwargs
+
+@router.post("/batch")
+async def run_batch_analyses(request: BatchRequest):
+    """
+    배치 분석 API
+    
+    - 여러 분석을 한 요청으로 실행 (대시보드 초기 로딩용)
+    - 모든 분석이 같은 스냅샷에서 계산되어 결과가 서로 일관됨
+    - 발음 오류 분석 항목은 msearch 한 번으로 조회
+    - 결과는 요청 순서대로 반환하며, 항목별 실패는 해당 항목의 error로 표시
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    if not request.analyses or len(request.analyses) > BATCH_MAX_ANALYSES:
+        raise HTTPException(status_code=400, detail=f"analyses는 1-{BATCH_MAX_ANALYSES}개여야 합니다.")
+    
+    calls = [_batch_call(position, analysis) for position, analysis in enumerate(request.analyses)]
+    
+    try:
+        results = await insight_service.run(insight_service.run_batch, calls)
+        
+        items = []
+        for analysis, result in zip(request.analyses, results):
+            if "error" in result:
+                items.append({"name": analysis.name, "success": False, "error": result["error"]})
+            else:
+                items.append({"name": analysis.name, "success": True, "data": result})
+        
+        failed = sum(1 for item in items if not item["success"])
+        return await _respond({
+            "success": True,
+            "data": items,
+            "message": f"배치 분석이 완료되었습니다. ({len(items) - failed}건 성공, {failed}건 실패)"
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+class CohortFilter(BaseModel):
+    sex: Optional[str] = None
+    nationality: Optional[str] = None
+    level: Optional[str] = None
+    type: Optional[str] = None
+    ref_text: Optional[str] = None
+
+class CompareRequest(BaseModel):
+    group_a: CohortFilter
+    group_b: CohortFilter
+    resamples: int = 10000
+    confidence: float = 0.95
+    seed: int = 0
+
+def _cohort_filters(cohort: CohortFilter) -> Dict[str, Optional[str]]:
+    return {
+        "sex": cohort.sex, "nationality": cohort.nationality, "level": cohort.level,
+        "type": cohort.type, "ref": cohort.ref_text
+    }
+
+@router.post("/compare")
+async def compare_cohorts(request: CompareRequest):
+    """
+    코호트 비교 API
+    
+    - 두 필터 조건(성별/국적/레벨/타입/참조 텍스트) 그룹의 평균 오류율 차이 (A - B)
+    - 부트스트랩 백분위 신뢰구간과 표준오차 (재표본 추출은 한 번의 벡터화 행렬 계산)
+    - 효과 크기 (Cohen's d)와 유의성 인사이트 제공
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    if request.resamples < 100 or request.resamples > 20000:
+        raise HTTPException(status_code=400, detail="resamples는 100-20000 사이의 값이어야 합니다.")
+    
+    if not 0.5 <= request.confidence < 1:
+        raise HTTPException(status_code=400, detail="confidence는 0.5 이상 1 미만이어야 합니다.")
+    
+    try:
+        result = await insight_service.run(
+            insight_service.compare_cohorts,
+            group_a=_cohort_filters(request.group_a),
+            group_b=_cohort_filters(request.group_b),
+            resamples=request.resamples,
+            confidence=request.confidence,
+            seed=request.seed
+        )
+        
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        return await _respond({
+            "success": True,
+            "data": result,
+            "message": "코호트 비교 분석이 완료되었습니다."
+        })
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
 
+@router.get("/aggregates/consistency")
+async def get_aggregates_consistency():
+    """
+    코호트 집계 일관성 검사 API
+    
+    - 증분 유지 중인 성별×국적×레벨×타입 셀 통계를 인덱스 전체 재계산 결과와 비교
+    - 불일치 셀 수와 일부 불일치 샘플 제공
+    """
+    if not insight_service:
+        raise HTTPException(status_code=500, detail="InsightService가 초기화되지 않았습니다.")
+    
+    try:
+        result = await insight_service.run(insight_service.check_aggregates_consistency)
+        
+        return await _respond({
+            "success": True,
+            "data": result,
+            "message": "코호트 집계가 일관됩니다." if result["consistent"] else "코호트 집계 불일치가 발견되었습니다."
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"검사 중 오류가 발생했습니다: {str(e)}")
+
 @router.get("/health")
 async def health_check():
     """
     인사이트 서비스 상태 확인 API
     """
     if not insight_service:
-        return {
+        return await _respond({
             "success": False,
             "message": "InsightService가 초기화되지 않았습니다.",
             "elasticsearch_connected": False
-        }
+        })
     
     try:
         # Elasticsearch 연결 상태 확인
-        es_connected = insight_service.es.ping()
-        return {
+        es_connected = await insight_service.ping_async()
+        return await _respond({
             "success": True,
             "message": "인사이트 서비스가 정상적으로 작동 중입니다.",
             "elasticsearch_connected": es_connected,
-            "index_name": insight_service.index_name
-        }
+            "backend": insight_service.backend.name,
+            "index_name": insight_service.index_name,
+            "cache": insight_service.cache_stats()
+        })
     except Exception as e:
-        return {
+        return await _respond({
             "success": False,
             "message": f"서비스 상태 확인 중 오류가 발생했습니다: {str(e)}",
             "elasticsearch_connected": False
-        } 
\ No newline at end of file
+        }) 
\ No newline at end of file
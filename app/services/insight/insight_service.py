@@ -1,104 +1,379 @@
-from elasticsearch import Elasticsearch
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple, Iterator, AsyncIterator, Set
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from collections import defaultdict, Counter
 import statistics
+import numpy as np
+from .snapshot import InsightSnapshot, SOURCE_FIELDS
+from . import aggregations
+from .cache import VersionedResultCache, cached_analysis, cached_async_analysis
+from .aggregates import CohortAggregates, COHORT_DIMENSIONS, is_learner_document
+from .sketch import compression_for
+from .phoneme import PhonemeIndex
+from . import alignment
+from .ref_index import RefTextIndex
+from .per_rank import PerRankIndex
+from . import difficulty
+from . import bootstrap
+from .cube import Cube
+from .backend import InsightBackend, create_backend
+from .records import PronunciationRecord
 
 # 환경변수 로드
 load_dotenv()
 
+# 스냅샷 갱신 확인 주기 (초)
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("INSIGHT_SNAPSHOT_REFRESH_SECONDS", "30"))
+# 분석 결과 캐시 최대 항목 수
+CACHE_SIZE = int(os.getenv("INSIGHT_CACHE_SIZE", "256"))
+# 분석 계산을 실행하는 스레드 수 (이벤트 루프 밖에서 동시에 실행되는 분석 수 상한)
+ANALYSIS_WORKERS = int(os.getenv("INSIGHT_ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 분위수 스케치 허용 순위 오차 (0.01 = 1%)
+SKETCH_COMPRESSION = compression_for(float(os.getenv("INSIGHT_SKETCH_RANK_ERROR", "0.01")))
+# 발음 오류 조회 시 문서를 가져올 후보 ref 최대 수
+REF_CANDIDATES = int(os.getenv("INSIGHT_REF_CANDIDATES", "10"))
+# 발음 오류 스트리밍 응답에서 한 번에 가져오는 샘플 문서 수
+STREAM_PAGE_SIZE = int(os.getenv("INSIGHT_STREAM_PAGE_SIZE", "50"))
+# 발음 오류 요약 계산에 필요한 필드 (ans/rec 음소 문자열 제외)와 샘플 필드
+PRONUNCIATION_SUMMARY_FIELDS = ["error", "C", "S", "I", "D", "per", "sex", "nationality", "level"]
+PRONUNCIATION_SAMPLE_FIELDS = ["ref", "ans", "rec", "error", "C", "S", "I", "D", "sex", "nationality", "level", "type"]
+# 코호트 비교 부트스트랩 대표값(구간) 최대 수
+COMPARE_BINS = int(os.getenv("INSIGHT_COMPARE_BINS", "128"))
+# 코호트 비교 필터 필드 (ref는 참조 텍스트)
+COMPARE_FIELDS = ("sex", "nationality", "level", "type", "ref")
+# 코호트 집계 저장 경로 (빈 값이면 저장하지 않음)
+AGGREGATES_PATH = os.getenv(
+    "INSIGHT_AGGREGATES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "insight_aggregates.json")
+)
+
 class InsightService:
-    def __init__(self):
-        es_url = os.getenv("ELASTICSEARCH_URL")
-        es_username = os.getenv("ES_USERNAME")
-        es_password = os.getenv("ES_PASSWORD")
-        self.index_name = os.getenv("ELASTICSEARCH_INDEX_NAME")
-        
-        if not all([es_url, es_username, es_password, self.index_name]):
-            raise ValueError("필수 환경변수가 설정되지 않았습니다.")
-        
-        self.es = Elasticsearch(es_url, basic_auth=(es_username, es_password))
-        
-        if not self.es.ping():
-            raise ConnectionError("Elasticsearch 연결에 실패했습니다.")
+    def __init__(self, backend: Optional[InsightBackend] = None):
+        # 원본 데이터 백엔드 (지정하지 않으면 INSIGHT_BACKEND: elasticsearch, embedded, auto)
+        self.backend = backend if backend is not None else create_backend()
+        self.index_name = self.backend.index_name
+        
+        # CPU 작업용 제한된 실행기
+        self._executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="insight-analysis")
+        
+        # 컬럼형 스냅샷과 백그라운드 갱신 스레드 (준비 전에는 백엔드 집계로 응답)
+        self._snapshot: Optional[InsightSnapshot] = None
+        # 스냅샷 생성 직렬화 (백그라운드 갱신과 최초 요청 시 생성)
+        self._snapshot_lock = threading.Lock()
+        # 배치 분석 중 스레드별로 고정한 스냅샷/집계/색인 참조와 결과 캐시 버전
+        self._pinned = threading.local()
+        # 스냅샷과 함께 갱신되는 음소 오류 이벤트 색인
+        self._phoneme_index: Optional[PhonemeIndex] = None
+        # ref 고유값 자모 n-gram 색인 (발음 오류 조회 시 부분/오타 일치 후보 검색)
+        self._ref_index: Optional[RefTextIndex] = None
+        # 참조 텍스트 × 코호트별 정렬된 per 배열 (학습자 백분위 조회)
+        self._per_rank_index: Optional[PerRankIndex] = None
+        
+        # 증분 유지되는 코호트 집계 (저장된 집계가 현재 인덱스 워터마크와 같으면 재계산 없이 사용)
+        self._aggregates: Optional[CohortAggregates] = self._load_aggregates()
+        
+        # 분석 결과 캐시와 로컬 쓰기 세대 (store_error_pattern 저장 시 증가)
+        self._cache = VersionedResultCache(maxsize=CACHE_SIZE)
+        self._write_generation = 0
+        # 쓰기 알림 반영과 스냅샷 갱신 시 집계/색인 교체를 직렬화, 집계 워터마크 이후 반영한 로컬 쓰기 위치(_seq_no)
+        self._write_lock = threading.Lock()
+        self._local_seq_nos: Set[int] = set()
+        self.backend.add_write_listener(self._on_index_write)
+        
+        self._refresher = threading.Thread(target=self._refresh_loop, name="insight-snapshot-refresher", daemon=True)
+        self._refresher.start()
+    
+    async def run(self, method: Callable, *args, **kwargs) -> Any:
+        """동기 분석 메서드를 분석 실행기에서 실행 (이벤트 루프를 막지 않음)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+    
+    async def ping_async(self) -> bool:
+        """백엔드 연결 확인"""
+        return await self.backend.ping_async()
+    
+    def _execute_aggregation(self, build_query: Callable[[Dict[str, str]], Dict]) -> Optional[Dict]:
+        """백엔드 집계 실행 (지원하지 않거나 실패 시 None)"""
+        return self.backend.aggregate(build_query)
+    
+    def _iter_documents(self, filters: Optional[Dict] = None, source: Optional[List[str]] = None) -> Iterator[Dict]:
+        """필터에 맞는 문서를 백엔드에서 순회 (_source 필드 지정 가능)"""
+        return self.backend.iter_documents(filters=filters, source=source)
+    
+    def _index_version(self) -> tuple:
+        """원본 데이터 변경 여부 판단용 버전"""
+        return self.backend.version()
+    
+    def _current_version(self) -> tuple:
+        """스냅샷 버전 (인덱스 버전 + 로컬 쓰기 세대)"""
+        return (self._index_version(), self._write_generation)
+    
+    def _dataset_version(self) -> Any:
+        """결과 캐시 버전 (스냅샷 버전 + 로컬 쓰기 세대, 코호트 집계는 쓰기 즉시 반영되므로)"""
+        pinned = self._pinned_state()
+        if pinned is not None:
+            return pinned["version"]
+        snapshot = self._snapshot
+        return (snapshot.version if snapshot is not None else None, self._write_generation)
+    
+    def _pinned_state(self) -> Optional[Dict[str, Any]]:
+        """현재 스레드에서 실행 중인 배치가 고정한 상태 (배치 밖이면 None)"""
+        return getattr(self._pinned, "state", None)
+    
+    def _allow_stale_results(self) -> bool:
+        """버전이 다른 캐시 결과 사용 여부 (배치는 고정한 버전의 결과만 사용)"""
+        return self._pinned_state() is None
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """결과 캐시 상태 (항목 수, 적중/만료 적중/미스 횟수)"""
+        return self._cache.stats()
     
-    def _execute_search(self, query: Dict) -> List[Dict]:
-        """Elasticsearch 검색 실행"""
+    def _on_index_write(self, documents: List[Dict]) -> None:
+        """es_client 쓰기 알림 - 새 학습자 문서를 코호트 집계와 색인에 증분 반영하고 집계 워터마크를 전진
+        
+        쓰기마다 인덱스 통계를 조회하지 않고, 쓰기 응답의 _seq_no로 워터마크를 옮긴다. 같은 인덱스의 발음 오류
+        단어 문서는 집계 대상이 아니므로 쓰기 위치만 반영한다. 학습자 문서 갱신(updated, 이전 값을 알 수 없음)이나
+        외부 쓰기로 위치가 비면 워터마크가 뒤처진 채로 남아 다음 스냅샷 갱신 시 재계산으로 맞춘다.
+        """
+        with self._write_lock:
+            aggregates = self._aggregates
+            watermark = aggregates.version if aggregates is not None else None
+            # 방금 교체한 스냅샷에 이미 포함된 쓰기는 다시 더하지 않음
+            documents = [doc for doc in documents if not self.backend.includes(watermark, doc.get("_seq_no"))]
+            learner = [doc for doc in documents if is_learner_document(doc["_source"])]
+            created = [doc["_source"] for doc in learner if doc.get("result") == "created"]
+            
+            if aggregates is not None:
+                aggregates.add_documents(created)
+            per_rank_index = self._per_rank_index
+            if per_rank_index is not None:
+                per_rank_index.add(created)
+            ref_index = self._ref_index
+            if ref_index is not None:
+                ref_index.add(doc["_source"]["ref"] for doc in learner)
+            self._write_generation += 1
+            
+            if aggregates is None or aggregates.version is None:
+                return
+            if any(doc.get("result") == "updated" for doc in learner):
+                aggregates.version = None
+                return
+            self._local_seq_nos.update(
+                doc["_seq_no"] for doc in documents
+                if doc.get("result") in ("created", "updated") and doc.get("_seq_no") is not None
+            )
+            aggregates.version = self.backend.advance_watermark(aggregates.version, self._local_seq_nos)
+            self._local_seq_nos = {seq_no for seq_no in self._local_seq_nos
+                                   if not self.backend.includes(aggregates.version, seq_no)}
+    
+    def _load_aggregates(self) -> Optional[CohortAggregates]:
+        """저장된 코호트 집계 로드 (현재 인덱스 워터마크와 다르면 None)"""
+        if not AGGREGATES_PATH:
+            return None
         try:
-            response = self.es.search(index=self.index_name, body=query)
-            return response['hits']['hits']
+            aggregates = CohortAggregates.load(AGGREGATES_PATH, compression=SKETCH_COMPRESSION)
+            if aggregates is not None and aggregates.version == self.backend.watermark(self._index_version()):
+                print(f"[InsightService] 저장된 코호트 집계 로드 - 셀 수: {len(aggregates.cells)}")
+                return aggregates
         except Exception as e:
-            print(f"검색 실행 오류: {e}")
-            return []
+            print(f"코호트 집계 로드 오류: {e}")
+        return None
     
-    def _get_all_data(self, filters: Optional[Dict] = None) -> List[Dict]:
-        """모든 데이터 조회 (필터 적용 가능)"""
-        query = {
-            "query": {
-                "match_all": {}
-            },
-            "size": 10000  # 최대 10,000개 문서 조회
-        }
+    def _save_aggregates(self) -> None:
+        """코호트 집계 저장"""
+        aggregates = self._aggregates
+        if not AGGREGATES_PATH or aggregates is None:
+            return
+        try:
+            aggregates.save(AGGREGATES_PATH)
+        except Exception as e:
+            print(f"코호트 집계 저장 오류: {e}")
+    
+    def _reconcile_aggregates(self, snapshot: InsightSnapshot) -> Optional[CohortAggregates]:
+        """코호트 집계가 스냅샷이 읽은 데이터의 워터마크에 있지 않으면(외부 변경) 스냅샷에서 재계산한 집계 반환
+        
+        로컬 쓰기만 있었다면 증분 반영으로 워터마크가 이미 같으므로 None을 반환한다. 스냅샷의 워터마크를 알 수
+        없으면(스캔 시작 중 쓰기 발생) 재계산한 집계도 워터마크 없이 두어 다음 갱신에서 다시 맞춘다.
+        """
+        watermark = snapshot.watermark
+        current = self._aggregates
+        if current is not None and watermark is not None and current.version == watermark:
+            return None
+        
+        rebuilt = CohortAggregates.from_snapshot(snapshot, version=watermark, compression=SKETCH_COMPRESSION)
+        if current is not None:
+            report = current.diff(rebuilt)
+            if not report["consistent"]:
+                print(f"[InsightService] 코호트 집계 불일치 {report['cell_mismatches']}건 - 재계산 값으로 교체")
+        return rebuilt
+    
+    def _refresh_snapshot(self) -> None:
+        """인덱스 전체를 읽어 스냅샷 재생성
+        
+        코호트 집계와 ref/per 순위 색인은 쓰기 알림으로 증분 유지되므로, 집계가 워터마크에서 뒤처졌을 때
+        (외부 변경)만 스냅샷에서 다시 만든다. 교체는 쓰기 알림과 같은 잠금 안에서 한 번에 한다.
+        """
+        version = self._current_version()
+        snapshot = self.backend.snapshot(SOURCE_FIELDS, version=version)
+        phoneme_index = PhonemeIndex.from_snapshot(snapshot, COHORT_DIMENSIONS)
+        rebuilt = self._reconcile_aggregates(snapshot)
+        ref_index = per_rank_index = None
+        if rebuilt is not None or self._ref_index is None:
+            ref_index = RefTextIndex(snapshot.categories["ref"])
+        if rebuilt is not None or self._per_rank_index is None:
+            per_rank_index = PerRankIndex.from_snapshot(snapshot)
+        
+        with self._write_lock:
+            if rebuilt is not None:
+                self._aggregates = rebuilt
+                self._local_seq_nos = set()
+            if ref_index is not None:
+                self._ref_index = ref_index
+            if per_rank_index is not None:
+                self._per_rank_index = per_rank_index
+            self._phoneme_index = phoneme_index
+            self._snapshot = snapshot
+        if rebuilt is not None:
+            self._save_aggregates()
+        print(f"[InsightService] 스냅샷 갱신 완료 - 문서 수: {snapshot.size}")
+    
+    def _refresh_loop(self) -> None:
+        """인덱스 변경 시 스냅샷을 백그라운드에서 주기적으로 갱신 (시작 직후 최초 생성, 로컬 쓰기는 다음 주기에 모아 반영)"""
+        while True:
+            try:
+                snapshot = self._snapshot
+                aggregates = self._aggregates
+                if (snapshot is None or snapshot.version != self._current_version()
+                        or aggregates is None or aggregates.version is None):
+                    with self._snapshot_lock:
+                        self._refresh_snapshot()
+                aggregates = self._aggregates
+                if aggregates is not None and aggregates.dirty:
+                    self._save_aggregates()
+            except Exception as e:
+                print(f"스냅샷 갱신 오류: {e}")
+            time.sleep(SNAPSHOT_REFRESH_SECONDS)
+    
+    def _get_snapshot(self) -> InsightSnapshot:
+        """현재 스냅샷 반환 (없으면 즉시 생성)"""
+        pinned = self._pinned_state()
+        if pinned is not None:
+            return pinned["snapshot"]
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._snapshot_lock:
+                if self._snapshot is None:
+                    self._refresh_snapshot()
+                snapshot = self._snapshot
+        return snapshot
+    
+    def _get_aggregates(self) -> CohortAggregates:
+        """현재 코호트 집계 반환 (없으면 스냅샷 생성과 함께 재계산)"""
+        pinned = self._pinned_state()
+        if pinned is not None:
+            return pinned["aggregates"]
+        if self._aggregates is None:
+            self._get_snapshot()
+        return self._aggregates
+    
+    def _get_phoneme_index(self) -> PhonemeIndex:
+        """현재 음소 오류 이벤트 색인 (없으면 스냅샷 생성과 함께 구성)"""
+        pinned = self._pinned_state()
+        if pinned is not None:
+            return pinned["phoneme_index"]
+        if self._phoneme_index is None:
+            self._get_snapshot()
+        return self._phoneme_index
+    
+    def _get_ref_index(self) -> RefTextIndex:
+        """현재 ref 자모 n-gram 색인 (없으면 스냅샷 생성과 함께 구성)"""
+        pinned = self._pinned_state()
+        if pinned is not None:
+            return pinned["ref_index"]
+        if self._ref_index is None:
+            self._get_snapshot()
+        return self._ref_index
+    
+    def _get_per_rank_index(self) -> PerRankIndex:
+        """현재 per 순위 색인 (없으면 스냅샷 생성과 함께 구성)"""
+        pinned = self._pinned_state()
+        if pinned is not None:
+            return pinned["per_rank_index"]
+        if self._per_rank_index is None:
+            self._get_snapshot()
+        return self._per_rank_index
+    
+    def check_aggregates_consistency(self) -> Dict[str, Any]:
+        """증분 유지 중인 코호트 집계를 인덱스 전체 재계산 결과와 비교"""
+        aggregates = self._get_aggregates()
+        recomputed = CohortAggregates.from_documents(
+            self._iter_documents(source=SOURCE_FIELDS), compression=SKETCH_COMPRESSION
+        )
+        return aggregates.diff(recomputed)
+    
+    def _capture_state(self) -> Dict[str, Any]:
+        """현재 스냅샷, 코호트 집계, 색인 참조와 결과 캐시 버전을 한 번에 읽음 (교체 중간 상태를 보지 않도록 쓰기 잠금 안에서)"""
+        self._get_snapshot()
+        with self._write_lock:
+            return {
+                "snapshot": self._snapshot,
+                "aggregates": self._aggregates,
+                "phoneme_index": self._phoneme_index,
+                "ref_index": self._ref_index,
+                "per_rank_index": self._per_rank_index,
+                "version": (self._snapshot.version, self._write_generation)
+            }
+    
+    def run_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """여러 분석을 같은 스냅샷에서 순서대로 실행하고 결과를 요청 순서대로 반환
+
+        시작 시 스냅샷/집계/색인 참조를 한 번 고정해 모든 분석에 쓰므로 스냅샷 잠금을 잡지 않고도
+        백그라운드 갱신이 중간에 데이터를 바꾸지 않는다. 캐시 결과는 고정한 버전과 같을 때만 사용한다.
+        발음 오류 조회는 msearch 한 번으로 모아 ES 왕복을 줄인다. 항목별 예외는 해당 결과의 error로 반환한다.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
         
-        if filters:
-            must_clauses = []
-            for field, value in filters.items():
-                if value is not None:
-                    must_clauses.append({"term": {field: value}})
+        self._pinned.state = self._capture_state()
+        try:
+            lookups = [
+                (position, kwargs) for position, (name, kwargs) in enumerate(calls)
+                if name == "analyze_pronunciation_errors"
+            ]
+            if lookups:
+                try:
+                    summaries = self._pronunciation_errors_msearch([kwargs for _, kwargs in lookups])
+                    for (position, _), summary in zip(lookups, summaries):
+                        results[position] = summary
+                except Exception as e:
+                    print(f"배치 발음 오류 조회 오류: {e}")
             
-            if must_clauses:
-                query["query"] = {
-                    "bool": {
-                        "must": must_clauses
-                    }
-                }
-        
-        hits = self._execute_search(query)
-        return [hit['_source'] for hit in hits]
+            for position, (name, kwargs) in enumerate(calls):
+                if results[position] is not None:
+                    continue
+                try:
+                    results[position] = getattr(self, name)(**kwargs)
+                except Exception as e:
+                    print(f"배치 분석 오류 ({name}): {e}")
+                    results[position] = {"error": f"분석 중 오류가 발생했습니다: {str(e)}"}
+        finally:
+            self._pinned.state = None
+        return results
     
+    @cached_analysis
     def analyze_gender_performance(self, level: Optional[str] = None, nationality: Optional[str] = None) -> Dict[str, Any]:
         """성별별 발음 성과 분석"""
-        filters = {}
-        if level:
-            filters['level'] = level
-        if nationality:
-            filters['nationality'] = nationality
+        gender_stats = None
+        if self._aggregates is None:
+            gender_stats = self._gender_stats_from_aggregations(level, nationality)
+        if gender_stats is None:
+            gender_stats = self._gender_stats_from_cohorts(level, nationality)
         
-        data = self._get_all_data(filters)
-        
-        male_data = [d for d in data if d.get('sex') == 'M']
-        female_data = [d for d in data if d.get('sex') == 'F']
-        
-        def calculate_stats(gender_data):
-            if not gender_data:
-                return {
-                    "count": 0,
-                    "avg_error_rate": 0,
-                    "csid_distribution": {"C": 0, "S": 0, "I": 0, "D": 0},
-                    "level_distribution": {}
-                }
-            
-            error_rates = [d.get('per', 0) for d in gender_data if d.get('per') is not None]
-            csid_totals = {"C": 0, "S": 0, "I": 0, "D": 0}
-            level_counts = Counter()
-            
-            for d in gender_data:
-                for key in csid_totals:
-                    csid_totals[key] += d.get(key, 0)
-                level_counts[d.get('level')] += 1
-            
-            return {
-                "count": len(gender_data),
-                "avg_error_rate": statistics.mean(error_rates) if error_rates else 0,
-                "median_error_rate": statistics.median(error_rates) if error_rates else 0,
-                "std_error_rate": statistics.stdev(error_rates) if len(error_rates) > 1 else 0,
-                "csid_distribution": csid_totals,
-                "level_distribution": dict(level_counts)
-            }
-        
-        male_stats = calculate_stats(male_data)
-        female_stats = calculate_stats(female_data)
+        male_stats, female_stats = gender_stats
         
         return {
             "male": male_stats,
@@ -109,59 +384,95 @@ class InsightService:
             }
         }
     
+    def _gender_stats_from_cohorts(self, level: Optional[str], nationality: Optional[str]) -> Tuple[Dict, Dict]:
+        """코호트 집계 기반 성별별 통계 (남성, 여성)"""
+        aggregates = self._get_aggregates()
+        cube = aggregates.cube().slice(level=level or None, nationality=nationality or None)
+        medians = aggregates.group_medians('sex', level=level or None, nationality=nationality or None)
+        
+        def calculate_stats(sex):
+            sex_cube = cube.slice(sex=sex)
+            stats = sex_cube.total()
+            if not stats["count"]:
+                return self._empty_gender_stats()
+            
+            return {
+                "count": stats["count"],
+                "avg_error_rate": stats["avg"],
+                "median_error_rate": medians.get(sex, 0),
+                "std_error_rate": stats["std"],
+                "csid_distribution": stats["csid"],
+                "level_distribution": sex_cube.value_counts('level')
+            }
+        
+        return calculate_stats('M'), calculate_stats('F')
+    
+    def _gender_stats_from_aggregations(self, level: Optional[str], nationality: Optional[str]) -> Optional[Tuple[Dict, Dict]]:
+        """ES 집계 기반 성별별 통계 (남성, 여성), 실패 시 None"""
+        response = self._execute_aggregation(
+            lambda fields: aggregations.gender_performance_query(fields, level, nationality)
+        )
+        if response is None:
+            return None
+        
+        buckets = aggregations.parse_buckets(response["aggregations"]["by_sex"])
+        
+        def calculate_stats(sex):
+            bucket = buckets.get(sex)
+            if not bucket:
+                return self._empty_gender_stats()
+            
+            per_stats = aggregations.parse_per_stats(bucket)
+            return {
+                "count": bucket["doc_count"],
+                "avg_error_rate": per_stats["avg"],
+                "median_error_rate": per_stats["median"],
+                "std_error_rate": per_stats["std"],
+                "csid_distribution": aggregations.parse_csid(bucket),
+                "level_distribution": aggregations.parse_level_distribution(bucket["levels"])
+            }
+        
+        return calculate_stats('M'), calculate_stats('F')
+    
+    @staticmethod
+    def _empty_gender_stats() -> Dict[str, Any]:
+        return {
+            "count": 0,
+            "avg_error_rate": 0,
+            "csid_distribution": {"C": 0, "S": 0, "I": 0, "D": 0},
+            "level_distribution": {}
+        }
+    
+    @cached_analysis
     def analyze_nationality_performance(self, nationality: Optional[str] = None) -> Dict[str, Any]:
         """국적별 발음 특성 분석"""
-        data = self._get_all_data()
+        aggregates = self._get_aggregates()
         
         if nationality:
             # 특정 국적 분석
-            nationality_data = [d for d in data if d.get('nationality') == nationality]
+            cube = aggregates.cube().slice(nationality=nationality)
+            stats = cube.total()
             
-            if not nationality_data:
+            if not stats["count"]:
                 return {"error": f"국적 '{nationality}' 데이터를 찾을 수 없습니다."}
             
-            error_rates = [d.get('per', 0) for d in nationality_data if d.get('per') is not None]
-            csid_totals = {"C": 0, "S": 0, "I": 0, "D": 0}
-            level_counts = Counter()
-            error_patterns = Counter()
-            
-            for d in nationality_data:
-                for key in csid_totals:
-                    csid_totals[key] += d.get(key, 0)
-                level_counts[d.get('level')] += 1
-                if d.get('error'):
-                    error_patterns[d.get('error')] += 1
-            
             return {
                 "nationality": nationality,
-                "count": len(nationality_data),
-                "avg_error_rate": statistics.mean(error_rates) if error_rates else 0,
-                "median_error_rate": statistics.median(error_rates) if error_rates else 0,
-                "csid_distribution": csid_totals,
-                "level_distribution": dict(level_counts),
-                "common_errors": dict(error_patterns.most_common(10))
+                "count": stats["count"],
+                "avg_error_rate": stats["avg"],
+                "median_error_rate": aggregates.median(nationality=nationality),
+                "csid_distribution": stats["csid"],
+                "level_distribution": cube.value_counts('level'),
+                "common_errors": aggregates.top_errors(10, nationality=nationality)
             }
         else:
             # 모든 국적 비교 분석
-            nationality_stats = defaultdict(lambda: {
-                "data": [],
-                "csid_totals": {"C": 0, "S": 0, "I": 0, "D": 0}
-            })
-            
-            for d in data:
-                nat = d.get('nationality')
-                if nat:
-                    nationality_stats[nat]["data"].append(d)
-                    for key in nationality_stats[nat]["csid_totals"]:
-                        nationality_stats[nat]["csid_totals"][key] += d.get(key, 0)
-            
             result = {}
-            for nat, stats in nationality_stats.items():
-                error_rates = [d.get('per', 0) for d in stats["data"] if d.get('per') is not None]
+            for nat, stats in aggregates.cube().groups('nationality').items():
                 result[nat] = {
-                    "count": len(stats["data"]),
-                    "avg_error_rate": statistics.mean(error_rates) if error_rates else 0,
-                    "csid_distribution": stats["csid_totals"]
+                    "count": stats["count"],
+                    "avg_error_rate": stats["avg"],
+                    "csid_distribution": stats["csid"]
                 }
             
             # 국적별 성과 랭킹
@@ -175,53 +486,37 @@ class InsightService:
                 }
             }
     
+    @cached_analysis
     def analyze_level_performance(self, level: Optional[str] = None) -> Dict[str, Any]:
         """레벨별 성과 분석"""
-        data = self._get_all_data()
+        aggregates = self._get_aggregates()
+        cube = aggregates.cube()
         
         if level:
             # 특정 레벨 분석
-            level_data = [d for d in data if d.get('level') == level]
+            stats = cube.slice(level=level).total()
             
-            if not level_data:
+            if not stats["count"]:
                 return {"error": f"레벨 '{level}' 데이터를 찾을 수 없습니다."}
             
-            error_rates = [d.get('per', 0) for d in level_data if d.get('per') is not None]
-            csid_totals = {"C": 0, "S": 0, "I": 0, "D": 0}
-            
-            for d in level_data:
-                for key in csid_totals:
-                    csid_totals[key] += d.get(key, 0)
-            
             return {
                 "level": level,
-                "count": len(level_data),
-                "avg_error_rate": statistics.mean(error_rates) if error_rates else 0,
-                "median_error_rate": statistics.median(error_rates) if error_rates else 0,
-                "csid_distribution": csid_totals
+                "count": stats["count"],
+                "avg_error_rate": stats["avg"],
+                "median_error_rate": aggregates.median(level=level),
+                "csid_distribution": stats["csid"]
             }
         else:
             # 모든 레벨 비교 분석
-            level_stats = defaultdict(lambda: {
-                "data": [],
-                "csid_totals": {"C": 0, "S": 0, "I": 0, "D": 0}
-            })
-            
-            for d in data:
-                lvl = d.get('level')
-                if lvl:
-                    level_stats[lvl]["data"].append(d)
-                    for key in level_stats[lvl]["csid_totals"]:
-                        level_stats[lvl]["csid_totals"][key] += d.get(key, 0)
+            medians = aggregates.group_medians('level')
             
             result = {}
-            for lvl, stats in level_stats.items():
-                error_rates = [d.get('per', 0) for d in stats["data"] if d.get('per') is not None]
+            for lvl, stats in cube.groups('level').items():
                 result[lvl] = {
-                    "count": len(stats["data"]),
-                    "avg_error_rate": statistics.mean(error_rates) if error_rates else 0,
-                    "median_error_rate": statistics.median(error_rates) if error_rates else 0,
-                    "csid_distribution": stats["csid_totals"]
+                    "count": stats["count"],
+                    "avg_error_rate": stats["avg"],
+                    "median_error_rate": medians.get(lvl, 0),
+                    "csid_distribution": stats["csid"]
                 }
             
             return {
@@ -240,30 +535,31 @@ class InsightService:
             "improvement_rate": error_rates[0] - error_rates[-1] if len(error_rates) > 1 else 0
         }
     
+    @cached_analysis
     def analyze_csid_patterns(self, sex: Optional[str] = None, nationality: Optional[str] = None, level: Optional[str] = None) -> Dict[str, Any]:
         """CSID 오류 패턴 분석"""
-        filters = {}
-        if sex:
-            filters['sex'] = sex
-        if nationality:
-            filters['nationality'] = nationality
-        if level:
-            filters['level'] = level
-        
-        data = self._get_all_data(filters)
+        response = None
+        if self._aggregates is None:
+            response = self._execute_aggregation(
+                lambda fields: aggregations.csid_patterns_query(
+                    fields, {"sex": sex, "nationality": nationality, "level": level}
+                )
+            )
+        
+        if response is not None:
+            sample_count = response["total"]
+            csid_totals = aggregations.parse_csid(response["aggregations"])
+        else:
+            stats = self._get_aggregates().cube().slice(
+                sex=sex or None, nationality=nationality or None, level=level or None
+            ).total()
+            sample_count = stats["count"]
+            csid_totals = stats["csid"]
         
-        if not data:
+        if not sample_count:
             return {"error": "조건에 맞는 데이터를 찾을 수 없습니다."}
         
-        csid_totals = {"C": 0, "S": 0, "I": 0, "D": 0}
-        total_errors = 0
-        
-        for d in data:
-            for key in csid_totals:
-                value = d.get(key, 0)
-                csid_totals[key] += value
-                if key != "C":  # Correct는 오류가 아님
-                    total_errors += value
+        total_errors = csid_totals["S"] + csid_totals["I"] + csid_totals["D"]  # Correct는 오류가 아님
         
         # 비율 계산
         total_operations = sum(csid_totals.values())
@@ -276,7 +572,7 @@ class InsightService:
                 error_ratios[key] = (value / total_errors * 100) if total_errors > 0 else 0
         
         return {
-            "sample_count": len(data),
+            "sample_count": sample_count,
             "csid_counts": csid_totals,
             "csid_ratios": csid_ratios,
             "error_distribution": error_ratios,
@@ -285,15 +581,16 @@ class InsightService:
             "accuracy_rate": csid_ratios.get("C", 0)
         }
     
+    @cached_analysis
     def analyze_type_performance(self) -> Dict[str, Any]:
         """타입별 (String vs Word) 성과 분석"""
-        data = self._get_all_data()
-        
-        string_data = [d for d in data if d.get('type') == 'S']
-        word_data = [d for d in data if d.get('type') == 'W']
+        aggregates = self._get_aggregates()
+        type_groups = aggregates.cube().groups('type')
+        medians = aggregates.group_medians('type')
         
-        def calculate_type_stats(type_data, type_name):
-            if not type_data:
+        def calculate_type_stats(type_code, type_name):
+            stats = type_groups.get(type_code)
+            if not stats:
                 return {
                     "type": type_name,
                     "count": 0,
@@ -301,23 +598,16 @@ class InsightService:
                     "csid_distribution": {"C": 0, "S": 0, "I": 0, "D": 0}
                 }
             
-            error_rates = [d.get('per', 0) for d in type_data if d.get('per') is not None]
-            csid_totals = {"C": 0, "S": 0, "I": 0, "D": 0}
-            
-            for d in type_data:
-                for key in csid_totals:
-                    csid_totals[key] += d.get(key, 0)
-            
             return {
                 "type": type_name,
-                "count": len(type_data),
-                "avg_error_rate": statistics.mean(error_rates) if error_rates else 0,
-                "median_error_rate": statistics.median(error_rates) if error_rates else 0,
-                "csid_distribution": csid_totals
+                "count": stats["count"],
+                "avg_error_rate": stats["avg"],
+                "median_error_rate": medians.get(type_code, 0),
+                "csid_distribution": stats["csid"]
             }
         
-        string_stats = calculate_type_stats(string_data, "String")
-        word_stats = calculate_type_stats(word_data, "Word")
+        string_stats = calculate_type_stats('S', "String")
+        word_stats = calculate_type_stats('W', "Word")
         
         return {
             "string_analysis": string_stats,
@@ -329,176 +619,103 @@ class InsightService:
             }
         }
     
-    def analyze_text_difficulty(self, limit: int = 20) -> Dict[str, Any]:
-        """참조 텍스트 난이도 분석"""
-        data = self._get_all_data()
-        
-        text_stats = defaultdict(lambda: {
-            "error_rates": [],
-            "count": 0,
-            "csid_totals": {"C": 0, "S": 0, "I": 0, "D": 0}
-        })
+    @cached_analysis
+    def analyze_text_difficulty(self, limit: int = 20, nationality: Optional[str] = None,
+                                level: Optional[str] = None) -> Dict[str, Any]:
+        """참조 텍스트 난이도 분석 (국적/레벨 필터 선택)"""
+        ranking = self._difficulty_ranking(nationality, level)
         
-        for d in data:
-            ref_text = d.get('ref')
-            if ref_text and ref_text != '왜':  # "왜" 텍스트 제외
-                text_stats[ref_text]["error_rates"].append(d.get('per', 0))
-                text_stats[ref_text]["count"] += 1
-                for key in text_stats[ref_text]["csid_totals"]:
-                    text_stats[ref_text]["csid_totals"][key] += d.get(key, 0)
+        return {
+            "total_unique_texts": len(ranking),
+            "hardest_texts": self._with_text_medians(ranking.page(limit=limit), nationality, level),
+            "easiest_texts": self._with_text_medians(ranking.tail(limit), nationality, level),
+            "difficulty_distribution": ranking.distribution()
+        }
+    
+    def get_text_difficulty_page(self, cursor: Optional[str] = None, limit: int = 50,
+                                 nationality: Optional[str] = None, level: Optional[str] = None) -> Dict[str, Any]:
+        """텍스트 난이도 순위 커서 페이지 (평균 오류율 내림차순, 같으면 텍스트 순)
         
-        # 통계 계산
-        text_difficulty = {}
-        for text, stats in text_stats.items():
-            if stats["count"] >= 2:  # 최소 2개 이상의 샘플이 있는 텍스트만
-                error_rates = stats["error_rates"]
-                text_difficulty[text] = {
-                    "text": text,
-                    "sample_count": stats["count"],
-                    "avg_error_rate": statistics.mean(error_rates),
-                    "median_error_rate": statistics.median(error_rates),
-                    "std_error_rate": statistics.stdev(error_rates) if len(error_rates) > 1 else 0,
-                    "text_length": len(text),
-                    "csid_distribution": stats["csid_totals"]
-                }
+        커서는 마지막 항목의 (평균 오류율, 텍스트)이므로 페이지 사이에 데이터가 바뀌어도
+        항목이 중복되거나 건너뛰지 않고 바뀐 순위 기준으로 이어진다.
+        """
+        try:
+            after = difficulty.decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return {"error": str(e)}
         
-        # 난이도별 정렬
-        sorted_by_difficulty = sorted(text_difficulty.values(), key=lambda x: x["avg_error_rate"], reverse=True)
+        ranking = self._difficulty_ranking(nationality, level)
+        # 다음 페이지 존재 여부를 알기 위해 한 개 더 가져옴
+        entries = ranking.page(after, limit + 1)
+        has_more = len(entries) > limit
+        entries = entries[:limit]
         
         return {
-            "total_unique_texts": len(text_difficulty),
-            "hardest_texts": sorted_by_difficulty[:limit],
-            "easiest_texts": sorted_by_difficulty[-limit:],
-            "difficulty_distribution": {
-                "very_hard": len([t for t in text_difficulty.values() if t["avg_error_rate"] > 0.3]),
-                "hard": len([t for t in text_difficulty.values() if 0.2 < t["avg_error_rate"] <= 0.3]),
-                "medium": len([t for t in text_difficulty.values() if 0.1 < t["avg_error_rate"] <= 0.2]),
-                "easy": len([t for t in text_difficulty.values() if t["avg_error_rate"] <= 0.1])
-            }
+            "total_unique_texts": len(ranking),
+            "texts": self._with_text_medians(entries, nationality, level),
+            "next_cursor": difficulty.encode_cursor(entries[-1]) if has_more else None
         }
     
+    def _difficulty_ranking(self, nationality: Optional[str], level: Optional[str]):
+        """필터가 없으면 증분 유지되는 전체 순위, 있으면 스냅샷에서 계산한 조건별 통계 배열 (결과 캐시에 보관)"""
+        if nationality is None and level is None:
+            return self._get_aggregates().difficulty_ranking()
+        
+        def build():
+            snapshot = self._get_snapshot()
+            mask = snapshot.mask(nationality=nationality, level=level)
+            return difficulty.DifficultyTable.from_cube(Cube.build(snapshot, ("ref",), mask))
+        
+        return self._cache.get_or_compute(
+            ("text_difficulty_table", ("nationality", nationality), ("level", level)),
+            self._dataset_version(),
+            build,
+            allow_stale=self._allow_stale_results()
+        )
+    
+    def _with_text_medians(self, entries: List[Dict[str, Any]], nationality: Optional[str],
+                           level: Optional[str]) -> List[Dict[str, Any]]:
+        """페이지 항목에만 per 중간값 추가 (필터가 없으면 텍스트 스케치, 있으면 스냅샷에서 계산)"""
+        if not entries:
+            return []
+        if nationality is None and level is None:
+            aggregates = self._get_aggregates()
+            return [difficulty.with_median(entry, aggregates.text_median(entry["text"])) for entry in entries]
+        
+        snapshot = self._get_snapshot()
+        codes = [snapshot.code_of("ref", entry["text"]) for entry in entries]
+        mask = snapshot.mask(nationality=nationality, level=level)
+        mask &= np.isin(snapshot.codes["ref"], [code for code in codes if code is not None])
+        medians = snapshot.group_medians("ref", mask)
+        return [difficulty.with_median(entry, medians.get(entry["text"], 0)) for entry in entries]
+    
+    @cached_analysis
     def get_overview(self) -> Dict[str, Any]:
         """전체 지표 개요 - 주요 KPI와 인사이트를 한눈에 제공"""
-        data = self._get_all_data()
+        parts = None
+        if self._aggregates is None:
+            parts = self._overview_parts_from_aggregations()
+        if parts is None:
+            parts = self._overview_parts_from_cohorts()
         
-        if not data:
+        if not parts["total_samples"]:
             return {"error": "분석할 데이터가 없습니다."}
         
-        # 기본 통계
-        total_samples = len(data)
-        error_rates = [d.get('per', 0) for d in data if d.get('per') is not None]
-        overall_avg_error_rate = statistics.mean(error_rates) if error_rates else 0
-        
-        # CSID 전체 통계
-        csid_totals = {"C": 0, "S": 0, "I": 0, "D": 0}
-        for d in data:
-            for key in csid_totals:
-                csid_totals[key] += d.get(key, 0)
+        total_samples = parts["total_samples"]
+        overall_avg_error_rate = parts["overall_avg_error_rate"]
+        csid_totals = parts["csid_totals"]
+        gender_summary = parts["gender_summary"]
+        nationality_summary = parts["nationality_summary"]
+        level_summary = parts["level_summary"]
+        type_summary = parts["type_summary"]
         
         total_operations = sum(csid_totals.values())
         overall_accuracy = (csid_totals["C"] / total_operations * 100) if total_operations > 0 else 0
         
-        # 상위 3개 오류 패턴
-        error_patterns = Counter()
-        for d in data:
-            if d.get('error'):
-                error_patterns[d.get('error')] += 1
-        top_error_patterns = dict(error_patterns.most_common(3))
-        
-        # 성별별 요약
-        male_data = [d for d in data if d.get('sex') == 'M']
-        female_data = [d for d in data if d.get('sex') == 'F']
-        
-        male_error_rates = [d.get('per', 0) for d in male_data if d.get('per') is not None]
-        female_error_rates = [d.get('per', 0) for d in female_data if d.get('per') is not None]
-        
-        gender_summary = {
-            "male": {
-                "count": len(male_data),
-                "avg_error_rate": statistics.mean(male_error_rates) if male_error_rates else 0
-            },
-            "female": {
-                "count": len(female_data),
-                "avg_error_rate": statistics.mean(female_error_rates) if female_error_rates else 0
-            }
-        }
-        
-        # 국적별 요약 (상위 5개)
-        nationality_stats = defaultdict(lambda: {"data": [], "error_rates": []})
-        for d in data:
-            nat = d.get('nationality')
-            if nat:
-                nationality_stats[nat]["data"].append(d)
-                if d.get('per') is not None:
-                    nationality_stats[nat]["error_rates"].append(d.get('per', 0))
-        
-        nationality_summary = {}
-        for nat, stats in nationality_stats.items():
-            if stats["error_rates"]:
-                nationality_summary[nat] = {
-                    "count": len(stats["data"]),
-                    "avg_error_rate": statistics.mean(stats["error_rates"])
-                }
-        
         # 성과 순으로 정렬하여 상위 5개만
         top_nationalities = dict(sorted(nationality_summary.items(), 
                                       key=lambda x: x[1]["avg_error_rate"])[:5])
         
-        # 레벨별 요약
-        level_stats = defaultdict(lambda: {"data": [], "error_rates": []})
-        for d in data:
-            lvl = d.get('level')
-            if lvl:
-                level_stats[lvl]["data"].append(d)
-                if d.get('per') is not None:
-                    level_stats[lvl]["error_rates"].append(d.get('per', 0))
-        
-        level_summary = {}
-        for lvl, stats in level_stats.items():
-            if stats["error_rates"]:
-                level_summary[lvl] = {
-                    "count": len(stats["data"]),
-                    "avg_error_rate": statistics.mean(stats["error_rates"])
-                }
-        
-        # 타입별 요약
-        string_data = [d for d in data if d.get('type') == 'S']
-        word_data = [d for d in data if d.get('type') == 'W']
-        
-        string_error_rates = [d.get('per', 0) for d in string_data if d.get('per') is not None]
-        word_error_rates = [d.get('per', 0) for d in word_data if d.get('per') is not None]
-        
-        type_summary = {
-            "string": {
-                "count": len(string_data),
-                "avg_error_rate": statistics.mean(string_error_rates) if string_error_rates else 0
-            },
-            "word": {
-                "count": len(word_data),
-                "avg_error_rate": statistics.mean(word_error_rates) if word_error_rates else 0
-            }
-        }
-        
-        # 가장 어려운 텍스트 TOP 3
-        text_stats = defaultdict(lambda: {"error_rates": [], "count": 0})
-        for d in data:
-            ref_text = d.get('ref')
-            if ref_text and ref_text != '왜' and d.get('per') is not None:  # "왜" 텍스트 제외
-                text_stats[ref_text]["error_rates"].append(d.get('per', 0))
-                text_stats[ref_text]["count"] += 1
-        
-        text_difficulty = []
-        for text, stats in text_stats.items():
-            if stats["count"] >= 2:  # 최소 2개 이상의 샘플
-                avg_error_rate = statistics.mean(stats["error_rates"])
-                text_difficulty.append({
-                    "text": text,
-                    "avg_error_rate": avg_error_rate,
-                    "sample_count": stats["count"]
-                })
-        
-        hardest_texts = sorted(text_difficulty, key=lambda x: x["avg_error_rate"], reverse=True)[:3]
-        
         # 주요 인사이트 생성
         insights = []
         
@@ -532,7 +749,7 @@ class InsightService:
                 "data_coverage": {
                     "nationalities": len(nationality_summary),
                     "levels": len(level_summary),
-                    "unique_texts": len(text_stats)
+                    "unique_texts": parts["unique_texts"]
                 }
             },
             "csid_overview": {
@@ -544,47 +761,386 @@ class InsightService:
                     "D": (csid_totals["D"] / total_operations * 100) if total_operations > 0 else 0
                 }
             },
-            "top_error_patterns": top_error_patterns,
+            "top_error_patterns": parts["top_error_patterns"],
             "gender_summary": gender_summary,
             "nationality_summary": top_nationalities,
             "level_summary": level_summary,
             "type_summary": type_summary,
-            "hardest_texts": hardest_texts,
+            "hardest_texts": parts["hardest_texts"],
             "key_insights": insights
         }
+    
+    def _overview_parts_from_cohorts(self) -> Dict[str, Any]:
+        """코호트 집계 기반 개요 구성 요소 (셀 수에 비례하는 계산)"""
+        aggregates = self._get_aggregates()
+        cube = aggregates.cube()
+        total = cube.total()
+        
+        def summary(groups, key):
+            stats = groups.get(key)
+            return {
+                "count": stats["count"] if stats else 0,
+                "avg_error_rate": stats["avg"] if stats else 0
+            }
+        
+        def summaries(dimension):
+            # 오류율이 있는 그룹만
+            return {
+                key: {"count": stats["count"], "avg_error_rate": stats["avg"]}
+                for key, stats in cube.groups(dimension).items()
+                if stats["n"]
+            }
+        
+        sex_groups = cube.groups('sex')
+        type_groups = cube.groups('type')
+        
+        # 가장 어려운 텍스트 TOP 3 ("왜" 텍스트 및 오류율 없는 문서 제외)
+        text_stats = {
+            text: stats
+            for text, stats in aggregates.text_groups().items()
+            if text != '왜' and stats["n"]
+        }
+        
+        text_difficulty = []
+        for text, stats in text_stats.items():
+            if stats["n"] >= 2:  # 최소 2개 이상의 샘플
+                text_difficulty.append({
+                    "text": text,
+                    "avg_error_rate": stats["avg"],
+                    "sample_count": stats["n"]
+                })
+        
+        return {
+            "total_samples": total["count"],
+            "overall_avg_error_rate": total["avg"],
+            "csid_totals": total["csid"],
+            "top_error_patterns": aggregates.top_errors(3),
+            "gender_summary": {
+                "male": summary(sex_groups, 'M'),
+                "female": summary(sex_groups, 'F')
+            },
+            "nationality_summary": summaries('nationality'),
+            "level_summary": summaries('level'),
+            "type_summary": {
+                "string": summary(type_groups, 'S'),
+                "word": summary(type_groups, 'W')
+            },
+            "hardest_texts": sorted(text_difficulty, key=lambda x: x["avg_error_rate"], reverse=True)[:3],
+            "unique_texts": len(text_stats)
+        }
+    
+    def _overview_parts_from_aggregations(self) -> Optional[Dict[str, Any]]:
+        """ES 집계 기반 개요 구성 요소 (실패 시 None)"""
+        response = self._execute_aggregation(aggregations.overview_query)
+        if response is None:
+            return None
+        
+        aggs = response["aggregations"]
+        
+        def summary(aggregation):
+            return {
+                item["key"]: {"count": item["count"], "avg_error_rate": item["avg_error_rate"]}
+                for item in aggregations.parse_summary_buckets(aggregation)
+            }
+        
+        def bucket_summary(buckets, key):
+            bucket = buckets.get(key)
+            if not bucket:
+                return {"count": 0, "avg_error_rate": 0}
+            return {
+                "count": bucket["doc_count"],
+                "avg_error_rate": aggregations.parse_per_stats(bucket)["avg"]
+            }
+        
+        sex_buckets = aggregations.parse_buckets(aggs["by_sex"])
+        type_buckets = aggregations.parse_buckets(aggs["by_type"])
+        
+        hardest_texts = [
+            {
+                "text": bucket["key"],
+                "avg_error_rate": aggregations.parse_per_stats(bucket)["avg"],
+                "sample_count": bucket["doc_count"]
+            }
+            for bucket in aggs["texts"]["hardest"]["buckets"]
+        ]
+        
+        return {
+            "total_samples": response["total"],
+            "overall_avg_error_rate": aggregations.parse_per_stats(aggs)["avg"],
+            "csid_totals": aggregations.parse_csid(aggs),
+            "top_error_patterns": {
+                bucket["key"]: bucket["doc_count"] for bucket in aggs["top_errors"]["buckets"]
+            },
+            "gender_summary": {
+                "male": bucket_summary(sex_buckets, 'M'),
+                "female": bucket_summary(sex_buckets, 'F')
+            },
+            "nationality_summary": summary(aggs["by_nationality"]),
+            "level_summary": summary(aggs["by_level"]),
+            "type_summary": {
+                "string": bucket_summary(type_buckets, 'S'),
+                "word": bucket_summary(type_buckets, 'W')
+            },
+            "hardest_texts": hardest_texts,
+            "unique_texts": aggs["texts"]["unique_texts"]["value"]
+        }
 
+    @cached_analysis
+    def analyze_error_rate_percentiles(self, sex: Optional[str] = None, nationality: Optional[str] = None,
+                                       level: Optional[str] = None, text_type: Optional[str] = None,
+                                       group_by: Optional[str] = None, ref_text: Optional[str] = None) -> Dict[str, Any]:
+        """오류율 분위수 분석 - 코호트 또는 참조 텍스트별 중간값/p90/p99"""
+        aggregates = self._get_aggregates()
+        
+        def percentiles(digest):
+            p50, p90, p99 = digest.quantiles([0.5, 0.9, 0.99])
+            return {"n": digest.count, "p50": p50, "p90": p90, "p99": p99}
+        
+        if ref_text:
+            digest = aggregates.text_digest(ref_text)
+            if digest is None or not digest.count:
+                return {"error": f"텍스트 '{ref_text}' 데이터를 찾을 수 없습니다."}
+            return {"ref_text": ref_text, "overall": percentiles(digest)}
+        
+        if group_by is not None and group_by not in COHORT_DIMENSIONS:
+            return {"error": f"group_by는 {', '.join(COHORT_DIMENSIONS)} 중 하나여야 합니다."}
+        
+        filters = {"sex": sex or None, "nationality": nationality or None, "level": level or None, "type": text_type or None}
+        overall = aggregates.cohort_digest(**filters)
+        if not overall.count:
+            return {"error": "조건에 맞는 데이터를 찾을 수 없습니다."}
+        
+        result = {
+            "filters": {key: value for key, value in filters.items() if value},
+            "overall": percentiles(overall)
+        }
+        if group_by:
+            result["groups"] = {
+                value: percentiles(digest)
+                for value, digest in aggregates.group_digests(group_by, **filters).items()
+                if digest.count
+            }
+        return result
+    
+    def compare_cohorts(self, group_a: Dict[str, Optional[str]], group_b: Dict[str, Optional[str]],
+                        resamples: int = 10000, confidence: float = 0.95, seed: int = 0) -> Dict[str, Any]:
+        """코호트 비교 - 두 필터 조건 그룹의 평균 오류율 차이(A - B), 부트스트랩 신뢰구간, 효과 크기"""
+        group_a = {field: value for field, value in group_a.items() if value}
+        group_b = {field: value for field, value in group_b.items() if value}
+        unknown = [field for field in list(group_a) + list(group_b) if field not in COMPARE_FIELDS]
+        if unknown:
+            return {"error": f"지원하지 않는 필터입니다: {', '.join(sorted(set(unknown)))}"}
+        
+        def compute():
+            snapshot = self._get_snapshot()
+            a = snapshot.per_values(snapshot.mask(**group_a))
+            b = snapshot.per_values(snapshot.mask(**group_b))
+            if len(a) < 2 or len(b) < 2:
+                return {"error": f"비교할 데이터가 부족합니다. (A: {len(a)}건, B: {len(b)}건, 그룹마다 2건 이상 필요)"}
+            
+            result = {
+                "group_a": self._compare_group_summary(group_a, a),
+                "group_b": self._compare_group_summary(group_b, b),
+                **bootstrap.mean_difference(a, b, resamples=resamples, confidence=confidence,
+                                            seed=seed, max_bins=COMPARE_BINS)
+            }
+            
+            # 인사이트 생성
+            difference = result["difference"]
+            percent = round(confidence * 100)
+            if difference["ci_lower"] > 0 or difference["ci_upper"] < 0:
+                better = "B" if difference["mean"] > 0 else "A"
+                insights = [f"{percent}% 신뢰구간이 0을 포함하지 않으므로 그룹 {better}의 오류율이 유의하게 낮습니다."]
+            else:
+                insights = [f"{percent}% 신뢰구간이 0을 포함하므로 두 그룹의 오류율 차이가 유의하지 않습니다."]
+            if result["effect_size"]["magnitude"] == "negligible":
+                insights.append("효과 크기가 매우 작아 실질적인 차이는 거의 없습니다.")
+            result["insights"] = insights
+            return result
+        
+        return self._cache.get_or_compute(
+            ("compare_cohorts", tuple(sorted(group_a.items())), tuple(sorted(group_b.items())), resamples, confidence, seed),
+            self._dataset_version(),
+            compute,
+            allow_stale=self._allow_stale_results()
+        )
+    
+    def get_learner_percentile(self, ref_text: str, per: float, sex: Optional[str] = None,
+                               nationality: Optional[str] = None, level: Optional[str] = None) -> Dict[str, Any]:
+        """학습자 백분위 - 같은 참조 텍스트를 발음한 코호트 안에서 학습자 오류율의 위치
+        
+        percentile은 학습자보다 오류율이 높은 비율(같은 값은 절반)로, 높을수록 잘한 것이다.
+        정렬된 셀 배열에서 이진 탐색만 하므로 인덱스를 읽지 않는다.
+        """
+        ref_text = (ref_text or "").strip()
+        if not ref_text:
+            return {"error": "참조 텍스트를 입력해주세요."}
+        
+        cohort = {"sex": sex or None, "nationality": nationality or None, "level": level or None}
+        below, equal, total = self._get_per_rank_index().rank(ref_text, per, **cohort)
+        if not total:
+            return {"error": f"텍스트 '{ref_text}'에 대한 비교 데이터를 찾을 수 없습니다."}
+        
+        above = total - below - equal
+        return {
+            "ref_text": ref_text,
+            "per": per,
+            "cohort": {key: value for key, value in cohort.items() if value},
+            "cohort_size": total,
+            "lower_error_count": below,
+            "same_error_count": equal,
+            "higher_error_count": above,
+            "percentile": (above + equal / 2) / total * 100
+        }
+    
+    @staticmethod
+    def _compare_group_summary(filters: Dict[str, str], values: np.ndarray) -> Dict[str, Any]:
+        return {
+            "filters": filters,
+            "count": len(values),
+            "avg_error_rate": float(values.mean()),
+            "median_error_rate": float(np.median(values)),
+            "std_error_rate": float(values.std(ddof=1))
+        }
+    
+    @cached_analysis
+    def analyze_phoneme_confusion(self, nationality: Optional[str] = None, level: Optional[str] = None,
+                                  sex: Optional[str] = None, text_type: Optional[str] = None,
+                                  top: int = 20) -> Dict[str, Any]:
+        """음소 혼동 분석 - 국적/레벨별 대체 행렬과 삽입/삭제 빈도"""
+        index = self._get_phoneme_index()
+        filters = {"nationality": nationality or None, "level": level or None, "sex": sex or None, "type": text_type or None}
+        
+        groups = [
+            group for group in index.confusion(("nationality", "level"), top=top, **filters)
+            if group["record_count"]
+        ]
+        if not groups:
+            return {"error": "조건에 맞는 데이터를 찾을 수 없습니다."}
+        
+        return {
+            "filters": {key: value for key, value in filters.items() if value},
+            "phonemes": index.phonemes,
+            "groups": groups
+        }
+    
+    @cached_analysis
+    def analyze_error_positions(self, ref_text: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+        """음절 위치별 오류 분석 - ans/rec 정렬로 텍스트의 어느 음절에서 오류가 많은지 계산"""
+        filters = {"ref": ref_text.strip()} if ref_text and ref_text.strip() else None
+        refs, ans, rec = [], [], []
+        for source in self._iter_documents(filters=filters, source=["ref", "ans", "rec"]):
+            if source.get("ans"):
+                refs.append(source.get("ref"))
+                ans.append(source.get("ans"))
+                rec.append(source.get("rec") or "")
+        
+        heatmaps = alignment.position_heatmaps(refs, ans, rec)
+        if not heatmaps:
+            return {"error": "조건에 맞는 데이터를 찾을 수 없습니다."}
+        
+        if filters:
+            heatmap = heatmaps.get(filters["ref"])
+            if heatmap is None:
+                return {"error": f"'{filters['ref']}'에 대한 정렬 데이터를 찾을 수 없습니다."}
+            return heatmap
+        
+        # 가장 어려운 음절의 레코드당 오류 수가 많은 텍스트 순
+        ranked = sorted(heatmaps.values(), key=lambda h: h["hardest_syllable"]["errors_per_record"], reverse=True)
+        return {
+            "total_texts": len(heatmaps),
+            "total_records": len(ans),
+            "texts": ranked[:limit]
+        }
+    
+    @cached_analysis
     def analyze_pronunciation_errors(self, ref_text: str, limit: int = 50) -> Dict[str, Any]:
         """발음 오류 분석 - 특정 단어/문장에 대한 발음 오류 패턴 분석"""
         if not ref_text or not ref_text.strip():
             return {"error": "분석할 텍스트를 입력해주세요."}
         
         ref_text = ref_text.strip()
+        matches = self._pronunciation_lookup(ref_text)
+        hits = self.backend.search_refs(ref_text, matches, limit)
+        return self._summarize_pronunciation_errors(ref_text, hits, matches)
+    
+    @cached_async_analysis
+    async def analyze_pronunciation_errors_async(self, ref_text: str, limit: int = 50) -> Dict[str, Any]:
+        """발음 오류 분석 (백엔드 비동기 검색 후 집계는 분석 실행기에서 수행)"""
+        if not ref_text or not ref_text.strip():
+            return {"error": "분석할 텍스트를 입력해주세요."}
         
-        # ref 필드에서 해당 텍스트를 포함한 문서 검색
-        query = {
-            "query": {
-                "bool": {
-                    "should": [
-                        {"match": {"ref": ref_text}},  # 정확한 매치
-                        {"wildcard": {"ref.keyword": f"*{ref_text}*"}}  # 부분 매치
-                    ],
-                    "minimum_should_match": 1
-                }
-            },
-            "size": limit
-        }
+        ref_text = ref_text.strip()
+        matches = await self.run(self._pronunciation_lookup, ref_text)
+        hits = await self.backend.search_refs_async(ref_text, matches, limit)
+        return await self.run(self._summarize_pronunciation_errors, ref_text, hits, matches)
+    
+    async def stream_pronunciation_errors(self, ref_text: str, limit: int = 50,
+                                          page_size: int = STREAM_PAGE_SIZE) -> AsyncIterator[Any]:
+        """발음 오류 분석 스트리밍 - 요약(샘플 제외)을 먼저 내보낸 뒤 샘플을 페이지 단위로 순회
         
-        hits = self._execute_search(query)
+        요약은 ans/rec를 제외한 필드만 검색해 계산하고, 샘플은 같은 검색 순서로 페이지마다 가져오므로
+        전체 샘플을 한 번에 메모리에 올리지 않는다. 첫 항목은 요약 dict, 이후 항목은 샘플 리스트다.
+        """
+        if not ref_text or not ref_text.strip():
+            yield {"error": "분석할 텍스트를 입력해주세요."}
+            return
         
+        ref_text = ref_text.strip()
+        matches = await self.run(self._pronunciation_lookup, ref_text)
+        hits = await self.backend.search_refs_async(ref_text, matches, limit, source=PRONUNCIATION_SUMMARY_FIELDS)
+        yield await self.run(self._summarize_pronunciation_errors, ref_text, hits, matches, False)
+        if not hits:
+            return
+        
+        async for page in self.backend.iter_refs_async(ref_text, matches, limit, source=PRONUNCIATION_SAMPLE_FIELDS,
+                                                       page_size=page_size):
+            yield [PronunciationRecord.from_source(hit['_source']).to_response() for hit in page]
+    
+    def _pronunciation_errors_msearch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """여러 발음 오류 분석의 문서 검색을 백엔드 한 번 호출(ES는 msearch)로 실행"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        searches, pending = [], []
+        for position, request in enumerate(requests):
+            ref_text = (request.get("ref_text") or "").strip()
+            if not ref_text:
+                results[position] = {"error": "분석할 텍스트를 입력해주세요."}
+                continue
+            matches = self._pronunciation_lookup(ref_text)
+            searches.append((ref_text, matches, request.get("limit", 50)))
+            pending.append((position, ref_text, matches))
+        
+        if pending:
+            for (position, ref_text, matches), hits in zip(pending, self.backend.search_refs_many(searches)):
+                results[position] = self._summarize_pronunciation_errors(ref_text, hits, matches)
+        return results
+    
+    def _pronunciation_lookup(self, ref_text: str) -> List[Tuple[str, int]]:
+        """ref 자모 n-gram 색인에서 후보 ref 검색 - 가장 가까운 단계만 사용
+        
+        완전/부분 일치(거리 0)가 있으면 그것만, 없으면 최소 거리의 오타 후보만 남기고, 같은 거리라도
+        ref 전체가 비슷한 후보가 있으면 긴 문장 속 일부만 비슷한 후보는 빼서 먼 후보의 문서가 통계에 섞이지 않게 한다.
+        """
+        return self._get_ref_index().best_matches(ref_text, REF_CANDIDATES)
+    
+    def _summarize_pronunciation_errors(self, ref_text: str, hits: List[Dict],
+                                        matches: Optional[List[Tuple[str, int]]] = None,
+                                        include_samples: bool = True) -> Dict[str, Any]:
+        """검색된 문서로 발음 오류 통계와 인사이트 구성 (include_samples=False면 샘플 목록 제외)
+        
+        문서는 PronunciationRecord로 변환해 통계를 내고, 샘플 응답 dict는 마지막에 한 번만 만든다.
+        """
+        matched_refs = [{"ref": ref, "distance": distance} for ref, distance in matches or []]
         if not hits:
             return {
                 "search_text": ref_text,
+                "matched_refs": matched_refs,
                 "found_documents": 0,
                 "message": f"'{ref_text}'와 관련된 발음 데이터를 찾을 수 없습니다."
             }
         
         # 검색된 문서들에서 데이터 추출
-        pronunciation_data = []
+        records = [PronunciationRecord.from_source(hit['_source']) for hit in hits]
         error_patterns = Counter()
         csid_totals = {"C": 0, "S": 0, "I": 0, "D": 0}
         error_rates = []
@@ -594,68 +1150,43 @@ class InsightService:
         nationality_stats = defaultdict(lambda: {"count": 0, "error_rates": []})
         level_stats = defaultdict(lambda: {"count": 0, "error_rates": []})
         
-        for hit in hits:
-            source = hit['_source']
-            
-            # 기본 발음 데이터
-            pronunciation_record = {
-                "ref": source.get('ref', ''),
-                "ans": source.get('ans', ''),  # 정답 발음
-                "rec": source.get('rec', ''),  # 모델이 인식한 발음
-                "error": source.get('error', ''),  # 오류 설명
-                "csid": {
-                    "C": source.get('C', 0),
-                    "S": source.get('S', 0),
-                    "I": source.get('I', 0),
-                    "D": source.get('D', 0)
-                },
-                "metadata": {
-                    "sex": source.get('sex', ''),
-                    "nationality": source.get('nationality', ''),
-                    "level": source.get('level', ''),
-                    "type": source.get('type', '')
-                }
-            }
-            
-            pronunciation_data.append(pronunciation_record)
+        for record in records:
+            per = record.per
             
             # 오류 패턴 수집
-            if source.get('error'):
-                error_patterns[source.get('error')] += 1
+            if record.error:
+                error_patterns[record.error] += 1
             
             # CSID 통계
-            for key in csid_totals:
-                csid_totals[key] += source.get(key, 0)
+            csid_totals["C"] += record.C
+            csid_totals["S"] += record.S
+            csid_totals["I"] += record.I
+            csid_totals["D"] += record.D
             
             # 오류율 수집
-            if source.get('per') is not None:
-                error_rates.append(source.get('per', 0))
+            if per is not None:
+                error_rates.append(per)
             
             # 성별별 통계
-            sex = source.get('sex')
-            if sex:
-                gender_stats[sex]["count"] += 1
-                if source.get('per') is not None:
-                    gender_stats[sex]["error_rates"].append(source.get('per', 0))
+            if record.sex:
+                gender_stats[record.sex]["count"] += 1
+                if per is not None:
+                    gender_stats[record.sex]["error_rates"].append(per)
             
             # 국적별 통계
-            nationality = source.get('nationality')
-            if nationality:
-                nationality_stats[nationality]["count"] += 1
-                if source.get('per') is not None:
-                    nationality_stats[nationality]["error_rates"].append(source.get('per', 0))
+            if record.nationality:
+                nationality_stats[record.nationality]["count"] += 1
+                if per is not None:
+                    nationality_stats[record.nationality]["error_rates"].append(per)
             
             # 레벨별 통계
-            level = source.get('level')
-            if level:
-                level_stats[level]["count"] += 1
-                if source.get('per') is not None:
-                    level_stats[level]["error_rates"].append(source.get('per', 0))
+            if record.level:
+                level_stats[record.level]["count"] += 1
+                if per is not None:
+                    level_stats[record.level]["error_rates"].append(per)
         
         # 통계 계산
         avg_error_rate = statistics.mean(error_rates) if error_rates else 0
-        median_error_rate = statistics.median(error_rates) if error_rates else 0
-        std_error_rate = statistics.stdev(error_rates) if len(error_rates) > 1 else 0
         
         # 성별별 통계 정리
         gender_analysis = {}
@@ -692,10 +1223,6 @@ class InsightService:
         # 가장 흔한 오류 패턴 (상위 10개)
         top_error_patterns = dict(error_patterns.most_common(10))
         
-        # 발음 정확도 계산
-        total_operations = sum(csid_totals.values())
-        accuracy = (csid_totals["C"] / total_operations * 100) if total_operations > 0 else 0
-        
         # 인사이트 생성
         insights = []
         
@@ -719,10 +1246,11 @@ class InsightService:
                 better_gender = "여성" if female_rate < male_rate else "남성"
                 insights.append(f"이 텍스트는 {better_gender} 학습자가 더 잘 발음합니다.")
         
-        return {
+        result = {
             "search_text": ref_text,
-            "found_documents": len(pronunciation_data),
-            "pronunciation_samples": pronunciation_data,
+            "matched_refs": matched_refs,
+            "found_documents": len(records),
+            "pronunciation_samples": [record.to_response() for record in records] if include_samples else [],
             "error_analysis": {
                 "top_error_patterns": top_error_patterns,
                 "gender_performance": gender_analysis,
@@ -730,4 +1258,7 @@ class InsightService:
                 "level_performance": level_analysis
             },
             "insights": insights
-        } 
\ No newline at end of file
+        }
+        if not include_samples:
+            del result["pronunciation_samples"]
+        return result 
\ No newline at end of file
@@ -0,0 +1,95 @@
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import threading
+
+import numpy as np
+
+from .snapshot import InsightSnapshot
+
+# 셀 키 차원 (참조 텍스트 + 학습자 코호트)
+RANK_DIMENSIONS = ("ref", "sex", "nationality", "level")
+
+CellKey = Tuple[Optional[str], ...]
+
+
+class PerRankIndex:
+    """참조 텍스트 × 코호트(성별, 국적, 레벨) 셀별로 정렬된 per 배열
+
+    스냅샷에서 한 번의 정렬로 만들고, 셀 배열은 정렬된 전체 배열의 구간(view)을 가리킨다.
+    조회는 해당 텍스트 셀마다 searchsorted 한 번이므로 O(셀 수 × log n)이다.
+    새 문서는 셀별 대기 목록에 쌓아 두었다가 그 셀을 처음 조회할 때 정렬 위치에 삽입한다.
+    """
+
+    def __init__(self, cells: Dict[CellKey, np.ndarray]):
+        self._cells = cells
+        self._by_ref: Dict[str, List[CellKey]] = {}
+        for key in cells:
+            self._by_ref.setdefault(key[0], []).append(key)
+        self._pending: Dict[CellKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: InsightSnapshot) -> "PerRankIndex":
+        """스냅샷의 유효한 per를 (셀, per) 순으로 정렬해 셀 구간으로 분할"""
+        rows = np.flatnonzero(snapshot.valid_per & (snapshot.codes["ref"] >= 0))
+        per = snapshot.numeric["per"][rows]
+        codes = [snapshot.codes[dimension][rows] for dimension in RANK_DIMENSIONS]
+        order = np.lexsort([per] + codes[::-1])
+        per = np.ascontiguousarray(per[order])
+        codes = np.stack([c[order] for c in codes], axis=1)
+
+        if len(per):
+            starts = np.flatnonzero(np.concatenate(([True], (codes[1:] != codes[:-1]).any(axis=1))))
+        else:
+            starts = np.empty(0, dtype=np.int64)
+        ends = np.append(starts[1:], len(per))
+
+        cells = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            key = tuple(
+                snapshot.categories[dimension][code] if code >= 0 else None
+                for dimension, code in zip(RANK_DIMENSIONS, codes[start].tolist())
+            )
+            cells[key] = per[start:end]
+        return cls(cells)
+
+    def add(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """새 문서의 per를 셀 대기 목록에 추가 (per나 ref가 없으면 무시), 추가된 수 반환"""
+        added = 0
+        with self._lock:
+            for doc in documents:
+                per = doc.get("per")
+                if per is None or not doc.get("ref"):
+                    continue
+                key = tuple(doc.get(dimension) for dimension in RANK_DIMENSIONS)
+                if key not in self._cells:
+                    self._cells[key] = np.empty(0)
+                    self._by_ref.setdefault(key[0], []).append(key)
+                self._pending.setdefault(key, []).append(float(per))
+                added += 1
+        return added
+
+    def _cell(self, key: CellKey) -> np.ndarray:
+        """대기 중인 값을 정렬 위치에 삽입한 셀 배열 (잠금 안에서 호출)"""
+        pending = self._pending.pop(key, None)
+        values = self._cells[key]
+        if pending:
+            pending = np.sort(np.asarray(pending))
+            values = self._cells[key] = np.insert(values, np.searchsorted(values, pending), pending)
+        return values
+
+    def rank(self, ref: str, per: float, **filters: Optional[str]) -> Tuple[int, int, int]:
+        """ref 텍스트의 조건(sex, nationality, level)에 맞는 셀에서 (per보다 낮은 수, 같은 수, 전체 수)"""
+        positions = [RANK_DIMENSIONS.index(dimension) for dimension, value in filters.items() if value is not None]
+        values = [value for value in filters.values() if value is not None]
+        below = equal = total = 0
+        with self._lock:
+            for key in self._by_ref.get(ref, ()):
+                if any(key[position] != value for position, value in zip(positions, values)):
+                    continue
+                cell = self._cell(key)
+                lower = int(np.searchsorted(cell, per, side="left"))
+                upper = int(np.searchsorted(cell, per, side="right"))
+                below += lower
+                equal += upper - lower
+                total += len(cell)
+        return below, equal, total
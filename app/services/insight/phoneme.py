@@ -0,0 +1,185 @@
+from typing import Dict, List, Any, Optional, Tuple
+import re
+
+import numpy as np
+
+from .snapshot import InsightSnapshot
+from .cube import Cube
+
+# 음소 오류 연산 (CSID 표기와 동일)
+OPERATIONS = ("S", "I", "D")
+_OPERATION_CODES = {"substitution": "S", "insertion": "I", "deletion": "D"}
+# "substitution of < EU > to < R >", "insertion of < I >", "deletion of < X >"
+_EVENT_PATTERN = re.compile(r"(substitution|insertion|deletion) of < (.*?) >(?: to < (.*?) >)?")
+
+# (연산, 원래 음소, 바뀐 음소) - 삽입은 원래 음소, 삭제는 바뀐 음소가 None
+ErrorEvent = Tuple[str, Optional[str], Optional[str]]
+
+
+def parse_error_events(error: Optional[str]) -> List[ErrorEvent]:
+    """error 문자열을 (연산, 원래 음소, 바뀐 음소) 이벤트 목록으로 변환"""
+    if not error:
+        return []
+    events = []
+    for operation, first, second in _EVENT_PATTERN.findall(error):
+        op = _OPERATION_CODES[operation]
+        if op == "S":
+            events.append(("S", first, second))
+        elif op == "I":
+            events.append(("I", None, first))
+        else:
+            events.append(("D", first, None))
+    return events
+
+
+def error_event_fields(error: Optional[str]) -> Dict[str, List[Dict[str, Optional[str]]]]:
+    """색인 시 문서에 추가할 구조화된 오류 이벤트 필드"""
+    return {
+        "error_events": [
+            {"op": op, "from": source, "to": target}
+            for op, source, target in parse_error_events(error)
+        ]
+    }
+
+
+class PhonemeIndex:
+    """코호트 셀별 음소 오류 이벤트 발생 횟수
+
+    counts[c, e]는 셀 c에서 이벤트 유형 e가 발생한 횟수이다.
+    이벤트 유형은 (연산, 원래 음소, 바뀐 음소)이며 음소는 phonemes의 코드(-1: 없음)로 저장한다.
+    """
+
+    def __init__(self, dimensions: Tuple[str, ...], categories: Dict[str, List[str]],
+                 cell_codes: np.ndarray, cell_records: np.ndarray, phonemes: List[str],
+                 event_from: np.ndarray, event_to: np.ndarray, counts: np.ndarray):
+        self.dimensions = tuple(dimensions)
+        self.categories = categories
+        self.cell_codes = cell_codes
+        self.cell_records = cell_records
+        self.phonemes = phonemes
+        self.event_from = event_from
+        self.event_to = event_to
+        self.counts = counts
+
+    @classmethod
+    def from_snapshot(cls, snapshot: InsightSnapshot, dimensions: Tuple[str, ...]) -> "PhonemeIndex":
+        """스냅샷의 error 범주를 한 번씩만 파싱해 셀 × 이벤트 유형 횟수를 누적"""
+        phoneme_lookup: Dict[str, int] = {}
+        event_lookup: Dict[Tuple[int, int], int] = {}
+        event_pairs: List[Tuple[int, int]] = []
+
+        def phoneme_code(phoneme):
+            if phoneme is None:
+                return -1
+            code = phoneme_lookup.get(phoneme)
+            if code is None:
+                code = phoneme_lookup[phoneme] = len(phoneme_lookup)
+            return code
+
+        # error 범주별 이벤트 유형 코드 (CSR)
+        flat_events = []
+        lengths = []
+        for error in snapshot.categories["error"]:
+            events = parse_error_events(error)
+            for _, source, target in events:
+                pair = (phoneme_code(source), phoneme_code(target))
+                code = event_lookup.get(pair)
+                if code is None:
+                    code = event_lookup[pair] = len(event_pairs)
+                    event_pairs.append(pair)
+                flat_events.append(code)
+            lengths.append(len(events))
+        flat_events = np.asarray(flat_events, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        offsets = np.cumsum(lengths) - lengths
+
+        # 행 → 셀
+        codes = np.stack([snapshot.codes[d] for d in dimensions])
+        categories = {d: snapshot.categories[d] for d in dimensions}
+        cell_codes, cell_of_row = Cube._group(codes, [len(categories[d]) + 1 for d in dimensions])
+        cell_records = np.bincount(cell_of_row, minlength=len(cell_codes))
+
+        # 행별 이벤트를 펼쳐 (셀, 이벤트 유형) 횟수 누적
+        error_codes = snapshot.codes["error"]
+        rows = np.flatnonzero(error_codes >= 0)
+        row_lengths = lengths[error_codes[rows]] if len(lengths) else np.zeros(len(rows), dtype=np.int64)
+        total = int(row_lengths.sum())
+        event_count = len(event_pairs)
+        if total:
+            starts = np.repeat(offsets[error_codes[rows]] - (np.cumsum(row_lengths) - row_lengths), row_lengths)
+            events = flat_events[starts + np.arange(total)]
+            cells = np.repeat(cell_of_row[rows], row_lengths)
+            counts = np.bincount(cells * event_count + events, minlength=len(cell_codes) * event_count)
+        else:
+            counts = np.zeros(len(cell_codes) * event_count, dtype=np.int64)
+
+        pairs = np.asarray(event_pairs, dtype=np.int64).reshape(-1, 2)
+        return cls(
+            dimensions, categories, cell_codes, cell_records, list(phoneme_lookup),
+            pairs[:, 0], pairs[:, 1], counts.reshape(len(cell_codes), event_count)
+        )
+
+    def confusion(self, group_by: Tuple[str, ...], top: int = 20, **filters) -> List[Dict[str, Any]]:
+        """group_by 값 조합별 대체 행렬과 삽입/삭제 벡터 (셀 단위 배열 합으로 계산)
+
+        필터 값이 None인 차원은 무시한다.
+        """
+        keep = np.ones(len(self.cell_codes), dtype=bool)
+        for dimension, value in filters.items():
+            if value is None:
+                continue
+            categories = self.categories[dimension]
+            code = categories.index(value) if value in categories else -2
+            keep &= self.cell_codes[:, self.dimensions.index(dimension)] == code
+
+        positions = [self.dimensions.index(d) for d in group_by]
+        group_codes, group_of_cell = Cube._group(
+            self.cell_codes[keep][:, positions].T,
+            [len(self.categories[d]) + 1 for d in group_by]
+        )
+        group_counts = np.zeros((len(group_codes), self.counts.shape[1]), dtype=np.int64)
+        np.add.at(group_counts, group_of_cell, self.counts[keep])
+        group_records = np.bincount(group_of_cell, weights=self.cell_records[keep], minlength=len(group_codes))
+
+        # 0번 행/열은 '음소 없음' (삽입의 원래 음소, 삭제의 바뀐 음소)
+        size = len(self.phonemes) + 1
+        matrices = np.zeros((len(group_codes), size, size), dtype=np.int64)
+        matrices[:, self.event_from + 1, self.event_to + 1] = group_counts
+
+        results = []
+        for index, codes in enumerate(group_codes):
+            matrix = matrices[index]
+            substitutions = matrix[1:, 1:]
+            insertions = matrix[0, 1:]
+            deletions = matrix[1:, 0]
+
+            order = np.argsort(-group_counts[index], kind="stable")[:top]
+            top_events = [
+                {
+                    "op": "S" if self.event_from[e] >= 0 and self.event_to[e] >= 0 else ("I" if self.event_from[e] < 0 else "D"),
+                    "from": self.phonemes[self.event_from[e]] if self.event_from[e] >= 0 else None,
+                    "to": self.phonemes[self.event_to[e]] if self.event_to[e] >= 0 else None,
+                    "count": int(group_counts[index, e])
+                }
+                for e in order
+                if group_counts[index, e]
+            ]
+
+            group = {
+                d: (self.categories[d][code] if code >= 0 else None)
+                for d, code in zip(group_by, codes)
+            }
+            group.update({
+                "record_count": int(group_records[index]),
+                "event_totals": {
+                    "S": int(substitutions.sum()),
+                    "I": int(insertions.sum()),
+                    "D": int(deletions.sum())
+                },
+                "substitution_matrix": substitutions.tolist(),
+                "insertions": insertions.tolist(),
+                "deletions": deletions.tolist(),
+                "top_events": top_events
+            })
+            results.append(group)
+        return results
@@ -0,0 +1,65 @@
+from typing import Dict, Any, Optional
+import sys
+
+
+def _intern(value: Any) -> Any:
+    """값 종류가 적은 범주형 문자열을 intern해 레코드끼리 같은 문자열 객체를 공유"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class PronunciationRecord:
+    """발음 오류 분석용 검색 문서 한 건
+
+    _source dict 대신 __slots__ 객체로 보관해 문서당 dict와 중복 문자열을 만들지 않는다.
+    범주형 문자열은 intern하고, 응답 dict는 to_response에서만 만든다.
+    값이 없는 필드는 응답과 같은 기본값(문자열 '', C/S/I/D 0, per None)으로 채운다.
+    """
+
+    __slots__ = ("ref", "ans", "rec", "error", "C", "S", "I", "D", "per", "sex", "nationality", "level", "type")
+
+    def __init__(self, ref: str = "", ans: str = "", rec: str = "", error: str = "",
+                 C: int = 0, S: int = 0, I: int = 0, D: int = 0, per: Optional[float] = None,
+                 sex: str = "", nationality: str = "", level: str = "", type: str = ""):
+        self.ref = _intern(ref)
+        self.ans = ans
+        self.rec = rec
+        self.error = _intern(error)
+        self.C = C
+        self.S = S
+        self.I = I
+        self.D = D
+        self.per = per
+        self.sex = _intern(sex)
+        self.nationality = _intern(nationality)
+        self.level = _intern(level)
+        self.type = _intern(type)
+
+    @classmethod
+    def from_source(cls, source: Dict[str, Any]) -> "PronunciationRecord":
+        """검색 문서 _source에서 필요한 필드만 꺼내 레코드 생성"""
+        return cls(
+            source.get('ref', ''), source.get('ans', ''), source.get('rec', ''), source.get('error', ''),
+            source.get('C', 0), source.get('S', 0), source.get('I', 0), source.get('D', 0), source.get('per'),
+            source.get('sex', ''), source.get('nationality', ''), source.get('level', ''), source.get('type', '')
+        )
+
+    def to_response(self) -> Dict[str, Any]:
+        """발음 샘플 응답 항목"""
+        return {
+            "ref": self.ref,
+            "ans": self.ans,  # 정답 발음
+            "rec": self.rec,  # 모델이 인식한 발음
+            "error": self.error,  # 오류 설명
+            "csid": {
+                "C": self.C,
+                "S": self.S,
+                "I": self.I,
+                "D": self.D
+            },
+            "metadata": {
+                "sex": self.sex,
+                "nationality": self.nationality,
+                "level": self.level,
+                "type": self.type
+            }
+        }
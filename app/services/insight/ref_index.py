@@ -0,0 +1,271 @@
+from collections import OrderedDict
+from typing import Dict, List, Iterable, Optional, Tuple
+import threading
+
+import numpy as np
+
+# 한글 음절 → 자모 분해 (U+AC00 + (초성 × 21 + 중성) × 28 + 종성)
+# 받침이 없으면 "_"를 넣어 음절 경계가 어긋난 일치("시게" → "주시겠어요")보다 같은 음절 구성을 우선한다
+_HANGUL_BASE, _HANGUL_LAST = 0xAC00, 0xD7A3
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ["_", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+              "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+# 자모 n-gram 길이
+GRAM_SIZE = 3
+# 검증할 후보 수 상한 (공유 n-gram 수가 많은 순)
+MAX_VERIFY = 64
+
+
+def decompose(text: str) -> str:
+    """공백을 제거하고 한글 음절을 초성/중성/종성 자모로 분해 (그 밖의 문자는 소문자로 유지)"""
+    jamo = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            jamo.append(_CHOSEONG[offset // 588])
+            jamo.append(_JUNGSEONG[offset % 588 // 28])
+            jamo.append(_JONGSEONG[offset % 28])
+        elif not char.isspace():
+            jamo.append(char.lower())
+    return "".join(jamo)
+
+
+def _grams(jamo: str) -> List[str]:
+    return [jamo[i:i + GRAM_SIZE] for i in range(len(jamo) - GRAM_SIZE + 1)]
+
+
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    """Myers 알고리즘의 문자별 위치 비트마스크"""
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    return peq
+
+
+def _substring_distance(pattern: str, text: str, limit: int, peq: Optional[Dict[str, int]] = None) -> int:
+    """text의 임의 부분 문자열과 pattern의 최소 편집 거리 (Myers 비트 병렬, limit 초과 시 limit + 1)"""
+    m = len(pattern)
+    if not m:
+        return 0
+    if peq is None:
+        peq = _pattern_masks(pattern)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score, best = mask, 0, m, m
+
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+            if score < best:
+                best = score
+                if best == 0:
+                    return 0
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return best if best <= limit else limit + 1
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """a와 b 전체의 편집 거리 (대각선 주변 limit 폭만 계산, limit 초과 시 limit + 1)"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(low, high + 1):
+            current[j] = min(previous[j - 1] + (a[i - 1] != b[j - 1]), previous[j] + 1, current[j - 1] + 1)
+        if min(current[low - 1:high + 1]) > limit:
+            return over
+        previous = current
+    return min(previous[len(b)], over)
+
+
+class RefTextIndex:
+    """참조 텍스트(ref) 고유값에 대한 자모 n-gram 역색인
+
+    부분 문자열과 오타("시게" → "시계")를 허용해 후보 ref를 찾는다.
+    공유 n-gram 수로 후보를 좁힌 뒤 자모 단위 부분 문자열 편집 거리로 검증하고,
+    같은 거리에서는 ref 전체가 질의와 가까운 후보를 긴 문장 속 일부만 비슷한 후보("이게 다 니 책임이야")보다 앞에 둔다.
+    """
+
+    def __init__(self, refs: Iterable[str] = (), cache_size: int = 1024):
+        self.refs: List[str] = []
+        self._jamo: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self._posting_arrays: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, int], List[Tuple[str, int, bool]]]" = OrderedDict()
+        self._cache_size = cache_size
+        # add()마다 증가 (검색 중 추가된 ref가 있으면 그 결과는 캐시하지 않음)
+        self._generation = 0
+        self.add(refs)
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def add(self, refs: Iterable[str]) -> int:
+        """새 ref 추가 (이미 있는 값은 무시), 추가된 수 반환"""
+        added = 0
+        touched = set()
+        with self._lock:
+            for ref in refs:
+                if not ref or ref in self._positions:
+                    continue
+                position = len(self.refs)
+                jamo = decompose(ref)
+                self.refs.append(ref)
+                self._jamo.append(jamo)
+                self._positions[ref] = position
+                for gram in set(_grams(jamo)):
+                    self._postings.setdefault(gram, []).append(position)
+                    touched.add(gram)
+                added += 1
+            if added:
+                for gram in touched:
+                    self._posting_arrays.pop(gram, None)
+                self._cache.clear()
+                self._generation += 1
+        return added
+
+    @staticmethod
+    def _window_distance(jamo: str, grams: List[str], text: str, edits: int, required: int,
+                         peq: Dict[str, int], memo: Dict[str, int]) -> int:
+        """질의 n-gram이 충분히 모여 나타난 위치 주변에서만 편집 거리를 계산 (긴 ref 검증 비용 절감)
+
+        편집 edits회 이내로 일치하는 구간이라면 시작 위치 추정값(등장 위치 - 질의 내 오프셋)이
+        2 × edits 범위 안에 있는 n-gram이 required개 이상 있어야 한다.
+        """
+        starts = []
+        for offset, gram in enumerate(grams):
+            found = text.find(gram)
+            while found >= 0:
+                starts.append(found - offset)
+                found = text.find(gram, found + 1)
+        starts.sort()
+
+        width = len(jamo) + 2 * edits
+        windows = []
+        for i in range(len(starts) - required + 1):
+            if starts[i + required - 1] - starts[i] <= 2 * edits:
+                start = max(0, starts[i] - edits)
+                windows.append((start, start + width + 2 * edits))
+
+        # 겹치는 구간을 합친 뒤 구간별로 검증
+        merged: List[List[int]] = []
+        for start, end in windows:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        best = edits + 1
+        for start, end in merged:
+            window = text[start:end]
+            distance = memo.get(window)
+            if distance is None:
+                distance = memo[window] = _substring_distance(jamo, window, edits, peq)
+            best = min(best, distance)
+            if best == 0:
+                break
+        return best
+
+    def _posting_array(self, gram: str) -> np.ndarray:
+        """n-gram 포스팅 배열 (add()의 무효화와 같은 잠금 안에서 조회/생성)"""
+        with self._lock:
+            array = self._posting_arrays.get(gram)
+            if array is None:
+                array = self._posting_arrays[gram] = np.asarray(self._postings.get(gram, ()), dtype=np.int64)
+            return array
+
+    @staticmethod
+    def max_edits(jamo: str) -> int:
+        """질의 길이에 따른 허용 자모 편집 수 (음절 하나 정도의 오타)"""
+        return max(1, len(jamo) // 6)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """질의와 일치하거나 가까운 ref 목록 [(ref, 자모 편집 거리)]
+
+        편집 거리, ref 전체 일치 여부, ref 길이 순으로 정렬한다. 거리 0은 부분 문자열로 포함됨을 뜻한다.
+        """
+        return [(ref, distance) for ref, distance, _ in self._cached_search(query, limit)]
+
+    def best_matches(self, query: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """search 결과 중 가장 가까운 단계(편집 거리, ref 전체 일치 여부)의 후보만 반환"""
+        matches = self._cached_search(query, limit)
+        if not matches:
+            return []
+        best = matches[0][1:]
+        return [(ref, distance) for ref, distance, whole in matches if (distance, whole) == best]
+
+    def _cached_search(self, query: str, limit: int) -> List[Tuple[str, int, bool]]:
+        jamo = decompose(query or "")
+        if not jamo:
+            return []
+        key = (jamo, limit)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            generation = self._generation
+
+        results = self._search(jamo, limit)
+
+        with self._lock:
+            if generation == self._generation:
+                self._cache[key] = results
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def _search(self, jamo: str, limit: int) -> List[Tuple[str, int, bool]]:
+        """[(ref, 자모 편집 거리, ref 전체 일치 여부)]"""
+        if len(jamo) < GRAM_SIZE:
+            # n-gram보다 짧은 질의는 부분 문자열 검사만 수행
+            matches = sorted((text != jamo, len(text), ref) for ref, text in zip(self.refs, self._jamo) if jamo in text)
+            return [(ref, 0, not partial) for partial, _, ref in matches[:limit]]
+
+        edits = self.max_edits(jamo)
+        grams = _grams(jamo)
+
+        # 편집 1회는 n-gram을 최대 GRAM_SIZE개 깨뜨리므로 그보다 적게 공유하면 후보에서 제외
+        unique = set(grams)
+        postings = [self._posting_array(gram) for gram in unique]
+        if not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.refs))
+        required = max(1, len(unique) - GRAM_SIZE * edits)
+        candidates = np.flatnonzero(shared >= required)
+        if len(candidates) > MAX_VERIFY:
+            candidates = candidates[np.argsort(-shared[candidates], kind="stable")[:MAX_VERIFY]]
+
+        # 같은 구간 문자열은 한 번만 검증
+        memo: Dict[str, int] = {}
+        peq = _pattern_masks(jamo)
+        matches = []
+        for position in candidates.tolist():
+            text = self._jamo[position]
+            distance = 0 if jamo in text else self._window_distance(jamo, grams, text, edits, required, peq, memo)
+            if distance > edits:
+                continue
+            # 부분 일치 거리와 같은 거리로 ref 전체가 질의와 맞는지 (길이 차가 그보다 크면 전체 일치일 수 없음)
+            whole = text == jamo if distance == 0 else _edit_distance(jamo, text, distance) == distance
+            matches.append((distance, not whole, len(text), self.refs[position]))
+        matches.sort()
+        return [(ref, distance, not partial) for distance, partial, _, ref in matches[:limit]]
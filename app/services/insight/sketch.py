@@ -0,0 +1,130 @@
+from typing import List, Iterable, Sequence
+import math
+
+import numpy as np
+
+# 기본 압축 계수 (순위 오차 약 1%)
+DEFAULT_COMPRESSION = 200
+
+
+def compression_for(rank_error: float) -> int:
+    """허용 순위 오차에 맞는 압축 계수 (오차가 작을수록 centroid가 많아짐)"""
+    return max(int(math.ceil(2.0 / rank_error)), 10)
+
+
+class TDigest:
+    """병합 가능한 t-digest 분위수 스케치
+
+    값이 compression × 5개를 넘기 전에는 모든 값을 그대로 보관하므로 정확한 분위수를 낸다.
+    그 이후에는 k1 스케일 함수로 centroid를 묶어 중앙값 부근 순위 오차를
+    약 2 / compression 이내로 유지하며, 꼬리(p99 등)는 더 정밀하다.
+    """
+
+    __slots__ = ("compression", "means", "weights", "min", "max", "_buffer")
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION,
+                 means: Sequence[float] = (), weights: Sequence[float] = (),
+                 min_value: float = math.inf, max_value: float = -math.inf):
+        self.compression = compression
+        self.means = np.asarray(means, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.min = min_value
+        self.max = max_value
+        self._buffer: List[float] = []
+
+    @property
+    def _capacity(self) -> int:
+        return self.compression * 5
+
+    @property
+    def count(self) -> int:
+        return int(round(self.weights.sum())) + len(self._buffer)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, compression: int = DEFAULT_COMPRESSION) -> "TDigest":
+        """값 배열로부터 한 번에 생성"""
+        digest = cls(compression)
+        digest._absorb(np.asarray(values, dtype=np.float64), np.ones(len(values)))
+        return digest
+
+    def add(self, value: float) -> None:
+        self._buffer.append(float(value))
+        if len(self._buffer) >= self._capacity:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            values = np.asarray(self._buffer, dtype=np.float64)
+            self._buffer = []
+            self._absorb(values, np.ones(len(values)))
+
+    def _absorb(self, means: np.ndarray, weights: np.ndarray) -> None:
+        """centroid를 합쳐 정렬하고, 용량을 넘으면 압축"""
+        if not len(means):
+            return
+        self.min = min(self.min, float(means.min()))
+        self.max = max(self.max, float(means.max()))
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="mergesort")
+        self.means, self.weights = means[order], weights[order]
+        if len(self.means) > self._capacity:
+            self._compress()
+
+    def _compress(self) -> None:
+        """k1 스케일 함수 값이 같은 구간의 centroid를 하나로 병합"""
+        total = self.weights.sum()
+        midpoints = (np.cumsum(self.weights) - self.weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * midpoints - 1)
+        groups = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+
+        weights = np.add.reduceat(self.weights, starts)
+        self.means = np.add.reduceat(self.means * self.weights, starts) / weights
+        self.weights = weights
+
+    def merge(self, other: "TDigest") -> None:
+        """다른 스케치를 이 스케치에 병합"""
+        other._flush()
+        self._flush()
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._absorb(other.means, other.weights)
+
+    @classmethod
+    def merge_all(cls, digests: Iterable["TDigest"], compression: int = DEFAULT_COMPRESSION) -> "TDigest":
+        """여러 스케치를 합친 새 스케치 (원본은 변경하지 않음)"""
+        means, weights = [], []
+        result = cls(compression)
+        for digest in digests:
+            digest._flush()
+            means.append(digest.means)
+            weights.append(digest.weights)
+            result.min = min(result.min, digest.min)
+            result.max = max(result.max, digest.max)
+        if means:
+            result._absorb(np.concatenate(means), np.concatenate(weights))
+        return result
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """분위수 목록 (값이 없으면 0)"""
+        self._flush()
+        total = self.weights.sum()
+        if not total:
+            return [0 for _ in qs]
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centers, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return [float(v) for v in np.interp(np.asarray(qs, dtype=np.float64) * total, positions, values)]
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def to_list(self) -> List:
+        self._flush()
+        return [self.compression, self.min, self.max, self.means.tolist(), self.weights.tolist()]
+
+    @classmethod
+    def from_list(cls, values: List) -> "TDigest":
+        compression, min_value, max_value, means, weights = values
+        return cls(compression, means, weights, min_value, max_value)
@@ -0,0 +1,123 @@
+from array import array
+from typing import Dict, List, Any, Optional, Iterable
+import time
+
+import numpy as np
+
+# 스냅샷에 적재하는 필드
+CSID_FIELDS = ("C", "S", "I", "D")
+NUMERIC_FIELDS = ("per",) + CSID_FIELDS
+CATEGORICAL_FIELDS = ("sex", "nationality", "level", "type", "ref", "error")
+# 스냅샷 생성 시 Elasticsearch에서 가져오는 _source 필드
+SOURCE_FIELDS = list(NUMERIC_FIELDS + CATEGORICAL_FIELDS)
+
+
+class InsightSnapshot:
+    """학습자 데이터의 컬럼형 인메모리 스냅샷
+
+    수치 필드는 NumPy 배열로, 범주형 필드는 정수 코드(사전 인코딩)로 보관한다.
+    값이 없는 범주형 필드는 -1, 값이 없는 per는 NaN으로 저장된다.
+    """
+
+    def __init__(self, numeric: Dict[str, np.ndarray], codes: Dict[str, np.ndarray],
+                 categories: Dict[str, List[str]], version: Any = None, watermark: Any = None):
+        self.numeric = numeric
+        self.codes = codes
+        self.categories = categories
+        self.lookup = {
+            field: {value: code for code, value in enumerate(values)}
+            for field, values in categories.items()
+        }
+        self.version = version
+        # 스캔한 데이터의 인덱스 워터마크 (백엔드가 확인하지 못했으면 None)
+        self.watermark = watermark
+        self.size = len(numeric["per"])
+        self.valid_per = ~np.isnan(numeric["per"])
+        self.built_at = time.time()
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Dict], version: Any = None) -> "InsightSnapshot":
+        """_source 문서들로부터 스냅샷 생성"""
+        per = array("d")
+        csid = {key: array("q") for key in CSID_FIELDS}
+        codes = {field: array("i") for field in CATEGORICAL_FIELDS}
+        lookups = {field: {} for field in CATEGORICAL_FIELDS}
+
+        for doc in documents:
+            value = doc.get("per")
+            per.append(float(value) if value is not None else np.nan)
+
+            for key in CSID_FIELDS:
+                csid[key].append(int(doc.get(key) or 0))
+
+            for field in CATEGORICAL_FIELDS:
+                value = doc.get(field)
+                if value is None:
+                    codes[field].append(-1)
+                    continue
+                table = lookups[field]
+                code = table.get(value)
+                if code is None:
+                    code = table[value] = len(table)
+                codes[field].append(code)
+
+        numeric = {"per": np.frombuffer(per, dtype=np.float64) if len(per) else np.empty(0)}
+        for key in CSID_FIELDS:
+            numeric[key] = np.frombuffer(csid[key], dtype=np.int64) if len(csid[key]) else np.empty(0, dtype=np.int64)
+
+        return cls(
+            numeric=numeric,
+            codes={
+                field: np.frombuffer(values, dtype=np.int32) if len(values) else np.empty(0, dtype=np.int32)
+                for field, values in codes.items()
+            },
+            categories={field: list(table) for field, table in lookups.items()},
+            version=version
+        )
+
+    def code_of(self, field: str, value: Any) -> Optional[int]:
+        """범주 값의 정수 코드 (없으면 None)"""
+        return self.lookup[field].get(value)
+
+    def mask(self, **filters) -> np.ndarray:
+        """필드=값 조건을 모두 만족하는 행의 불리언 마스크 (None 값은 무시)"""
+        result = np.ones(self.size, dtype=bool)
+        for field, value in filters.items():
+            if value is None:
+                continue
+            code = self.code_of(field, value)
+            if code is None:
+                return np.zeros(self.size, dtype=bool)
+            result &= self.codes[field] == code
+        return result
+
+    def per_values(self, mask: np.ndarray) -> np.ndarray:
+        """마스크 내 유효한 per 값"""
+        return self.numeric["per"][mask & self.valid_per]
+
+    def csid_totals(self, mask: np.ndarray) -> Dict[str, int]:
+        """마스크 내 C/S/I/D 합계"""
+        return {key: int(self.numeric[key][mask].sum()) for key in CSID_FIELDS}
+
+    def group_medians(self, field: str, mask: np.ndarray) -> Dict[str, float]:
+        """범주 값별 per 중간값을 한 번의 정렬로 계산 (값이 없거나 빈 문자열인 범주 제외)"""
+        categories = self.categories[field]
+        selected = mask & self.valid_per
+        codes = self.codes[field][selected]
+        values = self.numeric["per"][selected]
+        has_code = codes >= 0
+        codes, values = codes[has_code], values[has_code]
+
+        n = np.bincount(codes, minlength=len(categories))
+        sorted_values = values[np.lexsort((values, codes))]
+        starts = np.cumsum(n) - n
+        present = np.flatnonzero(n)
+        lo = starts[present] + (n[present] - 1) // 2
+        hi = starts[present] + n[present] // 2
+        medians = (sorted_values[lo] + sorted_values[hi]) / 2
+
+        return {
+            categories[code]: float(median)
+            for code, median in zip(present, medians)
+            if categories[code]
+        }
@@ -0,0 +1,158 @@
+# app/services/stt/cache.py
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import json
+import os
+import threading
+import time
+
+# 메모리 캐시 최대 항목 수
+CACHE_SIZE = int(os.getenv("STT_CACHE_SIZE", "512"))
+# 디스크 캐시 디렉터리 (빈 값이면 메모리 캐시만 사용)와 최대 크기 (MB)
+CACHE_DIR = os.getenv("STT_CACHE_DIR", "")
+CACHE_DISK_MAX_MB = float(os.getenv("STT_CACHE_DISK_MAX_MB", "256"))
+
+
+class TranscriptionCache:
+    """정규화된 PCM 해시를 키로 인식 결과(transcription, correction, segments)를 저장하는 캐시
+
+    - 메모리 LRU에 없으면 디스크 계층을 확인하고, 디스크에서 찾은 항목은 메모리로 올린다.
+    - 디스크 항목은 키별 JSON 파일이며, 전체 크기가 상한을 넘으면 가장 오래 쓰지 않은 파일부터 지운다.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE, directory: str = CACHE_DIR, disk_max_bytes: int = int(CACHE_DISK_MAX_MB * 1024 * 1024)):
+        self.maxsize = maxsize
+        self.directory = directory or None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.inflight_hits = 0
+        self.misses = 0
+
+        # 디스크 항목 색인: 키 → (크기, 마지막 사용 시각), 사용 시각 순
+        self._disk: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk_bytes = 0
+        if self.directory:
+            self._scan_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _scan_disk(self) -> None:
+        """재시작 시 기존 디스크 항목을 사용 시각 순으로 색인"""
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(root, name))
+                    found.append((stat.st_mtime, name[:-5], stat.st_size))
+        for mtime, key, size in sorted(found):
+            self._disk[key] = (size, mtime)
+            self._disk_bytes += size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            if key not in self._disk:
+                self.misses += 1
+                return None
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_memory(key, value)
+        return value
+
+    def count_inflight_hit(self) -> None:
+        """처리 중인 같은 음성의 결과를 기다려 받은 요청 수"""
+        with self._lock:
+            self.inflight_hits += 1
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._store_memory(key, value)
+        if self.directory:
+            self._write_disk(key, value)
+
+    def _store_memory(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            now = time.time()
+            os.utime(path, (now, now))
+            with self._lock:
+                if key in self._disk:
+                    self._disk[key] = (self._disk[key][0], now)
+                    self._disk.move_to_end(key)
+            return value
+        except Exception as e:
+            print(f"[STT 캐시 읽기 실패] {key}: {e}")
+            with self._lock:
+                size, _ = self._disk.pop(key, (0, 0))
+                self._disk_bytes -= size
+            return None
+
+    def _write_disk(self, key: str, value: Dict[str, Any]) -> None:
+        """임시 파일에 쓴 뒤 교체하고, 상한을 넘으면 오래된 항목부터 삭제"""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            print(f"[STT 캐시 저장 실패] {key}: {e}")
+            return
+
+        evicted = []
+        with self._lock:
+            previous, _ = self._disk.pop(key, (0, 0))
+            self._disk[key] = (size, time.time())
+            self._disk_bytes += size - previous
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+                old_key, (old_size, _) = self._disk.popitem(last=False)
+                self._disk_bytes -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.inflight_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "inflight_hits": self.inflight_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "disk": {
+                    "enabled": self.directory is not None,
+                    "entries": len(self._disk),
+                    "bytes": self._disk_bytes,
+                    "max_bytes": self.disk_max_bytes
+                }
+            }
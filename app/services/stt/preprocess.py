@@ -0,0 +1,249 @@
+# app/services/stt/preprocess.py
+"""STT 전 음성 전처리: 16kHz mono 디코딩, 음량 정규화, 앞뒤 무음 제거
+
+디코딩은 ffmpeg, 정규화와 에너지 기반 VAD는 numpy로 처리하며
+CPU를 쓰는 작업이므로 이벤트 루프 밖의 프로세스 풀에서 실행한다.
+
+전처리는 녹음 전체로 무음 경계와 음량을 정하므로 업로드를 메모리에 모두 받은 뒤 시작한다.
+그래서 기본값은 꺼져 있고(업로드를 STT 서버로 바로 스트리밍), 켜면 구간 분할 인식과 인식 결과 캐시도 함께 동작한다.
+"""
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import subprocess
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# STT 서버에 보내는 PCM 형식
+SAMPLE_RATE = 16000
+# ffmpeg 실행 파일 경로
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+# 전처리 사용 여부 (기본값 0: 업로드를 그대로 STT 서버로 스트리밍, 1: 업로드를 받아 전처리 후 전송)
+PREPROCESS_ENABLED = os.getenv("STT_PREPROCESS", "0") == "1"
+# 전처리 프로세스 수
+PREPROCESS_WORKERS = int(os.getenv("STT_PREPROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 음성 구간 RMS 목표 음량과 피크 상한, 최대 증폭량 (dBFS, dB)
+TARGET_LOUDNESS_DBFS = float(os.getenv("STT_TARGET_LOUDNESS_DBFS", "-20"))
+PEAK_LIMIT_DBFS = -1.0
+MAX_GAIN_DB = 30.0
+# VAD 프레임 길이, 잡음 바닥 대비 음성 판정 여유, 최고 에너지 대비 판정 하한, 절대 하한
+VAD_FRAME_MS = 30
+VAD_MARGIN_DB = float(os.getenv("STT_VAD_MARGIN_DB", "12"))
+VAD_PEAK_RANGE_DB = 25.0
+VAD_FLOOR_DBFS = -60.0
+# 음성으로 인정하는 최소 연속 길이 (클릭 잡음 무시)와 잘라낸 경계에 남기는 여유 (ms)
+VAD_MIN_SPEECH_MS = 90
+VAD_PAD_MS = int(os.getenv("STT_VAD_PAD_MS", "200"))
+# 이 길이(초)를 넘는 녹음은 무음 경계에서 약 SEGMENT_SECONDS 길이 구간으로 나눠 병렬 인식 (0이면 나누지 않음)
+SEGMENT_THRESHOLD_SECONDS = float(os.getenv("STT_SEGMENT_THRESHOLD_SECONDS", "60"))
+SEGMENT_SECONDS = float(os.getenv("STT_SEGMENT_SECONDS", "30"))
+# 분할 지점으로 우선 고르는 최소 무음 길이 (ms)
+SEGMENT_MIN_SILENCE_MS = 300
+
+
+class PreprocessError(ValueError):
+    """디코딩할 수 없는 음성"""
+
+
+class PreprocessedAudio:
+    """전처리된 16kHz mono 16bit PCM과 전처리 보고
+
+    segments는 STT에 따로 보낼 (시작, 끝) 샘플 구간이며 짧은 녹음은 전체 한 구간이다.
+    offset은 원본 녹음에서 잘라낸 앞부분 샘플 수 (구간 시각을 원본 기준으로 바꿀 때 사용)
+    digest는 PCM 해시로, 컨테이너나 원래 샘플링 레이트가 달라도 같은 소리면 같은 값이다 (인식 결과 캐시 키).
+    """
+
+    def __init__(self, pcm: bytes, stats: Dict[str, Any], segments: List[Tuple[int, int]], offset: int = 0):
+        self.pcm = pcm
+        self.stats = stats
+        self.segments = segments
+        self.offset = offset
+        self.digest = hashlib.blake2b(pcm, digest_size=16).hexdigest()
+
+    @property
+    def wav(self) -> bytes:
+        return self.segment_wav(0, len(self.pcm) // 2)
+
+    def segment_wav(self, start: int, end: int) -> bytes:
+        """샘플 구간 [start, end)의 WAV"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(self.pcm[start * 2:end * 2])
+        return buffer.getvalue()
+
+    def segment_times(self, start: int, end: int) -> Tuple[float, float]:
+        """샘플 구간의 원본 녹음 기준 (시작, 끝) 초"""
+        return round((self.offset + start) / SAMPLE_RATE, 3), round((self.offset + end) / SAMPLE_RATE, 3)
+
+
+def decode(data: bytes) -> np.ndarray:
+    """임의 형식 음성을 16kHz mono float32 샘플로 디코딩 (파이프 입출력, 임시 파일 없음)
+
+    moov가 끝에 있는 m4a처럼 탐색이 필요한 형식은 파이프로 디코딩할 수 없어 PreprocessError가 되며,
+    호출한 쪽은 원본을 그대로 STT 서버로 보낸다.
+    """
+    command = [FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+               "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "f32le", "pipe:1"]
+    result = subprocess.run(command, input=data, capture_output=True)
+    if result.returncode != 0 or not result.stdout:
+        raise PreprocessError(result.stderr.decode("utf-8", "replace").strip() or "디코딩된 샘플이 없습니다.")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def frame_energies(samples: np.ndarray, frame_ms: int = VAD_FRAME_MS) -> np.ndarray:
+    """프레임별 RMS 에너지 (dBFS, 마지막 불완전 프레임 포함)"""
+    size = SAMPLE_RATE * frame_ms // 1000
+    padded = np.pad(samples, (0, -len(samples) % size))
+    rms = np.sqrt(np.mean(np.square(padded.reshape(-1, size), dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def voiced_frames(samples: np.ndarray, frame_ms: int = VAD_FRAME_MS) -> np.ndarray:
+    """에너지 기반 프레임별 음성 여부
+
+    판정 기준은 잡음 바닥(하위 10% 에너지) + VAD_MARGIN_DB이되, 전체가 음성인 녹음에서 조용한 음절까지
+    무음으로 보지 않도록 최고 에너지 - VAD_PEAK_RANGE_DB를 넘지 않게 하고, VAD_FLOOR_DBFS 아래는 항상 무음이다.
+    VAD_MIN_SPEECH_MS보다 짧게 이어지는 음성 프레임은 무음으로 본다.
+    """
+    energies = frame_energies(samples, frame_ms)
+    if not len(energies):
+        return np.zeros(0, dtype=bool)
+    threshold = min(np.percentile(energies, 10) + VAD_MARGIN_DB, energies.max() - VAD_PEAK_RANGE_DB)
+    voiced = energies > max(threshold, VAD_FLOOR_DBFS)
+
+    run = max(1, -(-VAD_MIN_SPEECH_MS // frame_ms))
+    if run > 1 and voiced.any():
+        # run개 연속 음성 프레임으로 시작하는 위치를 구해 그 구간만 남김
+        starts = np.convolve(voiced.astype(np.int32), np.ones(run, dtype=np.int32), mode="valid") == run
+        voiced = np.convolve(starts.astype(np.int32), np.ones(run, dtype=np.int32))[:len(voiced)] > 0
+    return voiced
+
+
+def trim_bounds(voiced: np.ndarray, length: int, frame_ms: int = VAD_FRAME_MS) -> Tuple[int, int]:
+    """첫 음성 프레임부터 마지막 음성 프레임까지의 샘플 구간 (여유 포함, 음성이 없으면 전체)"""
+    indices = np.flatnonzero(voiced)
+    if not len(indices):
+        return 0, length
+    size = SAMPLE_RATE * frame_ms // 1000
+    pad = SAMPLE_RATE * VAD_PAD_MS // 1000
+    return max(0, int(indices[0]) * size - pad), min(length, (int(indices[-1]) + 1) * size + pad)
+
+
+def loudness_gain(samples: np.ndarray, voiced: np.ndarray, frame_ms: int = VAD_FRAME_MS) -> float:
+    """음성 프레임 RMS를 목표 음량으로 맞추는 이득 (dB, 피크 상한과 최대 증폭량 제한)"""
+    size = SAMPLE_RATE * frame_ms // 1000
+    mask = np.repeat(voiced, size)[:len(samples)]
+    speech = samples[mask] if mask.any() else samples
+    if not len(speech):
+        return 0.0
+    rms = float(np.sqrt(np.mean(np.square(speech, dtype=np.float64))))
+    peak = float(np.abs(samples).max())
+    if rms <= 0 or peak <= 0:
+        return 0.0
+    return float(min(TARGET_LOUDNESS_DBFS - 20 * np.log10(rms), PEAK_LIMIT_DBFS - 20 * np.log10(peak), MAX_GAIN_DB))
+
+
+def split_segments(samples: np.ndarray, target_seconds: float = SEGMENT_SECONDS,
+                   frame_ms: int = VAD_FRAME_MS) -> List[Tuple[int, int]]:
+    """target_seconds의 0.5~1.5배 길이 구간으로 나눈 (시작, 끝) 샘플 구간
+
+    각 분할 창 안에서 SEGMENT_MIN_SILENCE_MS 이상인 가장 긴 무음의 중앙에서 자르고,
+    그런 무음이 없으면 에너지가 가장 낮은 프레임에서 자른다.
+    """
+    size = SAMPLE_RATE * frame_ms // 1000
+    energies = frame_energies(samples, frame_ms)
+    silent = np.concatenate(([False], ~voiced_frames(samples, frame_ms), [False]))
+    edges = np.flatnonzero(silent[1:] != silent[:-1])
+    lengths = edges[1::2] - edges[::2]
+    keep = lengths >= max(1, SEGMENT_MIN_SILENCE_MS // frame_ms)
+    centers = ((edges[::2] + edges[1::2]) // 2)[keep]
+    lengths = lengths[keep]
+
+    target = max(2, int(target_seconds * 1000) // frame_ms)
+    bounds = []
+    start = 0
+    while len(energies) - start > target * 3 // 2:
+        low, high = start + target // 2, start + target * 3 // 2
+        i, j = np.searchsorted(centers, [low, high])
+        if j > i:
+            cut = int(centers[i + int(np.argmax(lengths[i:j]))])
+        else:
+            cut = low + int(np.argmin(energies[low:high]))
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(energies)))
+    return [(begin * size, min(end * size, len(samples))) for begin, end in bounds]
+
+
+def preprocess(data: bytes) -> PreprocessedAudio:
+    """디코딩 → 앞뒤 무음 제거 → 음량 정규화 후 16bit PCM과 줄어든 바이트/초 보고 반환"""
+    samples = decode(data)
+    voiced = voiced_frames(samples)
+    start, end = trim_bounds(voiced, len(samples))
+    trimmed = samples[start:end]
+    gain_db = loudness_gain(trimmed, voiced_frames(trimmed)) if len(trimmed) else 0.0
+
+    scaled = trimmed * np.float32(10 ** (gain_db / 20))
+    pcm = (np.clip(scaled, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    processed_bytes = len(pcm) + 44  # WAV 헤더
+    if SEGMENT_THRESHOLD_SECONDS > 0 and len(trimmed) > SEGMENT_THRESHOLD_SECONDS * SAMPLE_RATE:
+        segments = split_segments(trimmed)
+    else:
+        segments = [(0, len(trimmed))]
+
+    return PreprocessedAudio(pcm, {
+        "original_bytes": len(data),
+        "processed_bytes": processed_bytes,
+        # 압축 형식(mp3, m4a 등)은 PCM으로 풀면서 커질 수 있으므로 음수일 수 있음
+        "removed_bytes": len(data) - processed_bytes,
+        "original_seconds": round(len(samples) / SAMPLE_RATE, 3),
+        "processed_seconds": round(len(trimmed) / SAMPLE_RATE, 3),
+        "removed_seconds": round((len(samples) - len(trimmed)) / SAMPLE_RATE, 3),
+        "head_trimmed_seconds": round(start / SAMPLE_RATE, 3),
+        "tail_trimmed_seconds": round((len(samples) - end) / SAMPLE_RATE, 3),
+        "gain_db": round(gain_db, 2),
+        "segments": len(segments)
+    }, segments, offset=start)
+
+
+# 워커 프로세스 풀 (첫 요청 시 생성, 스레드가 있는 서버 프로세스를 fork하지 않도록 spawn 사용)
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """앱 종료 시 전처리 프로세스 정리"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def preprocess_async(data: bytes) -> Optional[PreprocessedAudio]:
+    """프로세스 풀에서 전처리 (ffmpeg가 없거나 디코딩에 실패하면 None)"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_executor(), preprocess, data)
+    except BrokenProcessPool as e:
+        # 워커가 비정상 종료되면 풀을 버리고 다음 요청에서 새로 생성
+        print(f"[음성 전처리 프로세스 오류]: {e}")
+        shutdown_executor()
+        return None
+    except Exception as e:
+        print(f"[음성 전처리 실패]: {e}")
+        return None
@@ -1,22 +1,129 @@
-import tempfile
-from shutil import copyfileobj
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import JSONResponse
-from services.stt.stt_service import transcribe_and_correct
+import asyncio
+import json
+from typing import AsyncIterator
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from services.stt.stt_service import transcribe_and_correct, transcribe_batch, cache_stats
+from services.stt.upload import UploadStream, UploadError, UploadTooLarge, iter_files, is_multipart
 
 router = APIRouter()
 
-@router.post("/api/stt")
-async def process_stt(audio: UploadFile = File(...)):
+# 문서화용 요청 본문 (본문은 라우트에서 직접 스트리밍으로 파싱)
+AUDIO_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"audio": {"type": "string", "format": "binary"}},
+                    "required": ["audio"]
+                }
+            }
+        }
+    }
+}
+
+# 문서화용 일괄 요청 본문 ("audio" 필드를 파일 수만큼 반복)
+AUDIO_BATCH_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"audio": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                    "required": ["audio"]
+                }
+            }
+        }
+    }
+}
+
+def _ndjson_line(item: dict) -> bytes:
+    return json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n"
+
+async def _batch_stream(first: "asyncio.Future", results: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """파일 처리가 끝나는 순서대로 결과 줄을 보내고 완료 줄로 마무리"""
+    sent = failed = 0
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            copyfileobj(audio.file, tmp)
-            tmp.flush()
-            tmp_path = tmp.name
+        item = await first
+        while True:
+            if "index" not in item:
+                # 본문 오류는 라우트에서 응답 전에 걸러지므로 응답 중에는 파일 목록 밖의 오류만 한 줄로 전달
+                yield _ndjson_line({"type": "error", "message": item["error"]})
+            else:
+                sent += 1
+                failed += "error" in item
+                yield _ndjson_line({"type": "result", "data": item})
+            item = await results.__anext__()
+    except StopAsyncIteration:
+        pass
+    finally:
+        await results.aclose()
+    yield _ndjson_line({"type": "end", "file_count": sent, "failed_count": failed})
 
-        print(f"[DEBUG] 임시 저장 경로: {tmp_path}")
+@router.post("/api/stt", openapi_extra=AUDIO_UPLOAD_BODY)
+async def process_stt(request: Request):
+    try:
+        # 업로드 청크를 임시 파일 없이 STT 서버로 바로 전달
+        audio = UploadStream(request, field="audio")
+        await audio.start()
 
-        result = transcribe_and_correct(tmp.name)
+        result = await transcribe_and_correct(
+            audio,
+            filename=audio.filename or "audio.wav",
+            content_type=audio.content_type or "audio/wav"
+        )
         return JSONResponse(result)
+    except UploadError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+@router.post("/api/stt/batch", openapi_extra=AUDIO_BATCH_BODY)
+async def process_stt_batch(request: Request):
+    """여러 음성 파일을 한 요청으로 받아 동시에 인식/교정하고, 끝나는 순서대로 NDJSON으로 응답
+
+    - 각 줄: {"type": "result", "data": {"index", "filename", "transcription", "correction", ...}}
+    - 파일별 실패(STT 서버 오류 포함)는 data의 "error", 마지막 줄은 {"type": "end"}
+    - 본문이 multipart가 아니거나 해석할 수 없거나 "audio" 파일이 없으면 400
+    - 파일 수, 파일 크기, 전체 크기 한도(STT_BATCH_MAX_FILES, STT_BATCH_MAX_FILE_MB, STT_BATCH_MAX_TOTAL_MB)를 넘으면 413
+    """
+    if not is_multipart(request):
+        return JSONResponse(status_code=400, content={"error": "multipart/form-data 요청이어야 합니다."})
+
+    # StreamingResponse는 연결 종료 감지를 위해 receive()를 읽으므로 응답 전에 본문을 모두 받는다 (크기는 한도로 제한).
+    # 파일은 다 받는 대로 처리를 시작하고, 응답은 그동안 끝난 결과부터 보낸다.
+    uploaded = asyncio.Event()
+    upload_errors = []
+
+    async def files():
+        try:
+            async for upload in iter_files(request, field="audio"):
+                yield upload
+        except Exception as e:
+            upload_errors.append(e)
+            raise
+        finally:
+            uploaded.set()
+
+    results = transcribe_batch(files())
+    first = asyncio.ensure_future(results.__anext__())
+    await uploaded.wait()
+
+    if upload_errors:
+        # 아직 응답을 시작하지 않았으므로 /api/stt와 같이 상태 코드로 응답하고 받은 파일 처리는 취소
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await results.aclose()
+        error = upload_errors[0]
+        status_code = 413 if isinstance(error, UploadTooLarge) else 400 if isinstance(error, UploadError) else 500
+        return JSONResponse(status_code=status_code, content={"error": str(error)})
+
+    return StreamingResponse(_batch_stream(first, results), media_type="application/x-ndjson")
+
+@router.get("/api/stt/cache")
+async def stt_cache_stats():
+    """인식 결과 캐시 적중/실패 수와 크기"""
+    return cache_stats()
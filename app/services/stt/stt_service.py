@@ -1,62 +1,357 @@
 # app/services/stt_service.py
-import requests
+import asyncio
+import itertools
+import os
+import uuid
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from starlette.concurrency import run_in_threadpool
 from services.elasticsearch.es_client import store_error_pattern
+from services.stt.upload import UploadError
+from services.stt.preprocess import PREPROCESS_ENABLED, PreprocessedAudio, preprocess_async
+from services.stt.cache import TranscriptionCache
 
-STT_API_URL = "http://voice-stt-container:8081/api/v1/stt"
+# STT 서버 주소 (STT_API_URLS에 쉼표로 여러 개를 주면 요청마다 돌아가며 사용)
+STT_API_URL = os.getenv("STT_API_URL", "http://voice-stt-container:8081/api/v1/stt")
+STT_API_URLS = [url.strip() for url in os.getenv("STT_API_URLS", STT_API_URL).split(",") if url.strip()]
+# 긴 녹음을 나눈 구간 중 한 요청에서 동시에 인식하는 수
+STT_SEGMENT_CONCURRENCY = int(os.getenv("STT_SEGMENT_CONCURRENCY", "4"))
+# 일괄 인식 요청에서 동시에 처리하는 파일 수
+STT_BATCH_CONCURRENCY = int(os.getenv("STT_BATCH_CONCURRENCY", "4"))
+# STT 서버 연결 풀 (워커 프로세스당 동시 연결 수와 유지할 keep-alive 연결 수)
+STT_MAX_CONNECTIONS = int(os.getenv("STT_MAX_CONNECTIONS", "32"))
+STT_KEEPALIVE_CONNECTIONS = int(os.getenv("STT_KEEPALIVE_CONNECTIONS", "16"))
+STT_TIMEOUT_SECONDS = float(os.getenv("STT_TIMEOUT_SECONDS", "300"))
 
-def transcribe_with_external_stt(file_path: str) -> str:
-    with open(file_path, "rb") as f:
-        files = {"file": (file_path, f, "audio/wav")}
-        try:
-            response = requests.post(STT_API_URL, files=files, timeout=300)
-            response.raise_for_status()
-            result = response.json()
+# 워커 프로세스에서 공유하는 비동기 HTTP 클라이언트 (첫 요청 시 생성)
+_http_client: Optional[httpx.AsyncClient] = None
+# 요청마다 돌아가며 쓰는 STT 서버 주소
+_stt_urls = itertools.cycle(STT_API_URLS)
+# 정규화된 PCM 해시 → 인식/교정 결과 캐시와 처리 중인 같은 음성 요청
+transcription_cache = TranscriptionCache()
+_inflight: Dict[str, "asyncio.Future"] = {}
 
-            print("[DEBUG] STT 응답:", result)
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(STT_TIMEOUT_SECONDS, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=STT_MAX_CONNECTIONS,
+                max_keepalive_connections=STT_KEEPALIVE_CONNECTIONS
+            )
+        )
+    return _http_client
 
-            transcription = result.get("text", "")
-            if not isinstance(transcription, str):
-                transcription = str(transcription)
+async def close_http_client() -> None:
+    """앱 종료 시 공유 클라이언트의 연결 정리"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
-            return transcription
+async def _multipart_body(chunks: AsyncIterable[bytes], boundary: str, filename: str,
+                          content_type: str) -> AsyncIterator[bytes]:
+    """파일 필드 하나짜리 multipart 본문을 청크 단위로 생성 (길이를 모르므로 chunked 전송)"""
+    filename = filename.replace('"', "")
+    yield (
+        f"--{boundary}\r\n"
+        f"Content-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode("utf-8")
+    async for chunk in chunks:
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode("utf-8")
 
-        except Exception as e:
-            print(f"[STT 서버 오류]: {e}")
-            return ""
+class STTError(RuntimeError):
+    """STT 서버 호출 실패"""
+
+async def _post_to_stt(**kwargs) -> str:
+    """STT 서버 요청 후 인식 텍스트 반환 (실패 시 STTError)"""
+    try:
+        response = await get_http_client().post(next(_stt_urls), **kwargs)
+        response.raise_for_status()
+        result = response.json()
+
+        print("[DEBUG] STT 응답:", result)
+
+        transcription = result.get("text", "")
+        if not isinstance(transcription, str):
+            transcription = str(transcription)
 
-def transcribe_and_correct(file_path: str) -> dict:
-    # Whisper로 텍스트 변환
-    transcription = transcribe_with_external_stt(file_path)
-    
+        return transcription
+
+    except UploadError:
+        # 업로드 스트림 오류는 라우터에서 400으로 응답
+        raise
+    except Exception as e:
+        print(f"[STT 서버 오류]: {e}")
+        raise STTError(f"STT 서버 오류: {e}")
+
+async def transcribe_stream(chunks: AsyncIterable[bytes], filename: str = "audio.wav",
+                            content_type: str = "audio/wav", strict: bool = False) -> str:
+    """오디오 청크를 받는 대로 STT 서버에 전달하고 인식 텍스트 반환 (실패 시 빈 문자열, strict면 STTError)"""
+    boundary = uuid.uuid4().hex
+    try:
+        return await _post_to_stt(
+            content=_multipart_body(chunks, boundary, filename, content_type),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        )
+    except STTError:
+        if strict:
+            raise
+        return ""
+
+async def transcribe_audio(data: bytes, filename: str = "audio.wav", content_type: str = "audio/wav",
+                           strict: bool = False) -> str:
+    """메모리에 있는 음성을 STT 서버에 전달하고 인식 텍스트 반환 (실패 시 빈 문자열, strict면 STTError)"""
+    try:
+        return await _post_to_stt(files={"file": (filename, data, content_type)})
+    except STTError:
+        if strict:
+            raise
+        return ""
+
+async def transcribe_segments(audio: PreprocessedAudio, filename: str = "audio.wav") -> List[Dict]:
+    """전처리된 음성의 구간들을 동시에 인식 (STT_SEGMENT_CONCURRENCY개까지), 구간 순서대로 반환
+
+    한 구간이라도 STT 호출에 실패하면 STTError
+    """
+    semaphore = asyncio.Semaphore(STT_SEGMENT_CONCURRENCY)
+    stem = os.path.splitext(filename)[0]
+
+    async def transcribe_segment(index: int, start: int, end: int) -> Dict:
+        async with semaphore:
+            transcription = await transcribe_audio(audio.segment_wav(start, end), f"{stem}_{index}.wav", strict=True)
+        start_seconds, end_seconds = audio.segment_times(start, end)
+        return {
+            "index": index,
+            "start": start_seconds,
+            "end": end_seconds,
+            "transcription": transcription
+        }
+
+    return await asyncio.gather(*(
+        transcribe_segment(index, start, end) for index, (start, end) in enumerate(audio.segments)
+    ))
+
+async def read_upload(chunks: AsyncIterable[bytes]) -> bytes:
+    """업로드 청크를 메모리에 모음 (전처리는 전체 음성이 필요)"""
+    parts = []
+    async for chunk in chunks:
+        parts.append(chunk)
+    return b"".join(parts)
+
+def generate_correction(transcription: str) -> Optional[str]:
+    """Gemini로 인식 텍스트 교정 (실패 시 None, blocking 호출이므로 스레드풀에서 실행)"""
     try:
         from services.correction.gemini import PromptRequest, chat_with_gemini
-        
+
         request = PromptRequest(prompt=transcription)
-        
+
         gemini_response = chat_with_gemini(request)
-        
+
         reply = gemini_response.get("reply", "")
-        
-        if "- [" in reply and "]" in reply:
-            correction = reply.split("- [")[1].split("]")[0]
-        else:
-            correction = reply.strip()
 
-        
-        try:
-            store_error_pattern(
-                stt_text=transcription,
-                enhanced_text=correction
-            )
-        except Exception as es_err:
-            print(f"[Elasticsearch 저장 실패]: {es_err}")
+        if "- [" in reply and "]" in reply:
+            return reply.split("- [")[1].split("]")[0]
+        return reply.strip()
 
-            
     except Exception as e:
         print(f"Gemini API 호출 실패: {e}")
-        correction = transcription 
-    
-    return {
+        return None
+
+def record_error_pattern(transcription: str, correction: str) -> None:
+    """인식/교정 결과를 오류 패턴으로 저장"""
+    try:
+        store_error_pattern(
+            stt_text=transcription,
+            enhanced_text=correction
+        )
+    except Exception as es_err:
+        print(f"[Elasticsearch 저장 실패]: {es_err}")
+
+def correct_transcription(transcription: str) -> str:
+    """Gemini로 인식 텍스트 교정 후 오류 패턴 저장 (교정 실패 시 원문 반환)"""
+    correction = generate_correction(transcription)
+    if correction is None:
+        return transcription
+
+    record_error_pattern(transcription, correction)
+    return correction
+
+async def _recognize(audio: PreprocessedAudio, filename: str) -> Tuple[Dict[str, Any], bool]:
+    """전처리된 음성의 인식과 교정 결과, 캐시에 저장해도 되는지 (빈 인식 결과나 교정 실패면 False)
+
+    STT 호출이 실패하면 STTError
+    """
+    segments = None
+    if len(audio.segments) > 1:
+        # 긴 녹음은 무음 경계에서 나눈 구간을 병렬로 인식한 뒤 순서대로 이어 붙임
+        segments = await transcribe_segments(audio, filename)
+        transcription = " ".join(s["transcription"] for s in segments if s["transcription"])
+    else:
+        transcription = await transcribe_audio(audio.wav, os.path.splitext(filename)[0] + ".wav", strict=True)
+
+    # 교정과 저장은 동기 HTTP/ES 호출이므로 이벤트 루프 밖에서 실행
+    correction = await run_in_threadpool(generate_correction, transcription)
+    cacheable = bool(transcription) and correction is not None
+    if correction is None:
+        correction = transcription
+    else:
+        await run_in_threadpool(record_error_pattern, transcription, correction)
+
+    result = {
         "transcription": transcription,
         "correction": correction
     }
+    if segments is not None:
+        result["segments"] = segments
+    return result, cacheable
+
+async def _recognize_cached(audio: PreprocessedAudio, filename: str) -> Tuple[Dict[str, Any], bool]:
+    """PCM 해시로 캐시를 확인해 같은 음성은 STT 서버와 Gemini를 다시 부르지 않음, (결과, 캐시 적중 여부)
+
+    같은 음성이 동시에 들어오면 먼저 온 요청(캐시 확인 포함)의 결과를 기다리며,
+    먼저 온 요청의 STT 호출이 실패하면 기다리던 요청도 같은 STTError로 끝난다.
+    """
+    key = audio.digest
+    pending = _inflight.get(key)
+    while pending is not None:
+        shared = await asyncio.shield(pending)
+        if shared is not None:
+            result, cacheable = shared
+            if cacheable:
+                transcription_cache.count_inflight_hit()
+                await run_in_threadpool(record_error_pattern, result["transcription"], result["correction"])
+            return result, cacheable
+        # 먼저 온 요청이 결과 없이 끝났으면 다시 확인
+        pending = _inflight.get(key)
+
+    # 확인과 등록 사이에 await가 없어야 동시에 들어온 같은 음성 요청이 모두 이 요청을 기다림
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        cached = await run_in_threadpool(transcription_cache.get, key)
+        if cached is not None:
+            future.set_result((cached, True))
+            # 인식/교정은 건너뛰고 오류 패턴 기록만 남김
+            await run_in_threadpool(record_error_pattern, cached["transcription"], cached["correction"])
+            return cached, True
+
+        result, cacheable = await _recognize(audio, filename)
+        if cacheable:
+            await run_in_threadpool(transcription_cache.put, key, result)
+        # 저장할 수 없는 결과(실패)도 기다리던 요청에 그대로 전달 (같은 음성으로 다시 호출하지 않음)
+        future.set_result((result, cacheable))
+        return result, False
+    except STTError as e:
+        future.set_exception(e)
+        # 기다리는 요청이 없어도 처리되지 않은 예외 경고가 남지 않도록 조회 표시
+        future.exception()
+        raise
+    finally:
+        if not future.done():
+            future.set_result(None)
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+async def transcribe_and_correct(chunks: AsyncIterable[bytes], filename: str = "audio.wav",
+                                 content_type: str = "audio/wav", strict: bool = False) -> dict:
+    """음성 인식과 교정 결과
+
+    STT 호출이 실패하면 기본적으로 빈 인식 결과로 교정 단계를 진행하고, strict면 STTError를 그대로 올린다.
+    """
+    extra = {}
+    if PREPROCESS_ENABLED:
+        # 16kHz mono 디코딩, 음량 정규화, 앞뒤 무음 제거 (녹음 전체가 필요해 업로드를 받은 뒤 시작, 실패하면 원본 그대로 전달)
+        data = await read_upload(chunks)
+        processed = await preprocess_async(data)
+        if processed is not None:
+            try:
+                result, cached = await _recognize_cached(processed, filename)
+            except STTError:
+                if strict:
+                    raise
+                transcription = ""
+                extra = {"preprocessing": processed.stats, "cached": False}
+            else:
+                return {**result, "preprocessing": processed.stats, "cached": cached}
+        else:
+            transcription = await transcribe_audio(data, filename, content_type, strict=strict)
+    else:
+        # 업로드 청크를 STT 서버로 바로 전달해 텍스트 변환
+        transcription = await transcribe_stream(chunks, filename, content_type, strict=strict)
+
+    # 교정과 저장은 동기 HTTP/ES 호출이므로 이벤트 루프 밖에서 실행
+    correction = await run_in_threadpool(correct_transcription, transcription)
+
+    return {
+        "transcription": transcription,
+        "correction": correction,
+        **extra
+    }
+
+async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+async def transcribe_batch(files: AsyncIterable[Tuple[str, Optional[str], bytes]]) -> AsyncIterator[Dict[str, Any]]:
+    """업로드되는 파일마다 인식/교정을 시작해 끝나는 순서대로 결과를 내보냄 (동시 STT_BATCH_CONCURRENCY개)
+
+    결과 항목은 {"index", "filename", ...transcribe_and_correct 결과} 또는 {"index", "filename", "error"}이며,
+    업로드 본문 오류는 {"error"} 항목 하나로 내보낸 뒤 이미 받은 파일의 결과까지 내보낸다.
+    """
+    semaphore = asyncio.Semaphore(STT_BATCH_CONCURRENCY)
+    events: asyncio.Queue = asyncio.Queue()
+    tasks = set()
+
+    async def process(index: int, filename: str, content_type: Optional[str], data: bytes) -> None:
+        try:
+            if not data:
+                raise UploadError("파일이 비어 있습니다.")
+            async with semaphore:
+                # STT 실패는 빈 인식 결과 대신 파일별 오류로 보고
+                result = await transcribe_and_correct(
+                    _single_chunk(data), filename, content_type or "audio/wav", strict=True
+                )
+            item = {"index": index, "filename": filename, **result}
+        except Exception as e:
+            item = {"index": index, "filename": filename, "error": str(e)}
+        await events.put(("result", item))
+
+    async def read_files() -> None:
+        received = 0
+        try:
+            async for filename, content_type, data in files:
+                task = asyncio.ensure_future(process(received, filename, content_type, data))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                received += 1
+        except Exception as e:
+            await events.put(("error", str(e)))
+        finally:
+            await events.put(("done", received))
+
+    reader = asyncio.ensure_future(read_files())
+    received = None
+    completed = 0
+    try:
+        while received is None or completed < received:
+            kind, value = await events.get()
+            if kind == "result":
+                completed += 1
+                yield value
+            elif kind == "error":
+                yield {"error": value}
+            else:
+                received = value
+    finally:
+        # 클라이언트 연결이 끊기면 남은 업로드 읽기와 처리 취소
+        reader.cancel()
+        for task in list(tasks):
+            task.cancel()
+
+def cache_stats() -> Dict[str, Any]:
+    """인식 결과 캐시 적중/실패 수와 크기"""
+    return transcription_cache.stats()
@@ -0,0 +1,199 @@
+# app/services/stt/upload.py
+"""multipart/form-data 요청의 파일 필드를 임시 파일 없이 청크 단위로 읽기
+
+UploadFile(File(...))은 요청 전체를 SpooledTemporaryFile에 받은 뒤에야 라우트가 실행되므로,
+요청 본문 스트림을 직접 파싱해 파일 필드 데이터가 도착하는 대로 넘긴다.
+"""
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+from starlette.requests import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # python-multipart 0.0.12 이전
+    import multipart
+    from multipart.multipart import parse_options_header
+
+# 일괄 업로드 한도 (파일은 메모리에 받으므로 요청 하나가 쓰는 메모리 상한)
+BATCH_MAX_FILES = int(os.getenv("STT_BATCH_MAX_FILES", "20"))
+BATCH_MAX_FILE_MB = float(os.getenv("STT_BATCH_MAX_FILE_MB", "25"))
+BATCH_MAX_TOTAL_MB = float(os.getenv("STT_BATCH_MAX_TOTAL_MB", "100"))
+
+
+class UploadError(ValueError):
+    """잘못된 업로드 요청 (라우터에서 400으로 응답)"""
+
+
+class UploadTooLarge(UploadError):
+    """업로드 한도 초과 (라우터에서 413으로 응답)"""
+
+
+class UploadPart:
+    """multipart 파트 헤더 정보"""
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+
+def is_multipart(request: Request) -> bool:
+    """boundary가 있는 multipart/form-data 요청인지"""
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    return content_type == b"multipart/form-data" and bool(params.get(b"boundary"))
+
+
+async def iter_parts(request: Request) -> AsyncIterator[Tuple[UploadPart, Optional[bytes]]]:
+    """요청 본문의 파트 데이터를 도착 순서대로 (파트, 청크)로 내보냄, 파트가 끝나면 (파트, None)
+
+    multipart 요청이 아니거나 본문을 해석할 수 없으면 UploadError
+    """
+    if not is_multipart(request):
+        raise UploadError("multipart/form-data 요청이어야 합니다.")
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+
+    state = {"part": UploadPart(), "header": b"", "value": b""}
+    events: List[Tuple[UploadPart, Optional[bytes]]] = []
+
+    def on_part_begin():
+        state["part"] = UploadPart()
+
+    def on_header_field(data, start, end):
+        state["header"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        part = state["part"]
+        header = state["header"].lower()
+        if header == b"content-disposition":
+            _, options = parse_options_header(state["value"])
+            part.name = options.get(b"name", b"").decode("utf-8", "replace")
+            filename = options.get(b"filename")
+            part.filename = filename.decode("utf-8", "replace") if filename else None
+        elif header == b"content-type":
+            part.content_type = state["value"].decode("latin-1")
+        state["header"] = state["value"] = b""
+
+    def on_part_data(data, start, end):
+        # 같은 파트의 연속된 청크는 하나로 합쳐서 내보냄
+        if events and events[-1][0] is state["part"] and events[-1][1] is not None:
+            events[-1] = (state["part"], events[-1][1] + data[start:end])
+        else:
+            events.append((state["part"], data[start:end]))
+
+    def on_part_end():
+        events.append((state["part"], None))
+
+    parser = multipart.MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end
+    })
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            while events:
+                yield events.pop(0)
+        parser.finalize()
+    except multipart.exceptions.MultipartParseError as e:
+        raise UploadError(f"multipart 본문을 해석할 수 없습니다: {e}")
+    for event in events:
+        yield event
+
+
+async def iter_files(request: Request, field: str = "audio", max_files: int = BATCH_MAX_FILES,
+                     max_file_bytes: int = int(BATCH_MAX_FILE_MB * 1024 * 1024),
+                     max_total_bytes: int = int(BATCH_MAX_TOTAL_MB * 1024 * 1024)) -> AsyncIterator[Tuple[str, Optional[str], bytes]]:
+    """field 이름의 파일 파트를 하나씩 다 받을 때마다 (파일 이름, Content-Type, 데이터)로 내보냄
+
+    파일 수, 파일 크기, 전체 파트 데이터 크기가 한도를 넘으면 나머지 본문을 읽지 않고 UploadTooLarge
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_total_bytes + 64 * 1024:
+        # multipart 경계와 헤더 여유를 두고 본문을 읽기 전에 거절
+        raise UploadTooLarge(f"요청 본문이 너무 큽니다. (최대 {max_total_bytes // (1024 * 1024)}MB)")
+
+    found = 0
+    size = total = 0
+    current: Optional[UploadPart] = None
+    buffers: List[bytes] = []
+    async for part, chunk in iter_parts(request):
+        if chunk is not None:
+            total += len(chunk)
+            if total > max_total_bytes:
+                raise UploadTooLarge(f"업로드 전체 크기가 너무 큽니다. (최대 {max_total_bytes // (1024 * 1024)}MB)")
+        if part.name != field:
+            continue
+        if part is not current:
+            if found >= max_files:
+                raise UploadTooLarge(f"파일이 너무 많습니다. (최대 {max_files}개)")
+            current, size = part, 0
+        if chunk is not None:
+            size += len(chunk)
+            if size > max_file_bytes:
+                raise UploadTooLarge(f"파일이 너무 큽니다: {part.filename or field} (최대 {max_file_bytes // (1024 * 1024)}MB)")
+            buffers.append(chunk)
+            continue
+        found += 1
+        data = b"".join(buffers)
+        buffers.clear()
+        yield part.filename or f"audio_{found}.wav", part.content_type, data
+
+    if not found:
+        raise UploadError(f"'{field}' 파일 필드가 없습니다.")
+
+
+class UploadStream:
+    """요청 본문에서 파일 필드 하나의 데이터를 도착 순서대로 내보내는 스트림
+
+    start()로 첫 데이터 청크까지 읽어 필드가 있는지 확인한 뒤 async for로 순회한다.
+    """
+
+    def __init__(self, request: Request, field: str = "audio"):
+        self.request = request
+        self.field = field
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self._chunks = self._iter_field()
+        self._first: Optional[bytes] = None
+
+    async def start(self) -> None:
+        """첫 데이터 청크까지 읽기 (multipart가 아니거나 필드가 없거나 비어 있으면 UploadError)"""
+        try:
+            self._first = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            raise UploadError(f"'{self.field}' 파일이 비어 있습니다.")
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self._first is None:
+            await self.start()
+        first, self._first = self._first, b""
+        if first:
+            yield first
+        async for chunk in self._chunks:
+            yield chunk
+
+    async def _iter_field(self) -> AsyncIterator[bytes]:
+        # 같은 이름의 파일 파트가 여러 개면 첫 파트만 사용
+        current: Optional[UploadPart] = None
+        async for part, chunk in iter_parts(self.request):
+            if part.name != self.field or (current is not None and part is not current):
+                continue
+            if current is None:
+                current = part
+                self.filename = part.filename
+                self.content_type = part.content_type
+            if chunk:
+                self.size += len(chunk)
+                yield chunk
+
+        if current is None:
+            raise UploadError(f"'{self.field}' 파일 필드가 없습니다.")
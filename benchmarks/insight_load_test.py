@@ -0,0 +1,111 @@
+"""인사이트 분석 부하 중 무관한 엔드포인트의 지연 시간 측정
+
+1단계: 부하 없이 probe 엔드포인트 지연 시간 측정
+2단계: 여러 스레드가 인사이트 API를 (캐시를 피하도록 파라미터를 바꿔 가며) 호출하는 동안 다시 측정
+
+사용법:
+    python benchmarks/insight_load_test.py --base-url http://localhost:8000 --duration 20 --workers 8
+"""
+import argparse
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+# 부하용 인사이트 요청 (파라미터 조합을 바꿔 결과 캐시 적중을 줄임)
+REF_TEXTS = ["시계", "안녕하세요", "사과", "학교", "감사합니다", "친구", "날씨", "병원"]
+NATIONALITIES = ["Chinese", "English", "Spanish"]
+LEVELS = ["A", "B", "C"]
+
+
+def insight_requests():
+    """(경로, 파라미터) 무한 순환"""
+    limits = itertools.cycle(range(1, 101))
+    refs = itertools.cycle(REF_TEXTS)
+    pron_limits = itertools.cycle(range(10, 201, 10))
+    for i in itertools.count():
+        yield "/api/insights/overview", {}
+        yield "/api/insights/text-difficulty", {"limit": next(limits)}
+        yield "/api/insights/pronunciation-errors", {"ref_text": next(refs), "limit": next(pron_limits)}
+        yield "/api/insights/gender-performance", {
+            "nationality": NATIONALITIES[i % len(NATIONALITIES)],
+            "level": LEVELS[(i // len(NATIONALITIES)) % len(LEVELS)]
+        }
+        yield "/api/insights/error-rate-percentiles", {"group_by": "level", "nationality": NATIONALITIES[i % len(NATIONALITIES)]}
+
+
+def probe(base_url: str, path: str, duration: float, interval: float) -> list:
+    """duration 동안 interval 간격으로 probe 엔드포인트를 호출하고 지연 시간(ms) 목록 반환"""
+    session = requests.Session()
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        session.get(base_url + path, timeout=30).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+    return latencies
+
+
+def load(base_url: str, stop: threading.Event, requests_iter, lock: threading.Lock, counter: list) -> None:
+    """stop 신호까지 인사이트 API 호출"""
+    session = requests.Session()
+    while not stop.is_set():
+        with lock:
+            path, params = next(requests_iter)
+        try:
+            session.get(base_url + path, params=params, timeout=120)
+        except requests.RequestException as e:
+            print(f"부하 요청 오류 ({path}): {e}")
+        with lock:
+            counter[0] += 1
+
+
+def summarize(name: str, latencies: list) -> dict:
+    values = np.asarray(latencies)
+    result = {
+        "requests": len(values),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max())
+    }
+    print(f"[{name}] 요청 {result['requests']}건 - p50 {result['p50']:.1f}ms, p95 {result['p95']:.1f}ms, "
+          f"p99 {result['p99']:.1f}ms, max {result['max']:.1f}ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인사이트 부하 중 무관한 엔드포인트 지연 시간 측정")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--probe-path", default="/", help="지연 시간을 측정할 무관한 엔드포인트")
+    parser.add_argument("--duration", type=float, default=20.0, help="단계별 측정 시간 (초)")
+    parser.add_argument("--interval", type=float, default=0.02, help="probe 호출 간격 (초)")
+    parser.add_argument("--workers", type=int, default=8, help="인사이트 부하 스레드 수")
+    args = parser.parse_args()
+
+    print("1단계: 부하 없음")
+    baseline = summarize("baseline", probe(args.base_url, args.probe_path, args.duration, args.interval))
+
+    print(f"2단계: 인사이트 부하 스레드 {args.workers}개")
+    stop = threading.Event()
+    lock = threading.Lock()
+    counter = [0]
+    requests_iter = insight_requests()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for _ in range(args.workers):
+            pool.submit(load, args.base_url, stop, requests_iter, lock, counter)
+        started = time.perf_counter()
+        loaded = summarize("under load", probe(args.base_url, args.probe_path, args.duration, args.interval))
+        stop.set()
+        elapsed = time.perf_counter() - started
+
+    print(f"인사이트 처리량: {counter[0] / elapsed:.1f} req/s")
+    print(f"p99 변화: {baseline['p99']:.1f}ms -> {loaded['p99']:.1f}ms ({loaded['p99'] / baseline['p99']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
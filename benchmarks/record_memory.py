@@ -0,0 +1,84 @@
+"""인사이트 문서 표현별 레코드당 메모리 측정
+
+app/data 코퍼스 문서를 반복해 N건(기본 100,000건)을 만들고, 표현마다 보관 중인 메모리를 tracemalloc으로 잰다.
+- source_dict: 검색 응답에서 디코딩한 전체 _source dict (문서마다 별도 문자열)
+- sample_dict: 발음 오류 분석이 문서마다 만들던 중첩 응답 dict (_source와 함께 보관)
+- record: PronunciationRecord (__slots__, 범주형 문자열 intern)
+- snapshot: InsightSnapshot 컬럼 (수치 배열 + 범주 코드)
+
+사용법:
+    python benchmarks/record_memory.py --records 100000
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.insight.corpus import default_paths, iter_rows, document_from_row  # noqa: E402
+from services.insight.records import PronunciationRecord  # noqa: E402
+from services.insight.snapshot import InsightSnapshot, SOURCE_FIELDS  # noqa: E402
+
+
+def encoded_documents(count: int):
+    """코퍼스 문서를 count건까지 반복하며 검색 응답처럼 JSON 인코딩된 _source 반환"""
+    documents = [document_from_row(row) for path in default_paths() for _, row in iter_rows(path)]
+    if not documents:
+        raise SystemExit("app/data에 CSV 코퍼스가 없습니다.")
+    for number, document in zip(range(count), itertools.cycle(documents)):
+        yield json.dumps({**document, "file": f"{document.get('file', '')}#{number}"}, ensure_ascii=False)
+
+
+def measure(build, encoded: list) -> int:
+    """build(encoded)가 반환한 객체를 보관한 상태의 메모리 증가량 (바이트)"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    retained = build(encoded)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del retained
+    return used
+
+
+def source_dicts(encoded: list) -> list:
+    return [json.loads(raw) for raw in encoded]
+
+
+def sample_dicts(encoded: list) -> list:
+    sources = [json.loads(raw) for raw in encoded]
+    return [(source, PronunciationRecord.from_source(source).to_response()) for source in sources]
+
+
+def records(encoded: list) -> list:
+    return [PronunciationRecord.from_source(json.loads(raw)) for raw in encoded]
+
+
+def snapshot(encoded: list) -> InsightSnapshot:
+    return InsightSnapshot.from_documents(
+        {field: document.get(field) for field in SOURCE_FIELDS}
+        for document in map(json.loads, encoded)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문서 표현별 레코드당 메모리 측정")
+    parser.add_argument("--records", type=int, default=100000, help="측정할 문서 수")
+    args = parser.parse_args()
+
+    encoded = list(encoded_documents(args.records))
+    print(f"문서 {len(encoded)}건")
+    print(f"{'표현':<14}{'전체(MB)':>12}{'레코드당(B)':>14}")
+    for name, build in (("source_dict", source_dicts), ("sample_dict", sample_dicts),
+                        ("record", records), ("snapshot", snapshot)):
+        used = measure(build, encoded)
+        print(f"{name:<14}{used / 1024 / 1024:>12.1f}{used / len(encoded):>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""동시 STT 업로드 처리량과 업로드 중 무관한 엔드포인트 지연 시간 측정
+
+동시 업로드 수를 단계별로 올리며 각 단계에서
+- 업로드 처리량(건/초)과 업로드 응답 지연 시간 p50/p99
+- 업로드가 진행되는 동안 probe 엔드포인트 지연 시간 p50/p99
+를 측정한다. 워커 하나(uvicorn --workers 1)로 실행한 서버에서 변경 전후를 비교한다.
+
+--fake-stt-port를 주면 지정한 지연 후 고정 텍스트를 반환하는 STT 서버를 함께 띄운다.
+API 서버는 STT_API_URL=http://<이 호스트>:<포트>/api/v1/stt 로 실행한다.
+
+사용법:
+    python benchmarks/stt_upload_bench.py --base-url http://localhost:8000 --concurrency 1 4 8 16 --fake-stt-port 8081
+"""
+import argparse
+import io
+import json
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+
+def make_wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    """seconds 길이의 16kHz mono 16bit 테스트 음성 (사인파 + 잡음)"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    rng = np.random.default_rng(0)
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((signal * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+class FakeSTTHandler(BaseHTTPRequestHandler):
+    """요청 본문(고정 길이 또는 chunked)을 모두 읽고 delay초 뒤 고정 텍스트 반환"""
+    delay = 1.0
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        received = 0
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                received += len(self.rfile.read(size))
+                self.rfile.readline()
+                if size == 0:
+                    break
+        else:
+            received = len(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(self.delay)
+        body = json.dumps({"text": "안녕하세요", "bytes": received}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_stt(port: int, delay: float) -> ThreadingHTTPServer:
+    FakeSTTHandler.delay = delay
+    server = ThreadingHTTPServer(("0.0.0.0", port), FakeSTTHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"가짜 STT 서버: http://0.0.0.0:{port}/api/v1/stt (지연 {delay}초)")
+    return server
+
+
+def upload(session: requests.Session, base_url: str, audio: bytes) -> float:
+    started = time.perf_counter()
+    response = session.post(f"{base_url}/api/stt", files={"audio": ("sample.wav", audio, "audio/wav")}, timeout=600)
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def probe(base_url: str, path: str, stop: threading.Event, interval: float) -> list:
+    session = requests.Session()
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(base_url + path, timeout=60).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+    return latencies
+
+
+def run_level(base_url: str, audio: bytes, concurrency: int, rounds: int, probe_path: str) -> dict:
+    """concurrency개 스레드가 각각 rounds번 업로드하는 동안 probe 지연 시간 측정"""
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as pool:
+        probe_future = pool.submit(probe, base_url, probe_path, stop, 0.05)
+
+        def worker():
+            session = requests.Session()
+            return [upload(session, base_url, audio) for _ in range(rounds)]
+
+        started = time.perf_counter()
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        latencies = [latency for future in futures for latency in future.result()]
+        elapsed = time.perf_counter() - started
+        stop.set()
+        probe_latencies = probe_future.result()
+
+    return {
+        "concurrency": concurrency,
+        "uploads_per_second": len(latencies) / elapsed,
+        "upload_p50": float(np.percentile(latencies, 50)),
+        "upload_p99": float(np.percentile(latencies, 99)),
+        "probe_p50": float(np.percentile(probe_latencies, 50)) if probe_latencies else 0.0,
+        "probe_p99": float(np.percentile(probe_latencies, 99)) if probe_latencies else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 STT 업로드 벤치마크")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16], help="동시 업로드 수 단계")
+    parser.add_argument("--rounds", type=int, default=3, help="단계별 스레드당 업로드 횟수")
+    parser.add_argument("--seconds", type=float, default=30.0, help="업로드할 음성 길이 (초)")
+    parser.add_argument("--probe-path", default="/", help="업로드 중 지연 시간을 잴 엔드포인트")
+    parser.add_argument("--fake-stt-port", type=int, default=None, help="가짜 STT 서버 포트 (지정 시 함께 실행)")
+    parser.add_argument("--stt-delay", type=float, default=1.0, help="가짜 STT 서버 응답 지연 (초)")
+    args = parser.parse_args()
+
+    if args.fake_stt_port:
+        start_fake_stt(args.fake_stt_port, args.stt_delay)
+
+    audio = make_wav(args.seconds)
+    print(f"업로드 크기: {len(audio) / 1024:.0f}KB ({args.seconds:.0f}초)")
+    print(f"{'동시':>4} {'건/초':>8} {'업로드 p50':>11} {'업로드 p99':>11} {'probe p50':>10} {'probe p99':>10}")
+    for concurrency in args.concurrency:
+        result = run_level(args.base_url, audio, concurrency, args.rounds, args.probe_path)
+        print(f"{result['concurrency']:>4} {result['uploads_per_second']:>8.2f} "
+              f"{result['upload_p50']:>9.0f}ms {result['upload_p99']:>9.0f}ms "
+              f"{result['probe_p50']:>8.1f}ms {result['probe_p99']:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""테스트 공통 설정 - app/을 import 루트로 쓰고(pytest.ini), 코호트 집계 파일은 저장하지 않는다."""
+import os
+import sys
+import types
+
+os.environ["INSIGHT_AGGREGATES_PATH"] = ""
+
+import pytest
+
+from services.insight.corpus import default_paths, iter_rows, document_from_row
+from services.insight.embedded import EmbeddedBackend
+from services.insight.insight_service import InsightService
+
+
+@pytest.fixture(scope="session")
+def corpus_documents():
+    """app/data CSV 코퍼스 전체 문서 (색인 시와 같은 변환)"""
+    return [document_from_row(row) for path in default_paths() for _, row in iter_rows(path)]
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    """백그라운드 갱신 스레드 없이 InsightService 생성 (테스트가 갱신 시점을 직접 제어)"""
+    monkeypatch.setattr(InsightService, "_refresh_loop", lambda self: None)
+    return InsightService
+
+
+@pytest.fixture(scope="session")
+def embedded_backend(tmp_path_factory):
+    return EmbeddedBackend(cache_dir=str(tmp_path_factory.mktemp("columnar")))
+
+
+@pytest.fixture
+def embedded_service(make_service, embedded_backend):
+    return make_service(backend=embedded_backend)
+
+
+@pytest.fixture
+def insight_app(embedded_service, monkeypatch):
+    """내장 백엔드 서비스를 쓰는 인사이트 라우터 앱"""
+    from fastapi import FastAPI
+    from services.insight import insight_router
+
+    monkeypatch.setattr(insight_router, "insight_service", embedded_service)
+    app = FastAPI()
+    app.include_router(insight_router.router)
+    return app
+
+
+@pytest.fixture
+def insight_client(insight_app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(insight_app) as client:
+        yield client
+
+
+@pytest.fixture
+def stt_service(monkeypatch):
+    """ES/Gemini 모듈을 대역으로 바꿔 새로 import한 STT 서비스
+
+    교정은 "교정 <원문>"이고 저장한 오류 패턴은 stt_service.stored_patterns에 쌓인다.
+    STT 서버 호출은 install_stt로 FakeSTT에 연결한다.
+    """
+    stored = []
+    es_client = types.ModuleType("services.elasticsearch.es_client")
+    es_client.store_error_pattern = lambda stt_text, enhanced_text: stored.append((stt_text, enhanced_text))
+
+    gemini = types.ModuleType("services.correction.gemini")
+
+    class PromptRequest:
+        def __init__(self, prompt):
+            self.prompt = prompt
+
+    gemini.PromptRequest = PromptRequest
+    gemini.chat_with_gemini = lambda request: {"reply": f"- [교정 {request.prompt}]"}
+
+    monkeypatch.setitem(sys.modules, "services.elasticsearch.es_client", es_client)
+    monkeypatch.setitem(sys.modules, "services.correction.gemini", gemini)
+    for name in ("services.stt.stt_service", "services.stt.stt"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    import services.stt.stt_service as module
+    module.stored_patterns = stored
+    yield module
+    for name in ("services.stt.stt_service", "services.stt.stt"):
+        sys.modules.pop(name, None)
+
+
+@pytest.fixture
+def install_stt(stt_service, monkeypatch):
+    """STT 서비스의 공유 HTTP 클라이언트를 FakeSTT로 응답하는 클라이언트로 교체"""
+    import httpx
+
+    def install(fake):
+        monkeypatch.setattr(stt_service, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(fake)))
+        return fake
+
+    return install
+
+
+@pytest.fixture
+def stt_app(stt_service):
+    from fastapi import FastAPI
+    from services.stt.stt import router
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
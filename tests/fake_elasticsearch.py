@@ -0,0 +1,96 @@
+"""테스트용 인메모리 Elasticsearch 클라이언트 (단일 primary 샤드)
+
+쓰기마다 seq_no가 1씩 늘고, 쓴 문서는 refresh 전까지 검색/point-in-time에 보이지 않는다.
+InsightBackend가 쓰는 API(indices.stats/refresh, point-in-time 순회, index/update)만 구현한다.
+"""
+import copy
+import itertools
+
+from services.insight.backend import ElasticsearchBackend
+
+INDEX_NAME = "pronunciation"
+
+
+class FakeIndices:
+    def __init__(self, es):
+        self._es = es
+
+    def stats(self, index=None, metric=None, level=None):
+        self._es.stats_calls += 1
+        visible = self._es.visible
+        return {"indices": {INDEX_NAME: {"shards": {"0": [{
+            "routing": {"primary": True},
+            "seq_no": {"max_seq_no": self._es.seq_no},
+            "docs": {"count": len(visible), "deleted": 0}
+        }]}}}}
+
+    def refresh(self, index=None):
+        self._es.visible = dict(self._es.documents)
+
+
+class FakeElasticsearch:
+    def __init__(self, documents=()):
+        self.indices = FakeIndices(self)
+        self.documents = {}
+        self.visible = {}
+        self.seq_no = -1
+        self.stats_calls = 0
+        self.pits = {}
+        # point-in-time을 연 직후 실행할 콜백 (스캔 시작 중 쓰기 재현용)
+        self.on_open_point_in_time = None
+        self._ids = itertools.count()
+        for doc in documents:
+            self.index(index=INDEX_NAME, document=doc)
+        self.indices.refresh()
+
+    def ping(self):
+        return True
+
+    def _write(self, doc_id, source):
+        result = "updated" if doc_id in self.documents else "created"
+        self.seq_no += 1
+        self.documents[doc_id] = copy.deepcopy(source)
+        return {"_id": doc_id, "result": result, "_seq_no": self.seq_no}
+
+    def index(self, index=None, id=None, document=None):
+        return self._write(id if id is not None else f"doc-{next(self._ids)}", document)
+
+    def update(self, index=None, id=None, body=None):
+        source = dict(self.documents.get(id, {}))
+        source.update(body["doc"])
+        return self._write(id, source)
+
+    def open_point_in_time(self, index=None, keep_alive=None):
+        pit_id = f"pit-{len(self.pits)}"
+        self.pits[pit_id] = list(self.visible.values())
+        if self.on_open_point_in_time is not None:
+            callback, self.on_open_point_in_time = self.on_open_point_in_time, None
+            callback()
+        return {"id": pit_id}
+
+    def close_point_in_time(self, id=None):
+        self.pits.pop(id, None)
+        return {"succeeded": True}
+
+    def search(self, index=None, body=None):
+        assert body["query"] == {"match_all": {}}
+        documents = self.pits[body["pit"]["id"]]
+        start = body["search_after"][0] + 1 if "search_after" in body else 0
+        fields = body["_source"]
+        hits = []
+        for position in range(start, min(start + body["size"], len(documents))):
+            source = documents[position]
+            if fields is not True:
+                source = {key: value for key, value in source.items() if key in fields}
+            hits.append({"_source": source, "sort": [position]})
+        return {"pit_id": body["pit"]["id"], "hits": {"hits": hits}}
+
+
+def make_backend(es):
+    """설정/연결 확인 없이 가짜 클라이언트를 쓰는 ElasticsearchBackend"""
+    backend = ElasticsearchBackend.__new__(ElasticsearchBackend)
+    backend.es = es
+    backend.index_name = INDEX_NAME
+    backend._keyword_fields = None
+    backend.add_write_listener = lambda listener: None
+    return backend
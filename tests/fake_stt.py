@@ -0,0 +1,85 @@
+"""테스트용 STT 서버와 요청 본문 도구
+
+FakeSTT는 httpx.MockTransport 처리기로, 받은 multipart 파일을 기록하고 {"text": ...}로 응답한다.
+delay(초, 또는 파일 이름을 받는 함수)를 주면 응답 전에 기다리며 동시에 처리 중인 요청 수의 최대값(max_active)을 기록한다.
+"""
+import asyncio
+import uuid
+
+import httpx
+from starlette.requests import Request
+
+
+class FakeSTT:
+    """fail은 True(모든 요청 실패) 또는 파일 이름을 받아 실패 여부를 정하는 함수"""
+
+    def __init__(self, delay=0.0, fail=False, transcribe=None):
+        self.delay = delay
+        self.fail = fail
+        self.transcribe = transcribe or (lambda filename, data: f"인식 {len(data)}")
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        filename, data = parse_file(request.headers["content-type"], body)
+        self.calls.append({"url": str(request.url), "filename": filename, "data": data})
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            delay = self.delay(filename) if callable(self.delay) else self.delay
+            if delay:
+                await asyncio.sleep(delay)
+        finally:
+            self.active -= 1
+        if self.fail is True or callable(self.fail) and self.fail(filename):
+            return httpx.Response(500, json={"detail": "model error"})
+        return httpx.Response(200, json={"text": self.transcribe(filename, data)})
+
+
+def parse_file(content_type: str, body: bytes):
+    """파일 파트 하나짜리 multipart 본문에서 (파일 이름, 데이터)"""
+    boundary = content_type.split("boundary=")[1].encode("ascii")
+    part = body.split(b"--" + boundary)[1]
+    headers, data = part.split(b"\r\n\r\n", 1)
+    filename = headers.split(b'filename="')[1].split(b'"')[0].decode("utf-8")
+    return filename, data[:-2]  # 파트 끝의 CRLF
+
+
+def multipart_body(files, fields=(), field="audio"):
+    """(파일 이름, 데이터[, Content-Type]) 목록과 (이름, 값) 일반 필드로 multipart 본문과 Content-Type 헤더 생성"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields:
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n".encode("utf-8")
+            + value.encode("utf-8") + b"\r\n"
+        )
+    for file in files:
+        filename, data = file[0], file[1]
+        content_type = file[2] if len(file) > 2 else "audio/wav"
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + data + b"\r\n"
+        )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def stream_request(body: bytes, content_type: str, chunk_size: int = 1024, content_length: bool = True):
+    """본문을 chunk_size씩 나눠 받는 Starlette Request (received에 읽은 청크 수 기록)"""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    headers = [(b"content-type", content_type.encode("latin-1"))]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode("ascii")))
+
+    async def receive():
+        index = request.received
+        request.received += 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index + 1 < len(chunks)}
+
+    request = Request({"type": "http", "method": "POST", "path": "/", "headers": headers}, receive)
+    request.received = 0
+    request.chunk_count = len(chunks)
+    return request
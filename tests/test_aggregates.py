@@ -0,0 +1,57 @@
+"""증분 유지 코호트 집계 - 전체 재계산과의 일치, 저장/로드, 불일치 보고"""
+import pytest
+
+from services.insight.aggregates import CohortAggregates
+from services.insight.snapshot import InsightSnapshot
+
+TERM_DOCUMENT = {"term": "시게", "term_text": "시게", "error_count": 2}
+
+
+@pytest.fixture(scope="module")
+def rebuilt(corpus_documents):
+    return CohortAggregates.from_snapshot(InsightSnapshot.from_documents(corpus_documents + [TERM_DOCUMENT]))
+
+
+def test_vectorized_rebuild_matches_document_accumulation(rebuilt, corpus_documents):
+    accumulated = CohortAggregates.from_documents(corpus_documents + [TERM_DOCUMENT])
+    report = rebuilt.diff(accumulated)
+    assert report["consistent"], report["samples"]
+    # 같은 인덱스의 발음 오류 단어 문서는 코호트 셀에 들어가지 않음
+    assert sum(cell.count for cell in rebuilt.cells.values()) == len(corpus_documents)
+
+
+def test_incremental_additions_match_rebuild(rebuilt, corpus_documents):
+    half = len(corpus_documents) // 2
+    aggregates = CohortAggregates.from_snapshot(InsightSnapshot.from_documents(corpus_documents[:half]))
+    aggregates.difficulty_ranking()
+    for start in range(half, len(corpus_documents), 500):
+        aggregates.add_documents(corpus_documents[start:start + 500])
+    aggregates.add_documents([TERM_DOCUMENT])
+
+    assert aggregates.dirty
+    assert aggregates.diff(rebuilt)["consistent"]
+    assert aggregates.top_errors(3) == rebuilt.top_errors(3)
+    page, expected = aggregates.difficulty_ranking().page(limit=10), rebuilt.difficulty_ranking().page(limit=10)
+    assert [entry["text"] for entry in page] == [entry["text"] for entry in expected]
+    assert [entry["avg_error_rate"] for entry in page] == pytest.approx([entry["avg_error_rate"] for entry in expected])
+
+
+def test_diff_reports_mismatched_cells(rebuilt, corpus_documents):
+    aggregates = CohortAggregates.from_documents(corpus_documents[:-1])
+    report = aggregates.diff(rebuilt)
+    assert not report["consistent"]
+    assert report["cell_mismatches"] == 2  # 코호트 셀 1개, 텍스트 1개
+    assert {sample["kind"] for sample in report["samples"]} == {"cohort", "text"}
+
+
+def test_save_and_load_round_trip(rebuilt, tmp_path):
+    rebuilt.version = (("pronunciation-v2", "0", 41),)
+    path = str(tmp_path / "aggregates.json")
+    rebuilt.save(path)
+    loaded = CohortAggregates.load(path, compression=rebuilt.compression)
+
+    assert loaded.version == rebuilt.version
+    assert loaded.diff(rebuilt)["consistent"]
+    assert loaded.median(nationality="Chinese") == pytest.approx(rebuilt.median(nationality="Chinese"))
+    assert loaded.errors_by_nationality == rebuilt.errors_by_nationality
+    assert CohortAggregates.load(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,101 @@
+"""Elasticsearch 집계 쿼리 구성과 응답 파싱"""
+import statistics
+from collections import Counter
+
+import pytest
+
+from services.insight import aggregations
+
+KEYWORD_FIELDS = {field: field for field in ("sex", "nationality", "level", "type", "ref", "error")}
+
+
+def test_resolve_keyword_fields_uses_keyword_subfield_for_dynamic_text():
+    mapping = {"pronunciation-v2": {"mappings": {"properties": {
+        "sex": {"type": "keyword"},
+        "ref": {"type": "text", "fields": {"keyword": {"type": "keyword"}}}
+    }}}}
+    fields = aggregations.resolve_keyword_fields(mapping)
+    assert fields["sex"] == "sex"
+    assert fields["ref"] == "ref.keyword"
+    assert fields["error"] == "error.keyword"
+
+
+def test_filter_query_skips_empty_filters():
+    assert aggregations.filter_query(KEYWORD_FIELDS, {"level": None, "sex": ""}) == {"match_all": {}}
+    assert aggregations.filter_query(KEYWORD_FIELDS, {"level": "A", "sex": None}) == {
+        "bool": {"filter": [{"term": {"level": "A"}}]}
+    }
+
+
+def test_gender_query_filters_and_buckets():
+    query = aggregations.gender_performance_query(KEYWORD_FIELDS, "B", "Chinese")
+    assert query["size"] == 0
+    assert query["query"]["bool"]["filter"] == [{"term": {"level": "B"}}, {"term": {"nationality": "Chinese"}}]
+    by_sex = query["aggs"]["by_sex"]
+    assert by_sex["terms"]["include"] == ["M", "F"]
+    assert {"per_stats", "per_median", "C_sum", "S_sum", "I_sum", "D_sum", "levels"} <= set(by_sex["aggs"])
+
+
+def test_parse_per_stats_handles_empty_buckets():
+    assert aggregations.parse_per_stats({"per_stats": {"count": 0, "avg": None}}) == {"n": 0, "avg": 0}
+    parsed = aggregations.parse_per_stats({
+        "per_stats": {"count": 1, "avg": 0.2, "std_deviation_sampling": None},
+        "per_median": {"values": {"50.0": 0.2}}
+    })
+    assert parsed == {"n": 1, "avg": 0.2, "median": 0.2, "std": 0}
+
+
+def gender_response(documents, level, nationality):
+    """gender_performance_query에 대한 Elasticsearch 응답을 문서에서 직접 구성"""
+    selected = [doc for doc in documents
+                if (level is None or doc["level"] == level) and (nationality is None or doc["nationality"] == nationality)]
+    buckets = []
+    for sex in ("M", "F"):
+        group = [doc for doc in selected if doc["sex"] == sex]
+        if not group:
+            continue
+        values = [doc["per"] for doc in group]
+        buckets.append({
+            "key": sex,
+            "doc_count": len(group),
+            "per_stats": {"count": len(values), "avg": statistics.mean(values),
+                          "std_deviation_sampling": statistics.stdev(values) if len(values) > 1 else None},
+            "per_median": {"values": {"50.0": statistics.median(values)}},
+            **{f"{key}_sum": {"value": float(sum(doc[key] for doc in group))} for key in "CSID"},
+            "levels": {"buckets": [{"key": key, "doc_count": count}
+                                   for key, count in Counter(doc["level"] for doc in group).items()]}
+        })
+    return {"total": len(selected), "aggregations": {"by_sex": {"buckets": buckets}}}
+
+
+def test_gender_analysis_from_aggregations_matches_cohorts(make_service, embedded_backend, corpus_documents, monkeypatch):
+    """집계가 준비되기 전에는 백엔드 집계로, 이후에는 코호트 집계로 같은 결과를 냄"""
+    service = make_service(backend=embedded_backend)
+    queries = []
+
+    def aggregate(build_query):
+        query = build_query(KEYWORD_FIELDS)
+        queries.append(query)
+        level = nationality = None
+        for clause in query["query"].get("bool", {}).get("filter", []):
+            field, value = next(iter(clause["term"].items()))
+            level = value if field == "level" else level
+            nationality = value if field == "nationality" else nationality
+        return gender_response(corpus_documents, level, nationality)
+
+    monkeypatch.setattr(embedded_backend, "aggregate", aggregate)
+    from_aggregations = service.analyze_gender_performance(level="A")
+    assert len(queries) == 1
+
+    service._get_aggregates()
+    service._cache.clear()
+    from_cohorts = service.analyze_gender_performance(level="A")
+    assert len(queries) == 1
+
+    for key in ("male", "female"):
+        a, b = from_aggregations[key], from_cohorts[key]
+        assert a["count"] == b["count"]
+        assert a["avg_error_rate"] == pytest.approx(b["avg_error_rate"])
+        assert a["std_error_rate"] == pytest.approx(b["std_error_rate"])
+        assert a["csid_distribution"] == b["csid_distribution"]
+        assert a["level_distribution"] == b["level_distribution"]
@@ -0,0 +1,123 @@
+"""배치 음소 정렬 - 레코드별 DP 편집 거리와 비교"""
+from collections import Counter
+
+import numpy as np
+
+from services.insight import alignment
+from services.insight.alignment_job import alignment_fields
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def check_alignment(ans, rec, ops, insertions):
+    """ops/insertions로 ans에서 rec를 따라가며 정렬이 유효하고 최소 비용인지 확인"""
+    assert len(ops) == len(ans) and len(insertions) == len(ans) + 1
+    j = 0
+    for i, op in enumerate(ops):
+        j += insertions[i]
+        if op == alignment.CORRECT:
+            assert ans[i] == rec[j]
+            j += 1
+        elif op == alignment.SUBSTITUTION:
+            assert ans[i] != rec[j]
+            j += 1
+        else:
+            assert op == alignment.DELETION
+    assert j + insertions[-1] == len(rec)
+    assert alignment_fields(ops, insertions)["alignment_distance"] == edit_distance(ans, rec)
+
+
+def test_encoder_assigns_codes_in_order():
+    encoder = alignment.PhonemeEncoder()
+    assert encoder.encode("G A G").tolist() == [0, 1, 0]
+    assert encoder.encode("A N").tolist() == [1, 2]
+    assert encoder.encode("").tolist() == []
+    assert encoder.phonemes == ["G", "A", "N"]
+
+
+def test_batched_alignment_matches_dp(corpus_documents):
+    pairs = [(doc["ans"] or "", doc["rec"] or "") for doc in corpus_documents[::7]]
+    pairs += [("", ""), ("A B", ""), ("", "A B"), ("A", "A")]
+    encoder = alignment.PhonemeEncoder()
+    ans = [encoder.encode(a) for a, _ in pairs]
+    rec = [encoder.encode(r) for _, r in pairs]
+
+    results = alignment.align(ans, rec)
+    for a, r, (ops, insertions) in zip(ans, rec, results):
+        check_alignment(a.tolist(), r.tolist(), ops, insertions)
+
+    # 작은 셀 예산으로 배치를 잘게 나눠도 결과가 같아야 한다
+    small = alignment.align(ans, rec, cell_budget=500)
+    for (ops, insertions), (small_ops, small_insertions) in zip(results, small):
+        assert np.array_equal(ops, small_ops) and np.array_equal(insertions, small_insertions)
+
+
+def test_alignment_fields():
+    encoder = alignment.PhonemeEncoder()
+    deleted, inserted = alignment.align(
+        [encoder.encode("G A N A"), encoder.encode("A")],
+        [encoder.encode("K A A"), encoder.encode("A X")]
+    )
+    assert alignment_fields(*deleted) == {
+        "alignment_ops": "SCDC",
+        "alignment_insertions": [0, 0, 0, 0, 0],
+        "alignment_distance": 2
+    }
+    assert alignment_fields(*inserted) == {
+        "alignment_ops": "C",
+        "alignment_insertions": [0, 1],
+        "alignment_distance": 1
+    }
+
+
+def test_syllable_index():
+    assert alignment.syllable_index("G A N A".split()).tolist() == [0, 0, 1, 1]
+    assert alignment.syllable_index("A N".split()).tolist() == [0, 0]
+    assert alignment.syllable_index("G A N G EO".split()).tolist() == [0, 0, 0, 1, 1]
+
+
+def test_position_heatmaps():
+    refs = ["가나", "가나", "가나", "다"]
+    ans = ["G A N A", "G A N A", "G A", "D A"]
+    rec = ["K A N A", "G A N", "G A", "D A"]
+    heatmaps = alignment.position_heatmaps(refs, ans, rec)
+
+    heatmap = heatmaps["가나"]
+    # 가장 흔한 ans의 레코드만 위치를 맞춘다
+    assert heatmap["records"] == 2
+    assert heatmap["phoneme_errors"] == {
+        "substitution": [1, 0, 0, 0],
+        "deletion": [0, 0, 0, 1],
+        "insertion": [0, 0, 0, 0, 0]
+    }
+    assert [s["syllable"] for s in heatmap["syllables"]] == ["가", "나"]
+    assert [s["errors"] for s in heatmap["syllables"]] == [1, 1]
+    assert heatmaps["다"]["hardest_syllable"]["errors"] == 0
+
+
+def test_service_error_positions(embedded_service, corpus_documents):
+    ref = Counter(doc["ref"] for doc in corpus_documents if doc["ans"]).most_common(1)[0][0]
+    docs = [doc for doc in corpus_documents if doc["ref"] == ref and doc["ans"]]
+    reference = Counter(doc["ans"] for doc in docs).most_common(1)[0][0]
+    docs = [doc for doc in docs if doc["ans"] == reference]
+
+    heatmap = embedded_service.analyze_error_positions(ref_text=ref)
+    assert heatmap["records"] == len(docs)
+    errors = heatmap["phoneme_errors"]
+    total = sum(sum(errors[key]) for key in ("substitution", "deletion", "insertion"))
+    assert total == sum(edit_distance(doc["ans"].split(), (doc["rec"] or "").split()) for doc in docs)
+    assert sum(s["errors"] for s in heatmap["syllables"]) == total
+
+    overview = embedded_service.analyze_error_positions(limit=3)
+    assert len(overview["texts"]) == 3
+    rates = [text["hardest_syllable"]["errors_per_record"] for text in overview["texts"]]
+    assert rates == sorted(rates, reverse=True)
+    assert "error" in embedded_service.analyze_error_positions(ref_text="없는 문장입니다")
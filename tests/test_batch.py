@@ -0,0 +1,73 @@
+"""배치 분석 - 같은 스냅샷에서 요청 순서대로 실행, 항목별 오류, 파라미터 검증"""
+from services.insight.aggregates import CohortAggregates
+from services.insight.snapshot import InsightSnapshot
+
+
+def test_run_batch_matches_individual_calls(embedded_service, corpus_documents):
+    ref = corpus_documents[0]["ref"]
+    calls = [
+        ("get_overview", {}),
+        ("analyze_pronunciation_errors", {"ref_text": ref, "limit": 20}),
+        ("analyze_gender_performance", {"level": "A"}),
+        ("analyze_pronunciation_errors", {"ref_text": "", "limit": 20}),
+        ("analyze_text_difficulty", {"limit": 5})
+    ]
+
+    results = embedded_service.run_batch(calls)
+
+    assert results[0] == embedded_service.get_overview()
+    assert results[1] == embedded_service.analyze_pronunciation_errors(ref, limit=20)
+    assert results[2] == embedded_service.analyze_gender_performance(level="A")
+    assert "error" in results[3]
+    assert results[4] == embedded_service.analyze_text_difficulty(limit=5)
+    assert embedded_service._pinned_state() is None
+
+
+def test_run_batch_keeps_state_pinned_while_data_is_replaced(embedded_service, corpus_documents, monkeypatch):
+    full_total = embedded_service.get_overview()["summary"]["total_samples"]
+    small = InsightSnapshot.from_documents(corpus_documents[:10])
+
+    def replace_state():
+        # 배치 도중 백그라운드 갱신이 스냅샷과 집계를 바꾼 상황
+        embedded_service._snapshot = small
+        embedded_service._aggregates = CohortAggregates.from_snapshot(small)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(embedded_service, "analyze_type_performance", replace_state)
+    results = embedded_service.run_batch([("analyze_type_performance", {}), ("get_overview", {})])
+
+    assert results[0] == {"error": "분석 중 오류가 발생했습니다: boom"}
+    assert results[1]["summary"]["total_samples"] == full_total
+    # 고정은 배치 안에서만 - 교체된 상태는 배치가 끝난 뒤 그대로 남는다
+    assert embedded_service._pinned_state() is None and embedded_service._snapshot is small
+
+
+def test_batch_route(insight_client, embedded_service):
+    response = insight_client.post("/api/insights/batch", json={"analyses": [
+        {"name": "overview"},
+        {"name": "level-performance", "params": {"level": "B"}},
+        {"name": "nationality-analysis", "params": {"nationality": "Korean"}}
+    ]})
+    assert response.status_code == 200
+    items = response.json()["data"]
+    assert [item["name"] for item in items] == ["overview", "level-performance", "nationality-analysis"]
+    assert items[0]["success"] and items[0]["data"]["summary"] == embedded_service.get_overview()["summary"]
+    assert items[1]["data"] == embedded_service.analyze_level_performance(level="B")
+    assert items[2]["success"] is False and items[2]["error"]
+
+
+def test_batch_route_validates_requests(insight_client):
+    def post(*analyses):
+        return insight_client.post("/api/insights/batch", json={"analyses": list(analyses)})
+
+    assert post().status_code == 400
+    assert post(*[{"name": "overview"}] * 21).status_code == 400
+    assert post({"name": "unknown"}).status_code == 400
+    assert post({"name": "overview", "params": {"level": "A"}}).status_code == 400
+    assert post({"name": "text-difficulty", "params": {"limit": 0}}).status_code == 400
+    assert post({"name": "text-difficulty", "params": {"limit": True}}).status_code == 400
+    assert post({"name": "level-performance", "params": {"level": 3}}).status_code == 400
+    assert post({"name": "pronunciation-errors", "params": {"limit": 10}}).status_code == 400
+    assert post({"name": "error-rate-percentiles", "params": {"group_by": "age"}}).status_code == 400
+    response = post({"name": "overview"}, {"name": "bogus"})
+    assert response.status_code == 400 and "1번 항목" in response.json()["detail"]
@@ -0,0 +1,83 @@
+"""부트스트랩 평균 차이 신뢰구간과 코호트 비교"""
+import statistics
+
+import numpy as np
+import pytest
+
+from services.insight import bootstrap
+
+
+def test_binned_values_preserve_counts_and_mean():
+    values = np.array([0.1, 0.2, 0.2, 0.5])
+    centers, counts = bootstrap.binned_values(values, 8)
+    assert centers.tolist() == [0.1, 0.2, 0.5] and counts.tolist() == [1, 2, 1]
+
+    values = np.random.default_rng(1).beta(2, 8, size=5000)
+    centers, counts = bootstrap.binned_values(values, 64)
+    assert len(centers) == 64 and counts.sum() == len(values)
+    assert counts @ centers / len(values) == pytest.approx(values.mean())
+
+
+@pytest.mark.parametrize("max_bins", [16, 128, 100000])
+def test_bootstrap_means_match_resampling(max_bins):
+    rng = np.random.default_rng(3)
+    values = rng.beta(2, 8, size=2000)
+
+    means = bootstrap.bootstrap_means(values, 4000, np.random.default_rng(0), max_bins)
+    # 복원 추출을 직접 반복한 결과와 같은 분포
+    resampled = rng.choice(values, size=(4000, len(values))).mean(axis=1)
+    assert means.mean() == pytest.approx(values.mean(), abs=2e-4)
+    assert means.std() == pytest.approx(resampled.std(), rel=0.06)
+    assert means.std() == pytest.approx(values.std() / np.sqrt(len(values)), rel=0.06)
+
+
+def test_mean_difference_interval():
+    rng = np.random.default_rng(5)
+    a = rng.normal(0.30, 0.1, size=800)
+    b = rng.normal(0.25, 0.1, size=1200)
+
+    result = bootstrap.mean_difference(a, b, resamples=5000, seed=1)
+    difference = result["difference"]
+    assert difference["mean"] == pytest.approx(a.mean() - b.mean())
+    assert difference["ci_lower"] < difference["mean"] < difference["ci_upper"]
+    standard_error = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+    assert difference["standard_error"] == pytest.approx(standard_error, rel=0.06)
+    assert difference["ci_upper"] - difference["ci_lower"] == pytest.approx(2 * 1.96 * standard_error, rel=0.08)
+
+    assert bootstrap.mean_difference(a, b, resamples=5000, seed=1) == result
+    narrow = bootstrap.mean_difference(a, b, resamples=5000, confidence=0.5, seed=1)["difference"]
+    assert narrow["ci_upper"] - narrow["ci_lower"] < difference["ci_upper"] - difference["ci_lower"]
+
+
+def test_effect_size():
+    a, b = np.array([1.0, 2.0, 3.0, 4.0]), np.array([2.0, 3.0, 4.0, 5.0])
+    pooled = np.sqrt((3 * statistics.variance(a) + 3 * statistics.variance(b)) / 6)
+    assert bootstrap.cohens_d(a, b) == pytest.approx(-1 / pooled)
+    assert bootstrap.cohens_d(np.ones(3), np.ones(3)) == 0.0
+    assert [bootstrap.effect_magnitude(d) for d in (0.1, -0.3, 0.5, -1.2)] == ["negligible", "small", "medium", "large"]
+
+
+def test_service_compare_cohorts(embedded_service, corpus_documents):
+    result = embedded_service.compare_cohorts({"sex": "M"}, {"sex": "F", "level": ""}, resamples=2000)
+
+    a = [doc["per"] for doc in corpus_documents if doc["sex"] == "M"]
+    b = [doc["per"] for doc in corpus_documents if doc["sex"] == "F"]
+    assert result["group_a"]["filters"] == {"sex": "M"} and result["group_b"]["filters"] == {"sex": "F"}
+    assert result["group_a"]["count"] == len(a) and result["group_b"]["count"] == len(b)
+    assert result["group_b"]["median_error_rate"] == pytest.approx(statistics.median(b))
+    assert result["difference"]["mean"] == pytest.approx(statistics.mean(a) - statistics.mean(b))
+    assert result["difference"]["ci_lower"] < result["difference"]["mean"] < result["difference"]["ci_upper"]
+    assert result["insights"]
+
+    assert "error" in embedded_service.compare_cohorts({"age": "20"}, {"sex": "F"})
+    assert "error" in embedded_service.compare_cohorts({"nationality": "Korean"}, {"sex": "F"})
+
+
+def test_compare_route(insight_client):
+    response = insight_client.post("/api/insights/compare", json={
+        "group_a": {"nationality": "English"}, "group_b": {"nationality": "Spanish"}, "resamples": 1000
+    })
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["difference"]["resamples"] == 1000
+    assert data["effect_size"]["magnitude"] in {"negligible", "small", "medium", "large"}
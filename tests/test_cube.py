@@ -0,0 +1,63 @@
+"""group-by 큐브 - 한 번의 스캔으로 만든 셀 통계와 rollup/slice"""
+import statistics
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from services.insight.cube import Cube
+from services.insight.snapshot import InsightSnapshot
+
+DIMENSIONS = ("sex", "nationality", "level", "type")
+
+
+@pytest.fixture(scope="module")
+def snapshot(corpus_documents):
+    return InsightSnapshot.from_documents(corpus_documents)
+
+
+def test_groups_match_plain_python(snapshot, corpus_documents):
+    cube = Cube.build(snapshot, DIMENSIONS)
+    for value, stats in cube.groups("nationality").items():
+        values = [doc["per"] for doc in corpus_documents if doc["nationality"] == value]
+        assert stats["count"] == len(values)
+        assert stats["avg"] == pytest.approx(statistics.mean(values))
+        assert stats["std"] == pytest.approx(statistics.stdev(values))
+        assert stats["csid"] == {key: sum(doc[key] for doc in corpus_documents if doc["nationality"] == value)
+                                 for key in "CSID"}
+
+
+def test_slice_and_rollup_match_direct_build(snapshot):
+    cube = Cube.build(snapshot, DIMENSIONS)
+    sliced = cube.slice(level="A", sex="F").groups("type")
+    direct = Cube.build(snapshot, ("type",), snapshot.mask(level="A", sex="F")).groups("type")
+    assert sliced.keys() == direct.keys()
+    for key in direct:
+        assert sliced[key]["count"] == direct[key]["count"]
+        assert sliced[key]["avg"] == pytest.approx(direct[key]["avg"])
+
+    rolled = cube.rollup(("level",))
+    assert dict(rolled.cells()).keys() == dict(Cube.build(snapshot, ("level",)).cells()).keys()
+    assert cube.slice(nationality="Korean").total()["count"] == 0
+
+
+def test_total_and_value_counts(snapshot, corpus_documents):
+    cube = Cube.build(snapshot, DIMENSIONS)
+    assert cube.total()["count"] == len(corpus_documents)
+    assert cube.value_counts("sex") == dict(Counter(doc["sex"] for doc in corpus_documents))
+
+
+def test_missing_values_form_their_own_cell():
+    snapshot = InsightSnapshot.from_documents([
+        {"sex": "M", "level": "A", "per": 0.1},
+        {"sex": "M", "per": 0.3},
+        {"level": "A", "per": None}
+    ])
+    cube = Cube.build(snapshot, ("sex", "level"))
+
+    assert cube.value_counts("level") == {"A": 2, None: 1}
+    assert cube.groups("sex") == {"M": cube.slice(sex="M").total()}
+    total = cube.total()
+    assert (total["count"], total["n"]) == (3, 2)
+    assert total["avg"] == pytest.approx(0.2)
+    assert np.isclose(total["std"], statistics.stdev([0.1, 0.3]))
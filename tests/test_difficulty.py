@@ -0,0 +1,109 @@
+"""텍스트 난이도 순위 - 증분 순위, 필터별 통계 배열, 커서 페이지"""
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from services.insight import difficulty
+from services.insight.difficulty import DifficultyRanking, DifficultyTable
+
+
+def entry(text, avg, count=5):
+    return {"text": text, "sample_count": count, "avg_error_rate": avg, "std_error_rate": 0.0,
+            "text_length": len(text), "csid_distribution": {"C": 0, "S": 0, "I": 0, "D": 0}}
+
+
+def table_of(entries):
+    return DifficultyTable(
+        [e["text"] for e in entries],
+        np.array([e["sample_count"] for e in entries]),
+        np.array([e["avg_error_rate"] for e in entries]),
+        np.zeros(len(entries)),
+        {key: np.zeros(len(entries), dtype=np.int64) for key in "CSID"}
+    )
+
+
+def ranked_texts(entries):
+    return [e["text"] for e in sorted(entries, key=lambda e: (-e["avg_error_rate"], e["text"]))]
+
+
+def test_cursor_round_trip():
+    cursor = difficulty.encode_cursor(entry("가족이 몇 명이에요", 0.125))
+    assert difficulty.decode_cursor(cursor) == (0.125, "가족이 몇 명이에요")
+    for bad in ("not-a-cursor", "", difficulty.encode_cursor(entry("x", 0.1))[:-3]):
+        with pytest.raises(ValueError):
+            difficulty.decode_cursor(bad)
+
+
+def test_ranking_and_table_pages_agree_with_sorting():
+    rng = random.Random(7)
+    # 동률 평균을 일부러 많이 만든다
+    entries = [entry(f"텍스트{i:03d}", rng.choice([0.05, 0.1, 0.15, 0.25, 0.4]) + rng.choice([0, 0.001]))
+               for i in range(300)]
+    entries += [entry("왜", 0.9), entry("한 번", 0.8, count=1)]
+    expected = ranked_texts(entries[:300])
+    ranked = [e for e in entries if difficulty.is_ranked(e["text"], e["sample_count"])]
+
+    for ranking in (DifficultyRanking(entries), table_of(ranked)):
+        assert len(ranking) == 300
+        pages, after = [], None
+        while True:
+            page = ranking.page(after, 17)
+            if not page:
+                break
+            pages.extend(e["text"] for e in page)
+            after = (page[-1]["avg_error_rate"], page[-1]["text"])
+        assert pages == expected
+        assert [e["text"] for e in ranking.tail(5)] == expected[-5:]
+        assert ranking.tail(0) == []
+        distribution = ranking.distribution()
+        assert sum(distribution.values()) == 300
+        assert distribution["very_hard"] == sum(1 for e in entries[:300] if e["avg_error_rate"] > 0.3)
+        assert distribution["easy"] == sum(1 for e in entries[:300] if e["avg_error_rate"] <= 0.1)
+
+
+def test_ranking_update_moves_and_removes_entries():
+    ranking = DifficultyRanking([entry("가", 0.1), entry("나", 0.2), entry("다", 0.3)])
+    ranking.update(entry("가", 0.5))
+    ranking.update(entry("라", 0.25))
+    ranking.update(entry("다", 0.3, count=1))
+    assert [e["text"] for e in ranking.page()] == ["가", "라", "나"]
+    assert [e["text"] for e in ranking.page((0.25, "라"))] == ["나"]
+
+
+def expected_difficulty(documents, **filters):
+    rates = {}
+    for doc in documents:
+        if any(doc.get(field) != value for field, value in filters.items()):
+            continue
+        rates.setdefault(doc["ref"], []).append(doc["per"])
+    return {text: statistics.mean(values) for text, values in rates.items() if difficulty.is_ranked(text, len(values))}
+
+
+@pytest.mark.parametrize("filters", [{}, {"nationality": "English"}, {"level": "B", "nationality": "Chinese"}])
+def test_service_cursor_pages_cover_ranking(embedded_service, corpus_documents, filters):
+    expected = expected_difficulty(corpus_documents, **filters)
+
+    texts, cursor = [], None
+    while True:
+        page = embedded_service.get_text_difficulty_page(cursor=cursor, limit=200, **filters)
+        assert page["total_unique_texts"] == len(expected)
+        texts.extend(page["texts"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(t["text"] for t in texts) == sorted(expected)
+    keys = [(-t["avg_error_rate"], t["text"]) for t in texts]
+    assert keys == sorted(keys)
+    for t in texts:
+        assert t["avg_error_rate"] == pytest.approx(expected[t["text"]])
+
+    summary = embedded_service.analyze_text_difficulty(limit=10, **filters)
+    assert [t["text"] for t in summary["hardest_texts"]] == [t["text"] for t in texts[:10]]
+    assert [t["text"] for t in summary["easiest_texts"]] == [t["text"] for t in texts[-10:]]
+
+
+def test_service_rejects_bad_cursor(embedded_service):
+    assert "error" in embedded_service.get_text_difficulty_page(cursor="@@@")
@@ -0,0 +1,40 @@
+"""Elasticsearch 백엔드 - point-in-time + search_after 전체 순회"""
+from fake_elasticsearch import FakeElasticsearch, make_backend
+
+
+def test_iter_documents_pages_through_every_document(corpus_documents):
+    es = FakeElasticsearch(corpus_documents[:250])
+    backend = make_backend(es)
+
+    documents = list(backend.iter_documents(source=["ref", "per"], page_size=40))
+
+    assert [doc["ref"] for doc in documents] == [doc["ref"] for doc in corpus_documents[:250]]
+    assert all(set(doc) <= {"ref", "per"} for doc in documents)
+    assert es.pits == {}
+
+
+def test_iter_documents_closes_point_in_time_when_abandoned(corpus_documents):
+    es = FakeElasticsearch(corpus_documents[:100])
+    documents = make_backend(es).iter_documents(page_size=10)
+
+    assert next(documents)["ref"] == corpus_documents[0]["ref"]
+    documents.close()
+    assert es.pits == {}
+
+
+def test_iter_documents_exact_multiple_of_page_size(corpus_documents):
+    es = FakeElasticsearch(corpus_documents[:30])
+    assert len(list(make_backend(es).iter_documents(page_size=10))) == 30
+
+
+def test_snapshot_reads_refreshed_point_in_time(corpus_documents):
+    es = FakeElasticsearch(corpus_documents[:50])
+    es.index(document=corpus_documents[50])
+    backend = make_backend(es)
+
+    snapshot = backend.snapshot(["ref", "per", "sex"], version="v")
+
+    assert snapshot.size == 51
+    assert snapshot.version == "v"
+    assert snapshot.watermark == backend.watermark(backend.version())
+    assert es.pits == {}
@@ -0,0 +1,101 @@
+"""내장 백엔드 - 컬럼 캐시가 CSV 색인 문서와 같은 결과를 내는지"""
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from services.insight.corpus import DATA_DIR
+from services.insight.embedded import ColumnStore, EmbeddedBackend
+from services.insight.snapshot import InsightSnapshot, CATEGORICAL_FIELDS, CSID_FIELDS
+
+
+def test_documents_round_trip(embedded_backend, corpus_documents):
+    assert list(embedded_backend.iter_documents()) == corpus_documents
+
+
+@pytest.mark.parametrize("filters", [
+    {"nationality": "English"},
+    {"nationality": "Chinese", "level": "B", "sex": "M"},
+    {"nationality": "Korean"},
+    {"level": ""}
+])
+def test_filtered_documents(embedded_backend, corpus_documents, filters):
+    source = ["ref", "per", "sex"]
+    expected = [
+        {field: doc[field] for field in source}
+        for doc in corpus_documents
+        if all(not value or doc.get(field) == value for field, value in filters.items())
+    ]
+    assert list(embedded_backend.iter_documents(filters=filters, source=source)) == expected
+
+
+def test_snapshot_matches_documents(embedded_backend, corpus_documents):
+    snapshot = embedded_backend.snapshot([], version="v")
+    expected = InsightSnapshot.from_documents(corpus_documents)
+
+    assert snapshot.size == expected.size == len(corpus_documents)
+    np.testing.assert_allclose(snapshot.numeric["per"], expected.numeric["per"])
+    for key in CSID_FIELDS:
+        assert snapshot.numeric[key].tolist() == expected.numeric[key].tolist()
+    for field in CATEGORICAL_FIELDS:
+        decoded = [snapshot.categories[field][c] if c >= 0 else None for c in snapshot.codes[field].tolist()]
+        assert decoded == [doc.get(field) for doc in corpus_documents]
+    assert snapshot.watermark[0] == "embedded"
+
+
+def test_search_refs_orders_candidates_then_rows(embedded_backend, corpus_documents):
+    refs = list(dict.fromkeys(doc["ref"] for doc in corpus_documents))
+    matches = [(refs[3], 0), (refs[0], 1)]
+    hits = embedded_backend.search_refs("", matches, limit=1000, source=["ref"])
+
+    expected = [row for ref, _ in matches for row, doc in enumerate(corpus_documents) if doc["ref"] == ref]
+    assert [int(hit["_id"]) for hit in hits] == expected
+    assert hits[0]["_source"] == {"ref": refs[3]}
+    assert len(embedded_backend.search_refs("", matches, limit=3)) == 3
+
+
+def test_search_refs_falls_back_to_word_scores(embedded_backend, corpus_documents):
+    word = next(doc["ref"].split()[0] for doc in corpus_documents if len(doc["ref"].split()) > 2)
+    hits = embedded_backend.search_refs(word, [], limit=5000, source=["ref"])
+
+    assert {int(hit["_id"]) for hit in hits} == {
+        row for row, doc in enumerate(corpus_documents) if word in doc["ref"].lower().split()
+    }
+    scores = [hit["_score"] for hit in hits]
+    assert scores == sorted(scores, reverse=True) and scores[-1] > 0
+    assert embedded_backend.search_refs("!!!", [], limit=10) == []
+
+
+def test_cache_is_reused_until_source_changes(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    shutil.copy(os.path.join(DATA_DIR, "spanish.csv"), data_dir)
+    backend = EmbeddedBackend(data_dir=str(data_dir), cache_dir=str(tmp_path / "cache"))
+    first = backend.version()
+    size = backend.store().size
+
+    # 같은 원본이면 새 백엔드도 캐시를 메모리 매핑으로 열기만 한다
+    built = []
+    original_build = ColumnStore.build.__func__
+
+    def counting_build(cls, *args, **kwargs):
+        built.append(1)
+        return original_build(cls, *args, **kwargs)
+
+    monkeypatch.setattr(ColumnStore, "build", classmethod(counting_build))
+    reopened = EmbeddedBackend(data_dir=str(data_dir), cache_dir=str(tmp_path / "cache"))
+    assert reopened.store().size == size and built == []
+
+    with open(data_dir / "spanish.csv", encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+    with open(data_dir / "spanish.csv", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines + lines[-1:]) + "\n")
+
+    assert reopened.version() != first
+    assert reopened.store().size == size + 1 and built == [1]
+
+
+def test_missing_data_dir(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        EmbeddedBackend(data_dir=str(tmp_path), cache_dir=str(tmp_path / "cache"))
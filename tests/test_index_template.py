@@ -0,0 +1,175 @@
+"""버전 관리 인덱스 템플릿 - 최초 생성, 동적 매핑/이전 버전 인덱스 마이그레이션"""
+import pytest
+
+from services.elasticsearch import index_template
+
+ALIAS = "pronunciation"
+
+
+class FakeIndicesClient:
+    def __init__(self, cluster):
+        self._cluster = cluster
+
+    def exists_index_template(self, name):
+        return name in self._cluster.templates
+
+    def get_index_template(self, name):
+        return {"index_templates": [{"name": name, "index_template": self._cluster.templates[name]}]}
+
+    def put_index_template(self, name, **template):
+        self._cluster.templates[name] = template
+
+    def exists_alias(self, name):
+        return any(name in aliases for aliases in self._cluster.aliases.values())
+
+    def get_alias(self, name):
+        return {index: {"aliases": {name: {}}} for index, aliases in self._cluster.aliases.items() if name in aliases}
+
+    def exists(self, index):
+        return index in self._cluster.indexes or self.exists_alias(index)
+
+    def create(self, index):
+        assert index not in self._cluster.indexes
+        template = next(t for t in self._cluster.templates.values() if index.startswith(t["index_patterns"][0][:-1]))
+        self._cluster.indexes[index] = {"settings": dict(template["template"]["settings"]), "docs": []}
+        self._cluster.aliases[index] = set()
+
+    def put_alias(self, index, name):
+        self._cluster.aliases[index].add(name)
+
+    def put_settings(self, index, settings):
+        self._cluster.indexes[index]["settings"].update(settings)
+        self._cluster.settings_history.append((index, dict(settings)))
+
+    def refresh(self, index):
+        self._cluster.refreshed.append(index)
+
+    def update_aliases(self, actions):
+        for action in actions:
+            (op, target), = action.items()
+            if op == "add":
+                self._cluster.aliases[target["index"]].add(target["alias"])
+            elif op == "remove":
+                self._cluster.aliases[target["index"]].discard(target["alias"])
+            else:
+                self.delete(target["index"])
+
+    def delete(self, index):
+        del self._cluster.indexes[index]
+        del self._cluster.aliases[index]
+
+
+class FakeTasks:
+    def __init__(self, cluster):
+        self._cluster = cluster
+
+    def get(self, task_id):
+        self._cluster.polls += 1
+        if self._cluster.polls == 1:
+            return {"completed": False, "task": {"status": {"created": 1, "total": 2}}}
+        return {"completed": True, "response": self._cluster.responses[task_id]}
+
+
+class FakeCluster:
+    """템플릿/별칭/재색인 작업 API만 흉내내는 클라이언트"""
+
+    def __init__(self, failures=()):
+        self.indices = FakeIndicesClient(self)
+        self.tasks = FakeTasks(self)
+        self.templates = {}
+        self.indexes = {}
+        self.aliases = {}
+        self.responses = {}
+        self.settings_history = []
+        self.refreshed = []
+        self.polls = 0
+        self.failures = list(failures)
+
+    def add_index(self, name, docs, aliases=()):
+        self.indexes[name] = {"settings": {}, "docs": list(docs)}
+        self.aliases[name] = set(aliases)
+
+    def reindex(self, source, dest, **options):
+        assert self.indexes[dest["index"]]["settings"]["refresh_interval"] == "-1"
+        copied = [doc for index in source["index"] for doc in self.indexes[index]["docs"]]
+        self.indexes[dest["index"]]["docs"].extend(copied)
+        task_id = f"task-{len(self.responses)}"
+        self.responses[task_id] = {"total": len(copied), "failures": self.failures}
+        return {"task": task_id}
+
+    def targets(self, alias=ALIAS):
+        return sorted(index for index, aliases in self.aliases.items() if alias in aliases)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(index_template.time, "sleep", lambda seconds: None)
+
+
+def test_ensure_index_creates_versioned_index_behind_alias():
+    es = FakeCluster()
+    index_template.ensure_index(es, ALIAS)
+
+    template = es.templates[index_template.template_name(ALIAS)]
+    assert template["version"] == index_template.TEMPLATE_VERSION
+    assert template["index_patterns"] == [f"{ALIAS}-v*"]
+    assert template["template"]["mappings"]["properties"]["ans"]["index"] is False
+    assert es.targets() == [f"{ALIAS}-v1"]
+    assert es.indexes[f"{ALIAS}-v1"]["settings"]["number_of_shards"] == 1
+
+    # 같은 버전이면 템플릿을 다시 등록하지 않고 인덱스도 그대로
+    assert index_template.put_template(es, ALIAS) is False
+    index_template.ensure_index(es, ALIAS)
+    assert sorted(es.indexes) == [f"{ALIAS}-v1"]
+
+
+def test_ensure_index_leaves_dynamic_mapping_index_alone():
+    es = FakeCluster()
+    es.add_index(ALIAS, [{"ref": "시계"}])
+    index_template.ensure_index(es, ALIAS)
+    assert sorted(es.indexes) == [ALIAS] and es.targets() == []
+
+
+def test_migrate_dynamic_mapping_index():
+    es = FakeCluster()
+    es.add_index(ALIAS, [{"ref": "시계"}, {"ref": "학교"}])
+
+    result = index_template.migrate(es, ALIAS)
+
+    target = f"{ALIAS}-v1"
+    assert result["sources"] == [ALIAS] and result["reindexed"] == 2
+    # 기존 인덱스는 별칭 교체와 동시에 삭제되고 별칭이 새 인덱스를 가리킨다
+    assert sorted(es.indexes) == [target] and es.targets() == [target]
+    assert es.indexes[target]["docs"] == [{"ref": "시계"}, {"ref": "학교"}]
+    assert es.settings_history == [(target, {"refresh_interval": "-1"}), (target, {"refresh_interval": "1s"})]
+    assert es.refreshed == [target] and es.polls == 2
+
+
+def test_migrate_previous_version(monkeypatch):
+    es = FakeCluster()
+    index_template.ensure_index(es, ALIAS)
+    es.indexes[f"{ALIAS}-v1"]["docs"].append({"ref": "시계"})
+    monkeypatch.setattr(index_template, "TEMPLATE_VERSION", 2)
+
+    result = index_template.migrate(es, ALIAS, delete_old=True)
+
+    assert result["target"] == f"{ALIAS}-v2" and result["sources"] == [f"{ALIAS}-v1"]
+    assert es.templates[index_template.template_name(ALIAS)]["version"] == 2
+    assert es.targets() == [f"{ALIAS}-v2"] and sorted(es.indexes) == [f"{ALIAS}-v2"]
+    assert es.indexes[f"{ALIAS}-v2"]["docs"] == [{"ref": "시계"}]
+
+    # 이미 현재 버전이면 재색인하지 않음
+    assert index_template.migrate(es, ALIAS)["reindexed"] == 0
+
+
+def test_migrate_keeps_alias_when_reindex_fails(monkeypatch):
+    es = FakeCluster(failures=[{"id": "1", "cause": "mapper_parsing_exception"}])
+    index_template.ensure_index(es, ALIAS)
+    monkeypatch.setattr(index_template, "TEMPLATE_VERSION", 2)
+
+    result = index_template.migrate(es, ALIAS, delete_old=True)
+
+    assert result["failures"] == 1
+    assert es.targets() == [f"{ALIAS}-v1"]
+    assert sorted(es.indexes) == [f"{ALIAS}-v1", f"{ALIAS}-v2"]
+    assert es.indexes[f"{ALIAS}-v2"]["settings"]["refresh_interval"] == "1s"
@@ -0,0 +1,144 @@
+"""CSV 대량 색인 - 진행 상황 저장과 중단 후 이어서 색인"""
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+from services.insight.corpus import default_paths, iter_rows
+
+INDEX_NAME = "pronunciation"
+
+
+class FakeBulk:
+    """helpers.parallel_bulk 대역 - 청크 단위로 액션을 미리 읽고 결과는 요청 순서대로 반환
+
+    fail_ids의 문서는 문서 단위 오류로, raise_after건의 결과를 낸 뒤에는 연결 오류로 중단한다.
+    """
+
+    def __init__(self, fail_ids=(), raise_after=None):
+        self.indexed = {}
+        self.fail_ids = set(fail_ids)
+        self.raise_after = raise_after
+        self.seq_no = -1
+        self.returned = 0
+
+    def __call__(self, client, actions, thread_count=4, chunk_size=500, queue_size=4, raise_on_error=True):
+        actions = iter(actions)
+        while True:
+            chunk = [action for _, action in zip(range(chunk_size), actions)]
+            if not chunk:
+                return
+            for action in chunk:
+                if self.raise_after is not None and self.returned >= self.raise_after:
+                    raise ConnectionError("connection reset")
+                self.returned += 1
+                if action["_id"] in self.fail_ids:
+                    yield False, {"index": {"_id": action["_id"], "status": 400, "error": "mapper_parsing_exception"}}
+                    continue
+                result = "updated" if action["_id"] in self.indexed else "created"
+                self.seq_no += 1
+                self.indexed[action["_id"]] = action["_source"]
+                yield True, {"index": {"_id": action["_id"], "result": result, "_seq_no": self.seq_no}}
+
+
+@pytest.fixture
+def ingest(monkeypatch):
+    """연결 없이 import한 ingest 모듈 (es_client는 인덱스 이름과 쓰기 알림만 가진 대역)"""
+    notified = []
+    es_client = types.ModuleType("services.elasticsearch.es_client")
+    es_client.es = object()
+    es_client.INDEX_NAME = INDEX_NAME
+    es_client._notify_write = notified.extend
+    monkeypatch.setitem(sys.modules, "services.elasticsearch.es_client", es_client)
+    monkeypatch.delitem(sys.modules, "services.elasticsearch.ingest", raising=False)
+    module = importlib.import_module("services.elasticsearch.ingest")
+    module.notified = notified
+    yield module
+    sys.modules.pop("services.elasticsearch.ingest", None)
+
+
+def row_counts():
+    return {path: sum(1 for _ in iter_rows(path)) for path in default_paths()}
+
+
+def test_document_id(ingest):
+    document_id = ingest.document_id
+    assert document_id({"file": "a/b.wav", "ref": "시계"}) == "a/b.wav"
+    anonymous = document_id({"ref": "시계", "ans": "S I G E"})
+    assert anonymous == document_id({"ans": "S I G E", "ref": "시계"})
+    assert anonymous != document_id({"ref": "시계", "ans": "S I G"})
+
+
+def test_progress_round_trip(ingest, tmp_path):
+    path = str(tmp_path / "progress.json")
+    assert ingest.load_progress(path) == {}
+    ingest.save_progress({"data/chinese.csv": 120}, path)
+    assert ingest.load_progress(path) == {"data/chinese.csv": 120}
+    assert not os.path.exists(f"{path}.tmp")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{broken")
+    assert ingest.load_progress(path) == {}
+
+
+def test_ingest_indexes_every_row_and_records_progress(ingest, monkeypatch, tmp_path):
+    bulk = FakeBulk()
+    monkeypatch.setattr(ingest.helpers, "parallel_bulk", bulk)
+    progress_path = str(tmp_path / "progress.json")
+    updates = []
+
+    stats = ingest.ingest(chunk_size=500, progress_path=progress_path, on_progress=updates.append)
+
+    counts = row_counts()
+    assert stats["done"] and stats["indexed"] == sum(counts.values()) and stats["failed"] == 0
+    assert ingest.load_progress(progress_path) == counts
+    assert len(bulk.indexed) == stats["indexed"]
+    # 쓰기 알림은 색인된 문서마다 한 번, seq_no와 함께
+    assert sorted(write["_seq_no"] for write in ingest.notified) == list(range(stats["indexed"]))
+    assert {write["result"] for write in ingest.notified} == {"created"}
+    assert [update["indexed"] for update in updates] == list(range(500, stats["indexed"], 500)) + [stats["indexed"]]
+
+
+def test_interrupted_ingest_resumes_after_last_acknowledged_row(ingest, monkeypatch, tmp_path):
+    progress_path = str(tmp_path / "progress.json")
+    first = default_paths()[0]
+    assert row_counts()[first] > 1234
+    interrupted = FakeBulk(raise_after=1234)
+    monkeypatch.setattr(ingest.helpers, "parallel_bulk", interrupted)
+
+    with pytest.raises(ConnectionError):
+        ingest.ingest(chunk_size=500, progress_path=progress_path)
+    # 미리 읽은 액션이 아니라 결과를 받은 행까지만 저장
+    assert ingest.load_progress(progress_path) == {first: 1234}
+    assert len(interrupted.indexed) == 1234
+
+    resumed = FakeBulk()
+    monkeypatch.setattr(ingest.helpers, "parallel_bulk", resumed)
+    stats = ingest.ingest(chunk_size=500, progress_path=progress_path)
+
+    counts = row_counts()
+    assert stats["indexed"] == sum(counts.values()) - 1234
+    assert ingest.load_progress(progress_path) == counts
+    assert not set(interrupted.indexed) & set(resumed.indexed)
+    assert len(set(interrupted.indexed) | set(resumed.indexed)) == sum(counts.values())
+
+
+def test_failed_documents_are_counted_and_skipped(ingest, monkeypatch, tmp_path):
+    progress_path = str(tmp_path / "progress.json")
+    path = default_paths()[-1]
+    rows = [row for _, row in iter_rows(path)]
+    failing = {rows[0]["file"], rows[10]["file"]}
+    monkeypatch.setattr(ingest.helpers, "parallel_bulk", FakeBulk(fail_ids=failing))
+
+    stats = ingest.ingest([path], chunk_size=50, progress_path=progress_path)
+    assert stats["failed"] == 2 and stats["indexed"] == len(rows) - 2
+    assert ingest.load_progress(progress_path) == {path: len(rows)}
+    assert not failing & {write["_id"] for write in ingest.notified}
+
+    # resume=False면 저장된 진행 상황을 무시하고 처음부터 다시 색인
+    restarted = FakeBulk()
+    monkeypatch.setattr(ingest.helpers, "parallel_bulk", restarted)
+    assert ingest.ingest([path], chunk_size=50, progress_path=progress_path)["indexed"] == 0
+    assert ingest.ingest([path], chunk_size=50, progress_path=progress_path, resume=False)["indexed"] == len(rows)
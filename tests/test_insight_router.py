@@ -0,0 +1,51 @@
+"""인사이트 라우트 - 분석은 실행기에서 돌고 이벤트 루프는 다른 요청을 계속 처리"""
+import asyncio
+import time
+
+import httpx
+
+
+def test_analysis_routes_return_service_results(insight_client, embedded_service):
+    response = insight_client.get("/api/insights/gender-performance", params={"level": "A"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert body["data"]["male"]["count"] == embedded_service.analyze_gender_performance(level="A")["male"]["count"]
+
+    health = insight_client.get("/api/insights/health").json()
+    assert health["success"] is True
+    assert health["backend"] == "embedded"
+
+
+def test_slow_analysis_does_not_block_event_loop(insight_app, embedded_service, monkeypatch):
+    def slow_type_performance():
+        time.sleep(0.5)
+        return {"string_analysis": {}, "word_analysis": {}}
+
+    monkeypatch.setattr(embedded_service, "analyze_type_performance", slow_type_performance)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=insight_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            request = asyncio.ensure_future(client.get("/api/insights/type-performance"))
+            # 분석이 도는 동안 이벤트 루프가 다른 작업을 계속 실행하는지 확인
+            gaps, last = [], time.monotonic()
+            while not request.done():
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                gaps.append(now - last)
+                last = now
+            return (await request).status_code, gaps
+
+    status, gaps = asyncio.run(scenario())
+    assert status == 200
+    assert len(gaps) >= 20
+    assert max(gaps) < 0.2
+
+
+def test_routes_report_missing_service(insight_client, monkeypatch):
+    from services.insight import insight_router
+
+    monkeypatch.setattr(insight_router, "insight_service", None)
+    assert insight_client.get("/api/insights/overview").status_code == 500
+    assert insight_client.get("/api/insights/health").json()["success"] is False
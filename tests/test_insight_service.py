@@ -0,0 +1,100 @@
+"""InsightService 분석 결과를 CSV 코퍼스에 대한 단순 파이썬 재계산(원래 문서 순회 구현)과 비교"""
+import statistics
+from collections import Counter
+
+import pytest
+
+CSID = ("C", "S", "I", "D")
+
+
+def select(documents, **filters):
+    return [doc for doc in documents if all(value is None or doc.get(field) == value for field, value in filters.items())]
+
+
+def recompute(documents):
+    error_rates = [doc["per"] for doc in documents if doc.get("per") is not None]
+    return {
+        "count": len(documents),
+        "avg_error_rate": statistics.mean(error_rates) if error_rates else 0,
+        "std_error_rate": statistics.stdev(error_rates) if len(error_rates) > 1 else 0,
+        "csid_distribution": {key: sum(doc.get(key, 0) for doc in documents) for key in CSID},
+        "level_distribution": dict(Counter(doc.get("level") for doc in documents)),
+        "error_rates": error_rates
+    }
+
+
+def assert_median_close(estimate, values, rank_error=0.02):
+    """중간값 추정치가 실제 순위 0.5 ± rank_error 구간 안에 있는지 (분위수 스케치 허용 오차)"""
+    ordered = sorted(values)
+    low = ordered[max(0, int((0.5 - rank_error) * len(ordered)))]
+    high = ordered[min(len(ordered) - 1, int((0.5 + rank_error) * len(ordered)))]
+    assert low <= estimate <= high
+
+
+@pytest.mark.parametrize("level, nationality", [(None, None), ("A", None), ("B", "Chinese"), (None, "Spanish")])
+def test_gender_performance(embedded_service, corpus_documents, level, nationality):
+    result = embedded_service.analyze_gender_performance(level=level, nationality=nationality)
+
+    for sex, key in (("M", "male"), ("F", "female")):
+        expected = recompute(select(corpus_documents, sex=sex, level=level, nationality=nationality))
+        stats = result[key]
+        assert stats["count"] == expected["count"]
+        assert stats["avg_error_rate"] == pytest.approx(expected["avg_error_rate"])
+        assert stats["std_error_rate"] == pytest.approx(expected["std_error_rate"])
+        assert stats["csid_distribution"] == expected["csid_distribution"]
+        assert stats["level_distribution"] == expected["level_distribution"]
+        assert_median_close(stats["median_error_rate"], expected["error_rates"])
+    assert result["comparison"]["total_samples"] == result["male"]["count"] + result["female"]["count"]
+
+
+def test_nationality_performance(embedded_service, corpus_documents):
+    overall = embedded_service.analyze_nationality_performance()
+    for nationality, stats in overall["nationality_stats"].items():
+        expected = recompute(select(corpus_documents, nationality=nationality))
+        assert stats["count"] == expected["count"]
+        assert stats["avg_error_rate"] == pytest.approx(expected["avg_error_rate"])
+        assert stats["csid_distribution"] == expected["csid_distribution"]
+    assert set(overall["nationality_stats"]) == {doc["nationality"] for doc in corpus_documents}
+
+    single = embedded_service.analyze_nationality_performance("English")
+    documents = select(corpus_documents, nationality="English")
+    assert single["count"] == len(documents)
+    assert_median_close(single["median_error_rate"], recompute(documents)["error_rates"])
+    expected_errors = Counter(doc["error"] for doc in documents if doc.get("error"))
+    assert single["common_errors"] == dict(expected_errors.most_common(10))
+    assert "error" in embedded_service.analyze_nationality_performance("Korean")
+
+
+def test_level_csid_and_type_analyses(embedded_service, corpus_documents):
+    levels = embedded_service.analyze_level_performance()["level_stats"]
+    for level, stats in levels.items():
+        expected = recompute(select(corpus_documents, level=level))
+        assert stats["count"] == expected["count"]
+        assert stats["avg_error_rate"] == pytest.approx(expected["avg_error_rate"])
+
+    csid = embedded_service.analyze_csid_patterns(sex="F", level="A")
+    expected = recompute(select(corpus_documents, sex="F", level="A"))["csid_distribution"]
+    assert csid["sample_count"] == len(select(corpus_documents, sex="F", level="A"))
+    assert csid["csid_counts"] == expected
+    assert csid["total_errors"] == expected["S"] + expected["I"] + expected["D"]
+
+    types = embedded_service.analyze_type_performance()
+    assert types["string_analysis"]["count"] == len(select(corpus_documents, type="S"))
+    assert types["word_analysis"]["count"] == len(select(corpus_documents, type="W"))
+
+
+def test_overview_summary(embedded_service, corpus_documents):
+    overview = embedded_service.get_overview()
+    expected = recompute(corpus_documents)
+
+    assert overview["summary"]["total_samples"] == len(corpus_documents)
+    assert overview["summary"]["overall_avg_error_rate"] == pytest.approx(expected["avg_error_rate"])
+    assert overview["csid_overview"]["totals"] == expected["csid_distribution"]
+    assert overview["summary"]["data_coverage"]["unique_texts"] == len({doc["ref"] for doc in corpus_documents if doc["ref"] != "왜"})
+
+    texts = {}
+    for doc in corpus_documents:
+        if doc["ref"] != "왜":
+            texts.setdefault(doc["ref"], []).append(doc["per"])
+    hardest = sorted(((statistics.mean(values), ref) for ref, values in texts.items() if len(values) >= 2), reverse=True)[:3]
+    assert [item["text"] for item in overview["hardest_texts"]] == [ref for _, ref in hardest]
@@ -0,0 +1,117 @@
+"""코호트 집계 워터마크 - 스냅샷 스캔과 로컬 쓰기 증분 반영이 인덱스와 어긋나지 않는지 확인"""
+import pytest
+
+from fake_elasticsearch import FakeElasticsearch, INDEX_NAME, make_backend
+
+
+@pytest.fixture
+def es(corpus_documents):
+    return FakeElasticsearch(corpus_documents[:400])
+
+
+@pytest.fixture
+def service(make_service, es):
+    service = make_service(backend=make_backend(es))
+    service._refresh_snapshot()
+    return service
+
+
+def learner_document(corpus_documents, ref="테스트 문장입니다"):
+    return dict(corpus_documents[0], ref=ref, per=0.5)
+
+
+def notify(service, doc_id, source, response):
+    """es_client와 같은 형식의 쓰기 알림"""
+    service._on_index_write([{"_id": doc_id, "_source": source, "result": response["result"],
+                              "_seq_no": response["_seq_no"]}])
+
+
+def total_count(aggregates):
+    return sum(cell.count for cell in aggregates.cells.values())
+
+
+def current_watermark(service):
+    return service.backend.watermark(service.backend.version())
+
+
+def test_snapshot_includes_writes_not_yet_refreshed(service, es, corpus_documents):
+    # 다른 워커가 쓴 문서: 쓰기 위치는 올라갔지만 refresh 전이라 검색에는 보이지 않음
+    es.index(index=INDEX_NAME, document=learner_document(corpus_documents))
+    service._refresh_snapshot()
+
+    aggregates = service._get_aggregates()
+    assert aggregates.version == current_watermark(service)
+    assert total_count(aggregates) == 401
+    assert service.check_aggregates_consistency()["consistent"]
+
+
+def test_write_while_opening_scan_leaves_watermark_unknown(service, es, corpus_documents):
+    es.index(index=INDEX_NAME, document=learner_document(corpus_documents, "첫 번째"))
+    es.on_open_point_in_time = lambda: es.index(index=INDEX_NAME, document=learner_document(corpus_documents, "두 번째"))
+    service._refresh_snapshot()
+    assert service._get_aggregates().version is None
+
+    # 다음 갱신에서 워터마크를 다시 정하고 두 쓰기를 모두 반영
+    service._refresh_snapshot()
+    aggregates = service._get_aggregates()
+    assert aggregates.version == current_watermark(service)
+    assert total_count(aggregates) == 402
+    assert service.check_aggregates_consistency()["consistent"]
+
+
+def test_local_writes_advance_watermark_without_index_stats(service, es, corpus_documents):
+    source = learner_document(corpus_documents)
+    stats_calls = es.stats_calls
+    notify(service, "learner", source, es.index(index=INDEX_NAME, id="learner", document=source))
+    # 발음 오류 단어 문서는 고정 id로 갱신(updated)되지만 집계 대상이 아님
+    term = {"term": "시게", "term_text": "시게", "error_count": 1}
+    for _ in range(3):
+        notify(service, "시게_pronunciation_error", term,
+               es.update(index=INDEX_NAME, id="시게_pronunciation_error", body={"doc": term, "doc_as_upsert": True}))
+    assert es.stats_calls == stats_calls
+
+    aggregates = service._get_aggregates()
+    assert aggregates.version == current_watermark(service)
+    assert total_count(aggregates) == 401
+
+    # 다음 갱신은 재계산 없이 같은 집계를 유지하고, 스냅샷의 단어 문서도 집계에 들어가지 않음
+    service._refresh_snapshot()
+    assert service._get_aggregates() is aggregates
+    assert service.check_aggregates_consistency()["consistent"]
+
+
+def test_external_write_gap_is_rebuilt(service, es, corpus_documents):
+    es.index(index=INDEX_NAME, document=learner_document(corpus_documents, "외부 쓰기"))
+    source = learner_document(corpus_documents, "로컬 쓰기")
+    notify(service, "local", source, es.index(index=INDEX_NAME, id="local", document=source))
+    assert service._get_aggregates().version != current_watermark(service)
+
+    service._refresh_snapshot()
+    aggregates = service._get_aggregates()
+    assert aggregates.version == current_watermark(service)
+    assert total_count(aggregates) == 402
+    assert service.check_aggregates_consistency()["consistent"]
+
+
+def test_write_already_in_snapshot_is_not_added_twice(service, es, corpus_documents):
+    source = learner_document(corpus_documents)
+    response = es.index(index=INDEX_NAME, id="late", document=source)
+    service._refresh_snapshot()
+    # 스냅샷 교체 후에 도착한 쓰기 알림
+    notify(service, "late", source, response)
+
+    assert total_count(service._get_aggregates()) == 401
+    assert service.check_aggregates_consistency()["consistent"]
+
+
+def test_learner_update_defers_to_rebuild(service, es, corpus_documents):
+    source = learner_document(corpus_documents)
+    es.index(index=INDEX_NAME, id="learner", document=source)
+    service._refresh_snapshot()
+    updated = dict(source, per=0.9)
+    notify(service, "learner", updated, es.index(index=INDEX_NAME, id="learner", document=updated))
+    assert service._get_aggregates().version is None
+
+    service._refresh_snapshot()
+    assert service._get_aggregates().version == current_watermark(service)
+    assert service.check_aggregates_consistency()["consistent"]
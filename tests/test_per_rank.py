@@ -0,0 +1,65 @@
+"""참조 텍스트 × 코호트별 per 순위 - 이진 탐색 결과와 전수 비교"""
+import random
+
+import pytest
+
+from services.insight.per_rank import PerRankIndex
+from services.insight.snapshot import InsightSnapshot
+
+
+def brute_rank(documents, ref, per, **filters):
+    values = [
+        doc["per"] for doc in documents
+        if doc["ref"] == ref and doc["per"] is not None
+        and all(value is None or doc.get(field) == value for field, value in filters.items())
+    ]
+    return sum(v < per for v in values), sum(v == per for v in values), len(values)
+
+
+@pytest.fixture(scope="module")
+def rank_index(corpus_documents):
+    return PerRankIndex.from_snapshot(InsightSnapshot.from_documents(corpus_documents))
+
+
+def test_rank_matches_brute_force(rank_index, corpus_documents):
+    rng = random.Random(11)
+    refs = sorted({doc["ref"] for doc in corpus_documents})
+    for _ in range(200):
+        doc = rng.choice(corpus_documents)
+        ref = doc["ref"] if rng.random() < 0.8 else rng.choice(refs)
+        # 코퍼스에 있는 값(동률)과 임의 값 모두 확인
+        per = doc["per"] if rng.random() < 0.5 else rng.random() * 0.5
+        filters = {
+            "sex": rng.choice([None, doc["sex"], "O"]),
+            "nationality": rng.choice([None, doc["nationality"]]),
+            "level": rng.choice([None, "A", "B"])
+        }
+        assert rank_index.rank(ref, per, **filters) == brute_rank(corpus_documents, ref, per, **filters)
+    assert rank_index.rank("없는 문장", 0.1) == (0, 0, 0)
+
+
+def test_added_documents_are_ranked(corpus_documents):
+    index = PerRankIndex.from_snapshot(InsightSnapshot.from_documents(corpus_documents[:1000]))
+    ref = corpus_documents[0]["ref"]
+    new = [dict(doc, per=doc["per"] / 2) for doc in corpus_documents[1000:1200]]
+    new += [{"ref": ref, "per": 0.05, "sex": "M", "nationality": "Thai", "level": "C"},
+            {"ref": ref, "per": None}, {"ref": None, "per": 0.1}]
+
+    assert index.add(new) == 201
+    documents = corpus_documents[:1000] + new[:201]
+    for doc in documents[::37] + new[-3:-2]:
+        for per in (doc["per"], 0.1, 0.0):
+            assert index.rank(doc["ref"], per) == brute_rank(documents, doc["ref"], per)
+    assert index.rank(ref, 0.05, nationality="Thai") == (0, 1, 1)
+
+
+def test_service_learner_percentile(embedded_service, corpus_documents):
+    doc = corpus_documents[5]
+    result = embedded_service.get_learner_percentile(doc["ref"], doc["per"], nationality=doc["nationality"])
+
+    below, equal, total = brute_rank(corpus_documents, doc["ref"], doc["per"], nationality=doc["nationality"])
+    assert result["cohort"] == {"nationality": doc["nationality"]}
+    assert (result["lower_error_count"], result["same_error_count"], result["cohort_size"]) == (below, equal, total)
+    assert result["percentile"] == pytest.approx((total - below - equal + equal / 2) / total * 100)
+    assert "error" in embedded_service.get_learner_percentile("", 0.1)
+    assert "error" in embedded_service.get_learner_percentile(doc["ref"], 0.1, nationality="Korean")
@@ -0,0 +1,60 @@
+"""음소 오류 이벤트 파싱과 코호트별 혼동 행렬"""
+from collections import Counter
+
+from services.insight.aggregates import COHORT_DIMENSIONS
+from services.insight.phoneme import PhonemeIndex, parse_error_events, error_event_fields
+from services.insight.snapshot import InsightSnapshot
+
+
+def test_parse_error_events():
+    error = "substitution of < EU > to < R >, insertion of < I > deletion of < X >"
+    assert parse_error_events(error) == [("S", "EU", "R"), ("I", None, "I"), ("D", "X", None)]
+    assert parse_error_events(None) == parse_error_events("") == []
+    assert error_event_fields("deletion of < N >") == {"error_events": [{"op": "D", "from": "N", "to": None}]}
+
+
+def expected_groups(documents, **filters):
+    groups = {}
+    for doc in documents:
+        if any(doc.get(field) != value for field, value in filters.items()):
+            continue
+        key = (doc["nationality"], doc["level"])
+        records, events = groups.setdefault(key, [0, Counter()])
+        groups[key][0] = records + 1
+        events.update(parse_error_events(doc.get("error")))
+    return groups
+
+
+def test_confusion_matches_event_counts(corpus_documents):
+    index = PhonemeIndex.from_snapshot(InsightSnapshot.from_documents(corpus_documents), COHORT_DIMENSIONS)
+    expected = expected_groups(corpus_documents, sex="F")
+
+    groups = index.confusion(("nationality", "level"), top=1000, sex="F")
+    assert {(g["nationality"], g["level"]) for g in groups} == set(expected)
+    for group in groups:
+        records, events = expected[(group["nationality"], group["level"])]
+        assert group["record_count"] == records
+        assert {(e["op"], e["from"], e["to"]): e["count"] for e in group["top_events"]} == dict(events)
+        totals = Counter()
+        for (op, _, _), count in events.items():
+            totals[op] += count
+        assert group["event_totals"] == {op: totals[op] for op in "SID"}
+        assert sum(map(sum, group["substitution_matrix"])) == totals["S"]
+        assert sum(group["insertions"]) == totals["I"]
+
+
+def test_top_events_are_sorted_and_limited(corpus_documents):
+    index = PhonemeIndex.from_snapshot(InsightSnapshot.from_documents(corpus_documents), COHORT_DIMENSIONS)
+    (group,) = index.confusion((), top=5)
+    counts = [event["count"] for event in group["top_events"]]
+    assert len(counts) == 5 and counts == sorted(counts, reverse=True)
+    assert group["record_count"] == len(corpus_documents)
+    assert index.confusion(("level",), nationality="Korean") == []
+
+
+def test_service_phoneme_confusion(embedded_service):
+    result = embedded_service.analyze_phoneme_confusion(nationality="English", top=3)
+    assert result["filters"] == {"nationality": "English"}
+    assert {group["nationality"] for group in result["groups"]} == {"English"}
+    assert all(len(group["top_events"]) <= 3 for group in result["groups"])
+    assert "error" in embedded_service.analyze_phoneme_confusion(nationality="Korean")
@@ -0,0 +1,128 @@
+"""STT 전 음성 전처리 - 16kHz mono 디코딩, 앞뒤 무음 제거, 음량 정규화"""
+import asyncio
+import io
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+
+from fake_stt import FakeSTT
+from services.stt import preprocess
+
+
+@pytest.fixture(scope="module")
+def ffmpeg():
+    path = shutil.which(preprocess.FFMPEG_PATH)
+    if path is None:
+        pytest.skip("ffmpeg가 없습니다 (FFMPEG_PATH로 지정)")
+    return path
+
+
+def recording(head=1.5, speech=2.0, tail=1.0, rate=48000, amplitude=0.05, noise=0.003, seed=0):
+    """앞뒤에 약한 잡음만 있는 48kHz stereo 16bit WAV"""
+    rng = np.random.default_rng(seed)
+    total = int((head + speech + tail) * rate)
+    samples = rng.normal(0, noise, total)
+    start, end = int(head * rate), int((head + speech) * rate)
+    t = np.arange(end - start) / rate
+    samples[start:end] += amplitude * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.repeat(pcm, 2).tobytes())
+    return buffer.getvalue()
+
+
+def dbfs(pcm):
+    samples = np.frombuffer(pcm, dtype=np.int16) / 32767
+    return 20 * np.log10(np.sqrt(np.mean(samples ** 2)))
+
+
+def test_decode_resamples_to_mono_16k(ffmpeg):
+    samples = preprocess.decode(recording())
+    assert samples.dtype == np.float32
+    assert abs(len(samples) - 4.5 * preprocess.SAMPLE_RATE) < 0.01 * preprocess.SAMPLE_RATE
+    with pytest.raises(preprocess.PreprocessError):
+        preprocess.decode(b"not audio at all")
+
+
+def test_preprocess_trims_silence_and_normalizes(ffmpeg):
+    data = recording()
+    audio = preprocess.preprocess(data)
+    stats = audio.stats
+    pad = preprocess.VAD_PAD_MS / 1000
+    frame = preprocess.VAD_FRAME_MS / 1000
+
+    assert stats["original_seconds"] == pytest.approx(4.5, abs=0.01)
+    assert stats["head_trimmed_seconds"] == pytest.approx(1.5 - pad, abs=2 * frame)
+    assert stats["tail_trimmed_seconds"] == pytest.approx(1.0 - pad, abs=2 * frame)
+    assert stats["processed_seconds"] == pytest.approx(2.0 + 2 * pad, abs=2 * frame)
+    assert stats["removed_seconds"] == pytest.approx(stats["original_seconds"] - stats["processed_seconds"], abs=0.002)
+    assert stats["removed_bytes"] == len(data) - len(audio.wav) == stats["original_bytes"] - stats["processed_bytes"]
+    assert stats["segments"] == 1 and audio.segments == [(0, len(audio.pcm) // 2)]
+    assert audio.offset == round(stats["head_trimmed_seconds"] * preprocess.SAMPLE_RATE)
+
+    # 음성 구간 음량이 목표 음량으로 올라간다 (앞뒤 여유의 잡음만큼 약간 낮음)
+    assert stats["gain_db"] > 0
+    assert dbfs(audio.pcm) == pytest.approx(preprocess.TARGET_LOUDNESS_DBFS, abs=1.5)
+    with wave.open(io.BytesIO(audio.wav)) as f:
+        assert (f.getnchannels(), f.getframerate(), f.getsampwidth()) == (1, 16000, 2)
+
+
+def test_same_sound_in_another_container_has_same_digest(ffmpeg):
+    wav = recording()
+    flac = subprocess.run([ffmpeg, "-loglevel", "error", "-i", "pipe:0", "-f", "flac", "pipe:1"],
+                          input=wav, capture_output=True, check=True).stdout
+    assert flac[:4] == b"fLaC"
+    assert preprocess.preprocess(flac).digest == preprocess.preprocess(wav).digest
+    assert preprocess.preprocess(recording(seed=1)).digest != preprocess.preprocess(wav).digest
+
+
+def test_all_speech_recording_is_kept(ffmpeg):
+    audio = preprocess.preprocess(recording(head=0, tail=0, noise=0.0))
+    assert audio.stats["head_trimmed_seconds"] == audio.stats["tail_trimmed_seconds"] == 0
+    assert audio.stats["processed_seconds"] == pytest.approx(2.0, abs=0.01)
+
+
+def test_process_pool_preprocessing(ffmpeg, monkeypatch):
+    monkeypatch.setenv("FFMPEG_PATH", ffmpeg)
+    try:
+        audio = asyncio.run(preprocess.preprocess_async(recording()))
+        assert audio is not None and audio.stats["segments"] == 1
+        # 디코딩 실패는 None (호출한 쪽이 원본을 그대로 전송)
+        assert asyncio.run(preprocess.preprocess_async(b"not audio")) is None
+    finally:
+        preprocess.shutdown_executor()
+
+
+def test_service_sends_preprocessed_wav_when_enabled(ffmpeg, stt_service, install_stt, monkeypatch):
+    fake = install_stt(FakeSTT())
+    monkeypatch.setattr(stt_service, "PREPROCESS_ENABLED", True)
+
+    async def preprocess_inline(data):
+        try:
+            return preprocess.preprocess(data)
+        except preprocess.PreprocessError:
+            return None
+
+    monkeypatch.setattr(stt_service, "preprocess_async", preprocess_inline)
+
+    async def chunks(data):
+        yield data[:1000]
+        yield data[1000:]
+
+    data = recording()
+    result = asyncio.run(stt_service.transcribe_and_correct(chunks(data), filename="phone.m4a", content_type="audio/mp4"))
+    sent = fake.calls[-1]
+    assert sent["filename"] == "phone.wav"
+    assert result["preprocessing"]["processed_bytes"] == len(sent["data"]) < len(data) / 4
+    assert result["transcription"] == f"인식 {len(sent['data'])}" and result["cached"] is False
+
+    # 디코딩할 수 없으면 원본을 그대로 보낸다
+    result = asyncio.run(stt_service.transcribe_and_correct(chunks(b"not audio" * 200), filename="odd.bin"))
+    assert fake.calls[-1]["data"] == b"not audio" * 200 and "preprocessing" not in result
@@ -0,0 +1,54 @@
+"""발음 오류 분석 레코드 - 응답 형식, 기본값, 문자열 공유"""
+import statistics
+from collections import Counter
+
+import pytest
+
+from services.insight.records import PronunciationRecord
+
+
+def test_response_shape_and_defaults():
+    source = {"ref": "시계", "ans": "S I G E", "rec": "S I G", "error": "deletion of < E >",
+              "C": 3, "S": 0, "I": 0, "D": 1, "per": 0.25, "sex": "F", "nationality": "English",
+              "level": "A", "type": "W", "file": "ignored.wav"}
+    assert PronunciationRecord.from_source(source).to_response() == {
+        "ref": "시계", "ans": "S I G E", "rec": "S I G", "error": "deletion of < E >",
+        "csid": {"C": 3, "S": 0, "I": 0, "D": 1},
+        "metadata": {"sex": "F", "nationality": "English", "level": "A", "type": "W"}
+    }
+
+    empty = PronunciationRecord.from_source({})
+    assert empty.per is None
+    assert empty.to_response() == {
+        "ref": "", "ans": "", "rec": "", "error": "",
+        "csid": {"C": 0, "S": 0, "I": 0, "D": 0},
+        "metadata": {"sex": "", "nationality": "", "level": "", "type": ""}
+    }
+
+
+def test_records_share_categorical_strings_and_have_no_dict():
+    first = PronunciationRecord.from_source({"nationality": "".join(["Chin", "ese"]), "ans": "".join(["A ", "B"])})
+    second = PronunciationRecord.from_source({"nationality": "".join(["Chi", "nese"]), "ans": "".join(["A", " B"])})
+    assert first.nationality is second.nationality
+    assert first.ans == second.ans
+    assert not hasattr(first, "__dict__")
+    with pytest.raises(AttributeError):
+        first.speaker = "x"
+
+
+def test_pronunciation_summary_matches_plain_python(embedded_service, corpus_documents):
+    ref = Counter(doc["ref"] for doc in corpus_documents).most_common(1)[0][0]
+    result = embedded_service.analyze_pronunciation_errors(ref, limit=200)
+    docs = [doc for doc in corpus_documents if ref in doc["ref"]][:200]
+    assert result["found_documents"] == len(docs)
+
+    by_level = {}
+    for doc in docs:
+        by_level.setdefault(doc["level"], []).append(doc["per"])
+    assert result["error_analysis"]["level_performance"] == {
+        level: {"count": len(rates), "avg_error_rate": pytest.approx(statistics.mean(rates))}
+        for level, rates in by_level.items()
+    }
+    errors = Counter(doc["error"] for doc in docs if doc.get("error"))
+    assert result["error_analysis"]["top_error_patterns"] == dict(errors.most_common(10))
+    assert [sample["csid"]["S"] for sample in result["pronunciation_samples"]] == [doc["S"] for doc in docs]
@@ -0,0 +1,85 @@
+"""ref 자모 n-gram 색인 - 부분/오타 일치 검색과 순위"""
+import random
+
+from services.insight.ref_index import RefTextIndex, decompose, _substring_distance, _edit_distance
+
+REFS = ["시계", "이게 다 니 책임이야", "가족이 몇 명이에요", "여기 물하고 반찬 좀 더 주시겠어요", "학교에 가요"]
+
+
+def sellers_distance(pattern, text):
+    """text의 임의 부분 문자열과 pattern의 최소 편집 거리 (동적 계획법)"""
+    previous = [0] * (len(text) + 1)
+    for i, char in enumerate(pattern, start=1):
+        current = [i] + [0] * len(text)
+        for j in range(1, len(text) + 1):
+            current[j] = min(previous[j - 1] + (char != text[j - 1]), previous[j] + 1, current[j - 1] + 1)
+        previous = current
+    return min(previous)
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, start=1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            current.append(min(previous[j - 1] + (char != b[j - 1]), previous[j] + 1, current[j - 1] + 1))
+        previous = current
+    return previous[-1]
+
+
+def test_decompose_marks_missing_final_consonant():
+    assert decompose("시계 A") == "ㅅㅣ_ㄱㅖ_a"
+
+
+def test_myers_distance_matches_dynamic_programming():
+    rng = random.Random(7)
+    for _ in range(300):
+        pattern = "".join(rng.choice("ㄱㄴㅏㅣ_") for _ in range(rng.randint(1, 12)))
+        text = "".join(rng.choice("ㄱㄴㅏㅣ_") for _ in range(rng.randint(0, 40)))
+        expected = sellers_distance(pattern, text)
+        for limit in (1, 3, 12):
+            assert _substring_distance(pattern, text, limit) == min(expected, limit + 1)
+
+
+def test_banded_edit_distance_matches_levenshtein():
+    rng = random.Random(11)
+    for _ in range(300):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 10)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 10)))
+        for limit in (0, 1, 2, 5):
+            assert _edit_distance(a, b, limit) == min(levenshtein(a, b), limit + 1)
+
+
+def test_whole_ref_near_match_ranks_before_fragment_of_long_sentence():
+    index = RefTextIndex(REFS)
+    # "시게"는 "시계" 전체와도, "이게 다 니 책임이야"의 "이게"와도 자모 1개 차이
+    matches = index.search("시게")
+    assert matches[:2] == [("시계", 1), ("이게 다 니 책임이야", 1)]
+    assert index.best_matches("시게") == [("시계", 1)]
+
+
+def test_exact_substring_and_typo_tiers():
+    index = RefTextIndex(REFS)
+    assert index.best_matches("이게") == [("이게 다 니 책임이야", 0)]
+    assert index.best_matches("가족이 멱 명") == [("가족이 몇 명이에요", 1)]
+    assert index.search("택시를 타요") == []
+
+
+def test_added_refs_are_searchable_after_cached_lookups():
+    index = RefTextIndex(REFS)
+    assert index.best_matches("시계를 샀어요") == []
+    assert index.add(["시계를 샀어요", "시계"]) == 1
+    assert index.best_matches("시계를 샀어요") == [("시계를 샀어요", 0)]
+    assert len(index) == len(REFS) + 1
+
+
+def test_service_pronunciation_errors_use_best_tier(embedded_service, corpus_documents):
+    ref = next(doc["ref"] for doc in corpus_documents if len(doc["ref"]) >= 4)
+    result = embedded_service.analyze_pronunciation_errors(ref, limit=1000)
+    assert result["matched_refs"][0] == {"ref": ref, "distance": 0}
+    assert {match["distance"] for match in result["matched_refs"]} == {0}
+    expected = sum(1 for doc in corpus_documents if ref in doc["ref"])
+    assert result["found_documents"] == min(expected, 1000)
+
+    missing = embedded_service.analyze_pronunciation_errors("뷁뷁뷁뷁뷁뷁")
+    assert missing["found_documents"] == 0 and missing["matched_refs"] == []
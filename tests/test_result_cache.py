@@ -0,0 +1,94 @@
+"""버전 태그 결과 캐시 - 같은 버전 적중, 버전 변경 시 stale-while-revalidate"""
+import asyncio
+import threading
+import time
+
+from services.insight.cache import VersionedResultCache
+
+
+def wait_idle(cache, timeout=5.0):
+    """백그라운드 재계산이 모두 끝날 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cache._refreshing
+
+
+def test_same_version_hits_without_recomputing():
+    cache = VersionedResultCache()
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+
+    assert cache.get_or_compute("k", 1, compute) == 1
+    assert cache.get_or_compute("k", 1, compute) == 1
+    assert calls == [1]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_new_version_serves_stale_value_and_refreshes_in_background():
+    cache = VersionedResultCache()
+    release = threading.Event()
+
+    cache.get_or_compute("k", 1, lambda: "old")
+
+    def slow():
+        release.wait(5)
+        return "new"
+
+    # 재계산이 끝나기 전 요청은 모두 이전 값을 받고, 재계산은 한 번만 실행
+    assert cache.get_or_compute("k", 2, slow) == "old"
+    assert cache.get_or_compute("k", 2, lambda: "duplicate") == "old"
+    release.set()
+    wait_idle(cache)
+
+    assert cache.get_or_compute("k", 2, lambda: "unused") == "new"
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_disallowing_stale_computes_now_and_keeps_other_version():
+    cache = VersionedResultCache()
+    cache.get_or_compute("k", 1, lambda: "v1")
+
+    assert cache.get_or_compute("k", 2, lambda: "v2", allow_stale=False) == "v2"
+    # 고정 버전 결과가 최신 버전 항목을 덮어쓰지 않음
+    assert cache.get_or_compute("k", 1, lambda: "unused") == "v1"
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = VersionedResultCache(maxsize=2)
+    for key in ("a", "b"):
+        cache.get_or_compute(key, 1, lambda: key)
+    cache.get_or_compute("a", 1, lambda: "unused")
+    cache.get_or_compute("c", 1, lambda: "c")
+
+    assert cache.stats()["size"] == 2
+    assert cache.get_or_compute("b", 1, lambda: "recomputed") == "recomputed"
+
+
+def test_async_get_or_compute_refreshes_stale_entry():
+    async def scenario():
+        cache = VersionedResultCache()
+
+        async def compute(value):
+            return value
+
+        assert await cache.get_or_compute_async("k", 1, lambda: compute("old")) == "old"
+        assert await cache.get_or_compute_async("k", 2, lambda: compute("new")) == "old"
+        await asyncio.sleep(0)
+        return await cache.get_or_compute_async("k", 2, lambda: compute("unused"))
+
+    assert asyncio.run(scenario()) == "new"
+
+
+def test_local_write_changes_dataset_version(embedded_service, corpus_documents):
+    embedded_service._get_snapshot()
+    first = embedded_service.get_overview()
+    assert embedded_service.get_overview() is first
+    version = embedded_service._dataset_version()
+
+    embedded_service._on_index_write([{"_id": "new", "_source": dict(corpus_documents[0]), "result": "created"}])
+    assert embedded_service._dataset_version() != version
+    # 이전 결과를 바로 돌려주고 백그라운드에서 새 버전으로 재계산
+    assert embedded_service.get_overview() is first
+    wait_idle(embedded_service._cache)
+    assert embedded_service.get_overview()["summary"]["total_samples"] == len(corpus_documents) + 1
@@ -0,0 +1,155 @@
+"""긴 녹음의 무음 경계 분할과 구간별 병렬 인식"""
+import asyncio
+import itertools
+
+import numpy as np
+import pytest
+
+from fake_stt import FakeSTT
+from services.stt import preprocess
+from services.stt.preprocess import PreprocessedAudio, SAMPLE_RATE
+
+FRAME = SAMPLE_RATE * preprocess.VAD_FRAME_MS // 1000
+
+
+def speech(pattern, amplitude=0.1, noise=0.002, seed=0):
+    """(음성 초, 무음 초) 목록대로 이어 붙인 16kHz 샘플과 무음 구간 목록"""
+    rng = np.random.default_rng(seed)
+    parts, pauses, position = [], [], 0
+    for voiced, silent in pattern:
+        t = np.arange(int(voiced * SAMPLE_RATE)) / SAMPLE_RATE
+        parts.append(amplitude * np.sin(2 * np.pi * 200 * t) * (1 + 0.5 * np.sin(2 * np.pi * 4 * t)))
+        parts.append(np.zeros(int(silent * SAMPLE_RATE)))
+        position += len(parts[-2])
+        pauses.append((position, position + len(parts[-1])))
+        position += len(parts[-1])
+    samples = np.concatenate(parts)
+    return (samples + rng.normal(0, noise, len(samples))).astype(np.float32), pauses
+
+
+def lecture(seconds=100, seed=0):
+    """1.5~3초 발화 사이에 짧은 숨(0.1초)과 0.6초 쉼이 번갈아 오는 녹음"""
+    rng = np.random.default_rng(seed)
+    pattern, total = [], 0.0
+    while total < seconds:
+        pattern.append((float(rng.uniform(1.5, 3)), 0.6 if len(pattern) % 2 else 0.1))
+        total += sum(pattern[-1])
+    return speech(pattern, seed=seed)
+
+
+def assert_covers(bounds, length, target_seconds):
+    target = target_seconds * SAMPLE_RATE
+    assert bounds[0][0] == 0 and bounds[-1][1] == length
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    for start, end in bounds[:-1]:
+        assert 0.5 * target - FRAME <= end - start <= 1.5 * target + FRAME
+    assert bounds[-1][1] - bounds[-1][0] <= 1.5 * target + FRAME
+
+
+@pytest.mark.parametrize("target_seconds", [10, 30])
+def test_split_segments_cuts_in_long_pauses(target_seconds):
+    samples, pauses = lecture()
+    bounds = preprocess.split_segments(samples, target_seconds)
+
+    assert len(bounds) > 1
+    assert_covers(bounds, len(samples), target_seconds)
+    long_pauses = [(start, end) for start, end in pauses if end - start >= 0.5 * SAMPLE_RATE]
+    for _, cut in bounds[:-1]:
+        # 발화 중간이나 짧은 숨이 아니라 긴 쉼 안에서 자른다
+        assert any(start <= cut <= end for start, end in long_pauses)
+
+
+def test_split_segments_without_pauses():
+    samples, _ = speech([(95, 0)])
+    bounds = preprocess.split_segments(samples, 30)
+    assert len(bounds) == 3
+    assert_covers(bounds, len(samples), 30)
+
+    # 목표 길이의 1.5배 이하면 나누지 않는다
+    assert preprocess.split_segments(samples[:40 * SAMPLE_RATE], 30) == [(0, 40 * SAMPLE_RATE)]
+
+
+def test_preprocess_segments_long_recordings(monkeypatch):
+    samples, _ = lecture(seconds=100, seed=1)
+    head = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    monkeypatch.setattr(preprocess, "decode", lambda data: np.concatenate((head, samples)))
+
+    audio = preprocess.preprocess(b"long recording")
+    assert audio.stats["segments"] == len(audio.segments) > 1
+    assert_covers(audio.segments, len(audio.pcm) // 2, preprocess.SEGMENT_SECONDS)
+    start, _ = audio.segment_times(*audio.segments[0])
+    _, end = audio.segment_times(*audio.segments[-1])
+    # 구간 시각은 앞 무음을 잘라내기 전 원본 기준
+    assert start == audio.stats["head_trimmed_seconds"] > 0
+    assert end == pytest.approx(audio.stats["original_seconds"] - audio.stats["tail_trimmed_seconds"], abs=0.001)
+
+    monkeypatch.setattr(preprocess, "SEGMENT_THRESHOLD_SECONDS", 0)
+    assert preprocess.preprocess(b"long recording").segments == [(0, len(audio.pcm) // 2)]
+
+
+def segmented_audio(count, seconds=1.0, offset=0.5):
+    size = int(seconds * SAMPLE_RATE)
+    pcm = (np.arange(count * size) % 128).astype(np.int16).tobytes()
+    return PreprocessedAudio(pcm, {"segments": count}, [(i * size, (i + 1) * size) for i in range(count)],
+                             offset=int(offset * SAMPLE_RATE))
+
+
+def test_segment_times_and_wav():
+    audio = segmented_audio(3, offset=0.5)
+    assert audio.segment_times(16000, 32000) == (1.5, 2.5)
+    assert len(audio.segment_wav(16000, 32000)) == 44 + 32000
+    assert audio.wav[44:] == audio.pcm
+
+
+def test_transcribe_segments_in_order_with_bounded_concurrency(stt_service, install_stt, monkeypatch):
+    # 뒤 구간일수록 먼저 끝나도 결과는 구간 순서대로
+    fake = install_stt(FakeSTT(delay=lambda filename: 0.2 - 0.03 * int(filename[-5]),
+                               transcribe=lambda filename, data: filename[:-4]))
+    monkeypatch.setattr(stt_service, "STT_SEGMENT_CONCURRENCY", 2)
+    urls = ["http://stt-a/api/v1/stt", "http://stt-b/api/v1/stt"]
+    monkeypatch.setattr(stt_service, "_stt_urls", itertools.cycle(urls))
+
+    segments = asyncio.run(stt_service.transcribe_segments(segmented_audio(6), "lecture.m4a"))
+    assert [s["transcription"] for s in segments] == [f"lecture_{i}" for i in range(6)]
+    assert [(s["index"], s["start"], s["end"]) for s in segments] == [(i, i + 0.5, i + 1.5) for i in range(6)]
+    assert fake.max_active == 2
+    # 구간 요청은 STT 서버들에 돌아가며 나뉜다
+    assert sorted(call["url"] for call in fake.calls) == sorted(urls * 3)
+    assert all(len(call["data"]) == 44 + 32000 for call in fake.calls)
+
+
+def test_recognize_joins_segments(stt_service, install_stt):
+    install_stt(FakeSTT(transcribe=lambda filename, data: "" if filename.endswith("_1.wav") else filename[-5]))
+
+    result, cacheable = asyncio.run(stt_service._recognize(segmented_audio(4), "lecture.wav"))
+    assert result["transcription"] == "0 2 3" and result["correction"] == "교정 0 2 3"
+    assert [s["transcription"] for s in result["segments"]] == ["0", "", "2", "3"]
+    assert cacheable and stt_service.stored_patterns == [("0 2 3", "교정 0 2 3")]
+
+    # 한 구간짜리 음성은 segments 없이 전체를 한 번에 보낸다
+    result, _ = asyncio.run(stt_service._recognize(segmented_audio(1), "short.m4a"))
+    assert "segments" not in result
+
+
+def test_failed_segment_fails_recognition(stt_service, install_stt, monkeypatch):
+    fake = install_stt(FakeSTT(fail=lambda filename: filename.endswith("_2.wav")))
+    audio = segmented_audio(4)
+    with pytest.raises(stt_service.STTError):
+        asyncio.run(stt_service._recognize(audio, "lecture.wav"))
+    assert len(fake.calls) == 4 and stt_service.stored_patterns == []
+
+    monkeypatch.setattr(stt_service, "PREPROCESS_ENABLED", True)
+
+    async def preprocess_inline(data):
+        return audio
+
+    monkeypatch.setattr(stt_service, "preprocess_async", preprocess_inline)
+
+    async def chunks():
+        yield b"lecture"
+
+    # 기본 동작은 빈 인식 결과로 교정을 진행하고, strict면 STTError를 올린다
+    result = asyncio.run(stt_service.transcribe_and_correct(chunks(), filename="lecture.wav"))
+    assert result["transcription"] == "" and result["preprocessing"] == {"segments": 4}
+    with pytest.raises(stt_service.STTError):
+        asyncio.run(stt_service.transcribe_and_correct(chunks(), filename="lecture.wav", strict=True))
@@ -0,0 +1,83 @@
+"""t-digest 분위수 스케치 - 순위 오차, 병합, 직렬화"""
+import numpy as np
+import pytest
+
+from services.insight.sketch import TDigest, compression_for
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def rank_errors(digest, values):
+    ordered = np.sort(values)
+    estimates = digest.quantiles(QUANTILES)
+    ranks = np.searchsorted(ordered, estimates) / len(ordered)
+    return np.abs(ranks - np.asarray(QUANTILES))
+
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(3).lognormal(-2.0, 0.8, 100_000)
+
+
+def test_compression_for_rank_error():
+    assert compression_for(0.01) == 200
+    assert compression_for(1.0) == 10
+
+
+def test_small_inputs_are_exact():
+    digest = TDigest()
+    for value in (0.4, 0.1, 0.3, 0.2):
+        digest.add(value)
+    assert digest.count == 4
+    assert digest.quantile(0.5) == pytest.approx(np.median([0.1, 0.2, 0.3, 0.4]))
+    assert digest.quantiles([0.0, 1.0]) == [0.1, 0.4]
+    assert TDigest().quantiles([0.5, 0.9]) == [0, 0]
+
+
+def test_rank_error_within_bound(values):
+    compression = compression_for(0.01)
+    digest = TDigest.from_values(values, compression)
+    assert digest.count == len(values)
+    assert len(digest.means) <= compression * 5
+    assert rank_errors(digest, values).max() <= 0.01
+
+
+def test_incremental_and_merged_digests_agree(values):
+    compression = compression_for(0.01)
+    incremental = TDigest(compression)
+    for value in values[:20_000]:
+        incremental.add(value)
+    assert rank_errors(incremental, values[:20_000]).max() <= 0.01
+
+    parts = [TDigest.from_values(chunk, compression) for chunk in np.array_split(values, 16)]
+    merged = TDigest.merge_all(parts, compression)
+    assert merged.count == len(values)
+    assert rank_errors(merged, values).max() <= 0.01
+    assert [part.count for part in parts] == [len(chunk) for chunk in np.array_split(values, 16)]
+
+    pairwise = TDigest(compression)
+    for part in parts:
+        pairwise.merge(part)
+    assert pairwise.quantiles(QUANTILES) == pytest.approx(merged.quantiles(QUANTILES), rel=0.05)
+    assert (pairwise.min, pairwise.max) == (values.min(), values.max())
+
+
+def test_serialization_round_trip(values):
+    digest = TDigest.from_values(values[:5000], 100)
+    digest.add(0.5)
+    restored = TDigest.from_list(digest.to_list())
+    assert restored.count == digest.count
+    assert restored.quantiles(QUANTILES) == digest.quantiles(QUANTILES)
+
+
+def test_error_rate_percentiles_on_corpus(embedded_service, corpus_documents):
+    result = embedded_service.analyze_error_rate_percentiles(nationality="Chinese", group_by="level")
+    for level, group in result["groups"].items():
+        values = np.array([doc["per"] for doc in corpus_documents
+                           if doc["nationality"] == "Chinese" and doc["level"] == level])
+        assert group["n"] == len(values)
+        for key, q in (("p50", 0.5), ("p90", 0.9)):
+            rank = np.searchsorted(np.sort(values), group[key], side="right") / len(values)
+            assert abs(rank - q) <= 0.02
+    assert result["overall"]["n"] == sum(group["n"] for group in result["groups"].values())
+    assert "error" in embedded_service.analyze_error_rate_percentiles(group_by="age")
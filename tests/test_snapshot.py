@@ -0,0 +1,54 @@
+"""컬럼형 스냅샷 - 사전 인코딩, 마스크, 그룹 중간값"""
+import math
+import statistics
+
+import numpy as np
+
+from services.insight.snapshot import InsightSnapshot
+
+DOCUMENTS = [
+    {"sex": "M", "nationality": "Chinese", "level": "A", "ref": "시계", "per": 0.1, "C": 3, "S": 1},
+    {"sex": "F", "nationality": "English", "level": "B", "ref": "시계", "per": 0.3, "C": 2, "D": 1, "error": "x"},
+    {"sex": "F", "nationality": "Chinese", "level": "A", "ref": "이게", "per": None, "C": 4},
+    {"sex": "M", "nationality": "Chinese", "level": "B", "per": 0.2, "I": 2},
+]
+
+
+def test_from_documents_encodes_categories_in_first_seen_order():
+    snapshot = InsightSnapshot.from_documents(DOCUMENTS, version="v1")
+
+    assert snapshot.size == 4
+    assert snapshot.version == "v1"
+    assert snapshot.categories["sex"] == ["M", "F"]
+    assert snapshot.codes["sex"].tolist() == [0, 1, 1, 0]
+    assert snapshot.codes["ref"].tolist() == [0, 0, 1, -1]
+    assert snapshot.codes["error"].tolist() == [-1, 0, -1, -1]
+    assert math.isnan(snapshot.numeric["per"][2])
+    assert snapshot.valid_per.tolist() == [True, True, False, True]
+    assert snapshot.numeric["C"].tolist() == [3, 2, 4, 0]
+
+
+def test_mask_and_column_reductions():
+    snapshot = InsightSnapshot.from_documents(DOCUMENTS)
+
+    mask = snapshot.mask(nationality="Chinese", level=None)
+    assert mask.tolist() == [True, False, True, True]
+    assert snapshot.per_values(mask).tolist() == [0.1, 0.2]
+    assert snapshot.csid_totals(mask) == {"C": 7, "S": 1, "I": 2, "D": 0}
+    assert not snapshot.mask(nationality="Korean").any()
+    assert snapshot.code_of("ref", "이게") == 1
+
+
+def test_group_medians_match_statistics_median(corpus_documents):
+    snapshot = InsightSnapshot.from_documents(corpus_documents)
+    medians = snapshot.group_medians("nationality", snapshot.mask(level="A"))
+
+    expected = {}
+    for nationality in {doc["nationality"] for doc in corpus_documents}:
+        values = [doc["per"] for doc in corpus_documents
+                  if doc["nationality"] == nationality and doc["level"] == "A" and doc.get("per") is not None]
+        if values:
+            expected[nationality] = statistics.median(values)
+    assert medians.keys() == expected.keys()
+    for nationality, median in expected.items():
+        assert np.isclose(medians[nationality], median)
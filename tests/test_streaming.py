@@ -0,0 +1,84 @@
+"""응답 인코딩과 발음 오류 NDJSON 스트리밍"""
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from starlette.responses import JSONResponse
+
+from services.insight import encoding
+
+
+def test_dumps_matches_json_response_and_converts_numpy():
+    content = {"text": "시계", "rate": 0.25, "items": [1, None, True], "nested": {"a": "b"}}
+    assert encoding.dumps(content) == JSONResponse(content).body
+    assert json.loads(encoding.dumps({"n": np.int64(3), "x": np.float32(0.5), "a": np.arange(3)})) == {
+        "n": 3, "x": 0.5, "a": [0, 1, 2]
+    }
+    with pytest.raises(ValueError):
+        encoding.dumps({"rate": float("nan")})
+    with pytest.raises(TypeError):
+        encoding.dumps({"value": object()})
+
+
+def test_ndjson_writes_one_line_per_item():
+    body = encoding.ndjson([{"a": 1}, ["시계"], None])
+    assert body.split(b"\n") == [b'{"a":1}', '["시계"]'.encode("utf-8"), b"null", b""]
+    assert encoding.ndjson([]) == b""
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_matches_buffered_response(insight_client, corpus_documents):
+    ref = corpus_documents[0]["ref"]
+    buffered = insight_client.get("/api/insights/pronunciation-errors", params={"ref_text": ref, "limit": 120}).json()
+    response = insight_client.get("/api/insights/pronunciation-errors",
+                                  params={"ref_text": ref, "limit": 120, "stream": "true"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == encoding.NDJSON_MEDIA_TYPE
+    lines = read_lines(response)
+    summary, samples, end = lines[0], lines[1:-1], lines[-1]
+
+    expected = dict(buffered["data"])
+    expected_samples = expected.pop("pronunciation_samples")
+    assert summary == {"type": "summary", "data": expected}
+    assert all(line["type"] == "sample" for line in samples)
+    assert [line["data"] for line in samples] == expected_samples
+    assert end == {"type": "end", "sample_count": len(expected_samples)}
+
+
+def test_service_stream_pages(embedded_service, corpus_documents):
+    ref = corpus_documents[0]["ref"]
+
+    async def collect():
+        return [item async for item in embedded_service.stream_pronunciation_errors(ref, limit=30, page_size=7)]
+
+    summary, *pages = asyncio.run(collect())
+    assert summary["found_documents"] == sum(len(page) for page in pages)
+    assert [len(page) for page in pages[:-1]] == [7] * (len(pages) - 1)
+    assert set(pages[0][0]) >= {"ans", "rec", "error"}
+
+
+def test_stream_reports_sample_errors_in_band(insight_client, embedded_service, corpus_documents, monkeypatch):
+    async def broken_pages(*args, **kwargs):
+        yield [{"_source": {"ref": corpus_documents[0]["ref"]}}]
+        raise RuntimeError("search failed")
+
+    monkeypatch.setattr(embedded_service.backend, "iter_refs_async", broken_pages)
+    response = insight_client.get("/api/insights/pronunciation-errors",
+                                  params={"ref_text": corpus_documents[0]["ref"], "stream": "true"})
+
+    lines = read_lines(response)
+    assert response.status_code == 200
+    assert [line["type"] for line in lines] == ["summary", "sample", "error"]
+    assert "search failed" in lines[-1]["message"]
+
+
+def test_stream_validates_before_streaming(insight_client):
+    response = insight_client.get("/api/insights/pronunciation-errors", params={"ref_text": " ", "stream": "true"})
+    assert response.status_code == 400
+    response = insight_client.get("/api/insights/pronunciation-errors", params={"ref_text": "시계", "limit": 0})
+    assert response.status_code == 400
@@ -0,0 +1,112 @@
+"""여러 파일 일괄 인식 - multipart 파일 순회 한도와 /api/stt/batch NDJSON 응답"""
+import asyncio
+import functools
+import json
+
+import httpx
+import pytest
+
+from fake_stt import FakeSTT, multipart_body, stream_request
+from services.stt import upload
+from services.stt.upload import UploadError, UploadTooLarge, iter_files
+
+MB = 1024 * 1024
+
+
+async def collect(request, **limits):
+    return [item async for item in iter_files(request, **limits)]
+
+
+def test_iter_files_yields_each_file():
+    body, content_type = multipart_body([("a.wav", b"A" * 5000), ("b.m4a", b"B" * 300, "audio/mp4"), ("", b"C")],
+                                        fields=[("lesson", "3")])
+    files = asyncio.run(collect(stream_request(body, content_type, chunk_size=512)))
+    assert files == [("a.wav", "audio/wav", b"A" * 5000), ("b.m4a", "audio/mp4", b"B" * 300),
+                     ("audio_3.wav", "audio/wav", b"C")]
+
+    body, content_type = multipart_body([("a.wav", b"A")], field="file")
+    with pytest.raises(UploadError, match="'audio' 파일 필드가 없습니다"):
+        asyncio.run(collect(stream_request(body, content_type)))
+
+
+@pytest.mark.parametrize("limits, message", [
+    ({"max_files": 2}, "파일이 너무 많습니다"),
+    ({"max_file_bytes": 6000}, "파일이 너무 큽니다: b.wav"),
+    ({"max_total_bytes": 9000}, "업로드 전체 크기가 너무 큽니다")
+])
+def test_iter_files_limits_stop_reading(limits, message):
+    files = [("a.wav", b"A" * 5000), ("b.wav", b"B" * 20000), ("c.wav", b"C" * 5000), ("d.wav", b"D" * 5000)]
+    body, content_type = multipart_body(files)
+    # Content-Length 사전 확인을 건너뛰도록 길이 없이 보내 본문을 읽는 중에 걸리는지 확인
+    request = stream_request(body, content_type, chunk_size=1024, content_length=False)
+
+    with pytest.raises(UploadTooLarge, match=message):
+        asyncio.run(collect(request, **limits))
+    # 한도를 넘은 시점에서 나머지 본문은 읽지 않는다
+    assert request.received < request.chunk_count
+
+
+def test_iter_files_rejects_large_content_length_before_reading():
+    body, content_type = multipart_body([("a.wav", b"A" * (2 * MB))])
+    request = stream_request(body, content_type)
+    with pytest.raises(UploadTooLarge, match="요청 본문이 너무 큽니다"):
+        asyncio.run(collect(request, max_total_bytes=MB))
+    assert request.received == 0
+
+
+async def post_batch(app, body, content_type):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/api/stt/batch", content=body, headers={"content-type": content_type})
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_route_streams_a_line_per_file(stt_app, install_stt):
+    fake = install_stt(FakeSTT(fail=lambda filename: filename == "bad.wav"))
+    files = [("a.wav", b"A" * 100), ("bad.wav", b"B" * 200), ("empty.wav", b""), ("녹음.m4a", b"C" * 300, "audio/mp4")]
+    response = asyncio.run(post_batch(stt_app, *multipart_body(files)))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = ndjson(response)
+    assert lines[-1] == {"type": "end", "file_count": 4, "failed_count": 2}
+    results = sorted((line["data"] for line in lines[:-1]), key=lambda data: data["index"])
+    assert all(line["type"] == "result" for line in lines[:-1])
+    assert [data["filename"] for data in results] == ["a.wav", "bad.wav", "empty.wav", "녹음.m4a"]
+    assert results[0] == {"index": 0, "filename": "a.wav", "transcription": "인식 100", "correction": "교정 인식 100"}
+    assert results[3]["transcription"] == "인식 300"
+    # STT 실패는 빈 인식 결과가 아니라 파일별 오류로 보고하고, 빈 파일은 STT에 보내지 않는다
+    assert "STT 서버 오류" in results[1]["error"] and "transcription" not in results[1]
+    assert results[2]["error"] == "파일이 비어 있습니다."
+    assert sorted(call["filename"] for call in fake.calls) == ["a.wav", "bad.wav", "녹음.m4a"]
+
+
+def test_batch_route_bounds_concurrency(stt_app, stt_service, install_stt, monkeypatch):
+    fake = install_stt(FakeSTT(delay=0.1))
+    monkeypatch.setattr(stt_service, "STT_BATCH_CONCURRENCY", 2)
+    files = [(f"{i}.wav", bytes([i]) * 100) for i in range(6)]
+
+    lines = ndjson(asyncio.run(post_batch(stt_app, *multipart_body(files))))
+    assert lines[-1] == {"type": "end", "file_count": 6, "failed_count": 0}
+    assert sorted(line["data"]["index"] for line in lines[:-1]) == list(range(6))
+    assert fake.max_active == 2 and len(fake.calls) == 6
+
+
+def test_batch_route_errors(stt_app, install_stt, monkeypatch):
+    fake = install_stt(FakeSTT())
+    assert asyncio.run(post_batch(stt_app, b"audio", "audio/wav")).status_code == 400
+
+    body, content_type = multipart_body([("a.wav", b"A")], field="file")
+    response = asyncio.run(post_batch(stt_app, body, content_type))
+    assert response.status_code == 400 and "파일 필드가 없습니다" in response.json()["error"]
+
+    import services.stt.stt as routes
+    monkeypatch.setattr(routes, "iter_files", functools.partial(upload.iter_files, max_files=2))
+    body, content_type = multipart_body([(f"{i}.wav", b"A" * 100) for i in range(3)])
+    response = asyncio.run(post_batch(stt_app, body, content_type))
+    assert response.status_code == 413 and "파일이 너무 많습니다" in response.json()["error"]
+    # 한도를 넘은 요청에서 이미 받은 파일의 처리는 취소하고 응답한다
+    assert len(fake.calls) <= 2
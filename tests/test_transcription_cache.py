@@ -0,0 +1,172 @@
+"""인식 결과 캐시 - 메모리 LRU, 디스크 계층, 같은 음성 동시 요청 합치기"""
+import asyncio
+import os
+
+import httpx
+import numpy as np
+import pytest
+
+from fake_stt import FakeSTT
+from services.stt.cache import TranscriptionCache
+from services.stt.preprocess import PreprocessedAudio
+
+
+def result(text):
+    return {"transcription": text, "correction": f"교정 {text}"}
+
+
+def test_memory_lru_eviction_and_stats():
+    cache = TranscriptionCache(maxsize=2)
+    cache.put("a", result("가"))
+    cache.put("b", result("나"))
+    assert cache.get("a") == result("가")
+    # 가장 오래 쓰지 않은 b가 밀려난다
+    cache.put("c", result("다"))
+    assert cache.get("b") is None and cache.get("c") == result("다")
+
+    stats = cache.stats()
+    assert (stats["size"], stats["maxsize"], stats["memory_hits"], stats["misses"]) == (2, 2, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["disk"] == {"enabled": False, "entries": 0, "bytes": 0, "max_bytes": cache.disk_max_bytes}
+
+
+def test_disk_tier_read_through_and_restart(tmp_path):
+    cache = TranscriptionCache(maxsize=1, directory=str(tmp_path))
+    cache.put("aa11", result("가"))
+    cache.put("bb22", result("나"))
+    assert os.path.exists(tmp_path / "aa" / "aa11.json")
+
+    # 메모리에서 밀려난 항목은 디스크에서 읽어 메모리로 올린다
+    assert cache.get("aa11") == result("가")
+    assert cache.get("aa11") == result("가")
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["disk"]["entries"]) == (1, 1, 2)
+
+    # 재시작하면 기존 디스크 항목을 색인해 다시 쓴다
+    restarted = TranscriptionCache(maxsize=1, directory=str(tmp_path))
+    assert restarted.stats()["disk"]["bytes"] == cache.stats()["disk"]["bytes"] > 0
+    assert restarted.get("bb22") == result("나") and restarted.disk_hits == 1
+    assert restarted.get("cc33") is None and restarted.misses == 1
+
+
+def test_disk_size_limit_evicts_least_recently_used(tmp_path):
+    entry = len(b'{"transcription": "x", "correction": "\xea\xb5\x90\xec\xa0\x95 x"}')
+    cache = TranscriptionCache(maxsize=1, directory=str(tmp_path), disk_max_bytes=2 * entry)
+    cache.put("aa", result("x"))
+    cache.put("bb", result("y"))
+    cache.get("aa")  # 디스크에서 읽어 최근 사용으로 갱신
+    cache.put("cc", result("z"))
+
+    assert not os.path.exists(tmp_path / "bb" / "bb.json")
+    assert cache.stats()["disk"]["entries"] == 2 and cache.stats()["disk"]["bytes"] <= 2 * entry
+    cache.put("dd", result("w"))
+    assert cache.get("bb") is None and cache.get("aa") is None and cache.get("cc") == result("z")
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    cache = TranscriptionCache(maxsize=1, directory=str(tmp_path))
+    cache.put("aa", result("가"))
+    cache.put("bb", result("나"))
+    (tmp_path / "aa" / "aa.json").write_text("{broken", encoding="utf-8")
+
+    assert cache.get("aa") is None
+    assert cache.stats()["disk"]["entries"] == 1 and cache.misses == 1
+
+
+def audio(seed=0):
+    pcm = np.random.default_rng(seed).integers(-1000, 1000, 16000, dtype=np.int16).tobytes()
+    return PreprocessedAudio(pcm, {"segments": 1}, [(0, 16000)])
+
+
+@pytest.fixture
+def preprocessed(stt_service, monkeypatch):
+    """전처리를 건너뛰고 업로드 내용(시드)에 따라 정해진 음성을 돌려주는 STT 서비스"""
+    monkeypatch.setattr(stt_service, "PREPROCESS_ENABLED", True)
+
+    async def preprocess_seed(data):
+        return audio(int(data))
+
+    monkeypatch.setattr(stt_service, "preprocess_async", preprocess_seed)
+    corrections = []
+    generate_correction = stt_service.generate_correction
+
+    def counting_correction(transcription):
+        corrections.append(transcription)
+        return generate_correction(transcription)
+
+    monkeypatch.setattr(stt_service, "generate_correction", counting_correction)
+    stt_service.corrections = corrections
+    return stt_service
+
+
+async def upload(service, seed=0, strict=False):
+    async def chunks():
+        yield str(seed).encode()
+
+    return await service.transcribe_and_correct(chunks(), filename="a.wav", strict=strict)
+
+
+def test_same_audio_skips_stt_and_gemini(preprocessed, install_stt):
+    fake = install_stt(FakeSTT())
+    first = asyncio.run(upload(preprocessed))
+    second = asyncio.run(upload(preprocessed))
+
+    assert first["cached"] is False and second["cached"] is True
+    assert {**first, "cached": True} == second
+    assert len(fake.calls) == 1 and len(preprocessed.corrections) == 1
+    # 캐시 적중도 오류 패턴 기록은 남긴다
+    assert len(preprocessed.stored_patterns) == 2
+    assert asyncio.run(upload(preprocessed, seed=1))["cached"] is False and len(fake.calls) == 2
+
+
+def test_concurrent_identical_requests_share_one_call(preprocessed, install_stt):
+    fake = install_stt(FakeSTT(delay=0.1))
+
+    async def many():
+        return await asyncio.gather(*(upload(preprocessed) for _ in range(5)))
+
+    results = asyncio.run(many())
+    assert len(fake.calls) == 1 and len(preprocessed.corrections) == 1
+    assert all(r["transcription"] == results[0]["transcription"] for r in results)
+    stats = preprocessed.cache_stats()
+    assert (stats["inflight_hits"], stats["misses"], stats["size"]) == (4, 1, 1)
+    assert len(preprocessed.stored_patterns) == 5
+
+
+def test_failure_reaches_waiters_and_is_not_cached(preprocessed, install_stt):
+    fake = install_stt(FakeSTT(delay=0.1, fail=True))
+
+    async def many():
+        return await asyncio.gather(*(upload(preprocessed, strict=True) for _ in range(3)),
+                                    return_exceptions=True)
+
+    errors = asyncio.run(many())
+    assert all(isinstance(e, preprocessed.STTError) for e in errors) and len(fake.calls) == 1
+    assert preprocessed.cache_stats()["size"] == 0 and preprocessed._inflight == {}
+
+    # 실패는 저장하지 않으므로 다음 요청은 STT를 다시 부른다
+    install_stt(FakeSTT())
+    assert asyncio.run(upload(preprocessed))["cached"] is False
+
+
+def test_empty_transcription_is_not_cached(preprocessed, install_stt):
+    fake = install_stt(FakeSTT(transcribe=lambda filename, data: ""))
+    assert asyncio.run(upload(preprocessed))["transcription"] == ""
+    assert asyncio.run(upload(preprocessed))["cached"] is False
+    assert len(fake.calls) == 2 and preprocessed.cache_stats()["size"] == 0
+
+
+def test_cache_route(stt_app, preprocessed, install_stt):
+    install_stt(FakeSTT())
+    asyncio.run(upload(preprocessed))
+    asyncio.run(upload(preprocessed))
+
+    async def get():
+        transport = httpx.ASGITransport(app=stt_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/stt/cache")
+
+    response = asyncio.run(get())
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["size"], data["memory_hits"], data["misses"], data["hit_rate"]) == (1, 1, 1, 0.5)
@@ -0,0 +1,116 @@
+"""multipart 업로드 스트리밍 파서와 임시 파일 없는 /api/stt 전달"""
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+import pytest
+
+from fake_stt import FakeSTT, multipart_body, stream_request
+from services.stt.upload import UploadError, UploadStream, is_multipart
+
+AUDIO = bytes(range(256)) * 300 + b"\r\n--not-a-boundary\r\n"
+
+
+async def read_stream(request, field="audio"):
+    stream = UploadStream(request, field=field)
+    await stream.start()
+    chunks = [chunk async for chunk in stream]
+    return stream, chunks
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 1 << 20])
+def test_upload_stream_yields_file_bytes(chunk_size):
+    body, content_type = multipart_body([("녹음.m4a", AUDIO, "audio/mp4"), ("second.wav", b"ignored")],
+                                        fields=[("lesson", "3")])
+    request = stream_request(body, content_type, chunk_size)
+
+    stream, chunks = asyncio.run(read_stream(request))
+    assert b"".join(chunks) == AUDIO
+    assert stream.filename == "녹음.m4a" and stream.content_type == "audio/mp4"
+    assert stream.size == len(AUDIO)
+
+
+def test_upload_stream_starts_before_body_is_read():
+    body, content_type = multipart_body([("a.wav", AUDIO)])
+    request = stream_request(body, content_type, chunk_size=1024)
+
+    async def first_chunk():
+        stream = UploadStream(request)
+        await stream.start()
+        return request.received
+
+    # 첫 데이터 청크를 받은 시점에는 본문 대부분을 아직 읽지 않았다
+    assert asyncio.run(first_chunk()) <= 2 < request.chunk_count
+
+
+@pytest.mark.parametrize("body, content_type, message", [
+    (b"audio", "audio/wav", "multipart/form-data"),
+    (multipart_body([("a.wav", b"x")], field="file")[0], None, "'audio' 파일 필드가 없습니다"),
+    (multipart_body([("a.wav", b"")])[0], None, "비어 있습니다"),
+    (b"garbage without boundaries", "multipart/form-data; boundary=abc", "해석할 수 없습니다")
+])
+def test_upload_stream_errors(body, content_type, message):
+    if content_type is None:
+        content_type = "multipart/form-data; boundary=" + body.split(b"\r\n")[0][2:].decode()
+    with pytest.raises(UploadError, match=message):
+        asyncio.run(read_stream(stream_request(body, content_type)))
+
+
+def test_is_multipart():
+    assert is_multipart(stream_request(b"", "multipart/form-data; boundary=abc"))
+    assert not is_multipart(stream_request(b"", "multipart/form-data"))
+    assert not is_multipart(stream_request(b"", "application/json"))
+
+
+def test_stt_route_forwards_upload_without_temp_files(stt_app, stt_service, install_stt, tmp_path, monkeypatch):
+    fake = install_stt(FakeSTT())
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    body, content_type = multipart_body([("녹음.wav", AUDIO)])
+
+    async def post():
+        transport = httpx.ASGITransport(app=stt_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/stt", content=body, headers={"content-type": content_type})
+
+    response = asyncio.run(post())
+    assert response.status_code == 200
+    assert response.json() == {"transcription": f"인식 {len(AUDIO)}", "correction": f"교정 인식 {len(AUDIO)}"}
+    assert fake.calls == [{"url": stt_service.STT_API_URLS[0], "filename": "녹음.wav", "data": AUDIO}]
+    assert stt_service.stored_patterns == [(f"인식 {len(AUDIO)}", f"교정 인식 {len(AUDIO)}")]
+    assert os.listdir(tmp_path) == []
+
+
+def test_stt_route_errors(stt_app, install_stt):
+    install_stt(FakeSTT(fail=True))
+
+    async def post(body, content_type):
+        transport = httpx.ASGITransport(app=stt_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/stt", content=body, headers={"content-type": content_type})
+
+    assert asyncio.run(post(b"audio", "audio/wav")).status_code == 400
+    # STT 서버 실패는 빈 인식 결과로 교정 단계를 진행 (기존 동작)
+    body, content_type = multipart_body([("a.wav", b"RIFF")])
+    response = asyncio.run(post(body, content_type))
+    assert response.status_code == 200 and response.json()["transcription"] == ""
+
+
+def test_concurrent_uploads_share_the_event_loop(stt_app, install_stt):
+    fake = install_stt(FakeSTT(delay=0.3))
+    body, content_type = multipart_body([("a.wav", AUDIO)])
+
+    async def post_many(count):
+        transport = httpx.ASGITransport(app=stt_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/stt", content=body, headers={"content-type": content_type}) for _ in range(count)
+            ))
+
+    started = time.monotonic()
+    responses = asyncio.run(post_many(8))
+    elapsed = time.monotonic() - started
+    assert all(response.status_code == 200 for response in responses)
+    # 8개 요청이 STT 응답을 동시에 기다리므로 직렬(2.4초)보다 훨씬 빨리 끝난다
+    assert fake.max_active == 8 and elapsed < 1.5